@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of creating an OpenAI chat model per agent, with a new SDK
+client per instance and with the shared client from the registry. It reports
+the construction cost, and the number of the TCP connections opened when
+each agent sends a request to a local stub server.
+
+Usage:
+    python benchmark/client_registry_benchmark.py
+"""
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agentscope.model import OpenAIChatModel, get_client_registry
+
+N_AGENTS = [10, 100, 1_000]
+N_REQUESTS = 50
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """The stub of the chat completions API, which records the connections."""
+
+    protocol_version = "HTTP/1.1"
+    addresses: set = set()
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Handle the chat completion request."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        CompletionHandler.addresses.add(self.client_address)
+        body = json.dumps(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "ok"},
+                    },
+                ],
+            },
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Disable the logging."""
+
+
+def create_model(base_url: str, shared: bool) -> OpenAIChatModel:
+    """Create the model of an agent."""
+    return OpenAIChatModel(
+        "gpt-4o",
+        api_key="test_key",
+        stream=False,
+        client_args={"base_url": base_url},
+        shared_client=shared,
+    )
+
+
+def bench_construction(n_agents: int, shared: bool) -> float:
+    """Create the models of the agents, and return the cost per agent."""
+    start = time.perf_counter()
+    for _ in range(n_agents):
+        create_model("http://127.0.0.1:1/v1", shared)
+    return (time.perf_counter() - start) / n_agents
+
+
+async def bench_connections(base_url: str, shared: bool) -> int:
+    """Send a request by a new model per request, and return the number of
+    the opened connections."""
+    CompletionHandler.addresses = set()
+    for _ in range(N_REQUESTS):
+        model = create_model(base_url, shared)
+        await model([{"role": "user", "content": "hi"}])
+        if not shared:
+            await model.client.close()
+    if shared:
+        await get_client_registry().close_all()
+    return len(CompletionHandler.addresses)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{'agents':>6} | {'per-instance (ms)':>17} | {'shared (ms)':>11}")
+    for n_agents in N_AGENTS:
+        cost = bench_construction(n_agents, False)
+        cost_shared = bench_construction(n_agents, True)
+        print(
+            f"{n_agents:>6} | {cost * 1e3:>17.3f} | "
+            f"{cost_shared * 1e3:>11.3f}",
+        )
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        n_connections = asyncio.run(bench_connections(base_url, False))
+        n_shared = asyncio.run(bench_connections(base_url, True))
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(
+        f"\nConnections for {N_REQUESTS} requests: {n_connections} "
+        f"per-instance, {n_shared} shared",
+    )
+
+
+if __name__ == "__main__":
+    main()
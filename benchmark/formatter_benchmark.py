@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the per-step formatting cost as the history grows, which
+simulates a ReAct agent that formats the whole memory in each reasoning
+step, with and without the formatting cache. With the cache, the number of
+the messages (or message groups) formatted in each step stays flat, which
+is asserted, and only the cache lookups grow with the history.
+
+Usage:
+    python benchmark/formatter_benchmark.py
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from agentscope.formatter import (
+    AnthropicChatFormatter,
+    DashScopeChatFormatter,
+    OpenAIChatFormatter,
+    TruncatedFormatterBase,
+)
+from agentscope.message import (
+    ImageBlock,
+    Msg,
+    TextBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+    URLSource,
+)
+
+N_STEPS = 400
+REPORT_EVERY = 100
+
+
+def make_step_msgs(step: int, image_path: str) -> list[Msg]:
+    """Create the messages appended in one reasoning-acting step."""
+    return [
+        Msg(
+            "user",
+            [
+                TextBlock(type="text", text=f"Question {step}: " + "x" * 500),
+                ImageBlock(
+                    type="image",
+                    source=URLSource(type="url", url=image_path),
+                ),
+            ],
+            "user",
+        ),
+        Msg(
+            "assistant",
+            [
+                ToolUseBlock(
+                    type="tool_use",
+                    id=str(step),
+                    name="search",
+                    input={"query": "y" * 200},
+                ),
+            ],
+            "assistant",
+        ),
+        Msg(
+            "system",
+            [
+                ToolResultBlock(
+                    type="tool_result",
+                    id=str(step),
+                    name="search",
+                    output="z" * 1000,
+                ),
+            ],
+            "system",
+        ),
+    ]
+
+
+async def bench(
+    formatter: TruncatedFormatterBase,
+    image_path: str,
+) -> tuple[list[float], list[int]]:
+    """Return the mean formatting cost (in milliseconds) of each
+    `REPORT_EVERY` steps, and the number of the cache misses in the last
+    step of them."""
+    msgs = [Msg("system", "You're a helpful assistant.", "system")]
+    costs, misses = [], []
+    total = 0.0
+    for step in range(1, N_STEPS + 1):
+        msgs.extend(make_step_msgs(step, image_path))
+        # pylint: disable-next=protected-access
+        n_cached = len(formatter._format_cache)
+        start = time.perf_counter()
+        await formatter.format(msgs)
+        total += time.perf_counter() - start
+        if step % REPORT_EVERY == 0:
+            costs.append(total / REPORT_EVERY * 1000)
+            # pylint: disable-next=protected-access
+            misses.append(len(formatter._format_cache) - n_cached)
+            total = 0.0
+    return costs, misses
+
+
+async def main() -> None:
+    """Run the benchmark and print the results."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_path = os.path.join(tmp_dir, "image.png")
+        with open(image_path, "wb") as f:
+            f.write(os.urandom(256 * 1024))
+
+        steps = list(range(REPORT_EVERY, N_STEPS + 1, REPORT_EVERY))
+        print(
+            f"{'formatter':>24} | {'cache':>5} | "
+            + " | ".join(f"{f'step {_} (ms)':>15}" for _ in steps),
+        )
+        for formatter_cls in [
+            OpenAIChatFormatter,
+            DashScopeChatFormatter,
+            AnthropicChatFormatter,
+        ]:
+            for cache_size in [0, 4096]:
+                costs, misses = await bench(
+                    formatter_cls(cache_size=cache_size),
+                    image_path,
+                )
+                print(
+                    f"{formatter_cls.__name__:>24} | "
+                    f"{'on' if cache_size else 'off':>5} | "
+                    + " | ".join(f"{_:>15.2f}" for _ in costs)
+                    + (f" | misses/step {misses}" if cache_size else ""),
+                )
+                if cache_size:
+                    # Only the messages of the new step are formatted
+                    assert len(set(misses)) == 1, misses
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the peak memory and time of formatting a multimodal history
+with base64 images, comparing copying the input messages before formatting
+(the former behavior) with the copy-on-write formatting.
+
+Usage:
+    python benchmark/formatter_memory_benchmark.py
+"""
+import asyncio
+import base64
+import os
+import time
+import tracemalloc
+from copy import deepcopy
+from typing import Callable
+
+from agentscope.formatter import (
+    AnthropicChatFormatter,
+    DashScopeChatFormatter,
+    GeminiChatFormatter,
+    OpenAIChatFormatter,
+    TruncatedFormatterBase,
+)
+from agentscope.message import (
+    Base64Source,
+    ImageBlock,
+    Msg,
+    TextBlock,
+)
+
+N_TURNS = 50
+IMAGE_BYTES = 512 * 1024
+
+
+def make_history() -> list[Msg]:
+    """Create a history where each user turn carries a base64 image."""
+    msgs = [Msg("system", "You're a helpful assistant.", "system")]
+    for turn in range(N_TURNS):
+        image = base64.b64encode(os.urandom(IMAGE_BYTES)).decode("utf-8")
+        msgs.append(
+            Msg(
+                "user",
+                [
+                    TextBlock(type="text", text=f"What's in image {turn}?"),
+                    ImageBlock(
+                        type="image",
+                        source=Base64Source(
+                            type="base64",
+                            media_type="image/png",
+                            data=image,
+                        ),
+                    ),
+                ],
+                "user",
+            ),
+        )
+        msgs.append(Msg("assistant", f"It's image {turn}.", "assistant"))
+    return msgs
+
+
+async def bench(
+    formatter: TruncatedFormatterBase,
+    msgs: list[Msg],
+    prepare: Callable[[list[Msg]], list[Msg]],
+) -> tuple[float, float]:
+    """Return the peak memory (in MB) and the time (in milliseconds) of
+    formatting the messages."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    await formatter.format(prepare(msgs))
+    cost = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, cost
+
+
+async def main() -> None:
+    """Run the benchmark and print the results."""
+    msgs = make_history()
+    print(
+        f"{'formatter':>24} | {'mode':>13} | {'peak (MB)':>10} | "
+        f"{'time (ms)':>10}",
+    )
+    for formatter_cls in [
+        OpenAIChatFormatter,
+        DashScopeChatFormatter,
+        AnthropicChatFormatter,
+        GeminiChatFormatter,
+    ]:
+        modes: list[tuple[str, Callable[[list[Msg]], list[Msg]]]] = [
+            ("deepcopy", deepcopy),
+            ("copy-on-write", list),
+        ]
+        for mode, prepare in modes:
+            peak, cost = await bench(
+                formatter_cls(cache_size=0),
+                msgs,
+                prepare,
+            )
+            print(
+                f"{formatter_cls.__name__:>24} | {mode:>13} | "
+                f"{peak:>10.2f} | {cost:>10.2f}",
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of parsing the streaming tool call arguments, which simulates a
+`write_text_file` call whose long content arrives in small chunks, by
+repairing the accumulated string on every chunk and by the incremental JSON
+parser.
+
+Usage:
+    python benchmark/json_stream_benchmark.py
+"""
+import json
+import time
+
+from agentscope._utils._common import _json_loads_with_repair
+from agentscope._utils._json_stream import _IncrementalJSONParser
+
+CHUNK_SIZE = 16
+CONTENT_SIZES = [1_000, 4_000, 16_000, 64_000]
+# Repairing on every chunk is quadratic, so it's skipped for the large sizes
+MAX_REPAIR_SIZE = 4_000
+
+
+def make_chunks(content_size: int) -> list[str]:
+    """Create the argument chunks of a `write_text_file` call."""
+    line = 'print("Hello, world!")  # 你好\n'
+    content = (line * (content_size // len(line) + 1))[:content_size]
+    arguments = json.dumps(
+        {"file_path": "/tmp/hello.py", "content": content},
+        ensure_ascii=False,
+    )
+    return [
+        arguments[i : i + CHUNK_SIZE]
+        for i in range(0, len(arguments), CHUNK_SIZE)
+    ]
+
+
+def bench_repair(chunks: list[str]) -> tuple[float, dict]:
+    """Repair and parse the accumulated string on every chunk."""
+    start = time.perf_counter()
+    accumulated = ""
+    for chunk in chunks:
+        accumulated += chunk
+        result = _json_loads_with_repair(accumulated or "{}")
+    return time.perf_counter() - start, result
+
+
+def bench_incremental(chunks: list[str]) -> tuple[float, dict]:
+    """Parse the new chunk and get the partial object on every chunk."""
+    start = time.perf_counter()
+    parser = _IncrementalJSONParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        parser.get()
+    result = parser.close()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(
+        f"{'content size':>12} | {'chunks':>6} | {'repair (s)':>10} | "
+        f"{'incremental (s)':>15} | {'per chunk (us)':>14}",
+    )
+    for content_size in CONTENT_SIZES:
+        chunks = make_chunks(content_size)
+        cost_incremental, result = bench_incremental(chunks)
+
+        cost_repair = "skipped"
+        if content_size <= MAX_REPAIR_SIZE:
+            cost, expected = bench_repair(chunks)
+            assert result == expected
+            cost_repair = f"{cost:.3f}"
+
+        print(
+            f"{content_size:>12} | {len(chunks):>6} | {cost_repair:>10} | "
+            f"{cost_incremental:>15.3f} | "
+            f"{cost_incremental / len(chunks) * 1e6:>14.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
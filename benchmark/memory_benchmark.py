@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Microbenchmark of adding and deleting messages in `InMemoryMemory` as the
+history grows, comparing the default mode with the indexed mode.
+
+Usage:
+    python benchmark/memory_benchmark.py
+"""
+import asyncio
+import time
+
+from agentscope.memory import InMemoryMemory
+from agentscope.message import Msg
+
+HISTORY_SIZES = [1000, 5000, 10000, 20000]
+ROUNDS = 200
+
+
+async def bench(indexed: bool, history_size: int) -> tuple[float, float]:
+    """Return the average time (in microseconds) of adding one message and
+    deleting one message by id with the given history size."""
+    memory = InMemoryMemory(indexed=indexed)
+    await memory.add(
+        [Msg("user", str(i), "user") for i in range(history_size)],
+    )
+    new_msgs = [Msg("assistant", str(i), "assistant") for i in range(ROUNDS)]
+
+    start = time.perf_counter()
+    for msg in new_msgs:
+        await memory.add(msg)
+    add_cost = (time.perf_counter() - start) / ROUNDS * 1e6
+
+    start = time.perf_counter()
+    for msg in new_msgs:
+        await memory.delete_by_id(msg.id)
+    delete_cost = (time.perf_counter() - start) / ROUNDS * 1e6
+
+    return add_cost, delete_cost
+
+
+async def main() -> None:
+    """Run the benchmark and print the results."""
+    print(
+        f"{'history':>8} | {'mode':>8} | {'add (us)':>10} | "
+        f"{'delete (us)':>11}",
+    )
+    for history_size in HISTORY_SIZES:
+        for indexed in [False, True]:
+            add_cost, delete_cost = await bench(indexed, history_size)
+            print(
+                f"{history_size:>8} | "
+                f"{'indexed' if indexed else 'default':>8} | "
+                f"{add_cost:>10.1f} | {delete_cost:>11.1f}",
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""The base class of the resolvers that load the local files and web
+resources with an LRU cache, e.g. the media data for the formatters and the
+image sizes for the token counters."""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+import httpx
+
+from .._logging import logger
+
+T = TypeVar("T")
+
+
+class _CachedLoader:
+    """The base class of the resolvers with an LRU cache and the async
+    loading.
+
+    The cache is bounded by the total size of the cached values measured by
+    `_sizeof`, and is guarded by a lock, since the sync methods may be
+    called from other threads. In the async methods, the concurrent loads of
+    the same key are merged and run with bounded concurrency. The web
+    resources are fetched through the shared HTTP client from the client
+    registry, whose connection pools are kept per event loop.
+    """
+
+    def __init__(
+        self,
+        cache_max_size: int,
+        max_concurrency: int = 8,
+        timeout: float = 30,
+        max_retries: int = 3,
+    ) -> None:
+        """Initialize the loader.
+
+        Args:
+            cache_max_size (`int`):
+                The maximum total size of the cached values measured by
+                `_sizeof`.
+            max_concurrency (`int`, defaults to `8`):
+                The maximum number of the concurrent loads in the async
+                methods.
+            timeout (`float`, defaults to `30`):
+                The timeout in seconds of fetching a web resource.
+            max_retries (`int`, defaults to `3`):
+                The maximum number of attempts to fetch a web resource.
+        """
+        self.cache_max_size = cache_max_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self._cache: OrderedDict[Hashable, Any] = OrderedDict()
+        self._cache_size = 0
+        self._cache_lock = threading.Lock()
+
+        # The async states are bound to the event loop that creates them
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def _sizeof(self, value: Any) -> int:  # pylint: disable=unused-argument
+        """The size of the value counted in the cache budget, which counts
+        the number of the values by default."""
+        return 1
+
+    def _cache_get(self, key: Hashable) -> Any:
+        """Get the cached value, or `None` on a cache miss, and mark it as
+        recently used."""
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, key: Hashable, value: Any) -> None:
+        """Put the value into the cache and evict the least recently used
+        values to stay within the budget."""
+        size = self._sizeof(value)
+        if size > self.cache_max_size:
+            return
+
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache_size -= self._sizeof(self._cache.pop(key))
+            self._cache[key] = value
+            self._cache_size += size
+            while self._cache_size > self.cache_max_size:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= self._sizeof(evicted)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get the shared async HTTP client with the timeout."""
+        from ..model._client_registry import get_client_registry
+
+        return get_client_registry().get_client(
+            "agentscope-loader",
+            lambda transport: httpx.AsyncClient(
+                transport=transport,
+                timeout=self.timeout,
+                follow_redirects=True,
+            ),
+            options={"timeout": self.timeout},
+        )
+
+    def _fetch_with_retries(self, fetch: Callable[[str], T], url: str) -> T:
+        """Call the blocking fetch function of the web URL with retries."""
+        for _ in range(self.max_retries):
+            try:
+                return fetch(url)
+            except httpx.HTTPError as e:
+                logger.info(
+                    "Failed to fetch bytes from URL %s. Error %s. Retrying...",
+                    url,
+                    str(e),
+                )
+
+        raise RuntimeError(
+            f"Failed to fetch bytes from URL `{url}` after "
+            f"{self.max_retries} retries.",
+        )
+
+    async def _afetch_with_retries(
+        self,
+        fetch: Callable[[str], Awaitable[T]],
+        url: str,
+    ) -> T:
+        """Await the async fetch function of the web URL with retries."""
+        for _ in range(self.max_retries):
+            try:
+                return await fetch(url)
+            except httpx.HTTPError as e:
+                logger.info(
+                    "Failed to fetch bytes from URL %s. Error %s. Retrying...",
+                    url,
+                    str(e),
+                )
+
+        raise RuntimeError(
+            f"Failed to fetch bytes from URL `{url}` after "
+            f"{self.max_retries} retries.",
+        )
+
+    def _bind_loop(self) -> None:
+        """Create the async states for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    async def _aload_once(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Load the value of the key within the concurrency limit and cache
+        it, where the concurrent loads of the same key are merged.
+
+        Args:
+            key (`Hashable`):
+                The cache key.
+            load (`Callable[[], Awaitable[Any]]`):
+                The function that loads the value on a cache miss.
+
+        Returns:
+            `Any`:
+                The loaded value.
+        """
+        self._bind_loop()
+        if key not in self._inflight:
+            task = asyncio.ensure_future(self._aload_into_cache(key, load))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(self._inflight[key])
+
+    async def _aload_into_cache(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Load the value within the concurrency limit and cache it."""
+        assert self._semaphore is not None
+        async with self._semaphore:
+            value = await load()
+        self._cache_put(key, value)
+        return value
+
+    async def aclose(self) -> None:
+        """Clear the cache and the async states. The shared HTTP client is
+        closed by `close_all` of the client registry."""
+        self._loop = None
+        self._semaphore = None
+        self._inflight = {}
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_size = 0
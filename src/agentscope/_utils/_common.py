@@ -2,6 +2,7 @@
 """The common utilities for agentscope library."""
 import asyncio
 import base64
+import contextvars
 import functools
 import inspect
 import json
@@ -10,8 +11,18 @@ import tempfile
 import types
 import typing
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Union, Any, Callable, Type, Dict
+from typing import (
+    Union,
+    Any,
+    AsyncGenerator,
+    Callable,
+    Type,
+    Dict,
+    Hashable,
+    Iterator,
+)
 
 import requests
 from json_repair import repair_json
@@ -104,6 +115,85 @@ async def _execute_async_or_sync_func(
     return func(*args, **kwargs)
 
 
+_IO_EXECUTOR: ThreadPoolExecutor | None = None
+
+
+def _get_io_executor() -> ThreadPoolExecutor:
+    """Get the dedicated thread pool executor for the blocking SDK calls, so
+    that the number of the concurrent blocking calls is bounded and the
+    default executor is not occupied."""
+    global _IO_EXECUTOR
+    if _IO_EXECUTOR is None:
+        _IO_EXECUTOR = ThreadPoolExecutor(
+            max_workers=32,
+            thread_name_prefix="agentscope-io",
+        )
+    return _IO_EXECUTOR
+
+
+async def _run_in_io_executor(
+    func: Callable[..., Any],
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """Run a blocking function in the I/O executor with the current context
+    variables, without blocking the event loop. If the awaiting task is
+    cancelled, the function is cancelled if it hasn't started, otherwise its
+    result is discarded.
+
+    Args:
+        func (`Callable`):
+            The blocking function, e.g. a synchronous SDK call.
+        *args (`Any`):
+            Positional arguments to be passed to the function.
+        **kwargs (`Any`):
+            Keyword arguments to be passed to the function.
+
+    Returns:
+        `Any`:
+            The result of the function.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.wrap_future(
+        _get_io_executor().submit(
+            context.run,
+            functools.partial(func, *args, **kwargs),
+        ),
+    )
+
+
+async def _iterate_in_io_executor(
+    iterator: Iterator,
+) -> AsyncGenerator[Any, None]:
+    """Iterate a blocking iterator (e.g. a synchronous streaming response)
+    asynchronously, where each item is fetched in the I/O executor. The
+    iterator is closed when the async generator is closed or cancelled.
+
+    Args:
+        iterator (`Iterator`):
+            The blocking iterator.
+    """
+    executor = _get_io_executor()
+    sentinel = object()
+    future: Future | None = None
+    try:
+        while True:
+            future = executor.submit(next, iterator, sentinel)
+            item = await asyncio.wrap_future(future)
+            future = None
+            if item is sentinel:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if callable(close):
+            if future is not None and not future.done():
+                # The generator can't be closed while it's running
+                future.add_done_callback(lambda _: executor.submit(close))
+            else:
+                executor.submit(close)
+
+
 def _get_bytes_from_web_url(
     url: str,
     max_retries: int = 3,
@@ -283,3 +373,13 @@ def _map_text_to_uuid(text: str) -> str:
             A deterministic UUID string derived from the input text.
     """
     return str(uuid.uuid3(uuid.NAMESPACE_DNS, text))
+
+
+def _freeze(obj: Any) -> Hashable:
+    """Convert the JSON-like object into a hashable one recursively, which
+    can be used as a cache key of the content."""
+    if isinstance(obj, dict):
+        return tuple((key, _freeze(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(_) for _ in obj)
+    return obj
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""The incremental JSON parser for the streaming outputs of the LLMs, e.g.
+the arguments of the tool calls."""
+import json
+import re
+from typing import Any
+
+from ._common import _json_loads_with_repair
+from .._logging import logger
+
+# The characters that can be consumed in one run within a string
+_STRING_RUN = re.compile(r'[^"\\]+')
+_WHITESPACE = " \t\n\r"
+_TOKEN_END = _WHITESPACE + ",}]"
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+# The parsing states
+_VALUE = 0
+_KEY_OR_END = 1
+_KEY = 2
+_COLON = 3
+_COMMA_OR_END = 4
+_STRING = 5
+_TOKEN = 6
+_DONE = 7
+_ERROR = 8
+
+
+def _copy_containers(obj: Any, copies: dict[int, Any]) -> Any:
+    """Copy the dicts and lists in the object, and record the copies by the
+    ids of the originals. The strings and numbers are shared."""
+    if isinstance(obj, dict):
+        copied: Any = {}
+        copies[id(obj)] = copied
+        for key, value in obj.items():
+            copied[key] = _copy_containers(value, copies)
+        return copied
+    if isinstance(obj, list):
+        copied = []
+        copies[id(obj)] = copied
+        for value in obj:
+            copied.append(_copy_containers(value, copies))
+        return copied
+    return obj
+
+
+class _IncrementalJSONParser:
+    """The incremental JSON parser, which consumes the streaming JSON text
+    chunk by chunk and maintains the partially parsed object.
+
+    Each character is scanned only once, and the runs of the plain string
+    characters are consumed in one step, so parsing a stream is linear in
+    its length, while parsing the accumulated text on every chunk is
+    quadratic. The partial object can be obtained at any time by `get`,
+    where the unfinished string is included and the unfinished number or
+    literal is included when it's already valid.
+
+    If the text is not valid JSON, e.g. the LLM outputs a Python dict, the
+    parsing stops at the invalid character, and the accumulated text is
+    repaired once in `close`.
+
+    Example:
+        .. code-block:: python
+
+            parser = _IncrementalJSONParser()
+            parser.feed('{"path": "a.txt", "content": "Hel')
+            parser.get()  # {"path": "a.txt", "content": "Hel"}
+            parser.feed('lo"}')
+            parser.close()  # {"path": "a.txt", "content": "Hello"}
+    """
+
+    def __init__(self) -> None:
+        """Initialize the incremental JSON parser."""
+        self._chunks: list[str] = []
+        self._state = _VALUE
+        self._root: Any = None
+        self._has_root = False
+        # The open containers, and the current key of each dict
+        self._stack: list[Any] = []
+        self._keys: list[str | None] = []
+
+        # The unfinished string or token
+        self._is_key = False
+        self._parts: list[str] = []
+        self._escape = ""
+        self._has_surrogate = False
+        self._token = ""
+
+        self._closed = False
+        self._result: Any = None
+
+    @property
+    def text(self) -> str:
+        """The accumulated text."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> None:
+        """Consume a new chunk of the JSON text.
+
+        The chunks fed after `close` are ignored, e.g. the late chunks that
+        some providers send after the finish reason.
+
+        Args:
+            chunk (`str`):
+                The new chunk of the text.
+        """
+        if self._closed:
+            if chunk:
+                logger.debug(
+                    "Ignore the chunk fed to the closed JSON parser: %s",
+                    chunk,
+                )
+            return
+        if not chunk:
+            return
+
+        self._chunks.append(chunk)
+        i, n = 0, len(chunk)
+        while i < n and self._state != _ERROR:
+            i = self._step(chunk, i)
+
+    def _step(self, chunk: str, i: int) -> int:
+        """Consume the characters starting from the index `i` under the
+        current state, and return the index of the next character."""
+        if self._state == _STRING:
+            return self._step_string(chunk, i)
+        if self._state == _TOKEN:
+            return self._step_token(chunk, i)
+
+        char = chunk[i]
+        if char not in _WHITESPACE:
+            self._step_structure(char)
+        return i + 1
+
+    def _step_string(self, chunk: str, i: int) -> int:
+        """Consume the characters within a string."""
+        if self._escape:
+            return self._consume_escape(chunk, i)
+        match = _STRING_RUN.match(chunk, i)
+        if match:
+            self._parts.append(match.group())
+            return match.end()
+        if chunk[i] == "\\":
+            self._escape = "\\"
+            return i + 1
+        # The closing quote
+        self._end_string()
+        return i + 1
+
+    def _step_token(self, chunk: str, i: int) -> int:
+        """Consume a character of a number or literal."""
+        char = chunk[i]
+        if char in _TOKEN_END:
+            self._end_token()
+            # The terminator is consumed by the following state
+            return i
+        self._token += char
+        return i + 1
+
+    def _step_structure(self, char: str) -> None:
+        """Consume a non-whitespace character outside the strings and
+        tokens."""
+        state = self._state
+        if state == _VALUE:
+            self._start_value(char)
+        elif state in (_KEY_OR_END, _KEY):
+            if char == '"':
+                self._is_key = True
+                self._state = _STRING
+            elif char == "}" and state == _KEY_OR_END:
+                self._end_container()
+            else:
+                self._state = _ERROR
+        elif state == _COLON:
+            self._state = _VALUE if char == ":" else _ERROR
+        elif state == _COMMA_OR_END:
+            container = self._stack[-1]
+            if char == ",":
+                self._state = _KEY if isinstance(container, dict) else _VALUE
+            elif char == ("}" if isinstance(container, dict) else "]"):
+                self._end_container()
+            else:
+                self._state = _ERROR
+        else:
+            # Any non-whitespace after the root value
+            self._state = _ERROR
+
+    def _start_value(self, char: str) -> None:
+        """Start a value with its first character."""
+        if char == "{":
+            self._place({}, True)
+            self._state = _KEY_OR_END
+        elif char == "[":
+            self._place([], True)
+            self._state = _VALUE
+        elif char == '"':
+            self._is_key = False
+            self._state = _STRING
+        elif char == "]" and self._stack and isinstance(self._stack[-1], list):
+            if self._stack[-1]:
+                # A trailing comma
+                self._state = _ERROR
+            else:
+                self._end_container()
+        elif char in "-0123456789tfn":
+            self._token = char
+            self._state = _TOKEN
+        else:
+            self._state = _ERROR
+
+    def _place(self, value: Any, is_container: bool = False) -> None:
+        """Place a value into the current container or as the root."""
+        if self._stack:
+            container = self._stack[-1]
+            if isinstance(container, dict):
+                container[self._keys[-1]] = value
+            else:
+                container.append(value)
+        else:
+            self._root = value
+            self._has_root = True
+
+        if is_container:
+            self._stack.append(value)
+            self._keys.append(None)
+        else:
+            self._after_value()
+
+    def _after_value(self) -> None:
+        """Update the state after a value is finished."""
+        self._state = _COMMA_OR_END if self._stack else _DONE
+
+    def _end_container(self) -> None:
+        """Close the current container."""
+        self._stack.pop()
+        self._keys.pop()
+        self._after_value()
+
+    def _consume_escape(self, chunk: str, i: int) -> int:
+        """Consume the characters of an escape sequence."""
+        self._escape += chunk[i]
+        escape = self._escape
+        if escape[1] != "u":
+            if escape[1] not in _ESCAPES:
+                self._state = _ERROR
+                return i + 1
+            self._parts.append(_ESCAPES[escape[1]])
+            self._escape = ""
+        elif len(escape) == 6:
+            try:
+                code = int(escape[2:], 16)
+            except ValueError:
+                self._state = _ERROR
+                return i + 1
+            if 0xD800 <= code <= 0xDFFF:
+                self._has_surrogate = True
+            self._parts.append(chr(code))
+            self._escape = ""
+        return i + 1
+
+    def _get_string(self) -> str:
+        """Get the unfinished string, where the surrogate pairs are
+        combined."""
+        string = "".join(self._parts)
+        self._parts = [string]
+        if self._has_surrogate:
+            string = string.encode("utf-16", "surrogatepass").decode(
+                "utf-16",
+                "replace",
+            )
+        return string
+
+    def _end_string(self) -> None:
+        """Finish the current string as a key or a value."""
+        string = self._get_string()
+        self._parts = []
+        self._has_surrogate = False
+        if self._is_key:
+            self._keys[-1] = string
+            self._state = _COLON
+        else:
+            self._place(string)
+
+    def _end_token(self) -> None:
+        """Finish the current number or literal."""
+        try:
+            value = json.loads(self._token)
+        except json.JSONDecodeError:
+            self._state = _ERROR
+            return
+        self._token = ""
+        self._place(value)
+
+    def _get_partial_scalar(self) -> tuple[bool, Any]:
+        """Get the unfinished scalar value, if any."""
+        if self._state == _STRING and not self._is_key:
+            return True, self._get_string()
+        if self._state == _TOKEN:
+            try:
+                return True, json.loads(self._token)
+            except json.JSONDecodeError:
+                pass
+        return False, None
+
+    def get(self) -> Any:
+        """Get the partially parsed object, which is a copy and safe to be
+        modified. After `close` is called, the final object is returned.
+
+        Returns:
+            `Any`:
+                The partially parsed object, or `None` if no value has been
+                started.
+        """
+        if self._closed:
+            return _copy_containers(self._result, {})
+
+        has_scalar, scalar = self._get_partial_scalar()
+        if not self._stack:
+            if self._has_root:
+                return _copy_containers(self._root, {})
+            return scalar if has_scalar else None
+
+        copies: dict[int, Any] = {}
+        root = _copy_containers(self._root, copies)
+        if has_scalar:
+            container = copies[id(self._stack[-1])]
+            if isinstance(container, dict):
+                container[self._keys[-1]] = scalar
+            else:
+                container.append(scalar)
+        return root
+
+    def close(self) -> Any:
+        """Finish the parsing. If the text is invalid or incomplete JSON,
+        it is repaired and parsed once.
+
+        Returns:
+            `Any`:
+                The final parsed object, or `None` if the text is empty.
+        """
+        if not self._closed:
+            if self._state == _TOKEN and not self._stack:
+                # A root number or literal is finished by the end of text
+                self._end_token()
+
+            if self._state == _DONE:
+                self._result = self._root
+            elif self.text.strip():
+                self._result = _json_loads_with_repair(self.text)
+            self._closed = True
+
+        return self.get()
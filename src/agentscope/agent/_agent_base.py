@@ -193,7 +193,12 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
             f"{self.__class__.__name__} class.",
         )
 
-    async def print(self, msg: Msg, last: bool = True) -> None:
+    async def print(
+        self,
+        msg: Msg,
+        last: bool = True,
+        delta: bool = False,
+    ) -> None:
         """The function to display the message.
 
         Args:
@@ -202,6 +207,13 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
             last (`bool`, defaults to `True`):
                 Whether this is the last one in streaming messages. For
                 non-streaming message, this should always be `True`.
+            delta (`bool`, defaults to `False`):
+                Whether the message only carries the new content since the
+                last printing of the message with the same id, e.g. the
+                chunks from a model in delta streaming mode. The text,
+                thinking and audio deltas are printed in O(delta), and the
+                message with the full content can still be printed with
+                `last=True` at the end.
         """
         if not self._disable_msg_queue:
             await self.msg_queue.put((msg, last))
@@ -215,7 +227,16 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
 
         for block in msg.get_content_blocks():
             if block["type"] == "audio":
-                self._process_audio_block(msg.id, block)
+                self._process_audio_block(msg.id, block, delta)
+
+            elif delta and block["type"] in ["text", "thinking"]:
+                self._print_text_delta(
+                    msg.id,
+                    name_prefix=msg.name
+                    if block["type"] == "text"
+                    else f"{msg.name}(thinking)",
+                    text_delta=block[block["type"]],
+                )
 
             elif block["type"] == "text":
                 self._print_text_block(
@@ -239,19 +260,18 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
         # Clean up resources if this is the last message in streaming
         if last and msg.id in self._stream_prefix:
             if "audio" in self._stream_prefix[msg.id]:
-                player, _ = self._stream_prefix[msg.id]["audio"]
+                player = self._stream_prefix[msg.id]["audio"][0]
                 # Close the miniaudio player
                 player.close()
             stream_prefix = self._stream_prefix.pop(msg.id)
-            if "text" in stream_prefix and not stream_prefix["text"].endswith(
-                "\n",
-            ):
+            if stream_prefix.get("text_end", "\n") != "\n":
                 print()
 
     def _process_audio_block(
         self,
         msg_id: str,
         audio_block: AudioBlock,
+        delta: bool = False,
     ) -> None:
         """Process audio block content.
 
@@ -260,6 +280,9 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
                 The unique identifier of the message
             audio_block (`AudioBlock`):
                 The audio content block
+            delta (`bool`, defaults to `False`):
+                Whether the audio block only carries the new data since the
+                last printing.
         """
         if "source" not in audio_block:
             raise ValueError(
@@ -280,9 +303,10 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
 
             import sounddevice as sd
 
-            # The player and the prefix data is cached for streaming audio
+            # The player, the data that is not played yet, and the length of
+            # the played data are cached for streaming audio
             if audio_prefix:
-                player, audio_prefix_data = audio_prefix
+                player, pending_data, n_played = audio_prefix
             else:
                 player = sd.OutputStream(
                     samplerate=24000,
@@ -292,12 +316,18 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
                     latency="low",
                 )
                 player.start()
-                audio_prefix_data = ""
+                pending_data, n_played = "", 0
 
-            # play the audio data
-            new_audio_data = data[len(audio_prefix_data) :]
-            if new_audio_data:
-                audio_bytes = base64.b64decode(new_audio_data)
+            if delta:
+                pending_data += data
+            else:
+                pending_data = data[n_played:]
+
+            # play the audio data, where only the complete base64 groups
+            # can be decoded
+            n_complete = len(pending_data) // 4 * 4
+            if n_complete:
+                audio_bytes = base64.b64decode(pending_data[:n_complete])
                 audio_np = np.frombuffer(audio_bytes, dtype=np.int16)
                 audio_float = audio_np.astype(np.float32) / 32768.0
 
@@ -307,7 +337,8 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
             # save the player and the prefix data
             self._stream_prefix[msg_id]["audio"] = (
                 player,
-                data,
+                pending_data[n_complete:],
+                n_played + n_complete,
             )
 
         else:
@@ -343,18 +374,57 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
         # The accumulated text and thinking blocks to print
         to_print = "\n".join(thinking_and_text_to_print)
 
-        # The text prefix that has been printed
+        # The length of the text that has been printed
         if msg_id not in self._stream_prefix:
             self._stream_prefix[msg_id] = {}
 
-        text_prefix = self._stream_prefix[msg_id].get("text", "")
+        n_printed = self._stream_prefix[msg_id].get("text_len", 0)
 
         # Only print when there is new text content
-        if len(to_print) > len(text_prefix):
-            print(to_print[len(text_prefix) :], end="")
+        if len(to_print) > n_printed:
+            print(to_print[n_printed:], end="")
+
+            # Save the length and the last character of the printed text
+            self._stream_prefix[msg_id]["text_len"] = len(to_print)
+            self._stream_prefix[msg_id]["text_end"] = to_print[-1]
 
-            # Save the printed text prefix
-            self._stream_prefix[msg_id]["text"] = to_print
+    def _print_text_delta(
+        self,
+        msg_id: str,
+        name_prefix: str,
+        text_delta: str,
+    ) -> None:
+        """Print the delta of a text block or thinking block, which is
+        printed in the same layout as `_print_text_block`.
+
+        Args:
+            msg_id (`str`):
+                The unique identifier of the message
+            name_prefix (`str`):
+                The prefix for the message, e.g. "{name}: " for text block and
+                "{name}(thinking): " for thinking block.
+            text_delta (`str`):
+                The new textual content to be printed.
+        """
+        if msg_id not in self._stream_prefix:
+            self._stream_prefix[msg_id] = {}
+        stream_prefix = self._stream_prefix[msg_id]
+
+        to_print = text_delta
+        if stream_prefix.get("text_block") != name_prefix:
+            # Start a new block, which is separated by a newline
+            to_print = f"{name_prefix}: {text_delta}"
+            if stream_prefix.get("text_len", 0):
+                to_print = "\n" + to_print
+            stream_prefix["text_block"] = name_prefix
+
+        if to_print:
+            print(to_print, end="")
+            stream_prefix["text_len"] = stream_prefix.get(
+                "text_len",
+                0,
+            ) + len(to_print)
+            stream_prefix["text_end"] = to_print[-1]
 
     def _print_last_block(
         self,
@@ -370,11 +440,11 @@ class AgentBase(StateModule, metaclass=_AgentMeta):
             msg (`Msg`):
                 The message object
         """
-        text_prefix = self._stream_prefix.get(msg.id, {}).get("text", "")
+        text_end = self._stream_prefix.get(msg.id, {}).get("text_end", "")
 
-        if text_prefix:
+        if text_end:
             # Add a newline to separate from previous text content
-            print_newline = "" if text_prefix.endswith("\n") else "\n"
+            print_newline = "" if text_end == "\n" else "\n"
             print(
                 f"{print_newline}"
                 f"{json.dumps(block, indent=4, ensure_ascii=False)}",
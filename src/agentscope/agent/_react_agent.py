@@ -3,6 +3,7 @@
 # mypy: disable-error-code="list-item"
 """ReAct agent class in agentscope."""
 import asyncio
+from copy import copy
 from typing import Type, Any, AsyncGenerator, Literal
 
 import shortuuid
@@ -13,7 +14,7 @@ from .._logging import logger
 from ..formatter import FormatterBase
 from ..memory import MemoryBase, LongTermMemoryBase, InMemoryMemory
 from ..message import Msg, ToolUseBlock, ToolResultBlock, TextBlock
-from ..model import ChatModelBase
+from ..model import ChatModelBase, ChatResponse, ChatResponseSnapshot
 from ..rag import KnowledgeBase, Document
 from ..plan import PlanNotebook
 from ..tool import Toolkit, ToolResponse
@@ -348,6 +349,25 @@ class ReActAgent(ReActAgentBase):
         await self.memory.add(reply_msg)
         return reply_msg
 
+    async def _print_streaming_chunk(
+        self,
+        msg: Msg,
+        chunk: ChatResponse,
+    ) -> ChatResponseSnapshot | None:
+        """Print a streaming chunk of the model response. In delta streaming
+        mode, only the delta is printed and the running snapshot is returned,
+        otherwise the content of the message is replaced by the chunk."""
+        if chunk.snapshot is None:
+            msg.content = chunk.content
+            await self.print(msg, False)
+            return None
+
+        if chunk.content:
+            delta_msg = copy(msg)
+            delta_msg.content = list(chunk.content)
+            await self.print(delta_msg, False, True)
+        return chunk.snapshot
+
     async def _reasoning(
         self,
     ) -> Msg:
@@ -379,12 +399,20 @@ class ReActAgent(ReActAgentBase):
         # handle output from the model
         interrupted_by_user = False
         msg = None
+        # The running snapshot of the response in delta streaming mode
+        snapshot = None
         try:
             if self.model.stream:
                 msg = Msg(self.name, [], "assistant")
                 async for content_chunk in res:
-                    msg.content = content_chunk.content
-                    await self.print(msg, False)
+                    snapshot = await self._print_streaming_chunk(
+                        msg,
+                        content_chunk,
+                    )
+
+                # Materialize the full content at the end in delta mode
+                if snapshot is not None:
+                    msg.content = snapshot.materialize()
                 await self.print(msg, True)
 
             else:
@@ -398,6 +426,10 @@ class ReActAgent(ReActAgentBase):
             raise e from None
 
         finally:
+            if msg and snapshot is not None:
+                # Keep the content generated before the interruption
+                msg.content = snapshot.materialize()
+
             if msg and not msg.has_content_blocks("tool_use"):
                 # Turn plain text response into a tool call of the finish
                 # function
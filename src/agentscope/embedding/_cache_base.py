@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 """The embedding cache base class."""
+import asyncio
+import hashlib
 from abc import abstractmethod
-from typing import List, Any
+from typing import Any, Awaitable, Callable, List
 
+from ._embedding_response import EmbeddingResponse
+from ._embedding_usage import EmbeddingUsage
 from ..types import (
     JSONSerializableObject,
     Embedding,
@@ -61,3 +65,89 @@ class EmbeddingCacheBase:
     @abstractmethod
     async def clear(self) -> None:
         """Clear all cached embeddings."""
+
+
+async def _embed_with_cache(
+    embedding_cache: EmbeddingCacheBase | None,
+    texts: List[str],
+    identifier: dict,
+    embed: Callable[[List[str]], Awaitable[EmbeddingResponse]],
+) -> EmbeddingResponse:
+    """Embed the texts with the per-text cache, where each text is cached
+    by the given identifier (e.g. the model name, the dimensions and the API
+    options) and the hash of the text. All the texts are looked up first, and
+    only the missed unique texts are embedded in one call, whose results are
+    merged back in the order of the texts.
+
+    Args:
+        embedding_cache (`EmbeddingCacheBase | None`):
+            The embedding cache. If `None`, all the texts are embedded.
+        texts (`List[str]`):
+            The texts to embed.
+        identifier (`dict`):
+            The JSON serializable identifier of the embedding settings, which
+            is shared by all the texts.
+        embed (`Callable[[List[str]], Awaitable[EmbeddingResponse]]`):
+            The function that embeds the given texts by the API.
+
+    Returns:
+        `EmbeddingResponse`:
+            The embedding response, whose usage reports the numbers of the
+            cache hits and misses.
+    """
+    if embedding_cache is None:
+        return await embed(texts)
+
+    identifiers = [
+        {
+            **identifier,
+            "text": hashlib.sha256(_.encode("utf-8")).hexdigest(),
+        }
+        for _ in texts
+    ]
+    cached = await asyncio.gather(
+        *[embedding_cache.retrieve(identifier=_) for _ in identifiers],
+    )
+
+    # The duplicated texts are only embedded once
+    missed_indices: dict[str, list[int]] = {}
+    for index, embeddings in enumerate(cached):
+        if not embeddings:
+            missed_indices.setdefault(texts[index], []).append(index)
+
+    embeddings = [_[0] if _ else None for _ in cached]
+    n_misses = sum(len(_) for _ in missed_indices.values())
+    usage = EmbeddingUsage(
+        time=0,
+        tokens=0,
+        cache_hits=len(texts) - n_misses,
+        cache_misses=n_misses,
+    )
+    if not missed_indices:
+        return EmbeddingResponse(
+            embeddings=embeddings,
+            usage=usage,
+            source="cache",
+        )
+
+    missed_texts = list(missed_indices)
+    res = await embed(missed_texts)
+    if len(res.embeddings) != len(missed_texts):
+        raise RuntimeError(
+            f"Expected {len(missed_texts)} embeddings from the API, got "
+            f"{len(res.embeddings)} instead.",
+        )
+
+    for text, embedding in zip(missed_texts, res.embeddings):
+        indices = missed_indices[text]
+        await embedding_cache.store(
+            embeddings=[embedding],
+            identifier=identifiers[indices[0]],
+        )
+        for index in indices:
+            embeddings[index] = embedding
+
+    if res.usage is not None:
+        usage.time = res.usage.time
+        usage.tokens = res.usage.tokens
+    return EmbeddingResponse(embeddings=embeddings, usage=usage)
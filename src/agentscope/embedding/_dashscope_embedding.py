@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 """The dashscope embedding module in agentscope."""
 from datetime import datetime
-from typing import Any, List, Literal
+from typing import Any, List
 
-from ._cache_base import EmbeddingCacheBase
+from ._cache_base import EmbeddingCacheBase, _embed_with_cache
 from ._embedding_response import EmbeddingResponse
 from ._embedding_usage import EmbeddingUsage
 from ._embedding_base import EmbeddingModelBase
 from .._logging import logger
+from .._utils._common import _run_in_io_executor
 from ..message import TextBlock
 
 
@@ -49,7 +50,7 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
                 for more details.
             embedding_cache (`EmbeddingCacheBase`):
                 The embedding cache class instance, used to cache the
-                embedding results to avoid repeated API calls.
+                embedding results per text to avoid repeated API calls.
         """
         super().__init__(model_name, dimensions)
 
@@ -59,25 +60,13 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
 
     async def _call_api(self, kwargs: dict[str, Any]) -> EmbeddingResponse:
         """Call the DashScope embedding API by the given keyword arguments."""
-
-        if self.embedding_cache:
-            cached_embeddings = await self.embedding_cache.retrieve(
-                identifier=kwargs,
-            )
-            if cached_embeddings:
-                return EmbeddingResponse(
-                    embeddings=cached_embeddings,
-                    usage=EmbeddingUsage(
-                        tokens=0,
-                        time=0,
-                    ),
-                    source="cache",
-                )
-
         import dashscope
 
         start_time = datetime.now()
-        response = dashscope.embeddings.TextEmbedding.call(
+        # The SDK only provides the synchronous text embedding API, which is
+        # called in a bounded executor to avoid blocking the event loop
+        response = await _run_in_io_executor(
+            dashscope.embeddings.TextEmbedding.call,
             api_key=self.api_key,
             **kwargs,
         )
@@ -88,14 +77,6 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
                 f"Failed to get embedding from DashScope API: {response}",
             )
 
-        if self.embedding_cache:
-            await self.embedding_cache.store(
-                identifier=kwargs,
-                embeddings=[
-                    _["embedding"] for _ in response.output["embeddings"]
-                ],
-            )
-
         return EmbeddingResponse(
             embeddings=[_["embedding"] for _ in response.output["embeddings"]],
             usage=EmbeddingUsage(
@@ -126,13 +107,31 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
                     "Input text must be a list of strings or TextBlock dicts.",
                 )
 
-        if len(gather_text) > self.batch_size_limit:
+        # Only the texts missed in the cache are sent to the API
+        return await _embed_with_cache(
+            self.embedding_cache,
+            gather_text,
+            {
+                "model": self.model_name,
+                "dimensions": self.dimensions,
+                **kwargs,
+            },
+            lambda texts: self._embed_texts(texts, kwargs),
+        )
+
+    async def _embed_texts(
+        self,
+        texts: List[str],
+        kwargs: dict[str, Any],
+    ) -> EmbeddingResponse:
+        """Embed the texts by the API calls within the batch size limit."""
+        if len(texts) > self.batch_size_limit:
             logger.info(
                 "The input texts (%d) will be embedded with %d API calls due "
                 f"to the batch size limit of {self.batch_size_limit} for "
                 f"DashScope embedding API.",
-                len(gather_text),
-                (len(gather_text) + self.batch_size_limit - 1)
+                len(texts),
+                (len(texts) + self.batch_size_limit - 1)
                 // self.batch_size_limit,
             )
 
@@ -140,11 +139,9 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
         collected_embeddings = []
         collected_time = 0.0
         collected_tokens = 0
-        collected_source: Literal["cache", "api"] = "cache"
-        for _ in range(0, len(gather_text), self.batch_size_limit):
-            batch_texts = gather_text[_ : _ + self.batch_size_limit]
+        for _ in range(0, len(texts), self.batch_size_limit):
             batch_kwargs = {
-                "input": batch_texts,
+                "input": texts[_ : _ + self.batch_size_limit],
                 "model": self.model_name,
                 "dimensions": self.dimensions,
                 **kwargs,
@@ -156,8 +153,6 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
             collected_time += res.usage.time
             if res.usage.tokens:
                 collected_tokens += res.usage.tokens
-            if res.source == "api":
-                collected_source = "api"
 
         return EmbeddingResponse(
             embeddings=collected_embeddings,
@@ -165,5 +160,4 @@ class DashScopeTextEmbedding(EmbeddingModelBase):
                 tokens=collected_tokens,
                 time=collected_time,
             ),
-            source=collected_source,
         )
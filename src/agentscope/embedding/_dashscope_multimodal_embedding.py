@@ -7,6 +7,7 @@ from ._cache_base import EmbeddingCacheBase
 from ._embedding_response import EmbeddingResponse
 from ._embedding_usage import EmbeddingUsage
 from ._embedding_base import EmbeddingModelBase
+from .._utils._common import _run_in_io_executor
 from ..message import (
     VideoBlock,
     ImageBlock,
@@ -217,7 +218,13 @@ class DashScopeMultiModalEmbedding(EmbeddingModelBase):
         import dashscope
 
         start_time = datetime.now()
-        res = dashscope.MultiModalEmbedding.call(**kwargs)
+        if getattr(dashscope, "AioMultiModalEmbedding", None) is not None:
+            res = await dashscope.AioMultiModalEmbedding.call(**kwargs)
+        else:
+            res = await _run_in_io_executor(
+                dashscope.MultiModalEmbedding.call,
+                **kwargs,
+            )
         time = (datetime.now() - start_time).total_seconds()
 
         if res.status_code != 200:
@@ -18,3 +18,10 @@ class EmbeddingUsage(DictMixin):
 
     type: Literal["embedding"] = field(default_factory=lambda: "embedding")
     """The type of the usage, must be `embedding`."""
+
+    cache_hits: int = field(default_factory=lambda: 0)
+    """The number of the input texts read from the embedding cache."""
+
+    cache_misses: int = field(default_factory=lambda: 0)
+    """The number of the input texts missed in the embedding cache, which are
+    only counted when the embedding cache is enabled."""
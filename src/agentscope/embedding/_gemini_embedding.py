@@ -5,7 +5,7 @@ from typing import Any, List
 
 from ._embedding_response import EmbeddingResponse
 from ._embedding_usage import EmbeddingUsage
-from ._cache_base import EmbeddingCacheBase
+from ._cache_base import EmbeddingCacheBase, _embed_with_cache
 from ._embedding_base import EmbeddingModelBase
 from ..message import TextBlock
 
@@ -38,7 +38,7 @@ class GeminiTextEmbedding(EmbeddingModelBase):
                 for more details.
             embedding_cache (`EmbeddingCacheBase | None`, defaults to `None`):
                 The embedding cache class instance, used to cache the
-                embedding results to avoid repeated API calls.
+                embedding results per text to avoid repeated API calls.
         """
         from google import genai
 
@@ -71,36 +71,30 @@ class GeminiTextEmbedding(EmbeddingModelBase):
                     "Input text must be a list of strings or TextBlock dicts.",
                 )
 
-        kwargs = {
-            "model": self.model_name,
-            "contents": gather_text,
-            "config": kwargs,
-        }
-
-        if self.embedding_cache:
-            cached_embeddings = await self.embedding_cache.retrieve(
-                identifier=kwargs,
-            )
-            if cached_embeddings:
-                return EmbeddingResponse(
-                    embeddings=cached_embeddings,
-                    usage=EmbeddingUsage(
-                        tokens=0,
-                        time=0,
-                    ),
-                    source="cache",
-                )
+        # Only the texts missed in the cache are sent to the API
+        return await _embed_with_cache(
+            self.embedding_cache,
+            gather_text,
+            {
+                "model": self.model_name,
+                "dimensions": self.dimensions,
+                "config": kwargs,
+            },
+            lambda texts: self._call_api(
+                {
+                    "model": self.model_name,
+                    "contents": texts,
+                    "config": kwargs,
+                },
+            ),
+        )
 
+    async def _call_api(self, kwargs: dict[str, Any]) -> EmbeddingResponse:
+        """Call the Gemini embedding API by the given keyword arguments."""
         start_time = datetime.now()
         response = self.client.models.embed_content(**kwargs)
         time = (datetime.now() - start_time).total_seconds()
 
-        if self.embedding_cache:
-            await self.embedding_cache.store(
-                identifier=kwargs,
-                embeddings=[_.values for _ in response.embeddings],
-            )
-
         return EmbeddingResponse(
             embeddings=[_.values for _ in response.embeddings],
             usage=EmbeddingUsage(
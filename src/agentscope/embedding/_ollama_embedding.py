@@ -6,7 +6,7 @@ from typing import List, Any
 
 from ._embedding_response import EmbeddingResponse
 from ._embedding_usage import EmbeddingUsage
-from ._cache_base import EmbeddingCacheBase
+from ._cache_base import EmbeddingCacheBase, _embed_with_cache
 from ..embedding import EmbeddingModelBase
 from ..message import TextBlock
 
@@ -37,7 +37,7 @@ class OllamaTextEmbedding(EmbeddingModelBase):
                 The host URL for the Ollama API.
             embedding_cache (`EmbeddingCacheBase | None`, defaults to `None`):
                 The embedding cache class instance, used to cache the
-                embedding results to avoid repeated API calls.
+                embedding results per text to avoid repeated API calls.
         """
         import ollama
 
@@ -68,35 +68,33 @@ class OllamaTextEmbedding(EmbeddingModelBase):
                     "Input text must be a list of strings or TextBlock dicts.",
                 )
 
-        if self.embedding_cache:
-            cached_embeddings = await self.embedding_cache.retrieve(
-                identifier=kwargs,
-            )
-            if cached_embeddings:
-                return EmbeddingResponse(
-                    embeddings=cached_embeddings,
-                    usage=EmbeddingUsage(
-                        tokens=0,
-                        time=0,
-                    ),
-                    source="cache",
-                )
+        # Only the texts missed in the cache are sent to the API
+        return await _embed_with_cache(
+            self.embedding_cache,
+            gather_text,
+            {
+                "model": self.model_name,
+                "dimensions": self.dimensions,
+                **kwargs,
+            },
+            lambda texts: self._call_api(texts, kwargs),
+        )
 
+    async def _call_api(
+        self,
+        texts: List[str],
+        kwargs: dict[str, Any],
+    ) -> EmbeddingResponse:
+        """Call the Ollama embedding API for the given texts."""
         start_time = datetime.now()
         response = await asyncio.gather(
             *[
                 self.client.embeddings(self.model_name, _, **kwargs)
-                for _ in gather_text
+                for _ in texts
             ],
         )
         time = (datetime.now() - start_time).total_seconds()
 
-        if self.embedding_cache:
-            await self.embedding_cache.store(
-                identifier=kwargs,
-                embeddings=[_.embedding for _ in response],
-            )
-
         return EmbeddingResponse(
             embeddings=[_.embedding for _ in response],
             usage=EmbeddingUsage(
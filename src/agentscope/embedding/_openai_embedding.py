@@ -5,7 +5,7 @@ from typing import Any, List
 
 from ._embedding_response import EmbeddingResponse
 from ._embedding_usage import EmbeddingUsage
-from ._cache_base import EmbeddingCacheBase
+from ._cache_base import EmbeddingCacheBase, _embed_with_cache
 from ._embedding_base import EmbeddingModelBase
 from ..message import TextBlock
 
@@ -22,6 +22,7 @@ class OpenAITextEmbedding(EmbeddingModelBase):
         model_name: str,
         dimensions: int = 1024,
         embedding_cache: EmbeddingCacheBase | None = None,
+        shared_client: bool = False,
         **kwargs: Any,
     ) -> None:
         """Initialize the OpenAI text embedding model class.
@@ -35,7 +36,11 @@ class OpenAITextEmbedding(EmbeddingModelBase):
                 The dimension of the embedding vector.
             embedding_cache (`EmbeddingCacheBase | None`, defaults to `None`):
                 The embedding cache class instance, used to cache the
-                embedding results to avoid repeated API calls.
+                embedding results per text to avoid repeated API calls.
+            shared_client (`bool`, defaults to `False`):
+                Whether to use the shared client from the client registry,
+                which reuses the keep-alive connections across the instances
+                with the same API key and client arguments.
 
         # TODO: handle batch size limit and token limit
         """
@@ -43,7 +48,28 @@ class OpenAITextEmbedding(EmbeddingModelBase):
 
         super().__init__(model_name, dimensions)
 
-        self.client = openai.AsyncClient(api_key=api_key, **kwargs)
+        if shared_client:
+            from ..model._client_registry import (
+                get_client_registry,
+                _get_http_module,
+            )
+
+            self.client = get_client_registry().get_client(
+                "openai",
+                lambda transport: openai.AsyncClient(
+                    api_key=api_key,
+                    http_client=openai.DefaultAsyncHttpxClient(
+                        transport=transport,
+                    ),
+                    **kwargs,
+                ),
+                base_url=kwargs.get("base_url"),
+                api_key=api_key,
+                options={"organization": None, **kwargs},
+                http_module=_get_http_module(openai.DefaultAsyncHttpxClient),
+            )
+        else:
+            self.client = openai.AsyncClient(api_key=api_key, **kwargs)
         self.embedding_cache = embedding_cache
 
     async def __call__(
@@ -69,37 +95,26 @@ class OpenAITextEmbedding(EmbeddingModelBase):
                 )
 
         kwargs = {
-            "input": gather_text,
             "model": self.model_name,
             "dimensions": self.dimensions,
             "encoding_format": "float",
             **kwargs,
         }
 
-        if self.embedding_cache:
-            cached_embeddings = await self.embedding_cache.retrieve(
-                identifier=kwargs,
-            )
-            if cached_embeddings:
-                return EmbeddingResponse(
-                    embeddings=cached_embeddings,
-                    usage=EmbeddingUsage(
-                        tokens=0,
-                        time=0,
-                    ),
-                    source="cache",
-                )
+        # Only the texts missed in the cache are sent to the API
+        return await _embed_with_cache(
+            self.embedding_cache,
+            gather_text,
+            kwargs,
+            lambda texts: self._call_api({"input": texts, **kwargs}),
+        )
 
+    async def _call_api(self, kwargs: dict[str, Any]) -> EmbeddingResponse:
+        """Call the OpenAI embedding API by the given keyword arguments."""
         start_time = datetime.now()
         response = await self.client.embeddings.create(**kwargs)
         time = (datetime.now() - start_time).total_seconds()
 
-        if self.embedding_cache:
-            await self.embedding_cache.store(
-                identifier=kwargs,
-                embeddings=[_.embedding for _ in response.data],
-            )
-
         return EmbeddingResponse(
             embeddings=[_.embedding for _ in response.data],
             usage=EmbeddingUsage(
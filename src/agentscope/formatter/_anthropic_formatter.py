@@ -10,6 +10,81 @@ from ..message import Msg, TextBlock, ImageBlock, ToolUseBlock, ToolResultBlock
 from ..token import TokenCounterBase
 
 
+def _add_anthropic_cache_control(
+    formatted_msgs: list[dict[str, Any]],
+    cache_system_prompt: bool,
+    cache_last_n_messages: int,
+) -> list[dict[str, Any]]:
+    """Mark the prompt cache breakpoints by adding `cache_control` to the
+    last content block of the system message and the last N messages. The
+    marked messages and blocks are copied, so that the cached formatting
+    results are not modified.
+
+    Args:
+        formatted_msgs (`list[dict[str, Any]]`):
+            The formatted messages in Anthropic API format.
+        cache_system_prompt (`bool`):
+            Whether to mark a breakpoint after the system message.
+        cache_last_n_messages (`int`):
+            The number of the latest messages to mark breakpoints.
+
+    Returns:
+        `list[dict[str, Any]]`:
+            The formatted messages with cache breakpoints.
+    """
+    indices = []
+    start = 0
+    if formatted_msgs and formatted_msgs[0]["role"] == "system":
+        start = 1
+        if cache_system_prompt:
+            indices.append(0)
+
+    if cache_last_n_messages > 0:
+        indices.extend(
+            range(
+                max(start, len(formatted_msgs) - cache_last_n_messages),
+                len(formatted_msgs),
+            ),
+        )
+
+    for index in indices:
+        msg = formatted_msgs[index]
+        content = msg["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+
+        # The thinking blocks cannot be marked as breakpoints
+        for i in reversed(range(len(content))):
+            if content[i].get("type") not in ["thinking", "redacted_thinking"]:
+                formatted_msgs[index] = {
+                    **msg,
+                    "content": [
+                        *content[:i],
+                        {**content[i], "cache_control": {"type": "ephemeral"}},
+                        *content[i + 1 :],
+                    ],
+                }
+                break
+
+    return formatted_msgs
+
+
+def _validate_cache_breakpoints(
+    cache_system_prompt: bool,
+    cache_last_n_messages: int,
+) -> None:
+    """Validate the number of prompt cache breakpoints."""
+    if (
+        cache_last_n_messages < 0
+        or cache_system_prompt + cache_last_n_messages > 4
+    ):
+        raise ValueError(
+            "Anthropic allows at most 4 prompt cache breakpoints in a "
+            f"request, but got cache_system_prompt={cache_system_prompt} "
+            f"and cache_last_n_messages={cache_last_n_messages}.",
+        )
+
+
 class AnthropicChatFormatter(TruncatedFormatterBase):
     """Formatter for Anthropic messages."""
 
@@ -32,6 +107,71 @@ class AnthropicChatFormatter(TruncatedFormatterBase):
     ]
     """The list of supported message blocks"""
 
+    def __init__(
+        self,
+        token_counter: TokenCounterBase | None = None,
+        max_tokens: int | None = None,
+        cache_size: int = 1024,
+        cache_system_prompt: bool = False,
+        cache_last_n_messages: int = 0,
+    ) -> None:
+        """Initialize the Anthropic chat formatter.
+
+        Args:
+            token_counter (`TokenCounterBase | None`, optional):
+                A token counter instance used to count tokens in the messages.
+                If not provided, the formatter will format the messages
+                without considering token limits.
+            max_tokens (`int | None`, optional):
+                The maximum number of tokens allowed in the formatted
+                messages. If not provided, the formatter will not truncate
+                the messages.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
+            cache_system_prompt (`bool`, defaults to `False`):
+                Whether to mark a prompt cache breakpoint after the system
+                message, so that the tool schemas and the system prompt are
+                read from the prompt cache of Anthropic across calls.
+            cache_last_n_messages (`int`, defaults to `0`):
+                The number of the latest messages to mark prompt cache
+                breakpoints, so that the conversation history is read from
+                the prompt cache in the following turns. Note Anthropic
+                allows at most 4 breakpoints in a request, including the one
+                marked by `AnthropicChatModel` for the tool schemas, which
+                raises a `ValueError` if the total exceeds the limit.
+        """
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
+        _validate_cache_breakpoints(cache_system_prompt, cache_last_n_messages)
+        self.cache_system_prompt = cache_system_prompt
+        self.cache_last_n_messages = cache_last_n_messages
+
+    async def format(
+        self,
+        msgs: list[Msg],
+        **kwargs: Any,
+    ) -> list[dict[str, Any]]:
+        """Format the input messages into Anthropic API format, and mark the
+        prompt cache breakpoints if enabled.
+
+        Args:
+            msgs (`list[Msg]`):
+                The input messages to be formatted.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages in Anthropic API format.
+        """
+        return _add_anthropic_cache_control(
+            await super().format(msgs, **kwargs),
+            self.cache_system_prompt,
+            self.cache_last_n_messages,
+        )
+
     async def _format(
         self,
         msgs: list[Msg],
@@ -56,63 +196,92 @@ class AnthropicChatFormatter(TruncatedFormatterBase):
 
         messages: list[dict] = []
         for index, msg in enumerate(msgs):
-            content_blocks = []
+            messages.extend(
+                await self._format_with_cache(
+                    self._format_msg,
+                    msg,
+                    index == 0,
+                ),
+            )
 
-            for block in msg.get_content_blocks():
-                typ = block.get("type")
-                if typ in ["thinking", "text", "image"]:
-                    content_blocks.append({**block})
-
-                elif typ == "tool_use":
-                    content_blocks.append(
-                        {
-                            "id": block.get("id"),
-                            "type": "tool_use",
-                            "name": block.get("name"),
-                            "input": block.get("input", {}),
-                        },
-                    )
-
-                elif typ == "tool_result":
-                    output = block.get("output")
-                    if output is None:
-                        content_value = [{"type": "text", "text": None}]
-                    elif isinstance(output, list):
-                        content_value = output
-                    else:
-                        content_value = [{"type": "text", "text": str(output)}]
-                    messages.append(
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "tool_result",
-                                    "tool_use_id": block.get("id"),
-                                    "content": content_value,
-                                },
-                            ],
-                        },
-                    )
+        return messages
+
+    async def _format_msg(
+        self,
+        msg: Msg,
+        is_first: bool,
+    ) -> list[dict[str, Any]]:
+        """Format a single message object into Anthropic API format. The tool
+        results are formatted as separate messages.
+
+        Args:
+            msg (`Msg`):
+                The message object to format.
+            is_first (`bool`):
+                Whether the message is the first one in the input messages.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages as a list of dictionaries.
+        """
+        messages: list[dict] = []
+        content_blocks = []
+
+        for block in msg.get_content_blocks():
+            typ = block.get("type")
+            if typ in ["thinking", "text", "image"]:
+                content_blocks.append({**block})
+
+            elif typ == "tool_use":
+                content_blocks.append(
+                    {
+                        "id": block.get("id"),
+                        "type": "tool_use",
+                        "name": block.get("name"),
+                        "input": block.get("input", {}),
+                    },
+                )
+
+            elif typ == "tool_result":
+                output = block.get("output")
+                if output is None:
+                    content_value = [{"type": "text", "text": None}]
+                elif isinstance(output, list):
+                    content_value = output
                 else:
-                    logger.warning(
-                        "Unsupported block type %s in the message, skipped.",
-                        typ,
-                    )
-
-            # Claude only allow the first message to be system message
-            if msg.role == "system" and index != 0:
-                role = "user"
+                    content_value = [{"type": "text", "text": str(output)}]
+                messages.append(
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "tool_result",
+                                "tool_use_id": block.get("id"),
+                                "content": content_value,
+                            },
+                        ],
+                    },
+                )
             else:
-                role = msg.role
+                logger.warning(
+                    "Unsupported block type %s in the message, skipped.",
+                    typ,
+                )
+
+        # Claude only allow the first message to be system message
+        if msg.role == "system" and not is_first:
+            role = "user"
+        else:
+            role = msg.role
 
-            msg_anthropic = {
-                "role": role,
-                "content": content_blocks or None,
-            }
+        msg_anthropic = {
+            "role": role,
+            "content": content_blocks or None,
+        }
 
-            # When both content and tool_calls are None, skipped
-            if msg_anthropic["content"] or msg_anthropic.get("tool_calls"):
-                messages.append(msg_anthropic)
+        # When both content and tool_calls are None, skipped
+        if msg_anthropic["content"] or msg_anthropic.get("tool_calls"):
+            messages.append(msg_anthropic)
 
         return messages
 
@@ -151,16 +320,62 @@ class AnthropicMultiAgentFormatter(TruncatedFormatterBase):
         ),
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
+        cache_system_prompt: bool = False,
+        cache_last_n_messages: int = 0,
     ) -> None:
         """Initialize the DashScope multi-agent formatter.
 
         Args:
             conversation_history_prompt (`str`):
                 The prompt to use for the conversation history section.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
+            cache_system_prompt (`bool`, defaults to `False`):
+                Whether to mark a prompt cache breakpoint after the system
+                message, so that the tool schemas and the system prompt are
+                read from the prompt cache of Anthropic across calls.
+            cache_last_n_messages (`int`, defaults to `0`):
+                The number of the latest messages to mark prompt cache
+                breakpoints, so that the conversation history is read from
+                the prompt cache in the following turns. Note Anthropic
+                allows at most 4 breakpoints in a request, including the one
+                marked by `AnthropicChatModel` for the tool schemas, which
+                raises a `ValueError` if the total exceeds the limit.
         """
-        super().__init__(token_counter=token_counter, max_tokens=max_tokens)
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
+        _validate_cache_breakpoints(cache_system_prompt, cache_last_n_messages)
+        self.cache_system_prompt = cache_system_prompt
+        self.cache_last_n_messages = cache_last_n_messages
         self.conversation_history_prompt = conversation_history_prompt
 
+    async def format(
+        self,
+        msgs: list[Msg],
+        **kwargs: Any,
+    ) -> list[dict[str, Any]]:
+        """Format the input messages into Anthropic API format, and mark the
+        prompt cache breakpoints if enabled.
+
+        Args:
+            msgs (`list[Msg]`):
+                The input messages to be formatted.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages in Anthropic API format.
+        """
+        return _add_anthropic_cache_control(
+            await super().format(msgs, **kwargs),
+            self.cache_system_prompt,
+            self.cache_last_n_messages,
+        )
+
     async def _format_tool_sequence(
         self,
         msgs: list[Msg],
@@ -138,90 +138,112 @@ class DashScopeChatFormatter(TruncatedFormatterBase):
 
         formatted_msgs: list[dict] = []
         for msg in msgs:
-            content_blocks = []
-            tool_calls = []
-            for block in msg.get_content_blocks():
-                typ = block.get("type")
+            formatted_msgs.extend(
+                await self._format_with_cache(self._format_msg, msg),
+            )
 
-                if typ == "text":
-                    content_blocks.append(
-                        {
-                            "text": block.get("text"),
-                        },
-                    )
+        return formatted_msgs
 
-                elif typ in ["image", "audio"]:
-                    source = block["source"]
-                    if source["type"] == "url":
-                        url = source["url"]
-                        if _is_accessible_local_file(url):
-                            content_blocks.append(
-                                {typ: "file://" + os.path.abspath(url)},
-                            )
-                        else:
-                            # treat as web url
-                            content_blocks.append({typ: url})
+    async def _format_msg(
+        self,
+        msg: Msg,
+    ) -> list[dict[str, Any]]:
+        """Format a single message object into DashScope API format. The tool
+        results are formatted as separate messages.
+
+        Args:
+            msg (`Msg`):
+                The message object to format.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages as a list of dictionaries.
+        """
+        formatted_msgs: list[dict] = []
+        content_blocks = []
+        tool_calls = []
+        for block in msg.get_content_blocks():
+            typ = block.get("type")
+
+            if typ == "text":
+                content_blocks.append(
+                    {
+                        "text": block.get("text"),
+                    },
+                )
 
-                    elif source["type"] == "base64":
-                        media_type = source["media_type"]
-                        base64_data = source["data"]
+            elif typ in ["image", "audio"]:
+                source = block["source"]
+                if source["type"] == "url":
+                    url = source["url"]
+                    if _is_accessible_local_file(url):
                         content_blocks.append(
-                            {typ: f"data:{media_type};base64,{base64_data}"},
+                            {typ: "file://" + os.path.abspath(url)},
                         )
-
                     else:
-                        raise NotImplementedError(
-                            f"Unsupported source type '{source.get('type')}' "
-                            f"for {typ} block.",
-                        )
+                        # treat as web url
+                        content_blocks.append({typ: url})
 
-                elif typ == "tool_use":
-                    tool_calls.append(
-                        {
-                            "id": block.get("id"),
-                            "type": "function",
-                            "function": {
-                                "name": block.get("name"),
-                                "arguments": json.dumps(
-                                    block.get("input", {}),
-                                    ensure_ascii=False,
-                                ),
-                            },
-                        },
+                elif source["type"] == "base64":
+                    media_type = source["media_type"]
+                    base64_data = source["data"]
+                    content_blocks.append(
+                        {typ: f"data:{media_type};base64,{base64_data}"},
                     )
 
-                elif typ == "tool_result":
-                    formatted_msgs.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": block.get("id"),
-                            "content": self.convert_tool_result_to_string(
-                                block.get("output"),  # type: ignore[arg-type]
-                            ),
+                else:
+                    raise NotImplementedError(
+                        f"Unsupported source type '{source.get('type')}' "
+                        f"for {typ} block.",
+                    )
+
+            elif typ == "tool_use":
+                tool_calls.append(
+                    {
+                        "id": block.get("id"),
+                        "type": "function",
+                        "function": {
                             "name": block.get("name"),
+                            "arguments": json.dumps(
+                                block.get("input", {}),
+                                ensure_ascii=False,
+                            ),
                         },
-                    )
+                    },
+                )
 
-                else:
-                    logger.warning(
-                        "Unsupported block type %s in the message, skipped.",
-                        typ,
-                    )
+            elif typ == "tool_result":
+                formatted_msgs.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": block.get("id"),
+                        "content": self.convert_tool_result_to_string(
+                            block.get("output"),  # type: ignore[arg-type]
+                        ),
+                        "name": block.get("name"),
+                    },
+                )
 
-            msg_dashscope = {
-                "role": msg.role,
-                "content": content_blocks or [{"text": None}],
-            }
+            else:
+                logger.warning(
+                    "Unsupported block type %s in the message, skipped.",
+                    typ,
+                )
+
+        msg_dashscope = {
+            "role": msg.role,
+            "content": content_blocks or [{"text": None}],
+        }
 
-            if tool_calls:
-                msg_dashscope["tool_calls"] = tool_calls
+        if tool_calls:
+            msg_dashscope["tool_calls"] = tool_calls
 
-            if msg_dashscope["content"] != [
-                {"text": None},
-            ] or msg_dashscope.get(
-                "tool_calls",
-            ):
-                formatted_msgs.append(msg_dashscope)
+        if msg_dashscope["content"] != [
+            {"text": None},
+        ] or msg_dashscope.get(
+            "tool_calls",
+        ):
+            formatted_msgs.append(msg_dashscope)
 
         return _reformat_messages(formatted_msgs)
 
@@ -274,6 +296,7 @@ class DashScopeMultiAgentFormatter(TruncatedFormatterBase):
         ),
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
     ) -> None:
         """Initialize the DashScope multi-agent formatter.
 
@@ -285,8 +308,15 @@ class DashScopeMultiAgentFormatter(TruncatedFormatterBase):
             max_tokens (`int | None`, optional):
                 The maximum number of tokens allowed in the formatted
                 messages. If `None`, no truncation will be applied.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
         """
-        super().__init__(token_counter=token_counter, max_tokens=max_tokens)
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
         self.conversation_history_prompt = conversation_history_prompt
 
     async def _format_tool_sequence(
@@ -48,59 +48,81 @@ class DeepSeekChatFormatter(TruncatedFormatterBase):
 
         messages: list[dict] = []
         for msg in msgs:
-            content_blocks: list = []
-            tool_calls = []
+            messages.extend(
+                await self._format_with_cache(self._format_msg, msg),
+            )
 
-            for block in msg.get_content_blocks():
-                typ = block.get("type")
-                if typ == "text":
-                    content_blocks.append({**block})
-
-                elif typ == "tool_use":
-                    tool_calls.append(
-                        {
-                            "id": block.get("id"),
-                            "type": "function",
-                            "function": {
-                                "name": block.get("name"),
-                                "arguments": json.dumps(
-                                    block.get("input", {}),
-                                    ensure_ascii=False,
-                                ),
-                            },
-                        },
-                    )
-
-                elif typ == "tool_result":
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": block.get("id"),
-                            "content": self.convert_tool_result_to_string(
-                                block.get("output"),  # type: ignore[arg-type]
-                            ),
+        return messages
+
+    async def _format_msg(
+        self,
+        msg: Msg,
+    ) -> list[dict[str, Any]]:
+        """Format a single message object into DeepSeek API format. The tool
+        results are formatted as separate messages.
+
+        Args:
+            msg (`Msg`):
+                The message object to format.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages as a list of dictionaries.
+        """
+        messages: list[dict] = []
+        content_blocks: list = []
+        tool_calls = []
+
+        for block in msg.get_content_blocks():
+            typ = block.get("type")
+            if typ == "text":
+                content_blocks.append({**block})
+
+            elif typ == "tool_use":
+                tool_calls.append(
+                    {
+                        "id": block.get("id"),
+                        "type": "function",
+                        "function": {
                             "name": block.get("name"),
+                            "arguments": json.dumps(
+                                block.get("input", {}),
+                                ensure_ascii=False,
+                            ),
                         },
-                    )
-
-                else:
-                    logger.warning(
-                        "Unsupported block type %s in the message, skipped.",
-                        typ,
-                    )
-            content_msg = "\n".join(
-                content.get("text", "") for content in content_blocks
-            )
-            msg_deepseek = {
-                "role": msg.role,
-                "content": content_msg or None,
-            }
+                    },
+                )
+
+            elif typ == "tool_result":
+                messages.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": block.get("id"),
+                        "content": self.convert_tool_result_to_string(
+                            block.get("output"),  # type: ignore[arg-type]
+                        ),
+                        "name": block.get("name"),
+                    },
+                )
+
+            else:
+                logger.warning(
+                    "Unsupported block type %s in the message, skipped.",
+                    typ,
+                )
+        content_msg = "\n".join(
+            content.get("text", "") for content in content_blocks
+        )
+        msg_deepseek = {
+            "role": msg.role,
+            "content": content_msg or None,
+        }
 
-            if tool_calls:
-                msg_deepseek["tool_calls"] = tool_calls
+        if tool_calls:
+            msg_deepseek["tool_calls"] = tool_calls
 
-            if msg_deepseek["content"] or msg_deepseek.get("tool_calls"):
-                messages.append(msg_deepseek)
+        if msg_deepseek["content"] or msg_deepseek.get("tool_calls"):
+            messages.append(msg_deepseek)
 
         return messages
 
@@ -137,6 +159,7 @@ class DeepSeekMultiAgentFormatter(TruncatedFormatterBase):
         ),
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
     ) -> None:
         """Initialize the DeepSeek multi-agent formatter.
 
@@ -151,8 +174,15 @@ class DeepSeekMultiAgentFormatter(TruncatedFormatterBase):
                 The maximum number of tokens allowed in the formatted
                 messages. If not provided, the formatter will not truncate
                 the messages.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
         """
-        super().__init__(token_counter=token_counter, max_tokens=max_tokens)
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
         self.conversation_history_prompt = conversation_history_prompt
 
     async def _format_tool_sequence(
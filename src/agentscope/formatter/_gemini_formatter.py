@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=too-many-branches
 """Google gemini API formatter in agentscope."""
-import base64
 import os
 from typing import Any
 from urllib.parse import urlparse
 
+from ._media_resolver import _get_media_resolver
 from ._truncated_formatter_base import TruncatedFormatterBase
-from .._utils._common import _get_bytes_from_web_url
 from ..message import (
     Msg,
     TextBlock,
@@ -41,7 +40,7 @@ def _to_gemini_inline_data(url: str) -> dict:
                 f"{GeminiChatFormatter.supported_extensions}",
             )
 
-        data = _get_bytes_from_web_url(url)
+        data = _get_media_resolver().load(url)
         return {
             "data": data,
             "mime_type": f"{typ}/{extension}",
@@ -55,9 +54,7 @@ def _to_gemini_inline_data(url: str) -> dict:
                 f"{GeminiChatFormatter.supported_extensions}",
             )
 
-        with open(url, "rb") as f:
-            data = base64.b64encode(f.read()).decode("utf-8")
-
+        data = _get_media_resolver().load(url)
         return {
             "data": data,
             "mime_type": f"{typ}/{extension}",
@@ -92,6 +89,9 @@ class GeminiChatFormatter(TruncatedFormatterBase):
     ]
     """The list of supported message blocks"""
 
+    prefetch_media_types: list[str] = ["image", "audio", "video"]
+    """The types of the media blocks loaded in the formatting"""
+
     supported_extensions: dict[str, list[str]] = {
         "image": ["png", "jpeg", "webp", "heic", "heif"],
         "video": [
@@ -117,87 +117,109 @@ class GeminiChatFormatter(TruncatedFormatterBase):
 
         messages: list = []
         for msg in msgs:
-            parts = []
+            messages.extend(
+                await self._format_with_cache(self._format_msg, msg),
+            )
 
-            for block in msg.get_content_blocks():
-                typ = block.get("type")
-                if typ == "text":
-                    parts.append(
-                        {
-                            "text": block.get("text"),
+        return messages
+
+    async def _format_msg(
+        self,
+        msg: Msg,
+    ) -> list[dict[str, Any]]:
+        """Format a single message object into Gemini API required
+        format. The tool results are formatted as separate messages.
+
+        Args:
+            msg (`Msg`):
+                The message object to format.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages as a list of dictionaries.
+        """
+        messages: list = []
+        parts = []
+
+        for block in msg.get_content_blocks():
+            typ = block.get("type")
+            if typ == "text":
+                parts.append(
+                    {
+                        "text": block.get("text"),
+                    },
+                )
+
+            elif typ == "tool_use":
+                parts.append(
+                    {
+                        "function_call": {
+                            "id": block["id"],
+                            "name": block["name"],
+                            "args": block["input"],
                         },
-                    )
+                    },
+                )
+
+            elif typ == "tool_result":
+                text_output = self.convert_tool_result_to_string(
+                    block["output"],  # type: ignore[arg-type]
+                )
+                messages.append(
+                    {
+                        "role": "user",
+                        "parts": [
+                            {
+                                "function_response": {
+                                    "id": block["id"],
+                                    "name": block["name"],
+                                    "response": {
+                                        "output": text_output,
+                                    },
+                                },
+                            },
+                        ],
+                    },
+                )
+
+            elif typ in ["image", "audio", "video"]:
+                if block["source"]["type"] == "base64":
+                    media_type = block["source"]["media_type"]
+                    base64_data = block["source"]["data"]
 
-                elif typ == "tool_use":
                     parts.append(
                         {
-                            "function_call": {
-                                "id": block["id"],
-                                "name": block["name"],
-                                "args": block["input"],
+                            "inline_data": {
+                                "data": base64_data,
+                                "mime_type": media_type,
                             },
                         },
                     )
 
-                elif typ == "tool_result":
-                    text_output = self.convert_tool_result_to_string(
-                        block["output"],  # type: ignore[arg-type]
-                    )
-                    messages.append(
+                elif block["source"]["type"] == "url":
+                    parts.append(
                         {
-                            "role": "user",
-                            "parts": [
-                                {
-                                    "function_response": {
-                                        "id": block["id"],
-                                        "name": block["name"],
-                                        "response": {
-                                            "output": text_output,
-                                        },
-                                    },
-                                },
-                            ],
+                            "inline_data": _to_gemini_inline_data(
+                                block["source"]["url"],
+                            ),
                         },
                     )
 
-                elif typ in ["image", "audio", "video"]:
-                    if block["source"]["type"] == "base64":
-                        media_type = block["source"]["media_type"]
-                        base64_data = block["source"]["data"]
-
-                        parts.append(
-                            {
-                                "inline_data": {
-                                    "data": base64_data,
-                                    "mime_type": media_type,
-                                },
-                            },
-                        )
-
-                    elif block["source"]["type"] == "url":
-                        parts.append(
-                            {
-                                "inline_data": _to_gemini_inline_data(
-                                    block["source"]["url"],
-                                ),
-                            },
-                        )
-
-                else:
-                    logger.warning(
-                        "Unsupported block type: %s in the message, skipped. ",
-                        typ,
-                    )
+            else:
+                logger.warning(
+                    "Unsupported block type: %s in the message, skipped. ",
+                    typ,
+                )
 
-            role = "model" if msg.role == "assistant" else "user"
+        role = "model" if msg.role == "assistant" else "user"
 
-            if parts:
-                messages.append(
-                    {
-                        "role": role,
-                        "parts": parts,
-                    },
-                )
+        if parts:
+            messages.append(
+                {
+                    "role": role,
+                    "parts": parts,
+                },
+            )
 
         return messages
 
@@ -242,6 +264,9 @@ class GeminiMultiAgentFormatter(TruncatedFormatterBase):
     ]
     """The list of supported message blocks"""
 
+    prefetch_media_types: list[str] = ["image", "audio", "video"]
+    """The types of the media blocks loaded in the formatting"""
+
     def __init__(
         self,
         conversation_history_prompt: str = (
@@ -251,6 +276,7 @@ class GeminiMultiAgentFormatter(TruncatedFormatterBase):
         ),
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
     ) -> None:
         """Initialize the Gemini multi-agent formatter.
 
@@ -262,8 +288,15 @@ class GeminiMultiAgentFormatter(TruncatedFormatterBase):
             max_tokens (`int | None`, optional):
                 The maximum number of tokens allowed in the formatted
                 messages. If `None`, no truncation will be applied.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
         """
-        super().__init__(token_counter=token_counter, max_tokens=max_tokens)
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
         self.conversation_history_prompt = conversation_history_prompt
 
     async def _format_system_message(
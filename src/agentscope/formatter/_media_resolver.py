@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""The media resolver shared by the formatters, which loads the local and
+web media files as base64 data with an LRU cache."""
+import asyncio
+import base64
+import os
+from typing import Any, Iterable
+from urllib.parse import urlparse
+
+import httpx
+
+from .._utils._cached_loader import _CachedLoader
+from ..message import Msg
+
+
+class _MediaResolver(_CachedLoader):
+    """The media resolver that loads the local files and web URLs as base64
+    strings.
+
+    The loaded data are kept in an LRU cache within a byte budget. Local
+    files are keyed by their absolute path, modification time and size, so
+    a modified file is loaded again. Web URLs are keyed by the URL itself.
+
+    In the async methods, the web URLs are fetched through the shared async
+    HTTP client with bounded concurrency, the local files are read in a
+    thread, and the concurrent loads of the same media are merged, so that
+    a slow URL won't block the event loop.
+    """
+
+    def __init__(
+        self,
+        cache_max_bytes: int = 128 * 1024 * 1024,
+        max_concurrency: int = 8,
+        timeout: float = 30,
+        max_retries: int = 3,
+    ) -> None:
+        """Initialize the media resolver.
+
+        Args:
+            cache_max_bytes (`int`, defaults to `128 * 1024 * 1024`):
+                The byte budget of the LRU cache, measured by the length of
+                the base64 strings. Set to `0` to disable the cache.
+            max_concurrency (`int`, defaults to `8`):
+                The maximum number of media loaded concurrently in the async
+                methods.
+            timeout (`float`, defaults to `30`):
+                The timeout in seconds of fetching a web URL.
+            max_retries (`int`, defaults to `3`):
+                The maximum number of attempts to fetch a web URL.
+        """
+        super().__init__(
+            cache_max_size=cache_max_bytes,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+            max_retries=max_retries,
+        )
+
+    def _sizeof(self, value: Any) -> int:
+        """The size of the base64 string in bytes."""
+        return len(value)
+
+    @staticmethod
+    def _get_key(url: str) -> tuple:
+        """Get the cache key of the local file or web URL.
+
+        Raises:
+            `ValueError`:
+                If the URL is neither an existing local file nor a web URL.
+        """
+        if os.path.isfile(url):
+            stat = os.stat(url)
+            return "file", os.path.abspath(url), stat.st_mtime_ns, stat.st_size
+
+        if urlparse(url).scheme != "":
+            return "web", url
+
+        raise ValueError(
+            f"The URL `{url}` is not a valid web URL or local file.",
+        )
+
+    @staticmethod
+    def _read_file(path: str) -> str:
+        """Read the local file as a base64 string."""
+        with open(path, "rb") as file:
+            return base64.b64encode(file.read()).decode("utf-8")
+
+    def load(self, url: str) -> str:
+        """Load the local file or web URL as a base64 string. On a cache
+        miss, the web URL is fetched with a blocking request, so the async
+        callers should `prefetch` the URLs first.
+
+        Args:
+            url (`str`):
+                The path of the local file or the web URL.
+
+        Returns:
+            `str`:
+                The base64 data of the media.
+        """
+        key = self._get_key(url)
+        data = self._cache_get(key)
+        if data is not None:
+            return data
+
+        if key[0] == "file":
+            data = self._read_file(url)
+        else:
+            data = self._fetch_with_retries(self._fetch, url)
+
+        self._cache_put(key, data)
+        return data
+
+    def _fetch(self, url: str) -> str:
+        """Fetch the web URL with a blocking request."""
+        response = httpx.get(url, timeout=self.timeout, follow_redirects=True)
+        response.raise_for_status()
+        return base64.b64encode(response.content).decode("utf-8")
+
+    async def _afetch(self, url: str) -> str:
+        """Fetch the web URL with the shared async client."""
+        response = await self._get_async_client().get(url)
+        response.raise_for_status()
+        return base64.b64encode(response.content).decode("utf-8")
+
+    async def aload(self, url: str) -> str:
+        """Load the local file or web URL as a base64 string without
+        blocking the event loop.
+
+        Args:
+            url (`str`):
+                The path of the local file or the web URL.
+
+        Returns:
+            `str`:
+                The base64 data of the media.
+        """
+        key = self._get_key(url)
+        data = self._cache_get(key)
+        if data is not None:
+            return data
+
+        if key[0] == "file":
+            return await self._aload_once(
+                key,
+                lambda: asyncio.to_thread(self._read_file, url),
+            )
+        return await self._aload_once(
+            key,
+            lambda: self._afetch_with_retries(self._afetch, url),
+        )
+
+    async def prefetch(self, urls: Iterable[str]) -> None:
+        """Load the given media concurrently into the cache, so that the
+        following `load` calls won't touch the disk or the network.
+
+        Args:
+            urls (`Iterable[str]`):
+                The paths of the local files or the web URLs.
+        """
+        await asyncio.gather(*[self.aload(_) for _ in dict.fromkeys(urls)])
+
+
+_MEDIA_RESOLVER: _MediaResolver | None = None
+
+
+def _get_media_resolver() -> _MediaResolver:
+    """Get the media resolver shared by the formatters."""
+    global _MEDIA_RESOLVER
+    if _MEDIA_RESOLVER is None:
+        _MEDIA_RESOLVER = _MediaResolver()
+    return _MEDIA_RESOLVER
+
+
+def _collect_media_urls(
+    msgs: list[Msg],
+    block_types: Iterable[str],
+) -> list[str]:
+    """Collect the URLs of the media blocks with the given types in the
+    messages. The invalid URLs are skipped and left to the formatters to
+    raise errors.
+
+    Args:
+        msgs (`list[Msg]`):
+            The messages.
+        block_types (`Iterable[str]`):
+            The types of the media blocks, e.g. "image", "audio" and "video".
+
+    Returns:
+        `list[str]`:
+            The local file paths and web URLs of the media blocks.
+    """
+    urls = []
+    for msg in msgs:
+        for block in msg.get_content_blocks():
+            if (
+                block["type"] in block_types
+                and block["source"]["type"] == "url"
+            ):
+                url = block["source"]["url"]
+                if os.path.isfile(url) or urlparse(url).scheme != "":
+                    urls.append(url)
+    return urls
@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=too-many-branches
 """The Ollama formatter module."""
-import base64
 import os
 from typing import Any
 from urllib.parse import urlparse
 
+from ._media_resolver import _get_media_resolver
 from ._truncated_formatter_base import TruncatedFormatterBase
 from .._logging import logger
-from .._utils._common import _get_bytes_from_web_url
 from ..message import Msg, TextBlock, ImageBlock, ToolUseBlock, ToolResultBlock
 from ..token import TokenCounterBase
 
@@ -17,16 +16,9 @@ def _convert_ollama_image_url_to_base64_data(url: str) -> str:
     """Convert image url to base64."""
     parsed_url = urlparse(url)
 
-    if not os.path.exists(url) and parsed_url.scheme != "":
-        # Web url
-        data = _get_bytes_from_web_url(url)
-        return data
-    if os.path.exists(url):
-        # Local file
-        with open(url, "rb") as f:
-            data = base64.b64encode(f.read()).decode("utf-8")
-
-        return data
+    # Web url or local file
+    if os.path.exists(url) or parsed_url.scheme != "":
+        return _get_media_resolver().load(url)
 
     raise ValueError(
         f"The URL `{url}` is not a valid image URL or local file.",
@@ -55,6 +47,9 @@ class OllamaChatFormatter(TruncatedFormatterBase):
     ]
     """The list of supported message blocks"""
 
+    prefetch_media_types: list[str] = ["image"]
+    """The types of the media blocks loaded in the formatting"""
+
     async def _format(
         self,
         msgs: list[Msg],
@@ -73,71 +68,93 @@ class OllamaChatFormatter(TruncatedFormatterBase):
 
         messages: list[dict] = []
         for msg in msgs:
-            content_blocks: list = []
-            tool_calls = []
-            images = []
+            messages.extend(
+                await self._format_with_cache(self._format_msg, msg),
+            )
 
-            for block in msg.get_content_blocks():
-                typ = block.get("type")
-                if typ == "text":
-                    content_blocks.append({**block})
-
-                elif typ == "tool_use":
-                    tool_calls.append(
-                        {
-                            "id": block.get("id"),
-                            "type": "function",
-                            "function": {
-                                "name": block.get("name"),
-                                "arguments": block.get("input", {}),
-                            },
-                        },
-                    )
+        return messages
 
-                elif typ == "tool_result":
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": block.get("id"),
-                            "content": self.convert_tool_result_to_string(
-                                block.get("output"),  # type: ignore[arg-type]
-                            ),
+    async def _format_msg(
+        self,
+        msg: Msg,
+    ) -> list[dict[str, Any]]:
+        """Format a single message object into Ollama API format. The tool
+        results are formatted as separate messages.
+
+        Args:
+            msg (`Msg`):
+                The message object to format.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages as a list of dictionaries.
+        """
+        messages: list[dict] = []
+        content_blocks: list = []
+        tool_calls = []
+        images = []
+
+        for block in msg.get_content_blocks():
+            typ = block.get("type")
+            if typ == "text":
+                content_blocks.append({**block})
+
+            elif typ == "tool_use":
+                tool_calls.append(
+                    {
+                        "id": block.get("id"),
+                        "type": "function",
+                        "function": {
                             "name": block.get("name"),
+                            "arguments": block.get("input", {}),
                         },
-                    )
+                    },
+                )
 
-                elif typ == "image":
-                    source_type = block["source"]["type"]
-                    if source_type == "url":
-                        images.append(
-                            _convert_ollama_image_url_to_base64_data(
-                                block["source"]["url"],
-                            ),
-                        )
-                    elif source_type == "base64":
-                        images.append(block["source"]["data"])
+            elif typ == "tool_result":
+                messages.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": block.get("id"),
+                        "content": self.convert_tool_result_to_string(
+                            block.get("output"),  # type: ignore[arg-type]
+                        ),
+                        "name": block.get("name"),
+                    },
+                )
 
-                else:
-                    logger.warning(
-                        "Unsupported block type %s in the message, skipped.",
-                        typ,
+            elif typ == "image":
+                source_type = block["source"]["type"]
+                if source_type == "url":
+                    images.append(
+                        _convert_ollama_image_url_to_base64_data(
+                            block["source"]["url"],
+                        ),
                     )
-            content_msg = "\n".join(
-                content.get("text", "") for content in content_blocks
-            )
-            msg_ollama = {
-                "role": msg.role,
-                "content": content_msg or None,
-            }
+                elif source_type == "base64":
+                    images.append(block["source"]["data"])
+
+            else:
+                logger.warning(
+                    "Unsupported block type %s in the message, skipped.",
+                    typ,
+                )
+        content_msg = "\n".join(
+            content.get("text", "") for content in content_blocks
+        )
+        msg_ollama = {
+            "role": msg.role,
+            "content": content_msg or None,
+        }
 
-            if tool_calls:
-                msg_ollama["tool_calls"] = tool_calls
+        if tool_calls:
+            msg_ollama["tool_calls"] = tool_calls
 
-            if images:
-                msg_ollama["images"] = images
+        if images:
+            msg_ollama["images"] = images
 
-            if msg_ollama["content"] or msg_ollama.get("tool_calls"):
-                messages.append(msg_ollama)
+        if msg_ollama["content"] or msg_ollama.get("tool_calls"):
+            messages.append(msg_ollama)
 
         return messages
 
@@ -167,6 +184,9 @@ class OllamaMultiAgentFormatter(TruncatedFormatterBase):
     ]
     """The list of supported message blocks"""
 
+    prefetch_media_types: list[str] = ["image"]
+    """The types of the media blocks loaded in the formatting"""
+
     def __init__(
         self,
         conversation_history_prompt: str = (
@@ -176,6 +196,7 @@ class OllamaMultiAgentFormatter(TruncatedFormatterBase):
         ),
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
     ) -> None:
         """Initialize the Ollama multi-agent formatter.
 
@@ -187,8 +208,15 @@ class OllamaMultiAgentFormatter(TruncatedFormatterBase):
             max_tokens (`int | None`, optional):
                 The maximum number of tokens allowed in the formatted
                 messages. If `None`, no truncation will be applied.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
         """
-        super().__init__(token_counter=token_counter, max_tokens=max_tokens)
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
         self.conversation_history_prompt = conversation_history_prompt
 
     async def _format_system_message(
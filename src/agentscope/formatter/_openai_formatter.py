@@ -1,14 +1,12 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=too-many-branches
 """The OpenAI formatter for agentscope."""
-import base64
 import json
 import os
 from typing import Any
 from urllib.parse import urlparse
 
-import requests
-
+from ._media_resolver import _collect_media_urls, _get_media_resolver
 from ._truncated_formatter_base import TruncatedFormatterBase
 from .._logging import logger
 from ..message import (
@@ -55,10 +53,7 @@ def _to_openai_image_url(url: str) -> str:
     # Check if it is a local file
     elif os.path.exists(url) and os.path.isfile(url):
         if any(lower_url.endswith(_) for _ in support_image_extensions):
-            with open(url, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode(
-                    "utf-8",
-                )
+            base64_image = _get_media_resolver().load(url)
             extension = parsed_url.path.lower().split(".")[-1]
             mime_type = f"image/{extension}"
             return f"data:{mime_type};base64,{base64_image}"
@@ -78,15 +73,9 @@ def _to_openai_audio_data(source: URLSource | Base64Source) -> dict:
 
         parsed_url = urlparse(source["url"])
 
-        if os.path.exists(source["url"]):
-            with open(source["url"], "rb") as audio_file:
-                data = base64.b64encode(audio_file.read()).decode("utf-8")
-
-        # web url
-        elif parsed_url.scheme != "":
-            response = requests.get(source["url"])
-            response.raise_for_status()
-            data = base64.b64encode(response.content).decode("utf-8")
+        # Local file or web url
+        if os.path.exists(source["url"]) or parsed_url.scheme != "":
+            data = _get_media_resolver().load(source["url"])
 
         else:
             raise ValueError(
@@ -117,6 +106,14 @@ def _to_openai_audio_data(source: URLSource | Base64Source) -> dict:
     raise TypeError(f"Unsupported audio source: {source['type']}.")
 
 
+def _get_openai_media_urls(msgs: list[Msg]) -> list[str]:
+    """Get the local images and the audios that are loaded in the
+    formatting. The web images are passed to the OpenAI API directly."""
+    return [
+        _ for _ in _collect_media_urls(msgs, ["image"]) if os.path.isfile(_)
+    ] + _collect_media_urls(msgs, ["audio"])
+
+
 class OpenAIChatFormatter(TruncatedFormatterBase):
     """The class used to format message objects into the OpenAI API required
     format."""
@@ -139,6 +136,10 @@ class OpenAIChatFormatter(TruncatedFormatterBase):
     ]
     """Supported message blocks for OpenAI API"""
 
+    def _get_media_urls(self, msgs: list[Msg]) -> list[str]:
+        """Get the local images and the audios loaded in the formatting."""
+        return _get_openai_media_urls(msgs)
+
     async def _format(
         self,
         msgs: list[Msg],
@@ -158,92 +159,114 @@ class OpenAIChatFormatter(TruncatedFormatterBase):
 
         messages: list[dict] = []
         for msg in msgs:
-            content_blocks = []
-            tool_calls = []
+            messages.extend(
+                await self._format_with_cache(self._format_msg, msg),
+            )
 
-            for block in msg.get_content_blocks():
-                typ = block.get("type")
-                if typ == "text":
-                    content_blocks.append({**block})
+        return messages
 
-                elif typ == "tool_use":
-                    tool_calls.append(
-                        {
-                            "id": block.get("id"),
-                            "type": "function",
-                            "function": {
-                                "name": block.get("name"),
-                                "arguments": json.dumps(
-                                    block.get("input", {}),
-                                    ensure_ascii=False,
-                                ),
-                            },
-                        },
-                    )
+    async def _format_msg(
+        self,
+        msg: Msg,
+    ) -> list[dict[str, Any]]:
+        """Format a single message object into OpenAI API required
+        format. The tool results are formatted as separate messages.
 
-                elif typ == "tool_result":
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": block.get("id"),
-                            "content": self.convert_tool_result_to_string(
-                                block.get("output"),  # type: ignore[arg-type]
-                            ),
+        Args:
+            msg (`Msg`):
+                The message object to format.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages as a list of dictionaries.
+        """
+        messages: list[dict] = []
+        content_blocks = []
+        tool_calls = []
+
+        for block in msg.get_content_blocks():
+            typ = block.get("type")
+            if typ == "text":
+                content_blocks.append({**block})
+
+            elif typ == "tool_use":
+                tool_calls.append(
+                    {
+                        "id": block.get("id"),
+                        "type": "function",
+                        "function": {
                             "name": block.get("name"),
+                            "arguments": json.dumps(
+                                block.get("input", {}),
+                                ensure_ascii=False,
+                            ),
                         },
-                    )
+                    },
+                )
 
-                elif typ == "image":
-                    source_type = block["source"]["type"]
-                    if source_type == "url":
-                        url = _to_openai_image_url(block["source"]["url"])
+            elif typ == "tool_result":
+                messages.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": block.get("id"),
+                        "content": self.convert_tool_result_to_string(
+                            block.get("output"),  # type: ignore[arg-type]
+                        ),
+                        "name": block.get("name"),
+                    },
+                )
 
-                    elif source_type == "base64":
-                        data = block["source"]["data"]
-                        media_type = block["source"]["media_type"]
-                        url = f"data:{media_type};base64,{data}"
+            elif typ == "image":
+                source_type = block["source"]["type"]
+                if source_type == "url":
+                    url = _to_openai_image_url(block["source"]["url"])
 
-                    else:
-                        raise ValueError(
-                            f"Unsupported image source type: {source_type}",
-                        )
+                elif source_type == "base64":
+                    data = block["source"]["data"]
+                    media_type = block["source"]["media_type"]
+                    url = f"data:{media_type};base64,{data}"
 
-                    content_blocks.append(
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": url,
-                            },
-                        },
+                else:
+                    raise ValueError(
+                        f"Unsupported image source type: {source_type}",
                     )
 
-                elif typ == "audio":
-                    input_audio = _to_openai_audio_data(block["source"])
-                    content_blocks.append(
-                        {
-                            "type": "input_audio",
-                            "input_audio": input_audio,
+                content_blocks.append(
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": url,
                         },
-                    )
+                    },
+                )
 
-                else:
-                    logger.warning(
-                        "Unsupported block type %s in the message, skipped.",
-                        typ,
-                    )
+            elif typ == "audio":
+                input_audio = _to_openai_audio_data(block["source"])
+                content_blocks.append(
+                    {
+                        "type": "input_audio",
+                        "input_audio": input_audio,
+                    },
+                )
+
+            else:
+                logger.warning(
+                    "Unsupported block type %s in the message, skipped.",
+                    typ,
+                )
 
-            msg_openai = {
-                "role": msg.role,
-                "name": msg.name,
-                "content": content_blocks or None,
-            }
+        msg_openai = {
+            "role": msg.role,
+            "name": msg.name,
+            "content": content_blocks or None,
+        }
 
-            if tool_calls:
-                msg_openai["tool_calls"] = tool_calls
+        if tool_calls:
+            msg_openai["tool_calls"] = tool_calls
 
-            # When both content and tool_calls are None, skipped
-            if msg_openai["content"] or msg_openai.get("tool_calls"):
-                messages.append(msg_openai)
+        # When both content and tool_calls are None, skipped
+        if msg_openai["content"] or msg_openai.get("tool_calls"):
+            messages.append(msg_openai)
 
         return messages
 
@@ -283,16 +306,28 @@ class OpenAIMultiAgentFormatter(TruncatedFormatterBase):
         ),
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
     ) -> None:
         """Initialize the OpenAI multi-agent formatter.
 
         Args:
             conversation_history_prompt (`str`):
                 The prompt to use for the conversation history section.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted message groups kept in the
+                formatting cache. Set to `0` to disable the cache.
         """
-        super().__init__(token_counter=token_counter, max_tokens=max_tokens)
+        super().__init__(
+            token_counter=token_counter,
+            max_tokens=max_tokens,
+            cache_size=cache_size,
+        )
         self.conversation_history_prompt = conversation_history_prompt
 
+    def _get_media_urls(self, msgs: list[Msg]) -> list[str]:
+        """Get the local images and the audios loaded in the formatting."""
+        return _get_openai_media_urls(msgs)
+
     async def _format_tool_sequence(
         self,
         msgs: list[Msg],
@@ -1,16 +1,23 @@
 # -*- coding: utf-8 -*-
 """The truncated formatter base class, which allows to truncate the input
 messages."""
+import os
 from abc import ABC
-from copy import deepcopy
+from collections import OrderedDict
+from stat import S_ISREG
 from typing import (
     Any,
     Tuple,
     Literal,
     AsyncGenerator,
+    Awaitable,
+    Callable,
+    Hashable,
 )
 
 from ._formatter_base import FormatterBase
+from ._media_resolver import _collect_media_urls, _get_media_resolver
+from .._utils._common import _freeze
 from ..message import Msg
 from ..token import TokenCounterBase
 from ..tracing import trace_format
@@ -20,10 +27,16 @@ class TruncatedFormatterBase(FormatterBase, ABC):
     """Base class for truncated formatters, which formats input messages into
     required formats with tokens under a specified limit."""
 
+    prefetch_media_types: list[str] = []
+    """The types of the media blocks loaded in the formatting, e.g. "image",
+    "audio" and "video", which are prefetched concurrently by the shared
+    media resolver"""
+
     def __init__(
         self,
         token_counter: TokenCounterBase | None = None,
         max_tokens: int | None = None,
+        cache_size: int = 1024,
     ) -> None:
         """Initialize the TruncatedFormatterBase.
 
@@ -36,6 +49,11 @@ class TruncatedFormatterBase(FormatterBase, ABC):
                 The maximum number of tokens allowed in the formatted
                 messages. If not provided, the formatter will not truncate
                 the messages.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of formatted messages (or message groups)
+                kept in the formatting cache, so that the unchanged messages
+                are not formatted again in the following calls. Set to `0`
+                to disable the cache.
         """
         self.token_counter = token_counter
 
@@ -44,6 +62,19 @@ class TruncatedFormatterBase(FormatterBase, ABC):
         ), "max_tokens must be greater than 0"
         self.max_tokens = max_tokens
 
+        self.cache_size = cache_size
+        self._format_cache: OrderedDict[Hashable, Any] = OrderedDict()
+
+        # The content hash and the media URLs of each message keyed by the
+        # message id, together with a shallow copy of the content they're
+        # computed from
+        self._content_hashes: OrderedDict[
+            str,
+            tuple[Any, int, tuple[str, ...]],
+        ] = OrderedDict()
+        # The stats of the local media files in the current formatting call
+        self._file_stats: dict[str, tuple[int, int] | None] = {}
+
     @trace_format
     async def format(
         self,
@@ -54,6 +85,12 @@ class TruncatedFormatterBase(FormatterBase, ABC):
         counter and max token limit are provided, the messages will be
         truncated to fit the limit.
 
+        .. note:: The input messages are treated as immutable and are not
+         copied. The formatters only copy the blocks they rewrite, so the
+         formatted messages may share nested data (e.g. the tool input and
+         the base64 media data) with the input messages, and shouldn't be
+         modified in place.
+
         Args:
             msgs (`list[Msg]`):
                 The input messages to be formatted.
@@ -66,21 +103,132 @@ class TruncatedFormatterBase(FormatterBase, ABC):
         # Check if the input messages are valid
         self.assert_list_of_msgs(msgs)
 
-        msgs = deepcopy(msgs)
+        # Stat the local media files again in each call, so the changed
+        # files invalidate the cache
+        self._file_stats = {}
+
+        # Load the media concurrently before the formatting, which reads
+        # them from the cache
+        media_urls = self._get_media_urls(msgs)
+        if media_urls:
+            await _get_media_resolver().prefetch(media_urls)
+
+        formatted_msgs = await self._format(msgs)
+        if await self._within_limit(formatted_msgs):
+            return formatted_msgs
+
+        if type(self)._truncate is not TruncatedFormatterBase._truncate:
+            # Respect the customized truncation strategy
+            while True:
+                msgs = await self._truncate(msgs)
+                formatted_msgs = await self._format(msgs)
+                if await self._within_limit(formatted_msgs):
+                    return formatted_msgs
+
+        return await self._truncate_by_budget(msgs)
+
+    def _get_media_urls(self, msgs: list[Msg]) -> list[str]:
+        """Get the local file paths and web URLs of the media that will be
+        loaded in the formatting, i.e. the media blocks with the types in
+        `prefetch_media_types`. Override this method if the formatter only
+        loads some of them.
+
+        Args:
+            msgs (`list[Msg]`):
+                The input messages to be formatted.
+
+        Returns:
+            `list[str]`:
+                The local file paths and web URLs of the media.
+        """
+        if not self.prefetch_media_types:
+            return []
+        return _collect_media_urls(msgs, self.prefetch_media_types)
+
+    async def _within_limit(
+        self,
+        formatted_msgs: list[dict[str, Any]],
+    ) -> bool:
+        """Check if the formatted messages are within the token limit."""
+        if self.max_tokens is None:
+            return True
+        n_tokens = await self._count(formatted_msgs)
+        return n_tokens is None or n_tokens <= self.max_tokens
+
+    async def _truncate_by_budget(
+        self,
+        msgs: list[Msg],
+    ) -> list[dict[str, Any]]:
+        """Truncate the oldest messages to fit the token limit, and return
+        the formatted messages.
+
+        The messages are split into truncation units in one pass, where
+        a tool call is kept together with its tool result. Then the
+        minimum number of the oldest units to drop is found by a binary
+        search, so only O(log n) formatting and counting passes are needed,
+        and the formatting passes mostly hit the formatting cache. The
+        system message is always kept.
+
+        Args:
+            msgs (`list[Msg]`):
+                The input messages, which exceed the token limit.
+
+        Raises:
+            `ValueError`:
+                If the system prompt message already exceeds the token limit,
+                or if there are tool calls without corresponding tool results.
+
+        Returns:
+            `list[dict[str, Any]]`:
+                The formatted messages within the token limit.
+        """
+        start_index = 0
+        if len(msgs) > 0 and msgs[0].role == "system":
+            start_index = 1
+
+        # The candidate cut points, i.e. the indices where the preceding
+        # messages have no pending tool calls
+        cut_points = []
+        tool_call_ids = set()
+        for i in range(start_index, len(msgs)):
+            for block in msgs[i].get_content_blocks("tool_use"):
+                tool_call_ids.add(block["id"])
+            for block in msgs[i].get_content_blocks("tool_result"):
+                tool_call_ids.discard(block["id"])
+            if len(tool_call_ids) == 0:
+                cut_points.append(i + 1)
+
+        # Find the first cut point that fits the limit, assuming the number
+        # of tokens decreases as more messages are dropped
+        low, high = 0, len(cut_points)
+        best: list[dict[str, Any]] | None = None
+        while low < high:
+            mid = (low + high) // 2
+            formatted_msgs = await self._format(
+                msgs[:start_index] + msgs[cut_points[mid] :],
+            )
+            if await self._within_limit(formatted_msgs):
+                best = formatted_msgs
+                high = mid
+            else:
+                low = mid + 1
+
+        if best is not None:
+            return best
 
-        while True:
-            formatted_msgs = await self._format(msgs)
-            n_tokens = await self._count(formatted_msgs)
+        if len(tool_call_ids) > 0:
+            raise ValueError(
+                "The input messages contains tool call(s) that do not have "
+                f"the corresponding tool result(s): {tool_call_ids}. ",
+            )
 
-            if (
-                n_tokens is None
-                or self.max_tokens is None
-                or n_tokens <= self.max_tokens
-            ):
-                return formatted_msgs
+        if start_index == 1:
+            raise ValueError(
+                f"The system prompt message already exceeds the token "
+                f"limit ({self.max_tokens} tokens).",
+            )
 
-            # truncate the input messages
-            msgs = await self._truncate(msgs)
+        return await self._format([])
 
     async def _format(self, msgs: list[Msg]) -> list[dict[str, Any]]:
         """Format the input messages into the required format. This method
@@ -90,7 +238,10 @@ class TruncatedFormatterBase(FormatterBase, ABC):
         start_index = 0
         if len(msgs) > 0 and msgs[0].role == "system":
             formatted_msgs.append(
-                await self._format_system_message(msgs[0]),
+                await self._format_with_cache(
+                    self._format_system_message,
+                    msgs[0],
+                ),
             )
             start_index = 1
 
@@ -99,11 +250,15 @@ class TruncatedFormatterBase(FormatterBase, ABC):
             match typ:
                 case "tool_sequence":
                     formatted_msgs.extend(
-                        await self._format_tool_sequence(group),
+                        await self._format_with_cache(
+                            self._format_tool_sequence,
+                            group,
+                        ),
                     )
                 case "agent_message":
                     formatted_msgs.extend(
-                        await self._format_agent_message(
+                        await self._format_with_cache(
+                            self._format_agent_message,
                             group,
                             is_first_agent_message,
                         ),
@@ -112,6 +267,128 @@ class TruncatedFormatterBase(FormatterBase, ABC):
 
         return formatted_msgs
 
+    async def _format_with_cache(
+        self,
+        format_func: Callable[..., Awaitable[Any]],
+        msgs: Msg | list[Msg],
+        *args: Hashable,
+    ) -> Any:
+        """Call `format_func(msgs, *args)` and memoize its output, keyed by
+        the function name, the fingerprints of the messages and the extra
+        arguments. So that only the newly appended or changed messages are
+        formatted in the following calls.
+
+        Args:
+            format_func (`Callable[..., Awaitable[Any]]`):
+                The async formatting function, which returns a formatted
+                message or a list of formatted messages.
+            msgs (`Msg | list[Msg]`):
+                The message or the message group to be formatted.
+            *args (`Hashable`):
+                The extra arguments passed to the formatting function.
+
+        Returns:
+            `Any`:
+                The formatted message or messages. The formatted messages
+                are shallow copies of the cached ones, so modifying their
+                top-level fields won't pollute the cache.
+        """
+        if not self.cache_size:
+            return await format_func(msgs, *args)
+
+        if isinstance(msgs, Msg):
+            fingerprints = self._get_msg_fingerprint(msgs)
+            cacheable = fingerprints is not None
+        else:
+            fingerprints = tuple(self._get_msg_fingerprint(_) for _ in msgs)
+            cacheable = None not in fingerprints
+
+        if not cacheable:
+            return await format_func(msgs, *args)
+
+        key = (format_func.__name__, fingerprints, args)
+        if key in self._format_cache:
+            self._format_cache.move_to_end(key)
+            formatted = self._format_cache[key]
+        else:
+            formatted = await format_func(msgs, *args)
+            self._format_cache[key] = formatted
+            while len(self._format_cache) > self.cache_size:
+                self._format_cache.popitem(last=False)
+
+        if isinstance(formatted, dict):
+            return {**formatted}
+        return [{**_} for _ in formatted]
+
+    def _get_msg_fingerprint(self, msg: Msg) -> Hashable | None:
+        """Get the fingerprint of the message for the formatting cache, which
+        consists of the message id and the hash of its content. The local
+        media files are identified by their modification time and size, so
+        that the cache is invalidated when they are changed.
+
+        .. note:: The content hash is memoized per message and reused while
+         the content equals the memoized shallow copy, so only the new or
+         changed messages are hashed again. The blocks shouldn't be modified
+         in place.
+
+        Args:
+            msg (`Msg`):
+                The message object.
+
+        Returns:
+            `Hashable | None`:
+                The fingerprint, or `None` if the content is not hashable.
+        """
+        content = msg.content
+        memo = self._content_hashes.get(msg.id)
+        # The list comparison checks the identity of the blocks first, so
+        # it's cheap for the unchanged messages
+        if memo is None or memo[0] != content:
+            try:
+                content_hash = hash(_freeze(content))
+            except TypeError:
+                return None
+            urls = tuple(
+                block["source"].get("url", "")
+                for block in (content if isinstance(content, list) else [])
+                if isinstance(block.get("source"), dict)
+                and block["source"].get("type") == "url"
+            )
+            memo = (
+                list(content) if isinstance(content, list) else content,
+                content_hash,
+                urls,
+            )
+            self._content_hashes[msg.id] = memo
+            while len(self._content_hashes) > self.cache_size:
+                self._content_hashes.popitem(last=False)
+        else:
+            self._content_hashes.move_to_end(msg.id)
+
+        file_stats = ()
+        if memo[2]:
+            file_stats = tuple(
+                _ for _ in map(self._get_file_stat, memo[2]) if _ is not None
+            )
+        return msg.id, msg.name, msg.role, memo[1], file_stats
+
+    def _get_file_stat(self, url: str) -> tuple[int, int] | None:
+        """Get the modification time and the size of the local file, or
+        `None` if the URL isn't a local file. Each file is only stat once
+        in a formatting call."""
+        if url not in self._file_stats:
+            try:
+                stat = os.stat(url)
+            except (OSError, ValueError):
+                self._file_stats[url] = None
+            else:
+                self._file_stats[url] = (
+                    (stat.st_mtime_ns, stat.st_size)
+                    if S_ISREG(stat.st_mode)
+                    else None
+                )
+        return self._file_stats[url]
+
     async def _format_system_message(
         self,
         msg: Msg,
@@ -225,6 +502,11 @@ class TruncatedFormatterBase(FormatterBase, ABC):
         if self.token_counter is None:
             return None
 
+        if self.max_tokens is not None:
+            return await self.token_counter.count_for_budget(
+                msgs,
+                self.max_tokens,
+            )
         return await self.token_counter.count(msgs)
 
     @staticmethod
@@ -3,6 +3,7 @@
 
 from ._memory_base import MemoryBase
 from ._in_memory_memory import InMemoryMemory
+from ._sqlite_memory import SQLiteMemory
 from ._long_term_memory_base import LongTermMemoryBase
 from ._mem0_long_term_memory import Mem0LongTermMemory
 
@@ -10,6 +11,7 @@ from ._mem0_long_term_memory import Mem0LongTermMemory
 __all__ = [
     "MemoryBase",
     "InMemoryMemory",
+    "SQLiteMemory",
     "LongTermMemoryBase",
     "Mem0LongTermMemory",
 ]
@@ -1,24 +1,60 @@
 # -*- coding: utf-8 -*-
 """The dialogue memory class"""
-
-from typing import Union, Iterable, Any
+from bisect import bisect_right, insort
+from typing import Union, Iterable, Any, Iterator
 
 from ._memory_base import MemoryBase
 from ..message import Msg
 
 
 class InMemoryMemory(MemoryBase):
-    """The in-memory memory class for storing messages."""
+    """The in-memory memory class for storing messages.
+
+    In the indexed mode, the memory maintains an id-to-position index, so
+    that deduplication in `add`, `get_by_id` and `delete_by_id` cost O(1)
+    per message. Deleted messages are marked as tombstones and removed
+    lazily by a compaction, which is triggered when the ratio of tombstones
+    exceeds `compact_ratio`, or when the full memory is requested.
+    """
 
     def __init__(
         self,
+        indexed: bool = False,
+        compact_ratio: float = 0.5,
     ) -> None:
-        """Initialize the in-memory memory object."""
+        """Initialize the in-memory memory object.
+
+        Args:
+            indexed (`bool`, defaults to `False`):
+                Whether to maintain an id-to-position index for the stored
+                messages and delete messages with tombstones. Note in the
+                indexed mode, the messages should be modified through the
+                memory methods rather than the `content` attribute directly.
+            compact_ratio (`float`, defaults to `0.5`):
+                The ratio of tombstones to the stored messages that triggers
+                a compaction. Only used in the indexed mode.
+        """
         super().__init__()
+
+        if not 0 < compact_ratio <= 1:
+            raise ValueError(
+                f"The compact_ratio should be in (0, 1], but got "
+                f"{compact_ratio}.",
+            )
+
+        self.indexed = indexed
+        self.compact_ratio = compact_ratio
+
         self.content: list[Msg] = []
 
+        # The positions of the messages in `content`, keyed by message id
+        self._id_index: dict[str, list[int]] = {}
+        # The sorted positions of the deleted messages in `content`
+        self._tombstones: list[int] = []
+
     def state_dict(self) -> dict:
         """Convert the current memory into JSON data format."""
+        self._compact()
         return {
             "content": [_.to_dict() for _ in self.content],
         }
@@ -42,10 +78,11 @@ class InMemoryMemory(MemoryBase):
         for data in state_dict["content"]:
             data.pop("type", None)
             self.content.append(Msg.from_dict(data))
+        self._rebuild_index()
 
     async def size(self) -> int:
         """The size of the memory."""
-        return len(self.content)
+        return len(self.content) - len(self._tombstones)
 
     async def retrieve(self, *args: Any, **kwargs: Any) -> None:
         """Retrieve items from the memory."""
@@ -64,16 +101,71 @@ class InMemoryMemory(MemoryBase):
         if isinstance(index, int):
             index = [index]
 
-        invalid_index = [_ for _ in index if 0 > _ or _ >= len(self.content)]
+        index = set(index)
+        size = await self.size()
+
+        invalid_index = [_ for _ in index if 0 > _ or _ >= size]
 
         if invalid_index:
             raise IndexError(
                 f"The index {invalid_index} does not exist.",
             )
 
-        self.content = [
-            _ for idx, _ in enumerate(self.content) if idx not in index
-        ]
+        if not self.indexed:
+            self.content = [
+                _ for idx, _ in enumerate(self.content) if idx not in index
+            ]
+            return
+
+        # Convert all indexes before marking, since marking shifts the
+        # positions of the following messages
+        positions = [self._to_position(_) for _ in index]
+        for position in positions:
+            self._mark_deleted(position)
+        self._maybe_compact()
+
+    async def delete_by_id(self, msg_ids: Union[Iterable[str], str]) -> None:
+        """Delete the messages with the given id(s). The ids that don't exist
+        in the memory are ignored.
+
+        Args:
+            msg_ids (`Union[Iterable[str], str]`):
+                The id(s) of the messages to delete.
+        """
+        if isinstance(msg_ids, str):
+            msg_ids = [msg_ids]
+
+        if not self.indexed:
+            msg_ids = set(msg_ids)
+            self.content = [_ for _ in self.content if _.id not in msg_ids]
+            return
+
+        for msg_id in msg_ids:
+            for position in self._id_index.get(msg_id, [])[:]:
+                self._mark_deleted(position)
+        self._maybe_compact()
+
+    async def get_by_id(self, msg_id: str) -> Msg | None:
+        """Get the message with the given id.
+
+        Args:
+            msg_id (`str`):
+                The id of the message.
+
+        Returns:
+            `Msg | None`:
+                The first message with the given id, or `None` if not found.
+        """
+        if not self.indexed:
+            for msg in self.content:
+                if msg.id == msg_id:
+                    return msg
+            return None
+
+        positions = self._id_index.get(msg_id)
+        if not positions:
+            return None
+        return self.content[positions[0]]
 
     async def add(
         self,
@@ -108,15 +200,109 @@ class InMemoryMemory(MemoryBase):
                     f"but got {type(msg)}.",
                 )
 
-        if not allow_duplicates:
-            existing_ids = [_.id for _ in self.content]
-            memories = [_ for _ in memories if _.id not in existing_ids]
-        self.content.extend(memories)
+        if not self.indexed:
+            if not allow_duplicates:
+                existing_ids = {_.id for _ in self.content}
+                memories = [_ for _ in memories if _.id not in existing_ids]
+            self.content.extend(memories)
+            return
+
+        for msg in memories:
+            if not allow_duplicates and msg.id in self._id_index:
+                continue
+            self._id_index.setdefault(msg.id, []).append(len(self.content))
+            self.content.append(msg)
 
     async def get_memory(self) -> list[Msg]:
         """Get the memory content."""
+        self._compact()
         return self.content
 
+    async def iter_memory(
+        self,
+        start: int = 0,
+        stop: int | None = None,
+    ) -> Iterator[Msg]:
+        """Get an iterator over a range of the memory without copying the
+        content, e.g. the latest 10 messages by `iter_memory(-10)`. The
+        memory shouldn't be modified while iterating.
+
+        Args:
+            start (`int`, defaults to `0`):
+                The start index of the range, negative values count from the
+                end of the memory.
+            stop (`int | None`, defaults to `None`):
+                The stop index (exclusive) of the range, negative values count
+                from the end of the memory. If `None`, iterate to the end.
+
+        Returns:
+            `Iterator[Msg]`:
+                An iterator over the messages in the given range.
+        """
+        start, stop, _ = slice(start, stop).indices(await self.size())
+        if start >= stop:
+            return iter(())
+
+        if not self._tombstones:
+            return (self.content[_] for _ in range(start, stop))
+
+        first = self._to_position(start)
+        last = self._to_position(stop - 1)
+        tombstones = set(
+            self._tombstones[bisect_right(self._tombstones, first) :],
+        )
+        return (
+            self.content[_]
+            for _ in range(first, last + 1)
+            if _ not in tombstones
+        )
+
     async def clear(self) -> None:
         """Clear the memory content."""
         self.content = []
+        self._id_index = {}
+        self._tombstones = []
+
+    def _to_position(self, index: int) -> int:
+        """Convert the index among the remaining messages into the position
+        in `content` by skipping the tombstones."""
+        position = index
+        while True:
+            # The number of tombstones before or at the current position
+            new_position = index + bisect_right(self._tombstones, position)
+            if new_position == position:
+                return position
+            position = new_position
+
+    def _mark_deleted(self, position: int) -> None:
+        """Mark the message at the given position in `content` as deleted."""
+        msg_id = self.content[position].id
+        positions = self._id_index[msg_id]
+        positions.remove(position)
+        if not positions:
+            self._id_index.pop(msg_id)
+        insort(self._tombstones, position)
+
+    def _maybe_compact(self) -> None:
+        """Compact the content if there are too many tombstones."""
+        if len(self._tombstones) > self.compact_ratio * len(self.content):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Remove the tombstones from the content and rebuild the index."""
+        if not self._tombstones:
+            return
+
+        tombstones = set(self._tombstones)
+        self.content = [
+            _ for idx, _ in enumerate(self.content) if idx not in tombstones
+        ]
+        self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the id index and clear the tombstones."""
+        self._tombstones = []
+        self._id_index = {}
+        if self.indexed:
+            for idx, msg in enumerate(self.content):
+                self._id_index.setdefault(msg.id, []).append(idx)
@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+"""The SQLite-backed memory class, which keeps only the recent messages in
+RAM and pages the older ones in from the disk on demand."""
+import json
+import sqlite3
+import threading
+from typing import Any, Iterable, Union
+
+from ._memory_base import MemoryBase
+from .._utils._common import _run_in_io_executor
+from ..message import Msg
+
+# The maximum number of the bound variables in a query, which is under the
+# limit (999) of the older SQLite builds
+_MAX_VARIABLES = 500
+
+
+class SQLiteMemory(MemoryBase):
+    """The memory class that appends messages to a SQLite table.
+
+    Only the latest `window_size` messages are kept in RAM, the older
+    messages are paged in lazily from the database when requested by
+    `get_memory`.
+
+    The stored rows are never removed, and their sequence numbers only
+    grow. The memory content is the rows within a list of seq segments,
+    which are narrowed by `delete` and `clear`, and extended by `add`. Its
+    state dictionary only records the database path, the memory id and the
+    segments, so saving a checkpoint costs O(1) regardless of the
+    conversation length, and every saved checkpoint stays restorable. The
+    latest segments are also stored in the database, so a new instance
+    resumes from them.
+
+    The database is accessed in the I/O executor, so the async methods don't
+    block the event loop.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        memory_id: str = "default",
+        window_size: int = 100,
+        page_size: int = 500,
+    ) -> None:
+        """Initialize the SQLite memory.
+
+        Args:
+            db_path (`str`):
+                The path to the SQLite database file.
+            memory_id (`str`, defaults to `"default"`):
+                The id to distinguish different memories stored in the same
+                database file.
+            window_size (`int`, defaults to `100`):
+                The number of recent messages kept in RAM.
+            page_size (`int`, defaults to `500`):
+                The number of messages fetched from the database at a time
+                when paging in the older messages.
+        """
+        super().__init__()
+
+        if window_size <= 0 or page_size <= 0:
+            raise ValueError(
+                "The window_size and page_size should be positive, but got "
+                f"{window_size} and {page_size}.",
+            )
+
+        self.db_path = db_path
+        self.memory_id = memory_id
+        self.window_size = window_size
+        self.page_size = page_size
+
+        self._conn: sqlite3.Connection | None = None
+        # The connection and the window are shared by the executor threads
+        self._lock = threading.RLock()
+        # The recent messages as (seq, msg) pairs in ascending order of seq
+        self._window: list[tuple[int, Msg]] = []
+        self._size = 0
+        # The inclusive [start, end] seq ranges of the memory content
+        self._segments: list[list[int]] = []
+
+        with self._lock:
+            self._segments = self._read_head()
+            self._load_from_db()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get the database connection, creating the table if needed."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS as_memory (
+                    memory_id TEXT,
+                    seq INTEGER,
+                    msg_id TEXT,
+                    msg_data JSON,
+                    PRIMARY KEY (memory_id, seq)
+                )
+                """,
+            )
+            self._conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS as_memory_msg_id
+                ON as_memory (memory_id, msg_id)
+                """,
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS as_memory_head (
+                    memory_id TEXT PRIMARY KEY,
+                    segments JSON
+                )
+                """,
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _seq_filter(self) -> str:
+        """The SQL condition on the seqs of the memory content, where the
+        bounds are inlined integers, so the number of the segments isn't
+        limited by the bound variables."""
+        if not self._segments:
+            return "0"
+        return (
+            "("
+            + " OR ".join(
+                f"seq BETWEEN {int(start)} AND {int(end)}"
+                for start, end in self._segments
+            )
+            + ")"
+        )
+
+    def _read_head(self) -> list[list[int]]:
+        """Read the latest segments of the memory from the database, which
+        are all the stored rows for the databases without them."""
+        conn = self._get_conn()
+        row = conn.execute(
+            "SELECT segments FROM as_memory_head WHERE memory_id = ?",
+            (self.memory_id,),
+        ).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+
+        last_seq = conn.execute(
+            "SELECT MAX(seq) FROM as_memory WHERE memory_id = ?",
+            (self.memory_id,),
+        ).fetchone()[0]
+        return [[1, last_seq]] if last_seq else []
+
+    def _write_head(self) -> None:
+        """Store the segments as the latest ones of the memory, which is
+        committed by the caller."""
+        self._get_conn().execute(
+            "INSERT OR REPLACE INTO as_memory_head VALUES (?, ?)",
+            (self.memory_id, json.dumps(self._segments)),
+        )
+
+    def _load_from_db(self) -> None:
+        """Load the size and the recent window of the segments from the
+        database."""
+        conn = self._get_conn()
+        self._size = conn.execute(
+            f"""
+            SELECT COUNT(*) FROM as_memory
+            WHERE memory_id = ? AND {self._seq_filter()}
+            """,
+            (self.memory_id,),
+        ).fetchone()[0]
+
+        rows = conn.execute(
+            f"""
+            SELECT seq, msg_data FROM as_memory
+            WHERE memory_id = ? AND {self._seq_filter()}
+            ORDER BY seq DESC LIMIT ?
+            """,
+            (self.memory_id, self.window_size),
+        ).fetchall()
+        self._window = [
+            (seq, Msg.from_dict(json.loads(data)))
+            for seq, data in reversed(rows)
+        ]
+
+    def state_dict(self) -> dict:
+        """Get the state dictionary, which is a pointer to the stored
+        messages rather than the messages themselves."""
+        return {
+            "db_path": self.db_path,
+            "memory_id": self.memory_id,
+            "cursor": self._segments[-1][1] if self._segments else 0,
+            "segments": [[*_] for _ in self._segments],
+        }
+
+    def load_state_dict(
+        self,
+        state_dict: dict,
+        strict: bool = True,
+    ) -> None:
+        """Load the state dictionary, so that the memory is restored to the
+        time the state dictionary was saved. The messages stored after it
+        are kept in the database, but not in the memory content.
+
+        Args:
+            state_dict (`dict`):
+                The state dictionary to load, which should have "db_path",
+                "memory_id" and "cursor" fields, and optionally the
+                "segments" field. Without the segments, the memory content is
+                all the stored messages up to the cursor.
+            strict (`bool`, defaults to `True`):
+                If `True`, raises an error if any key in the module is not
+                found in the state_dict. If `False`, skips missing keys.
+        """
+        for key in ["db_path", "memory_id", "cursor"]:
+            if strict and key not in state_dict:
+                raise KeyError(
+                    f"Key '{key}' not found in state_dict. Ensure that "
+                    f"the state_dict contains all required keys.",
+                )
+
+        with self._lock:
+            db_path = state_dict.get("db_path", self.db_path)
+            if db_path != self.db_path:
+                self.close()
+                self.db_path = db_path
+            self.memory_id = state_dict.get("memory_id", self.memory_id)
+
+            if "segments" in state_dict:
+                self._segments = [[*_] for _ in state_dict["segments"]]
+            elif "cursor" in state_dict:
+                cursor = state_dict["cursor"]
+                self._segments = [[1, cursor]] if cursor else []
+            else:
+                self._segments = self._read_head()
+
+            self._write_head()
+            self._get_conn().commit()
+            self._load_from_db()
+
+    async def size(self) -> int:
+        """The size of the memory."""
+        return self._size
+
+    async def retrieve(self, *args: Any, **kwargs: Any) -> None:
+        """Retrieve items from the memory."""
+        raise NotImplementedError(
+            "The retrieve method is not implemented in "
+            f"{self.__class__.__name__} class.",
+        )
+
+    async def delete(self, index: Union[Iterable, int]) -> None:
+        """Delete the specified item by index(es).
+
+        Args:
+            index (`Union[Iterable, int]`):
+                The index to delete.
+        """
+        if isinstance(index, int):
+            index = [index]
+
+        index = set(index)
+        invalid_index = [_ for _ in index if 0 > _ or _ >= self._size]
+
+        if invalid_index:
+            raise IndexError(
+                f"The index {invalid_index} does not exist.",
+            )
+
+        await _run_in_io_executor(self._delete_rows, index)
+
+    def _delete_rows(self, index: set[int]) -> None:
+        """Remove the messages at the given indexes from the segments."""
+        with self._lock:
+            conn = self._get_conn()
+            window_start = self._size - len(self._window)
+            seqs = set()
+            for idx in index:
+                if idx >= window_start:
+                    seqs.add(self._window[idx - window_start][0])
+                else:
+                    seqs.add(
+                        conn.execute(
+                            f"""
+                            SELECT seq FROM as_memory
+                            WHERE memory_id = ? AND {self._seq_filter()}
+                            ORDER BY seq LIMIT 1 OFFSET ?
+                            """,
+                            (self.memory_id, idx),
+                        ).fetchone()[0],
+                    )
+
+            segments = []
+            for start, end in self._segments:
+                for seq in sorted(_ for _ in seqs if start <= _ <= end):
+                    if start < seq:
+                        segments.append([start, seq - 1])
+                    start = seq + 1
+                if start <= end:
+                    segments.append([start, end])
+            self._segments = segments
+
+            self._write_head()
+            conn.commit()
+            self._load_from_db()
+
+    async def add(
+        self,
+        memories: Union[list[Msg], Msg, None],
+        allow_duplicates: bool = False,
+    ) -> None:
+        """Append message(s) into the memory.
+
+        Args:
+            memories (`Union[list[Msg], Msg, None]`):
+                The message to add.
+            allow_duplicates (`bool`, defaults to `False`):
+                If allow adding duplicate messages (with the same id) into
+                the memory.
+        """
+        if memories is None:
+            return
+
+        if isinstance(memories, Msg):
+            memories = [memories]
+
+        if not isinstance(memories, list):
+            raise TypeError(
+                f"The memories should be a list of Msg or a single Msg, "
+                f"but got {type(memories)}.",
+            )
+
+        for msg in memories:
+            if not isinstance(msg, Msg):
+                raise TypeError(
+                    f"The memories should be a list of Msg or a single Msg, "
+                    f"but got {type(msg)}.",
+                )
+
+        await _run_in_io_executor(
+            self._insert_rows,
+            memories,
+            allow_duplicates,
+        )
+
+    def _get_existing_ids(self, msg_ids: list[str]) -> set[str]:
+        """Get the ids among the given ones that are already in the memory,
+        where the ids are queried in chunks to respect the limit of the bound
+        variables."""
+        conn = self._get_conn()
+        existing_ids = set()
+        for i in range(0, len(msg_ids), _MAX_VARIABLES):
+            chunk = msg_ids[i : i + _MAX_VARIABLES]
+            existing_ids.update(
+                row[0]
+                for row in conn.execute(
+                    f"""
+                    SELECT msg_id FROM as_memory
+                    WHERE memory_id = ? AND {self._seq_filter()}
+                    AND msg_id IN ({",".join("?" * len(chunk))})
+                    """,
+                    (self.memory_id, *chunk),
+                )
+            )
+        return existing_ids
+
+    def _insert_rows(
+        self,
+        memories: list[Msg],
+        allow_duplicates: bool,
+    ) -> None:
+        """Insert the messages into the database and the window."""
+        with self._lock:
+            conn = self._get_conn()
+            if not allow_duplicates and memories:
+                existing_ids = self._get_existing_ids([_.id for _ in memories])
+                memories = [_ for _ in memories if _.id not in existing_ids]
+
+            if not memories:
+                return
+
+            # Continue after all the stored rows, including the ones out of
+            # the segments, so the seqs in the saved checkpoints are never
+            # reused
+            last_seq = (
+                conn.execute(
+                    "SELECT MAX(seq) FROM as_memory WHERE memory_id = ?",
+                    (self.memory_id,),
+                ).fetchone()[0]
+                or 0
+            )
+            rows = []
+            for seq, msg in enumerate(memories, start=last_seq + 1):
+                rows.append(
+                    (
+                        self.memory_id,
+                        seq,
+                        msg.id,
+                        json.dumps(msg.to_dict(), ensure_ascii=False),
+                    ),
+                )
+                self._window.append((seq, msg))
+
+            if self._segments and self._segments[-1][1] == last_seq:
+                self._segments[-1][1] = last_seq + len(rows)
+            else:
+                self._segments.append([last_seq + 1, last_seq + len(rows)])
+
+            conn.executemany(
+                "INSERT INTO as_memory VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._write_head()
+            conn.commit()
+
+            self._size += len(rows)
+            self._window = self._window[-self.window_size :]
+
+    async def get_memory(self, recent_n: int | None = None) -> list[Msg]:
+        """Get the memory content. The messages out of the in-RAM window
+        are paged in from the database and not kept resident.
+
+        Args:
+            recent_n (`int | None`, optional):
+                Only return the latest `recent_n` messages. If `None`, return
+                all the messages.
+
+        Returns:
+            `list[Msg]`:
+                The messages in the memory in chronological order.
+        """
+        return await _run_in_io_executor(self._read_messages, recent_n)
+
+    def _read_messages(self, recent_n: int | None) -> list[Msg]:
+        """Read the latest messages from the window and the database."""
+        with self._lock:
+            if recent_n is None or recent_n > self._size:
+                recent_n = self._size
+
+            if recent_n <= len(self._window):
+                return [
+                    msg
+                    for _, msg in self._window[len(self._window) - recent_n :]
+                ]
+
+            # Page in the older messages by the seq cursor
+            n_older = recent_n - len(self._window)
+            first_window_seq = self._window[0][0]
+            conn = self._get_conn()
+            cursor = conn.execute(
+                f"""
+                SELECT seq FROM as_memory
+                WHERE memory_id = ? AND {self._seq_filter()} AND seq < ?
+                ORDER BY seq DESC LIMIT 1 OFFSET ?
+                """,
+                (self.memory_id, first_window_seq, n_older - 1),
+            ).fetchone()[0]
+
+            msgs = []
+            while len(msgs) < n_older:
+                rows = conn.execute(
+                    f"""
+                    SELECT seq, msg_data FROM as_memory
+                    WHERE memory_id = ? AND {self._seq_filter()}
+                    AND seq >= ? AND seq < ?
+                    ORDER BY seq LIMIT ?
+                    """,
+                    (
+                        self.memory_id,
+                        cursor,
+                        first_window_seq,
+                        min(self.page_size, n_older - len(msgs)),
+                    ),
+                ).fetchall()
+                if not rows:
+                    break
+                msgs.extend(
+                    Msg.from_dict(json.loads(data)) for _, data in rows
+                )
+                cursor = rows[-1][0] + 1
+
+            return msgs + [msg for _, msg in self._window]
+
+    async def clear(self) -> None:
+        """Clear the memory content."""
+        await _run_in_io_executor(self._clear_segments)
+
+    def _clear_segments(self) -> None:
+        """Empty the segments, where the stored messages are kept for the
+        saved checkpoints."""
+        with self._lock:
+            self._segments = []
+            self._write_head()
+            self._get_conn().commit()
+            self._window = []
+            self._size = 0
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -2,7 +2,24 @@
 """The model module."""
 
 from ._model_base import ChatModelBase
-from ._model_response import ChatResponse
+from ._model_response import (
+    ChatBatchResponse,
+    ChatResponse,
+    ChatResponseSnapshot,
+)
+from ._hedged_model import HedgedChatModel
+from ._client_registry import HTTPClientRegistry, get_client_registry
+from ._latency import (
+    LatencyAggregator,
+    LatencyHistogram,
+    get_latency_aggregator,
+)
+from ._rate_limiter import RateLimiter, get_shared_rate_limiter
+from ._response_cache import (
+    ResponseCacheBase,
+    InMemoryResponseCache,
+    FileResponseCache,
+)
 from ._dashscope_model import DashScopeChatModel
 from ._openai_model import OpenAIChatModel
 from ._anthropic_model import AnthropicChatModel
@@ -12,6 +29,19 @@ from ._gemini_model import GeminiChatModel
 __all__ = [
     "ChatModelBase",
     "ChatResponse",
+    "ChatBatchResponse",
+    "ChatResponseSnapshot",
+    "HedgedChatModel",
+    "HTTPClientRegistry",
+    "get_client_registry",
+    "LatencyAggregator",
+    "LatencyHistogram",
+    "get_latency_aggregator",
+    "RateLimiter",
+    "get_shared_rate_limiter",
+    "ResponseCacheBase",
+    "InMemoryResponseCache",
+    "FileResponseCache",
     "DashScopeChatModel",
     "OpenAIChatModel",
     "AnthropicChatModel",
@@ -11,18 +11,17 @@ from typing import (
     Literal,
     Type,
 )
-from collections import OrderedDict
 
 from pydantic import BaseModel
 
+from ._batch import _poll_batch
+from ._client_registry import get_client_registry, _get_http_module
 from ._model_base import ChatModelBase
-from ._model_response import ChatResponse
-from ._model_usage import ChatUsage
+from ._latency import _StreamLatencyTracker
+from ._model_response import ChatResponse, ChatResponseSnapshot
+from ._model_usage import ChatUsage, _get_usage_field
 from .._logging import logger
-from .._utils._common import (
-    _json_loads_with_repair,
-    _create_tool_from_base_model,
-)
+from .._utils._common import _create_tool_from_base_model
 from ..message import TextBlock, ToolUseBlock, ThinkingBlock
 from ..tracing import trace_llm
 from ..types._json import JSONSerializableObject
@@ -34,19 +33,28 @@ else:
     Message = "anthropic.types.message.Message"
     AsyncStream = "anthropic.AsyncStream"
 
+_MAX_CACHE_BREAKPOINTS = 4
+"""The maximum number of the prompt cache breakpoints in a request"""
+
 
 class AnthropicChatModel(ChatModelBase):
     """The Anthropic model wrapper for AgentScope."""
 
+    supports_provider_batch: bool = True
+    """Whether the model supports the batch endpoint of the provider"""
+
     def __init__(
         self,
         model_name: str,
         api_key: str | None = None,
         max_tokens: int = 2048,
         stream: bool = True,
+        stream_delta: bool = False,
         thinking: dict | None = None,
         client_args: dict | None = None,
         generate_kwargs: dict[str, JSONSerializableObject] | None = None,
+        cache_tools: bool = False,
+        shared_client: bool = False,
     ) -> None:
         """Initialize the Anthropic chat model.
 
@@ -57,6 +65,9 @@ class AnthropicChatModel(ChatModelBase):
                 The anthropic API key.
             stream (`bool`):
                 The streaming output or not
+            stream_delta (`bool`, defaults to `False`):
+                Whether the streaming chunks only carry the new content, with
+                the full content materialized on demand from the snapshot.
             max_tokens (`int`):
                 Limit the maximum token count the model can generate.
             thinking (`dict | None`, default `None`):
@@ -76,6 +87,17 @@ class AnthropicChatModel(ChatModelBase):
              optional):
                 The extra keyword arguments used in Gemini API generation,
                 e.g. `temperature`, `seed`.
+            cache_tools (`bool`, defaults to `False`):
+                Whether to mark a prompt cache breakpoint after the tool
+                schemas, so that the tool schemas are read from the prompt
+                cache of Anthropic across calls. The breakpoints of the
+                messages are marked by the `AnthropicChatFormatter`, and a
+                `ValueError` is raised if there are more than 4 breakpoints
+                in total.
+            shared_client (`bool`, defaults to `False`):
+                Whether to use the shared client from the client registry,
+                which reuses the keep-alive connections across the instances
+                with the same API key and client arguments.
         """
 
         try:
@@ -86,15 +108,35 @@ class AnthropicChatModel(ChatModelBase):
                 "`pip install anthropic`.",
             ) from e
 
-        super().__init__(model_name, stream)
-
-        self.client = anthropic.AsyncAnthropic(
-            api_key=api_key,
-            **(client_args or {}),
-        )
+        super().__init__(model_name, stream, stream_delta)
+
+        client_args = client_args or {}
+        if shared_client:
+            self.client = get_client_registry().get_client(
+                "anthropic",
+                lambda transport: anthropic.AsyncAnthropic(
+                    api_key=api_key,
+                    http_client=anthropic.DefaultAsyncHttpxClient(
+                        transport=transport,
+                    ),
+                    **client_args,
+                ),
+                base_url=client_args.get("base_url"),
+                api_key=api_key,
+                options=client_args,
+                http_module=_get_http_module(
+                    anthropic.DefaultAsyncHttpxClient,
+                ),
+            )
+        else:
+            self.client = anthropic.AsyncAnthropic(
+                api_key=api_key,
+                **client_args,
+            )
         self.max_tokens = max_tokens
         self.thinking = thinking
         self.generate_kwargs = generate_kwargs or {}
+        self.cache_tools = cache_tools
 
     @trace_llm
     async def __call__(
@@ -169,6 +211,45 @@ class AnthropicChatModel(ChatModelBase):
             `ChatResponse | AsyncGenerator[ChatResponse, None]`:
                 The response from the Anthropic chat completions API."""
 
+        kwargs = self._format_request_kwargs(
+            messages,
+            tools,
+            tool_choice,
+            structured_model,
+            **generate_kwargs,
+        )
+
+        start_datetime = datetime.now()
+
+        response = await self.client.messages.create(**kwargs)
+
+        if self.stream:
+            return self._parse_anthropic_stream_completion_response(
+                start_datetime,
+                response,
+                structured_model,
+            )
+
+        # Non-streaming response
+        parsed_response = await self._parse_anthropic_completion_response(
+            start_datetime,
+            response,
+            structured_model,
+        )
+
+        return parsed_response
+
+    def _format_request_kwargs(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict] | None = None,
+        tool_choice: Literal["auto", "none", "any", "required"]
+        | str
+        | None = None,
+        structured_model: Type[BaseModel] | None = None,
+        **generate_kwargs: Any,
+    ) -> dict[str, Any]:
+        """Format the keyword arguments of the Anthropic messages API."""
         kwargs: dict[str, Any] = {
             "model": self.model_name,
             "max_tokens": self.max_tokens,
@@ -202,6 +283,16 @@ class AnthropicChatModel(ChatModelBase):
                 format_tool["function"]["name"],
             )
 
+        if self.cache_tools and kwargs.get("tools"):
+            kwargs["tools"] = kwargs["tools"][:-1] + [
+                {
+                    **kwargs["tools"][-1],
+                    "cache_control": {"type": "ephemeral"},
+                },
+            ]
+
+        self._validate_cache_breakpoints(messages, kwargs.get("tools"))
+
         # Extract the system message
         if messages[0]["role"] == "system":
             kwargs["system"] = messages[0]["content"]
@@ -209,25 +300,107 @@ class AnthropicChatModel(ChatModelBase):
 
         kwargs["messages"] = messages
 
-        start_datetime = datetime.now()
+        return kwargs
 
-        response = await self.client.messages.create(**kwargs)
+    @staticmethod
+    def _validate_cache_breakpoints(
+        messages: list[dict[str, Any]],
+        tools: list[dict] | None,
+    ) -> None:
+        """Check the prompt cache breakpoints marked by the formatter on the
+        messages and by `cache_tools` on the tool schemas are within the
+        limit of Anthropic, which rejects the request otherwise.
 
-        if self.stream:
-            return self._parse_anthropic_stream_completion_response(
-                start_datetime,
-                response,
+        Args:
+            messages (`list[dict[str, Any]]`):
+                The formatted messages.
+            tools (`list[dict] | None`):
+                The formatted tool schemas.
+
+        Raises:
+            `ValueError`:
+                If there are more than 4 breakpoints in the request.
+        """
+        n_breakpoints = sum("cache_control" in _ for _ in tools or [])
+        for msg in messages:
+            if isinstance(msg.get("content"), list):
+                n_breakpoints += sum(
+                    isinstance(block, dict) and "cache_control" in block
+                    for block in msg["content"]
+                )
+
+        if n_breakpoints > _MAX_CACHE_BREAKPOINTS:
+            raise ValueError(
+                f"Anthropic allows at most {_MAX_CACHE_BREAKPOINTS} prompt "
+                f"cache breakpoints in a request, but got {n_breakpoints}. "
+                "Reduce `cache_last_n_messages` or disable "
+                "`cache_system_prompt` of the formatter when `cache_tools` "
+                "is enabled.",
+            )
+
+    async def _batch_with_provider(
+        self,
+        prompts: list[list[dict]],
+        poll_interval: float,
+        timeout: float | None,
+        tools: list[dict] | None = None,
+        tool_choice: Literal["auto", "none", "any", "required"]
+        | str
+        | None = None,
+        structured_model: Type[BaseModel] | None = None,
+        **generate_kwargs: Any,
+    ) -> tuple[list[ChatResponse | None], list[str | None], dict]:
+        """Submit the requests to the Anthropic Message Batches API, and poll
+        the job until it's done."""
+        requests = []
+        for index, messages in enumerate(prompts):
+            params = self._format_request_kwargs(
+                messages,
+                tools,
+                tool_choice,
                 structured_model,
+                **generate_kwargs,
             )
+            params.pop("stream", None)
+            requests.append({"custom_id": str(index), "params": params})
 
-        # Non-streaming response
-        parsed_response = await self._parse_anthropic_completion_response(
-            start_datetime,
-            response,
-            structured_model,
+        start_datetime = datetime.now()
+        batch = await self.client.messages.batches.create(requests=requests)
+        logger.info("Submitted the Anthropic batch job %s.", batch.id)
+
+        batch = await _poll_batch(
+            lambda: self.client.messages.batches.retrieve(batch.id),
+            lambda _: _.processing_status == "ended",
+            poll_interval,
+            timeout,
+            lambda: self.client.messages.batches.cancel(batch.id),
         )
 
-        return parsed_response
+        responses: list[ChatResponse | None] = [None] * len(prompts)
+        errors: list[str | None] = [
+            f"No result in the batch job {batch.id}.",
+        ] * len(prompts)
+        async for entry in await self.client.messages.batches.results(
+            batch.id,
+        ):
+            index = int(entry.custom_id)
+            if entry.result.type != "succeeded":
+                errors[index] = str(
+                    getattr(entry.result, "error", None) or entry.result.type,
+                )
+                continue
+            responses[index] = await self._parse_anthropic_completion_response(
+                start_datetime,
+                entry.result.message,
+                structured_model,
+            )
+            errors[index] = None
+
+        return (
+            responses,
+            errors,
+            {"batch_id": batch.id, "status": batch.processing_status},
+        )
 
     async def _parse_anthropic_completion_response(
         self,
@@ -300,6 +473,14 @@ class AnthropicChatModel(ChatModelBase):
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
                 time=(datetime.now() - start_datetime).total_seconds(),
+                cached_tokens=_get_usage_field(
+                    response.usage,
+                    "cache_read_input_tokens",
+                ),
+                cache_creation_tokens=_get_usage_field(
+                    response.usage,
+                    "cache_creation_input_tokens",
+                ),
             )
 
         parsed_response = ChatResponse(
@@ -336,21 +517,24 @@ class AnthropicChatModel(ChatModelBase):
 
         .. note::
             If `structured_model` is not `None`, the expected structured output
-            will be stored in the metadata of the `ChatResponse`.
+            will be stored in the metadata of the `ChatResponse`. In delta
+            mode, the content only carries the deltas, and the full content
+            and metadata are materialized from `ChatResponse.snapshot`.
         """
 
         usage = None
-        text_buffer = ""
-        thinking_buffer = ""
-        thinking_signature = ""
-        tool_calls = OrderedDict()
-        tool_call_buffers = {}
-        res = None
-        metadata = None
+        # Accumulate the deltas, where the tool inputs are parsed
+        # incrementally instead of repairing the accumulated string on every
+        # event
+        snapshot = ChatResponseSnapshot(
+            delta=self.stream_delta,
+            structured_output="tool_use" if structured_model else None,
+        )
+        snapshot.thinking_signature = ""
+        latency = _StreamLatencyTracker(self.model_name, start_datetime)
 
         async for event in response:
             content_changed = False
-            thinking_changed = False
 
             if event.type == "message_start":
                 message = event.message
@@ -363,89 +547,62 @@ class AnthropicChatModel(ChatModelBase):
                             0,
                         ),
                         time=(datetime.now() - start_datetime).total_seconds(),
+                        cached_tokens=_get_usage_field(
+                            message.usage,
+                            "cache_read_input_tokens",
+                        ),
+                        cache_creation_tokens=_get_usage_field(
+                            message.usage,
+                            "cache_creation_input_tokens",
+                        ),
                     )
 
             elif event.type == "content_block_start":
                 if event.content_block.type == "tool_use":
-                    block_index = event.index
-                    tool_block = event.content_block
-                    tool_calls[block_index] = {
-                        "type": "tool_use",
-                        "id": tool_block.id,
-                        "name": tool_block.name,
-                        "input": "",
-                    }
-                    tool_call_buffers[block_index] = ""
+                    snapshot.add_tool_call(
+                        event.index,
+                        event.content_block.id,
+                        event.content_block.name,
+                    )
                     content_changed = True
 
             elif event.type == "content_block_delta":
                 block_index = event.index
                 delta = event.delta
                 if delta.type == "text_delta":
-                    text_buffer += delta.text
+                    snapshot.add_text(delta.text)
                     content_changed = True
                 elif delta.type == "thinking_delta":
-                    thinking_buffer += delta.thinking
-                    thinking_changed = True
+                    snapshot.add_thinking(delta.thinking)
+                    content_changed = True
                 elif delta.type == "signature_delta":
-                    thinking_signature = delta.signature
+                    snapshot.thinking_signature = delta.signature
                 elif (
                     delta.type == "input_json_delta"
-                    and block_index in tool_calls
+                    and block_index in snapshot.tool_calls
                 ):
-                    tool_call_buffers[block_index] += delta.partial_json or ""
-                    tool_calls[block_index]["input"] = tool_call_buffers[
-                        block_index
-                    ]
+                    snapshot.tool_calls[block_index]["input"].feed(
+                        delta.partial_json or "",
+                    )
+                    content_changed = True
+
+            elif event.type == "content_block_stop":
+                if event.index in snapshot.tool_calls:
+                    # Repair the invalid or incomplete JSON once at the end
+                    snapshot.tool_calls[event.index]["input"].close()
                     content_changed = True
 
             elif event.type == "message_delta":
                 if event.usage and usage:
                     usage.output_tokens = event.usage.output_tokens
 
-            if (thinking_changed or content_changed) and usage:
-                contents: list = []
-                if thinking_buffer:
-                    thinking_block = ThinkingBlock(
-                        type="thinking",
-                        thinking=thinking_buffer,
-                    )
-                    thinking_block["signature"] = thinking_signature
-                    contents.append(thinking_block)
-                if text_buffer:
-                    contents.append(
-                        TextBlock(
-                            type="text",
-                            text=text_buffer,
-                        ),
-                    )
-                for block_index, tool_call in tool_calls.items():
-                    input_str = tool_call["input"]
-                    try:
-                        input_obj = _json_loads_with_repair(input_str or "{}")
-                        if not isinstance(input_obj, dict):
-                            input_obj = {}
+            if content_changed:
+                latency.on_chunk()
 
-                    except Exception:
-                        input_obj = {}
+            if content_changed and usage and not snapshot.is_empty:
+                yield snapshot.to_chat_response(latency.update(usage))
 
-                    contents.append(
-                        ToolUseBlock(
-                            type=tool_call["type"],
-                            id=tool_call["id"],
-                            name=tool_call["name"],
-                            input=input_obj,
-                        ),
-                    )
-                    if structured_model:
-                        metadata = input_obj
-                if contents:
-                    res = ChatResponse(
-                        content=contents,
-                        usage=usage,
-                        metadata=metadata,
-                    )
-                    yield res
+        latency.finish(usage)
 
     def _format_tools_json_schemas(
         self,
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""The utilities of the batch inference of the chat models, including the
+bounded concurrent local loop with retries, and the polling of the provider
+batch jobs."""
+import asyncio
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, TYPE_CHECKING
+
+from ._model_response import ChatResponse
+from ._model_usage import ChatUsage
+from .._logging import logger
+
+if TYPE_CHECKING:
+    from ._model_base import ChatModelBase
+else:
+    ChatModelBase = "ChatModelBase"
+
+BATCH_MODES = ["local", "provider"]
+
+
+def _aggregate_usage(
+    responses: list[ChatResponse | None],
+    elapsed: float,
+) -> ChatUsage:
+    """Aggregate the usages of the responses, where the time is the
+    wall-clock time of the batch."""
+    usage = ChatUsage(input_tokens=0, output_tokens=0, time=elapsed)
+    for response in responses:
+        if response is None or response.usage is None:
+            continue
+        usage.input_tokens += response.usage.input_tokens
+        usage.output_tokens += response.usage.output_tokens
+        usage.cached_tokens += response.usage.cached_tokens
+        usage.cache_creation_tokens += response.usage.cache_creation_tokens
+    return usage
+
+
+async def _call_with_retries(
+    model: ChatModelBase,
+    messages: list[dict],
+    max_retries: int,
+    retry_delay: float,
+    kwargs: dict,
+) -> ChatResponse:
+    """Call the model with the exponential backoff retries, where the
+    streaming response is consumed and its last chunk is materialized."""
+    for attempt in range(max_retries + 1):
+        try:
+            res = await model(messages, **kwargs)
+            if isinstance(res, AsyncGenerator):
+                last_chunk = None
+                async for chunk in res:
+                    last_chunk = chunk
+                if last_chunk is None:
+                    raise RuntimeError("Empty streaming response.")
+                res = last_chunk.materialize()
+            return res
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay * 2**attempt
+            logger.warning(
+                "Attempt %d of the batch request failed, retry in %.1f "
+                "seconds: %s",
+                attempt + 1,
+                delay,
+                e,
+            )
+            await asyncio.sleep(delay)
+    raise RuntimeError("Unreachable")
+
+
+async def _run_local_batch(
+    model: ChatModelBase,
+    prompts: list[list[dict]],
+    max_concurrency: int,
+    max_retries: int,
+    retry_delay: float,
+    kwargs: dict,
+) -> tuple[list[ChatResponse | None], list[str | None]]:
+    """Run the requests concurrently with a bounded concurrency, and collect
+    the responses and the errors in the order of the requests."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    responses: list[ChatResponse | None] = [None] * len(prompts)
+    errors: list[str | None] = [None] * len(prompts)
+
+    async def _run(index: int) -> None:
+        async with semaphore:
+            try:
+                responses[index] = await _call_with_retries(
+                    model,
+                    prompts[index],
+                    max_retries,
+                    retry_delay,
+                    kwargs,
+                )
+            except Exception as e:
+                errors[index] = f"{type(e).__name__}: {e}"
+
+    await asyncio.gather(*[_run(i) for i in range(len(prompts))])
+    return responses, errors
+
+
+async def _poll_batch(
+    retrieve: Callable[[], Awaitable[Any]],
+    is_done: Callable[[Any], bool],
+    poll_interval: float,
+    timeout: float | None,
+    cancel: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Poll the provider batch job until it's done, and cancel it if the
+    timeout is exceeded or the polling is cancelled.
+
+    Returns:
+        `Any`:
+            The final status object of the batch job.
+    """
+    start = time.monotonic()
+    try:
+        while True:
+            batch = await retrieve()
+            if is_done(batch):
+                return batch
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(
+                    f"The batch job is not done within {timeout} seconds.",
+                )
+            await asyncio.sleep(poll_interval)
+    except (TimeoutError, asyncio.CancelledError):
+        try:
+            await cancel()
+        except Exception as e:
+            logger.warning("Failed to cancel the batch job: %s", e)
+        raise
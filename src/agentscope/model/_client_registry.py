@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""The registry of the shared SDK clients, so that the model, embedding and
+token counter instances calling the same endpoint with the same API key and
+options reuse the keep-alive connections, instead of creating a connection
+pool per instance."""
+import asyncio
+import hashlib
+import importlib
+import json
+import urllib.request
+import weakref
+from types import ModuleType
+from typing import Any, Callable
+
+import httpx
+
+from .._logging import logger
+
+
+def _get_http_module(client_class: type) -> ModuleType:
+    """Get the HTTP library (e.g. `httpx`) of the given HTTP client class,
+    e.g. the default HTTP client class of an SDK, so that the transport is
+    created by the same library as the SDK."""
+    for cls in client_class.__mro__:
+        module = importlib.import_module(cls.__module__.split(".")[0])
+        if hasattr(module, "AsyncHTTPTransport"):
+            return module
+    return httpx
+
+
+class _LoopBoundTransport:
+    """The HTTP transport that keeps a connection pool per event loop, since
+    the pooled connections cannot be reused across the event loops, e.g. by
+    the successive `asyncio.run` calls. It implements the interface of
+    `httpx.AsyncBaseTransport`, and is compatible with the libraries sharing
+    the interface.
+
+    The clients given an explicit transport ignore the proxy environment
+    variables, so the transport routes the requests by the `HTTP_PROXY`,
+    `HTTPS_PROXY`, `ALL_PROXY` and `NO_PROXY` variables itself, as the
+    default clients of the SDKs do.
+    """
+
+    def __init__(
+        self,
+        http_module: ModuleType,
+        limits: dict,
+        http2: bool = False,
+    ) -> None:
+        """Initialize the transport."""
+        self.http_module = http_module
+        self.limits = limits
+        self.http2 = http2
+        # The proxies by the lowercase scheme, read once as the SDK clients do
+        self.proxies = urllib.request.getproxies_environment()
+        # The connection pools of each event loop keyed by the proxy URL
+        self._transports: weakref.WeakKeyDictionary = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _get_proxy(self, request: Any) -> str | None:
+        """Get the proxy URL of the request, or `None` to connect directly."""
+        url = request.url
+        if not self.proxies or urllib.request.proxy_bypass_environment(
+            url.host,
+            self.proxies,
+        ):
+            return None
+        return self.proxies.get(url.scheme) or self.proxies.get("all")
+
+    def _get_transport(self, proxy: str | None) -> Any:
+        """Get the connection pool of the running event loop and the proxy."""
+        loop = asyncio.get_running_loop()
+        transports = self._transports.get(loop)
+        if transports is None:
+            # The connections of the closed loops are dropped
+            for closed_loop in [_ for _ in self._transports if _.is_closed()]:
+                del self._transports[closed_loop]
+            transports = self._transports[loop] = {}
+
+        if proxy not in transports:
+            transports[proxy] = self.http_module.AsyncHTTPTransport(
+                limits=self.http_module.Limits(**self.limits),
+                http2=self.http2,
+                **({"proxy": proxy} if proxy else {}),
+            )
+        return transports[proxy]
+
+    async def handle_async_request(self, request: Any) -> Any:
+        """Send the request by the connection pool of the running loop."""
+        transport = self._get_transport(self._get_proxy(request))
+        return await transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        """Close the connection pools of the running event loop, and drop the
+        others. A new pool is created if the transport is used again."""
+        loop = asyncio.get_running_loop()
+        transports = self._transports.pop(loop, {})
+        self._transports.clear()
+        for transport in transports.values():
+            await transport.aclose()
+
+    async def __aenter__(self) -> "_LoopBoundTransport":
+        """Enter the async context."""
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        """Close the connection pool when exiting the async context."""
+        await self.aclose()
+
+
+class HTTPClientRegistry:
+    """The registry that hands out the shared SDK clients keyed by the
+    provider, the base URL, the API key and the client options. All the
+    clients use the keep-alive connection pools with the configured limits,
+    where a pool is kept per event loop.
+
+    The shared clients follow the proxy environment variables as the default
+    clients of the SDKs do, while an own `http_client` or `transport` in the
+    client options is rejected, since it cannot share the connection pools.
+
+    Note the shared clients shouldn't be closed by the instances using them,
+    call `close_all` on shutdown instead.
+    """
+
+    def __init__(
+        self,
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 20,
+        keepalive_expiry: float | None = 30.0,
+        http2: bool = False,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            max_connections (`int | None`, defaults to `100`):
+                The maximum number of the connections of a client per event
+                loop. `None` means no limit.
+            max_keepalive_connections (`int | None`, defaults to `20`):
+                The maximum number of the idle keep-alive connections of a
+                client per event loop.
+            keepalive_expiry (`float | None`, defaults to `30.0`):
+                The seconds after which an idle connection is closed.
+            http2 (`bool`, defaults to `False`):
+                Whether to enable HTTP/2, which requires the `h2` package.
+        """
+        self.configure(
+            max_connections,
+            max_keepalive_connections,
+            keepalive_expiry,
+            http2,
+        )
+        self._clients: dict[tuple, tuple[Any, _LoopBoundTransport]] = {}
+
+    def configure(
+        self,
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 20,
+        keepalive_expiry: float | None = 30.0,
+        http2: bool = False,
+    ) -> None:
+        """Configure the connection pools of the clients created afterwards.
+        The arguments are the same as the constructor."""
+        self.limits = {
+            "max_connections": max_connections,
+            "max_keepalive_connections": max_keepalive_connections,
+            "keepalive_expiry": keepalive_expiry,
+        }
+        self.http2 = http2
+
+    def __len__(self) -> int:
+        """The number of the shared clients."""
+        return len(self._clients)
+
+    def get_client(
+        self,
+        provider: str,
+        factory: Callable[[Any], Any],
+        base_url: str | None = None,
+        api_key: str | None = None,
+        options: dict | None = None,
+        http_module: ModuleType = httpx,
+    ) -> Any:
+        """Get the shared client, which is created by the factory on the
+        first call.
+
+        Args:
+            provider (`str`):
+                The provider of the client, e.g. `"openai"`.
+            factory (`Callable[[Any], Any]`):
+                The function that creates the SDK client with the given
+                HTTP transport.
+            base_url (`str | None`, optional):
+                The base URL of the client.
+            api_key (`str | None`, optional):
+                The API key, which is hashed in the key.
+            options (`dict | None`, optional):
+                The other options of the client, e.g. the timeout and the
+                default headers.
+            http_module (`ModuleType`, defaults to `httpx`):
+                The HTTP library used by the SDK, which creates the
+                connection pools.
+
+        Raises:
+            `ValueError`:
+                If the options have an HTTP client or transport of their
+                own, which cannot share the pooled connections.
+
+        Returns:
+            `Any`:
+                The shared SDK client.
+        """
+        for name in ["http_client", "transport"]:
+            if name in (options or {}):
+                raise ValueError(
+                    f"The `{name}` argument cannot be used with the shared "
+                    f"{provider} client, which sends the requests by the "
+                    "pooled connections of the client registry. Disable "
+                    "`shared_client` to use your own one.",
+                )
+
+        key = (
+            provider,
+            base_url,
+            hashlib.sha256((api_key or "").encode("utf-8")).hexdigest(),
+            json.dumps(options or {}, sort_keys=True, default=repr),
+        )
+        if key not in self._clients:
+            transport = _LoopBoundTransport(
+                http_module,
+                self.limits,
+                self.http2,
+            )
+            self._clients[key] = (factory(transport), transport)
+            logger.debug(
+                "Created the shared %s client for %s.",
+                provider,
+                base_url,
+            )
+        return self._clients[key][0]
+
+    async def close_all(self) -> None:
+        """Close the connection pools of all the shared clients in the
+        running event loop, and remove the clients from the registry, so
+        that new clients are created afterwards."""
+        clients, self._clients = self._clients, {}
+        for _, transport in clients.values():
+            await transport.aclose()
+
+
+_client_registry = HTTPClientRegistry()
+
+
+def get_client_registry() -> HTTPClientRegistry:
+    """Get the process-wide registry of the shared SDK clients.
+
+    Returns:
+        `HTTPClientRegistry`:
+            The registry of the shared SDK clients.
+    """
+    return _client_registry
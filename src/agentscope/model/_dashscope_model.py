@@ -1,12 +1,10 @@
 # -*- coding: utf-8 -*-
 """The dashscope API model classes."""
-import collections
 from datetime import datetime
 from http import HTTPStatus
 from typing import (
     Any,
     AsyncGenerator,
-    Generator,
     Union,
     TYPE_CHECKING,
     List,
@@ -17,13 +15,16 @@ from pydantic import BaseModel
 from aioitertools import iter as giter
 
 from ._model_base import ChatModelBase
-from ._model_response import ChatResponse
-from ._model_usage import ChatUsage
+from ._latency import _StreamLatencyTracker
+from ._model_response import ChatResponse, ChatResponseSnapshot
+from ._model_usage import ChatUsage, _get_usage_field
 from .._utils._common import (
     _json_loads_with_repair,
     _create_tool_from_base_model,
+    _iterate_in_io_executor,
+    _run_in_io_executor,
 )
-from ..message import TextBlock, ToolUseBlock, ThinkingBlock
+from ..message import TextBlock, ToolUseBlock
 from ..tracing import trace_llm
 from ..types import JSONSerializableObject
 from .._logging import logger
@@ -52,6 +53,7 @@ class DashScopeChatModel(ChatModelBase):
         model_name: str,
         api_key: str,
         stream: bool = True,
+        stream_delta: bool = False,
         enable_thinking: bool | None = None,
         generate_kwargs: dict[str, JSONSerializableObject] | None = None,
         base_http_api_url: str | None = None,
@@ -65,6 +67,9 @@ class DashScopeChatModel(ChatModelBase):
                 The dashscope API key.
             stream (`bool`):
                 The streaming output or not
+            stream_delta (`bool`, defaults to `False`):
+                Whether the streaming chunks only carry the new content, with
+                the full content materialized on demand from the snapshot.
             enable_thinking (`bool | None`, optional):
                 Enable thinking or not, only support Qwen3, QwQ, DeepSeek-R1.
                 Refer to `DashScope documentation
@@ -85,7 +90,7 @@ class DashScopeChatModel(ChatModelBase):
             )
             stream = True
 
-        super().__init__(model_name, stream)
+        super().__init__(model_name, stream, stream_delta)
 
         self.api_key = api_key
         self.enable_thinking = enable_thinking
@@ -200,10 +205,7 @@ class DashScopeChatModel(ChatModelBase):
 
         start_datetime = datetime.now()
         if self.model_name.startswith("qvq") or "-vl" in self.model_name:
-            response = dashscope.MultiModalConversation.call(
-                api_key=self.api_key,
-                **kwargs,
-            )
+            response = await self._call_multimodal_api(kwargs)
 
         else:
             response = await dashscope.aigc.generation.AioGeneration.call(
@@ -226,13 +228,40 @@ class DashScopeChatModel(ChatModelBase):
 
         return parsed_response
 
+    async def _call_multimodal_api(
+        self,
+        kwargs: dict[str, Any],
+    ) -> Union[
+        MultiModalConversationResponse,
+        AsyncGenerator[MultiModalConversationResponse, None],
+    ]:
+        """Call the DashScope multimodal conversation API without blocking
+        the event loop, through the async SDK if available, otherwise the
+        synchronous SDK in a bounded executor."""
+        import dashscope
+
+        if getattr(dashscope, "AioMultiModalConversation", None) is not None:
+            return await dashscope.AioMultiModalConversation.call(
+                api_key=self.api_key,
+                **kwargs,
+            )
+
+        response = await _run_in_io_executor(
+            dashscope.MultiModalConversation.call,
+            api_key=self.api_key,
+            **kwargs,
+        )
+        if self.stream:
+            return _iterate_in_io_executor(response)
+        return response
+
     # pylint: disable=too-many-branches
     async def _parse_dashscope_stream_response(
         self,
         start_datetime: datetime,
         response: Union[
             AsyncGenerator[GenerationResponse, None],
-            Generator[MultiModalConversationResponse, None, None],
+            AsyncGenerator[MultiModalConversationResponse, None],
         ],
         structured_model: Type[BaseModel] | None = None,
     ) -> AsyncGenerator[ChatResponse, Any]:
@@ -243,8 +272,8 @@ class DashScopeChatModel(ChatModelBase):
             start_datetime (`datetime`):
                 The start datetime of the response generation.
             response (
-                `Union[AsyncGenerator[GenerationResponse, None], Generator[ \
-                MultiModalConversationResponse, None, None]]`
+                `Union[AsyncGenerator[GenerationResponse, None], \
+                AsyncGenerator[MultiModalConversationResponse, None]]`
             ):
                 DashScope streaming response generator (GenerationResponse or
                 MultiModalConversationResponse) to parse.
@@ -260,11 +289,19 @@ class DashScopeChatModel(ChatModelBase):
 
         .. note::
             If `structured_model` is not `None`, the expected structured output
-            will be stored in the metadata of the `ChatResponse`.
+            will be stored in the metadata of the `ChatResponse`. In delta
+            mode, the content only carries the deltas, and the full content
+            and metadata are materialized from `ChatResponse.snapshot`.
         """
-        acc_content, acc_thinking_content = "", ""
-        acc_tool_calls = collections.defaultdict(dict)
-        metadata = None
+        # Accumulate the deltas, where the tool arguments are parsed
+        # incrementally instead of repairing the accumulated string on every
+        # chunk
+        snapshot = ChatResponseSnapshot(
+            delta=self.stream_delta,
+            structured_output="tool_use" if structured_model else None,
+        )
+        latency = _StreamLatencyTracker(self.model_name, start_datetime)
+        usage = None
 
         async for chunk in giter(response):
             if chunk.status_code != HTTPStatus.OK:
@@ -273,81 +310,49 @@ class DashScopeChatModel(ChatModelBase):
                 )
 
             message = chunk.output.choices[0].message
+            if (
+                message.content
+                or message.get("reasoning_content")
+                or message.get("tool_calls")
+            ):
+                latency.on_chunk()
 
             # Update reasoning content
             if isinstance(message.get("reasoning_content"), str):
-                acc_thinking_content += message["reasoning_content"]
+                snapshot.add_thinking(message["reasoning_content"])
 
             # Update text content
             if isinstance(message.content, str):
-                acc_content += message.content
+                snapshot.add_text(message.content)
             elif isinstance(message.content, list):
                 for item in message.content:
                     if isinstance(item, dict) and "text" in item:
-                        acc_content += item["text"]
+                        snapshot.add_text(item["text"])
 
             # Update tool calls
             for tool_call in message.get("tool_calls", []):
-                index = tool_call.get("index", 0)
+                acc_tool_call = snapshot.add_tool_call(
+                    tool_call.get("index", 0),
+                )
 
-                if "id" in tool_call and tool_call["id"] != acc_tool_calls[
-                    index
-                ].get("id"):
-                    acc_tool_calls[index]["id"] = (
-                        acc_tool_calls[index].get("id", "") + tool_call["id"]
-                    )
+                if (
+                    "id" in tool_call
+                    and tool_call["id"] != acc_tool_call["id"]
+                ):
+                    acc_tool_call["id"] += tool_call["id"]
 
                 if "function" in tool_call:
                     func = tool_call["function"]
                     if "name" in func:
-                        acc_tool_calls[index]["name"] = (
-                            acc_tool_calls[index].get("name", "")
-                            + func["name"]
-                        )
+                        acc_tool_call["name"] += func["name"]
 
                     if "arguments" in func:
-                        acc_tool_calls[index]["arguments"] = (
-                            acc_tool_calls[index].get("arguments", "")
-                            + func["arguments"]
-                        )
+                        acc_tool_call["input"].feed(func["arguments"] or "")
 
-            # to content blocks
-            content_blocks: list[TextBlock | ToolUseBlock | ThinkingBlock] = []
-            if acc_thinking_content:
-                content_blocks.append(
-                    ThinkingBlock(
-                        type="thinking",
-                        thinking=acc_thinking_content,
-                    ),
-                )
-
-            if acc_content:
-                content_blocks.append(
-                    TextBlock(
-                        type="text",
-                        text=acc_content,
-                    ),
-                )
-
-            for tool_call in acc_tool_calls.values():
-                repaired_input = _json_loads_with_repair(
-                    tool_call.get("arguments", "{}") or "{}",
-                )
-
-                if not isinstance(repaired_input, dict):
-                    repaired_input = {}
-
-                content_blocks.append(
-                    ToolUseBlock(
-                        type="tool_use",
-                        id=tool_call.get("id", ""),
-                        name=tool_call.get("name", ""),
-                        input=repaired_input,
-                    ),
-                )
-
-                if structured_model:
-                    metadata = repaired_input
+            finish_reason = chunk.output.choices[0].get("finish_reason")
+            if isinstance(finish_reason, str) and finish_reason != "null":
+                # Repair the invalid or incomplete JSON once at the end
+                snapshot.close()
 
             usage = None
             if chunk.usage:
@@ -355,14 +360,16 @@ class DashScopeChatModel(ChatModelBase):
                     input_tokens=chunk.usage.input_tokens,
                     output_tokens=chunk.usage.output_tokens,
                     time=(datetime.now() - start_datetime).total_seconds(),
+                    cached_tokens=_get_usage_field(
+                        chunk.usage,
+                        "prompt_tokens_details",
+                        "cached_tokens",
+                    ),
                 )
 
-            parsed_chunk = ChatResponse(
-                content=content_blocks,
-                usage=usage,
-                metadata=metadata,
-            )
-            yield parsed_chunk
+            yield snapshot.to_chat_response(latency.update(usage))
+
+        latency.finish(usage)
 
     async def _parse_dashscope_generation_response(
         self,
@@ -456,6 +463,11 @@ class DashScopeChatModel(ChatModelBase):
                 input_tokens=response.usage.input_tokens,
                 output_tokens=response.usage.output_tokens,
                 time=(datetime.now() - start_datetime).total_seconds(),
+                cached_tokens=_get_usage_field(
+                    response.usage,
+                    "prompt_tokens_details",
+                    "cached_tokens",
+                ),
             )
 
         parsed_response = ChatResponse(
@@ -17,8 +17,9 @@ from pydantic import BaseModel
 from .._logging import logger
 from .._utils._common import _json_loads_with_repair
 from ..message import ToolUseBlock, TextBlock, ThinkingBlock
-from ._model_usage import ChatUsage
+from ._model_usage import ChatUsage, _get_usage_field
 from ._model_base import ChatModelBase
+from ._latency import _StreamLatencyTracker
 from ._model_response import ChatResponse
 from ..tracing import trace_llm
 from ..types import JSONSerializableObject
@@ -218,8 +219,16 @@ class GeminiChatModel(ChatModelBase):
         text = ""
         thinking = ""
         metadata: dict | None = None
+        latency = _StreamLatencyTracker(self.model_name, start_datetime)
+        usage = None
         async for chunk in response:
             content_block: list = []
+            if (
+                chunk.candidates
+                and chunk.candidates[0].content
+                and chunk.candidates[0].content.parts
+            ) or chunk.function_calls:
+                latency.on_chunk()
 
             # Thinking parts
             if (
@@ -257,6 +266,10 @@ class GeminiChatModel(ChatModelBase):
                     output_tokens=chunk.usage_metadata.total_token_count
                     - chunk.usage_metadata.prompt_token_count,
                     time=(datetime.now() - start_datetime).total_seconds(),
+                    cached_tokens=_get_usage_field(
+                        chunk.usage_metadata,
+                        "cached_content_token_count",
+                    ),
                 )
 
             if thinking:
@@ -283,11 +296,13 @@ class GeminiChatModel(ChatModelBase):
 
             parsed_chunk = ChatResponse(
                 content=content_block,
-                usage=usage,
+                usage=latency.update(usage),
                 metadata=metadata,
             )
             yield parsed_chunk
 
+        latency.finish(usage)
+
     def _parse_gemini_generation_response(
         self,
         start_datetime: datetime,
@@ -358,6 +373,10 @@ class GeminiChatModel(ChatModelBase):
                 output_tokens=response.usage_metadata.total_token_count
                 - response.usage_metadata.prompt_token_count,
                 time=(datetime.now() - start_datetime).total_seconds(),
+                cached_tokens=_get_usage_field(
+                    response.usage_metadata,
+                    "cached_content_token_count",
+                ),
             )
 
         else:
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""The composite chat model that hedges the slow requests and fails over on
+errors, which cuts the tail latency of the model calls."""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, AsyncGenerator
+
+from ._model_base import ChatModelBase
+from ._model_response import ChatResponse
+from .._logging import logger
+
+
+def _percentile(samples: list[float], percentile: float) -> float:
+    """The nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    rank = math.ceil(percentile / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def _with_leg_info(response: ChatResponse, info: dict) -> ChatResponse:
+    """Attach the information of the winning leg to the metadata of the
+    response, without modifying the original metadata object."""
+    metadata = response.metadata if isinstance(response.metadata, dict) else {}
+    response.metadata = {**metadata, "hedge": info}
+    return response
+
+
+async def _first_token(
+    model: ChatModelBase,
+    args: tuple,
+    kwargs: dict,
+) -> tuple[ChatResponse | AsyncGenerator[ChatResponse, None], Any]:
+    """Call the model, and wait for the first chunk if the response is
+    streaming.
+
+    Returns:
+        `tuple[ChatResponse | AsyncGenerator[ChatResponse, None], Any]`:
+            The response (or the generator) and the first chunk, which is
+            `None` for the non-streaming or empty responses.
+    """
+    res = await model(*args, **kwargs)
+    if not isinstance(res, AsyncGenerator):
+        return res, None
+
+    try:
+        first_chunk = await anext(res)
+    except StopAsyncIteration:
+        return res, None
+    except BaseException:
+        await res.aclose()
+        raise
+    return res, first_chunk
+
+
+class HedgedChatModel(ChatModelBase):
+    """The composite chat model over a primary model and the optional
+    secondary models, which
+
+    - hedges: if the current leg hasn't produced its first token (the full
+      response for non-streaming models) within a deadline, another leg is
+      fired to the same model or the next secondary model, the first leg
+      that produces its first token wins and the others are cancelled;
+    - fails over: if a leg raises an error before its first token, the next
+      leg is fired immediately.
+
+    The hedging deadline is the given percentile of the observed
+    time-to-first-token of the model, so only the slowest requests are
+    hedged. The cancelled legs are observed at their elapsed time, a lower
+    bound of their latency, so that the deadline isn't biased towards the
+    faster legs. The winning leg is reported in `metadata["hedge"]` of the
+    responses. Note a streaming leg is committed once its first chunk is
+    yielded, and the errors after that are raised to the caller.
+    """
+
+    def __init__(
+        self,
+        models: list[ChatModelBase],
+        hedge_percentile: float = 95.0,
+        hedge_delay: float = 5.0,
+        min_hedge_delay: float = 0.0,
+        min_samples: int = 10,
+        history_size: int = 100,
+        max_attempts: int | None = None,
+        hedge: bool = True,
+    ) -> None:
+        """Initialize the hedged chat model.
+
+        Args:
+            models (`list[ChatModelBase]`):
+                The primary model followed by the secondary models in
+                priority order. The i-th leg is sent to the i-th model, and
+                the last model is reused for the further legs. Use a single
+                model to hedge to the same model.
+            hedge_percentile (`float`, defaults to `95.0`):
+                The percentile of the observed time-to-first-token used as
+                the hedging deadline.
+            hedge_delay (`float`, defaults to `5.0`):
+                The hedging deadline in seconds before `min_samples`
+                latencies are observed for the model.
+            min_hedge_delay (`float`, defaults to `0.0`):
+                The lower bound of the hedging deadline in seconds, which
+                avoids doubling the load when the latencies are uniform.
+            min_samples (`int`, defaults to `10`):
+                The minimum number of observed latencies before the
+                percentile deadline is used.
+            history_size (`int`, defaults to `100`):
+                The number of the recent latencies kept for each model.
+            max_attempts (`int | None`, optional):
+                The maximum number of legs of a call, including the hedges
+                and the failovers. Defaults to the number of models, and at
+                least 2.
+            hedge (`bool`, defaults to `True`):
+                Whether to hedge the slow requests. If `False`, the model
+                only fails over on errors.
+        """
+        if not models:
+            raise ValueError("At least one model is required.")
+        if not 0 < hedge_percentile <= 100:
+            raise ValueError(
+                f"The hedge percentile must be in (0, 100], got "
+                f"{hedge_percentile}.",
+            )
+        for model in models[1:]:
+            if (model.stream, model.stream_delta) != (
+                models[0].stream,
+                models[0].stream_delta,
+            ):
+                raise ValueError(
+                    "All the models must have the same `stream` and "
+                    "`stream_delta` settings.",
+                )
+
+        super().__init__(
+            "|".join(_.model_name for _ in models),
+            models[0].stream,
+            models[0].stream_delta,
+        )
+        self.models = models
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.max_attempts = max_attempts or max(2, len(models))
+        self.hedge = hedge
+
+        self._latencies = [deque(maxlen=history_size) for _ in models]
+
+    def get_hedge_delay(self, index: int = 0) -> float:
+        """Get the current hedging deadline of a model.
+
+        Args:
+            index (`int`, defaults to `0`):
+                The index of the model in `models`.
+
+        Returns:
+            `float`:
+                The hedging deadline in seconds.
+        """
+        latencies = self._latencies[index]
+        if len(latencies) < self.min_samples:
+            delay = self.hedge_delay
+        else:
+            delay = _percentile(list(latencies), self.hedge_percentile)
+        return max(delay, self.min_hedge_delay)
+
+    def _model_index(self, leg: int) -> int:
+        """The index of the model that serves the given leg."""
+        return min(leg, len(self.models) - 1)
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        *args: Any,
+        **kwargs: Any,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Call the models with hedging and failover. The arguments are
+        passed to the models as they are.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages sent to the models.
+            *args (`Any`):
+                The other positional arguments of the models.
+            **kwargs (`Any`):
+                The keyword arguments of the models, e.g. `tools` and
+                `tool_choice`.
+
+        Returns:
+            `ChatResponse | AsyncGenerator[ChatResponse, None]`:
+                The response of the winning leg, with its information in
+                `metadata["hedge"]`.
+        """
+        args = (messages, *args)
+        tasks: dict[asyncio.Task, int] = {}
+        starts: list[float] = []
+        n_failed = 0
+        last_error: Exception | None = None
+
+        def _launch() -> None:
+            leg = len(starts)
+            model = self.models[self._model_index(leg)]
+            starts.append(time.monotonic())
+            task = asyncio.create_task(_first_token(model, args, kwargs))
+            tasks[task] = leg
+
+        _launch()
+        try:
+            while tasks:
+                timeout = None
+                if self.hedge and len(starts) < self.max_attempts:
+                    timeout = max(
+                        0.0,
+                        starts[-1]
+                        + self.get_hedge_delay(
+                            self._model_index(len(starts) - 1),
+                        )
+                        - time.monotonic(),
+                    )
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    logger.debug(
+                        "No first token from %s within the deadline, fire "
+                        "leg %d.",
+                        self.model_name,
+                        len(starts),
+                    )
+                    _launch()
+                    continue
+
+                # Check the earliest leg first if several legs are done
+                for task in sorted(done, key=lambda t: tasks[t]):
+                    leg = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        res, first_chunk = task.result()
+                        # The other legs, even if done, are closed in the
+                        # finally block
+                        return self._on_win(
+                            leg,
+                            len(starts),
+                            n_failed,
+                            res,
+                            first_chunk,
+                            time.monotonic() - starts[leg],
+                        )
+
+                    n_failed += 1
+                    last_error = error
+                    logger.warning(
+                        "Leg %d of %s failed, fail over: %s",
+                        leg,
+                        self.model_name,
+                        error,
+                    )
+
+                if len(starts) < self.max_attempts:
+                    _launch()
+
+            # The loop only ends when all the legs have failed
+            assert last_error is not None
+            raise last_error
+        finally:
+            await self._cancel(tasks, starts)
+
+    async def _cancel(
+        self,
+        tasks: dict[asyncio.Task, int],
+        starts: list[float],
+    ) -> None:
+        """Record the elapsed time of the losing legs as their latencies,
+        cancel them, and close their streams if they are already done."""
+        now = time.monotonic()
+        for task, leg in tasks.items():
+            self._latencies[self._model_index(leg)].append(now - starts[leg])
+            task.cancel()
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, tuple) and isinstance(
+                result[0],
+                AsyncGenerator,
+            ):
+                await result[0].aclose()
+
+    def _on_win(
+        self,
+        leg: int,
+        n_legs: int,
+        n_failed: int,
+        res: ChatResponse | AsyncGenerator[ChatResponse, None],
+        first_chunk: ChatResponse | None,
+        latency: float,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Record the latency of the winning leg, and attach its information
+        to the response."""
+        index = self._model_index(leg)
+        self._latencies[index].append(latency)
+        info = {
+            "leg": leg,
+            "model_name": self.models[index].model_name,
+            "n_legs": n_legs,
+            "n_failed": n_failed,
+            "latency": latency,
+        }
+        if not isinstance(res, AsyncGenerator):
+            return _with_leg_info(res, info)
+        return self._stream(res, first_chunk, info)
+
+    @staticmethod
+    async def _stream(
+        generator: AsyncGenerator[ChatResponse, None],
+        first_chunk: ChatResponse | None,
+        info: dict,
+    ) -> AsyncGenerator[ChatResponse, None]:
+        """Yield the chunks of the winning leg with its information."""
+        try:
+            if first_chunk is None:
+                return
+            yield _with_leg_info(first_chunk, info)
+            async for chunk in generator:
+                yield _with_leg_info(chunk, info)
+        finally:
+            await generator.aclose()
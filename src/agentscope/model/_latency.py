@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""The latency instrumentation of the streaming chat responses, which
+records the time to the first token, the intervals between the chunks and
+the output tokens per second into the usage, and aggregates them into the
+in-process per-model histograms."""
+import bisect
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Sequence
+
+from ._model_usage import ChatUsage
+
+DEFAULT_TIME_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+"""The default histogram buckets of the latencies in seconds."""
+
+DEFAULT_RATE_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0)
+"""The default histogram buckets of the output tokens per second."""
+
+# The name, the unit and the description of the recorded metrics
+_METRICS = {
+    "time_to_first_token": (
+        "seconds",
+        "The time from the request to the first content chunk.",
+    ),
+    "chunk_interval": (
+        "seconds",
+        "The interval between the successive content chunks.",
+    ),
+    "tokens_per_second": (
+        "tokens_per_second",
+        "The output tokens per second after the first content chunk.",
+    ),
+    "time": (
+        "seconds",
+        "The total time of the streaming response.",
+    ),
+}
+
+
+class LatencyHistogram:
+    """The histogram with fixed bucket boundaries, whose buckets follow the
+    Prometheus convention, i.e. a bucket counts the values less than or
+    equal to its upper bound."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        """Initialize the histogram.
+
+        Args:
+            buckets (`Sequence[float]`):
+                The upper bounds of the buckets, where an overflow bucket of
+                `+Inf` is added.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the quantile by the linear interpolation within the
+        bucket, as `histogram_quantile` of Prometheus does.
+
+        Args:
+            q (`float`):
+                The quantile between 0 and 1.
+
+        Returns:
+            `float | None`:
+                The estimated quantile, or `None` if no value is recorded.
+                The values in the overflow bucket are estimated by the
+                largest bound.
+        """
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count > 0:
+                if index == len(self.buckets):
+                    return self.buckets[-1] if self.buckets else None
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1] if self.buckets else None
+
+    def to_dict(self) -> dict:
+        """Convert the histogram into a JSON serializable dictionary, with
+        the cumulative bucket counts and the estimated percentiles."""
+        buckets, cumulative = {}, 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "buckets": buckets,
+            "sum": self.sum,
+            "count": self.count,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+def _escape_label(value: str) -> str:
+    """Escape the label value in the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class LatencyAggregator:
+    """The in-process aggregator of the streaming latency metrics, which
+    keeps a histogram per model and metric. The histograms can be exported
+    as JSON or in the Prometheus text format.
+
+    The recorded metrics are `time_to_first_token`, `chunk_interval`,
+    `tokens_per_second` and `time` (the total time of the stream).
+    """
+
+    def __init__(
+        self,
+        time_buckets: Sequence[float] = DEFAULT_TIME_BUCKETS,
+        rate_buckets: Sequence[float] = DEFAULT_RATE_BUCKETS,
+    ) -> None:
+        """Initialize the aggregator.
+
+        Args:
+            time_buckets (`Sequence[float]`, defaults to \
+            `DEFAULT_TIME_BUCKETS`):
+                The bucket bounds of the latencies in seconds.
+            rate_buckets (`Sequence[float]`, defaults to \
+            `DEFAULT_RATE_BUCKETS`):
+                The bucket bounds of the output tokens per second.
+        """
+        self.time_buckets = tuple(time_buckets)
+        self.rate_buckets = tuple(rate_buckets)
+        self._histograms: dict[str, dict[str, LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, model_name: str, metric: str, value: float) -> None:
+        """Record a value into the histogram of the model and metric."""
+        histograms = self._histograms.setdefault(model_name, {})
+        if metric not in histograms:
+            histograms[metric] = LatencyHistogram(
+                self.rate_buckets
+                if metric == "tokens_per_second"
+                else self.time_buckets,
+            )
+        histograms[metric].observe(value)
+
+    def record(
+        self,
+        model_name: str,
+        time_to_first_token: float | None = None,
+        chunk_intervals: Sequence[float] = (),
+        tokens_per_second: float | None = None,
+        total_time: float | None = None,
+    ) -> None:
+        """Record the metrics of a streaming response.
+
+        Args:
+            model_name (`str`):
+                The name of the model.
+            time_to_first_token (`float | None`, optional):
+                The time to the first content chunk in seconds.
+            chunk_intervals (`Sequence[float]`, defaults to `()`):
+                The intervals between the content chunks in seconds.
+            tokens_per_second (`float | None`, optional):
+                The output tokens per second.
+            total_time (`float | None`, optional):
+                The total time of the streaming response in seconds.
+        """
+        with self._lock:
+            if time_to_first_token is not None:
+                self._observe(
+                    model_name,
+                    "time_to_first_token",
+                    time_to_first_token,
+                )
+            for interval in chunk_intervals:
+                self._observe(model_name, "chunk_interval", interval)
+            if tokens_per_second is not None:
+                self._observe(
+                    model_name,
+                    "tokens_per_second",
+                    tokens_per_second,
+                )
+            if total_time is not None:
+                self._observe(model_name, "time", total_time)
+
+    def get_histogram(
+        self,
+        model_name: str,
+        metric: str,
+    ) -> LatencyHistogram | None:
+        """Get the histogram of the model and metric, or `None` if nothing
+        is recorded."""
+        return self._histograms.get(model_name, {}).get(metric)
+
+    def reset(self) -> None:
+        """Clear all the histograms."""
+        with self._lock:
+            self._histograms = {}
+
+    def to_dict(self) -> dict:
+        """Export the histograms as a dictionary keyed by the model name and
+        the metric name."""
+        with self._lock:
+            return {
+                model_name: {
+                    metric: histogram.to_dict()
+                    for metric, histogram in histograms.items()
+                }
+                for model_name, histograms in self._histograms.items()
+            }
+
+    def to_json(self, indent: int | None = None) -> str:
+        """Export the histograms as a JSON string."""
+        return json.dumps(self.to_dict(), indent=indent, ensure_ascii=False)
+
+    def to_prometheus(self, prefix: str = "agentscope_model") -> str:
+        """Export the histograms in the Prometheus text exposition format,
+        where the model name is the `model` label.
+
+        Args:
+            prefix (`str`, defaults to `"agentscope_model"`):
+                The prefix of the metric names.
+
+        Returns:
+            `str`:
+                The metrics in the Prometheus text format.
+        """
+        lines = []
+        with self._lock:
+            for metric, (unit, description) in _METRICS.items():
+                name = f"{prefix}_{metric}"
+                if unit != metric:
+                    name = f"{name}_{unit}"
+                series = [
+                    (model_name, histograms[metric])
+                    for model_name, histograms in self._histograms.items()
+                    if metric in histograms
+                ]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for model_name, histogram in series:
+                    label = f'model="{_escape_label(model_name)}"'
+                    cumulative = 0
+                    for bound, count in zip(
+                        [*histogram.buckets, "+Inf"],
+                        histogram.counts,
+                    ):
+                        cumulative += count
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{bound}"}} '
+                            f"{cumulative}",
+                        )
+                    lines.append(f"{name}_sum{{{label}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label}}} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+_latency_aggregator = LatencyAggregator()
+
+
+def get_latency_aggregator() -> LatencyAggregator:
+    """Get the process-wide aggregator of the streaming latency metrics,
+    which all the chat models record into.
+
+    Returns:
+        `LatencyAggregator`:
+            The latency aggregator.
+    """
+    return _latency_aggregator
+
+
+class _StreamLatencyTracker:
+    """The tracker of the latency metrics of a streaming response, which is
+    notified on every content chunk by the stream parser, fills the metrics
+    into the usage, and records them into the aggregator. The chunk
+    intervals are recorded as they arrive, and the other metrics at the
+    end."""
+
+    def __init__(self, model_name: str, start_datetime: datetime) -> None:
+        """Initialize the tracker.
+
+        Args:
+            model_name (`str`):
+                The name of the model.
+            start_datetime (`datetime`):
+                The start datetime of the request.
+        """
+        self.model_name = model_name
+        # The monotonic clock is used to measure the short intervals
+        self._start = (
+            time.monotonic()
+            - (datetime.now() - start_datetime).total_seconds()
+        )
+        self._first: float | None = None
+        self._last: float | None = None
+        self._n_intervals = 0
+        self._interval_sum = 0.0
+        self._interval_max = 0.0
+        self._finished = False
+
+    def on_chunk(self) -> None:
+        """Record the arrival of a content chunk."""
+        now = time.monotonic()
+        if self._last is None:
+            self._first = now
+        else:
+            interval = now - self._last
+            self._n_intervals += 1
+            self._interval_sum += interval
+            self._interval_max = max(self._interval_max, interval)
+            get_latency_aggregator().record(
+                self.model_name,
+                chunk_intervals=(interval,),
+            )
+        self._last = now
+
+    def update(self, usage: ChatUsage | None) -> ChatUsage | None:
+        """Fill the latency metrics so far into the usage.
+
+        Args:
+            usage (`ChatUsage | None`):
+                The usage of the current chunk, which is modified in place.
+
+        Returns:
+            `ChatUsage | None`:
+                The given usage.
+        """
+        if usage is None or self._first is None or self._last is None:
+            return usage
+        usage.time_to_first_token = self._first - self._start
+        if self._n_intervals:
+            usage.mean_chunk_interval = self._interval_sum / self._n_intervals
+            usage.max_chunk_interval = self._interval_max
+        duration = self._last - self._first
+        if duration > 0 and usage.output_tokens:
+            usage.tokens_per_second = usage.output_tokens / duration
+        return usage
+
+    def finish(self, usage: ChatUsage | None) -> None:
+        """Fill the final metrics into the usage and record them into the
+        aggregator, which only takes effect once."""
+        if self._finished or self._first is None:
+            return
+        self._finished = True
+        self.update(usage)
+        get_latency_aggregator().record(
+            self.model_name,
+            time_to_first_token=self._first - self._start,
+            tokens_per_second=usage.tokens_per_second if usage else None,
+            total_time=time.monotonic() - self._start,
+        )
@@ -1,10 +1,22 @@
 # -*- coding: utf-8 -*-
 """The chat model base class."""
 
+import time
 from abc import abstractmethod
-from typing import AsyncGenerator, Any
+from typing import AsyncGenerator, Any, Literal
 
-from ._model_response import ChatResponse
+from ._batch import BATCH_MODES, _aggregate_usage, _run_local_batch
+from ._model_response import ChatBatchResponse, ChatResponse
+from ._rate_limiter import (
+    RateLimiter,
+    get_shared_rate_limiter,
+    _wrap_with_rate_limiter,
+)
+from ._response_cache import (
+    RESPONSE_CACHE_MODES,
+    ResponseCacheBase,
+    _wrap_with_response_cache,
+)
 
 TOOL_CHOICE_MODES = ["auto", "none", "any", "required"]
 
@@ -18,10 +30,37 @@ class ChatModelBase:
     stream: bool
     """Is the model output streaming or not"""
 
+    stream_delta: bool
+    """Whether the streaming chunks only carry the deltas, with the running
+    snapshot in `ChatResponse.snapshot`"""
+
+    response_cache: ResponseCacheBase | None = None
+    """The response cache of the model, if any"""
+
+    response_cache_mode: Literal["cache", "record", "replay"] = "cache"
+    """How the response cache is used"""
+
+    rate_limiter: RateLimiter | None = None
+    """The rate limiter of the model, if any"""
+
+    supports_provider_batch: bool = False
+    """Whether the model supports the batch endpoint of the provider, i.e.
+    the `"provider"` mode of `batch`"""
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Wrap the `__call__` function of the subclasses with the response
+        cache and the rate limiter, where the cache hits are not limited."""
+        super().__init_subclass__(**kwargs)
+        if "__call__" in cls.__dict__:
+            cls.__call__ = _wrap_with_response_cache(
+                _wrap_with_rate_limiter(cls.__dict__["__call__"]),
+            )
+
     def __init__(
         self,
         model_name: str,
         stream: bool,
+        stream_delta: bool = False,
     ) -> None:
         """Initialize the chat model base class.
 
@@ -30,9 +69,195 @@ class ChatModelBase:
                 The name of the model
             stream (`bool`):
                 Whether the model output is streaming or not
+            stream_delta (`bool`, defaults to `False`):
+                Whether the streaming chunks only carry the new content
+                (deltas) instead of the accumulated content. The full content
+                is materialized on demand from `ChatResponse.snapshot`, so
+                the cost per chunk is proportional to the delta. Only
+                supported by the models that stream the deltas.
         """
         self.model_name = model_name
         self.stream = stream
+        self.stream_delta = stream_delta
+
+    def set_response_cache(
+        self,
+        cache: ResponseCacheBase | None,
+        mode: Literal["cache", "record", "replay"] = "cache",
+    ) -> None:
+        """Set the response cache, which stores the responses keyed by the
+        canonical hash of the model configuration, the messages, tools and
+        the generation arguments. The streaming responses are stored as
+        chunk sequences, and replayed with their original structure.
+
+        Args:
+            cache (`ResponseCacheBase | None`):
+                The response cache, e.g. `InMemoryResponseCache` or
+                `FileResponseCache`. Set to `None` to disable the cache.
+            mode (`Literal["cache", "record", "replay"]`, defaults to \
+            `"cache"`):
+                In `"cache"` mode, the cached response is returned if found,
+                otherwise the model is called and its response is stored. In
+                `"record"` mode, the model is always called and its response
+                overwrites the cached one. In `"replay"` mode, the model is
+                never called, and a `RuntimeError` is raised on a cache miss,
+                which is useful for the deterministic offline benchmarks.
+        """
+        if mode not in RESPONSE_CACHE_MODES:
+            raise ValueError(
+                f"Invalid response cache mode {mode}, expected one of "
+                f"{RESPONSE_CACHE_MODES}.",
+            )
+        self.response_cache = cache
+        self.response_cache_mode = mode
+
+    def set_rate_limiter(self, rate_limiter: RateLimiter | None) -> None:
+        """Set the rate limiter, which can be shared by multiple model
+        instances.
+
+        Args:
+            rate_limiter (`RateLimiter | None`):
+                The rate limiter. Set to `None` to disable the rate limiting.
+        """
+        self.rate_limiter = rate_limiter
+
+    def use_shared_rate_limiter(self, **kwargs: Any) -> RateLimiter:
+        """Use the process-wide rate limiter shared by the model instances
+        that call the same endpoint and model with the same API key.
+
+        Args:
+            **kwargs (`Any`):
+                The arguments to create the rate limiter, e.g. `rpm` and
+                `tpm`, which are ignored if the shared rate limiter already
+                exists.
+
+        Returns:
+            `RateLimiter`:
+                The shared rate limiter.
+        """
+        client = getattr(self, "client", None)
+        base_url = getattr(client, "base_url", None) or getattr(
+            self,
+            "base_http_api_url",
+            None,
+        )
+        api_key = getattr(self, "api_key", None) or getattr(
+            client,
+            "api_key",
+            None,
+        )
+        self.rate_limiter = get_shared_rate_limiter(
+            f"{self.__class__.__name__}:{base_url or ''}",
+            self.model_name,
+            api_key if isinstance(api_key, str) else None,
+            **kwargs,
+        )
+        return self.rate_limiter
+
+    async def batch(
+        self,
+        prompts: list[list[dict]],
+        mode: Literal["local", "provider"] = "local",
+        max_concurrency: int = 8,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        poll_interval: float = 30.0,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> ChatBatchResponse:
+        """Get the responses of a batch of requests, e.g. for the evaluation
+        sweeps and the bulk summarization.
+
+        Args:
+            prompts (`list[list[dict]]`):
+                The formatted messages of the requests.
+            mode (`Literal["local", "provider"]`, defaults to `"local"`):
+                In `"local"` mode, the requests are sent by a concurrent loop
+                bounded by `max_concurrency`, with the retries on errors,
+                where the response cache and the rate limiter of the model
+                apply. In `"provider"` mode, the requests are submitted to
+                the batch endpoint of the provider, which is polled until the
+                job is done. Note the streaming setting doesn't apply to the
+                provider batch jobs.
+            max_concurrency (`int`, defaults to `8`):
+                The maximum number of the concurrent requests in `"local"`
+                mode.
+            max_retries (`int`, defaults to `3`):
+                The maximum number of the retries of a failed request in
+                `"local"` mode, with the exponential backoff.
+            retry_delay (`float`, defaults to `1.0`):
+                The delay in seconds before the first retry.
+            poll_interval (`float`, defaults to `30.0`):
+                The interval in seconds to poll the provider batch job.
+            timeout (`float | None`, optional):
+                The timeout in seconds of the provider batch job, which is
+                cancelled if exceeded.
+            **kwargs (`Any`):
+                The other arguments of the requests, e.g. `tools`,
+                `tool_choice`, `structured_model` and the generation
+                arguments.
+
+        Returns:
+            `ChatBatchResponse`:
+                The responses and the errors in the order of the requests,
+                and the aggregated usage.
+        """
+        if mode not in BATCH_MODES:
+            raise ValueError(
+                f"Invalid batch mode {mode}, expected one of {BATCH_MODES}.",
+            )
+        if mode == "provider" and not self.supports_provider_batch:
+            raise ValueError(
+                f"{self.__class__.__name__} doesn't support the provider "
+                "batch API, use the 'local' mode instead.",
+            )
+
+        start = time.monotonic()
+        metadata = None
+        if mode == "local":
+            responses, errors = await _run_local_batch(
+                self,
+                prompts,
+                max_concurrency,
+                max_retries,
+                retry_delay,
+                kwargs,
+            )
+        else:
+            responses, errors, metadata = await self._batch_with_provider(
+                prompts,
+                poll_interval,
+                timeout,
+                **kwargs,
+            )
+
+        return ChatBatchResponse(
+            responses=responses,
+            usage=_aggregate_usage(responses, time.monotonic() - start),
+            errors=errors,
+            metadata=metadata,
+        )
+
+    async def _batch_with_provider(
+        self,
+        prompts: list[list[dict]],
+        poll_interval: float,
+        timeout: float | None,
+        **kwargs: Any,
+    ) -> tuple[list[ChatResponse | None], list[str | None], dict]:
+        """Submit the requests to the batch endpoint of the provider, and
+        poll the job until it's done. Implemented by the models that set
+        `supports_provider_batch` to `True`.
+
+        Returns:
+            `tuple[list[ChatResponse | None], list[str | None], dict]`:
+                The responses, the errors in the order of the requests, and
+                the metadata of the batch job.
+        """
+        raise ValueError(
+            f"{self.__class__.__name__} doesn't support the provider batch "
+            "API, use the 'local' mode instead.",
+        )
 
     @abstractmethod
     async def __call__(
@@ -1,28 +1,281 @@
 # -*- coding: utf-8 -*-
 """The model response module."""
-
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Literal, Sequence
+from typing import Any, Literal, Sequence
 
 from ._model_usage import ChatUsage
 from .._utils._common import _get_timestamp
+from .._utils._json_stream import _IncrementalJSONParser
 from .._utils._mixin import DictMixin
 from ..message import (
     TextBlock,
     ToolUseBlock,
     ThinkingBlock,
     AudioBlock,
+    Base64Source,
 )
 from ..types import JSONSerializableObject
 
 
+def _join_pieces(pieces: list[str]) -> str:
+    """Join the string pieces, and keep the joined string as the only piece
+    so that it's not joined again."""
+    if len(pieces) > 1:
+        pieces[:] = ["".join(pieces)]
+    return pieces[0] if pieces else ""
+
+
+class ChatResponseSnapshot:
+    """The running snapshot of a streaming chat response, which accumulates
+    the deltas of the chunks and materializes the full content blocks on
+    demand.
+
+    The textual and audio deltas are kept as lists of pieces and joined only
+    when the snapshot is materialized, so consuming a chunk costs O(delta)
+    rather than O(total output). The tool calls are kept with their
+    incremental JSON parsers, and only appear in the materialized content.
+    """
+
+    def __init__(
+        self,
+        delta: bool = False,
+        structured_output: Literal["text", "tool_use"] | None = None,
+    ) -> None:
+        """Initialize the snapshot.
+
+        Args:
+            delta (`bool`, defaults to `False`):
+                Whether to track the deltas since the last `pop_delta` call,
+                i.e. whether the chunks are yielded in delta mode.
+            structured_output (`Literal["text", "tool_use"] | None`, \
+            defaults to `None`):
+                Where the structured output comes from, i.e. the JSON text or
+                the input of the last tool call. If given, the structured
+                output is returned by the `metadata` property.
+        """
+        self.delta = delta
+        self.structured_output = structured_output
+
+        self._thinking: list[str] = []
+        self._text: list[str] = []
+        self._audio: list[str] = []
+        self._audio_media_type = "audio/wav"
+
+        self.thinking_signature: str | None = None
+        """The signature of the thinking block, if any."""
+
+        self.tool_calls: OrderedDict[Any, dict] = OrderedDict()
+        """The tool calls, whose inputs are incremental JSON parsers."""
+
+        self._text_parser = (
+            _IncrementalJSONParser() if structured_output == "text" else None
+        )
+
+        # The deltas since the last `pop_delta` call
+        self._delta_thinking: list[str] = []
+        self._delta_text: list[str] = []
+        self._delta_audio: list[str] = []
+
+    def add_thinking(self, thinking: str) -> None:
+        """Append a thinking delta."""
+        if thinking:
+            self._thinking.append(thinking)
+            if self.delta:
+                self._delta_thinking.append(thinking)
+
+    def add_text(self, text: str) -> None:
+        """Append a text delta."""
+        if text:
+            self._text.append(text)
+            if self._text_parser is not None:
+                self._text_parser.feed(text)
+            if self.delta:
+                self._delta_text.append(text)
+
+    def add_audio(self, data: str, media_type: str) -> None:
+        """Append a delta of the base64 encoded audio data."""
+        if data:
+            self._audio.append(data)
+            self._audio_media_type = media_type
+            if self.delta:
+                self._delta_audio.append(data)
+
+    def add_tool_call(
+        self,
+        key: Any,
+        call_id: str = "",
+        name: str = "",
+    ) -> dict:
+        """Get the tool call by the given key, which is created if it
+        doesn't exist. The arguments should be fed to its `"input"` parser.
+
+        Args:
+            key (`Any`):
+                The key of the tool call, e.g. its index in the stream.
+            call_id (`str`, defaults to `""`):
+                The identifier of the new tool call.
+            name (`str`, defaults to `""`):
+                The name of the new tool call.
+
+        Returns:
+            `dict`:
+                The tool call with `"type"`, `"id"`, `"name"` and `"input"`
+                fields.
+        """
+        if key not in self.tool_calls:
+            self.tool_calls[key] = {
+                "type": "tool_use",
+                "id": call_id,
+                "name": name,
+                "input": _IncrementalJSONParser(),
+            }
+        return self.tool_calls[key]
+
+    def close(self) -> None:
+        """Finish parsing the structured output and the tool inputs, where
+        the invalid or incomplete JSON is repaired once."""
+        if self._text_parser is not None:
+            self._text_parser.close()
+        for tool_call in self.tool_calls.values():
+            tool_call["input"].close()
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the snapshot has no content yet."""
+        return not (
+            self._thinking or self._text or self._audio or self.tool_calls
+        )
+
+    @property
+    def text(self) -> str:
+        """The accumulated text."""
+        return _join_pieces(self._text)
+
+    @property
+    def thinking(self) -> str:
+        """The accumulated thinking content."""
+        return _join_pieces(self._thinking)
+
+    @property
+    def metadata(self) -> dict | None:
+        """The structured output, if any."""
+        if self._text_parser is not None and self._text:
+            return self._text_parser.get()
+        if self.structured_output == "tool_use" and self.tool_calls:
+            return self._get_tool_input(next(reversed(self.tool_calls)))
+        return None
+
+    def _get_tool_input(self, key: Any) -> dict:
+        """Get the (partial) input of the tool call."""
+        tool_input = self.tool_calls[key]["input"].get()
+        return tool_input if isinstance(tool_input, dict) else {}
+
+    def _to_blocks(
+        self,
+        thinking: list[str],
+        audio: list[str],
+        text: list[str],
+    ) -> list[ThinkingBlock | AudioBlock | TextBlock]:
+        """Convert the given pieces into the content blocks."""
+        blocks: list = []
+        if thinking:
+            block = ThinkingBlock(
+                type="thinking",
+                thinking=_join_pieces(thinking),
+            )
+            if self.thinking_signature is not None:
+                block["signature"] = self.thinking_signature
+            blocks.append(block)
+        if audio:
+            blocks.append(
+                AudioBlock(
+                    type="audio",
+                    source=Base64Source(
+                        type="base64",
+                        media_type=self._audio_media_type,
+                        data=_join_pieces(audio),
+                    ),
+                ),
+            )
+        if text:
+            blocks.append(TextBlock(type="text", text=_join_pieces(text)))
+        return blocks
+
+    def pop_delta(self) -> list[ThinkingBlock | AudioBlock | TextBlock]:
+        """Get the content blocks of the deltas since the last call, which
+        only include the thinking, audio and text blocks.
+
+        Returns:
+            `list[ThinkingBlock | AudioBlock | TextBlock]`:
+                The delta blocks, e.g. a text block with only the new text.
+        """
+        blocks = self._to_blocks(
+            self._delta_thinking,
+            self._delta_audio,
+            self._delta_text,
+        )
+        self._delta_thinking = []
+        self._delta_audio = []
+        self._delta_text = []
+        return blocks
+
+    def materialize(
+        self,
+    ) -> list[TextBlock | ToolUseBlock | ThinkingBlock | AudioBlock]:
+        """Materialize the full content blocks accumulated so far. The
+        joined strings are kept, so materializing again without new deltas
+        doesn't join the pieces again.
+
+        Returns:
+            `list[TextBlock | ToolUseBlock | ThinkingBlock | AudioBlock]`:
+                A new list of the full content blocks.
+        """
+        blocks: list = self._to_blocks(self._thinking, self._audio, self._text)
+        for key, tool_call in self.tool_calls.items():
+            blocks.append(
+                ToolUseBlock(
+                    type="tool_use",
+                    id=tool_call["id"],
+                    name=tool_call["name"],
+                    input=self._get_tool_input(key),
+                ),
+            )
+        return blocks
+
+    def to_chat_response(self, usage: ChatUsage | None) -> "ChatResponse":
+        """Create the chat response of the current chunk, which carries the
+        delta and this snapshot in delta mode, otherwise the full content.
+
+        Args:
+            usage (`ChatUsage | None`):
+                The usage information of the current chunk.
+
+        Returns:
+            `ChatResponse`:
+                The chat response of the current chunk.
+        """
+        if self.delta:
+            return ChatResponse(
+                content=self.pop_delta(),
+                usage=usage,
+                snapshot=self,
+            )
+        return ChatResponse(
+            content=self.materialize(),
+            usage=usage,
+            metadata=self.metadata,
+        )
+
+
 @dataclass
 class ChatResponse(DictMixin):
     """The response of chat models."""
 
     content: Sequence[TextBlock | ToolUseBlock | ThinkingBlock | AudioBlock]
     """The content of the chat response, which can include text blocks,
-    tool use blocks, or thinking blocks."""
+    tool use blocks, or thinking blocks. In delta streaming mode, it only
+    includes the thinking, audio and text deltas of the current chunk."""
 
     id: str = field(default_factory=lambda: _get_timestamp(True))
     """The unique identifier formatter """
@@ -40,3 +293,60 @@ class ChatResponse(DictMixin):
         default_factory=lambda: None,
     )
     """The metadata of the chat response"""
+
+    snapshot: ChatResponseSnapshot | None = field(
+        default_factory=lambda: None,
+    )
+    """The running snapshot of the streaming response in delta mode, from
+    which the full content and metadata are materialized on demand."""
+
+    def materialize(self) -> "ChatResponse":
+        """Get the chat response with the full content. In delta mode, the
+        content and metadata are materialized from the snapshot, where the
+        metadata attached to the chunk itself (e.g. by a composite model) is
+        kept, otherwise the response itself is returned.
+
+        Returns:
+            `ChatResponse`:
+                The chat response with the full content.
+        """
+        if self.snapshot is None:
+            return self
+        metadata = self.snapshot.metadata
+        if self.metadata:
+            metadata = {
+                **(metadata if isinstance(metadata, dict) else {}),
+                **self.metadata,
+            }
+        return ChatResponse(
+            content=self.snapshot.materialize(),
+            id=self.id,
+            created_at=self.created_at,
+            usage=self.usage,
+            metadata=metadata,
+        )
+
+
+@dataclass
+class ChatBatchResponse(DictMixin):
+    """The responses of a batch of chat model requests."""
+
+    responses: list[ChatResponse | None]
+    """The responses in the order of the requests, where the failed requests
+    are `None`."""
+
+    usage: ChatUsage
+    """The aggregated usage of the successful requests, where the time is the
+    wall-clock time of the whole batch."""
+
+    errors: list[str | None] = field(default_factory=list)
+    """The error messages in the order of the requests, where the successful
+    requests are `None`."""
+
+    id: str = field(default_factory=lambda: _get_timestamp(True))
+    """The unique identifier of the batch"""
+
+    metadata: dict[str, JSONSerializableObject] | None = field(
+        default_factory=lambda: None,
+    )
+    """The metadata of the batch, e.g. the provider batch id and status."""
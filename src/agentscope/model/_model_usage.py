@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """The model usage class in agentscope."""
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import Any, Literal
 
 from .._utils._mixin import DictMixin
 
@@ -21,3 +21,45 @@ class ChatUsage(DictMixin):
 
     type: Literal["chat"] = field(default_factory=lambda: "chat")
     """The type of the usage, must be `chat`."""
+
+    cached_tokens: int = field(default_factory=lambda: 0)
+    """The number of input tokens read from the provider-side prompt
+    cache."""
+
+    cache_creation_tokens: int = field(default_factory=lambda: 0)
+    """The number of input tokens written into the provider-side prompt
+    cache, which is only reported by the providers with explicit cache
+    breakpoints, e.g. Anthropic."""
+
+    time_to_first_token: float | None = field(default_factory=lambda: None)
+    """The time from the request to the first content chunk in seconds,
+    which is only recorded for the streaming responses."""
+
+    mean_chunk_interval: float | None = field(default_factory=lambda: None)
+    """The mean interval between the successive content chunks in seconds,
+    which is only recorded for the streaming responses."""
+
+    max_chunk_interval: float | None = field(default_factory=lambda: None)
+    """The maximum interval between the successive content chunks in
+    seconds, which is only recorded for the streaming responses."""
+
+    tokens_per_second: float | None = field(default_factory=lambda: None)
+    """The output tokens per second after the first content chunk, which is
+    only recorded for the streaming responses."""
+
+
+def _get_usage_field(usage: Any, *path: str) -> int:
+    """Get an integer field from the usage object of the provider by the
+    attribute (or key) path, e.g. `("prompt_tokens_details",
+    "cached_tokens")`.
+
+    Returns:
+        `int`:
+            The value of the field, or `0` if it's missing.
+    """
+    for key in path:
+        if isinstance(usage, dict):
+            usage = usage.get(key)
+        else:
+            usage = getattr(usage, key, None)
+    return usage if isinstance(usage, int) else 0
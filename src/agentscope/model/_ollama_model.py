@@ -15,10 +15,13 @@ from collections import OrderedDict
 from pydantic import BaseModel
 
 from . import ChatResponse
+from ._client_registry import get_client_registry
+from ._latency import _StreamLatencyTracker
 from ._model_base import ChatModelBase
 from ._model_usage import ChatUsage
 from .._logging import logger
 from .._utils._common import _json_loads_with_repair
+from .._utils._json_stream import _IncrementalJSONParser
 from ..message import ToolUseBlock, TextBlock, ThinkingBlock
 from ..tracing import trace_llm
 
@@ -40,6 +43,7 @@ class OllamaChatModel(ChatModelBase):
         keep_alive: str = "5m",
         enable_thinking: bool | None = None,
         host: str | None = None,
+        shared_client: bool = False,
         **kwargs: Any,
     ) -> None:
         """Initialize the Ollama chat model.
@@ -63,6 +67,10 @@ class OllamaChatModel(ChatModelBase):
            host (`str | None`, default `None`):
                The host address of the Ollama server. If None, uses the
                default address (typically http://localhost:11434).
+           shared_client (`bool`, default `False`):
+               Whether to use the shared client from the client registry,
+               which reuses the keep-alive connections across the instances
+               with the same host and arguments.
            **kwargs (`Any`):
                Additional keyword arguments to pass to the base chat model
                class.
@@ -78,10 +86,22 @@ class OllamaChatModel(ChatModelBase):
 
         super().__init__(model_name, stream)
 
-        self.client = ollama.AsyncClient(
-            host=host,
-            **kwargs,
-        )
+        if shared_client:
+            self.client = get_client_registry().get_client(
+                "ollama",
+                lambda transport: ollama.AsyncClient(
+                    host=host,
+                    transport=transport,
+                    **kwargs,
+                ),
+                base_url=host,
+                options=kwargs,
+            )
+        else:
+            self.client = ollama.AsyncClient(
+                host=host,
+                **kwargs,
+            )
         self.options = options
         self.keep_alive = keep_alive
         self.think = enable_thinking
@@ -195,13 +215,22 @@ class OllamaChatModel(ChatModelBase):
         accumulated_text = ""
         acc_thinking_content = ""
         tool_calls = OrderedDict()  # Store tool calls
+        # Parse the structured output incrementally instead of repairing the
+        # accumulated text on every chunk
+        text_parser = _IncrementalJSONParser()
         metadata: dict | None = None
+        latency = _StreamLatencyTracker(self.model_name, start_datetime)
+        usage = None
 
         async for chunk in response:
             # Handle text content
             msg = chunk.message
+            if msg.content or msg.thinking or msg.tool_calls:
+                latency.on_chunk()
             acc_thinking_content += msg.thinking or ""
             accumulated_text += msg.content or ""
+            if structured_model:
+                text_parser.feed(msg.content or "")
 
             # Handle tool calls
             for idx, tool_call in enumerate(msg.tool_calls or []):
@@ -213,6 +242,10 @@ class OllamaChatModel(ChatModelBase):
                     "name": function.name,
                     "input": function.arguments,
                 }
+            # Only the final chunk is yielded
+            if not chunk.done:
+                continue
+
             # Calculate usage statistics
             current_time = (datetime.now() - start_datetime).total_seconds()
             usage = ChatUsage(
@@ -234,7 +267,7 @@ class OllamaChatModel(ChatModelBase):
             if accumulated_text:
                 contents.append(TextBlock(type="text", text=accumulated_text))
                 if structured_model:
-                    metadata = _json_loads_with_repair(accumulated_text)
+                    metadata = text_parser.close()
 
             # Add tool call blocks
             for tool_call in tool_calls.values():
@@ -253,15 +286,16 @@ class OllamaChatModel(ChatModelBase):
                 except Exception as e:
                     print(f"Error parsing tool call input: {e}")
 
-            # Generate response when there's new content or at final chunk
-            if chunk.done and contents:
+            if contents:
                 res = ChatResponse(
                     content=contents,
-                    usage=usage,
+                    usage=latency.update(usage),
                     metadata=metadata,
                 )
                 yield res
 
+        latency.finish(usage)
+
     async def _parse_ollama_completion_response(
         self,
         start_datetime: datetime,
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=too-many-branches
 """OpenAI Chat model class."""
+import json
 from datetime import datetime
 from typing import (
     Any,
@@ -10,13 +11,15 @@ from typing import (
     Literal,
     Type,
 )
-from collections import OrderedDict
 
 from pydantic import BaseModel
 
-from . import ChatResponse
+from ._batch import _poll_batch
+from ._client_registry import get_client_registry, _get_http_module
+from ._latency import _StreamLatencyTracker
+from ._model_response import ChatResponse, ChatResponseSnapshot
 from ._model_base import ChatModelBase
-from ._model_usage import ChatUsage
+from ._model_usage import ChatUsage, _get_usage_field
 from .._logging import logger
 from .._utils._common import _json_loads_with_repair
 from ..message import (
@@ -40,15 +43,20 @@ else:
 class OpenAIChatModel(ChatModelBase):
     """The OpenAI chat model class."""
 
+    supports_provider_batch: bool = True
+    """Whether the model supports the batch endpoint of the provider"""
+
     def __init__(
         self,
         model_name: str,
         api_key: str | None = None,
         stream: bool = True,
+        stream_delta: bool = False,
         reasoning_effort: Literal["low", "medium", "high"] | None = None,
         organization: str = None,
         client_args: dict = None,
         generate_kwargs: dict[str, JSONSerializableObject] | None = None,
+        shared_client: bool = False,
     ) -> None:
         """Initialize the openai client.
 
@@ -60,6 +68,9 @@ class OpenAIChatModel(ChatModelBase):
                 be read from the environment variable `OPENAI_API_KEY`.
             stream (`bool`, default `True`):
                 Whether to use streaming output or not.
+            stream_delta (`bool`, default `False`):
+                Whether the streaming chunks only carry the new content, with
+                the full content materialized on demand from the snapshot.
             reasoning_effort (`Literal["low", "medium", "high"] | None`, \
             optional):
                 Reasoning effort, supported for o3, o4, etc. Please refer to
@@ -75,17 +86,40 @@ class OpenAIChatModel(ChatModelBase):
              optional):
                The extra keyword arguments used in OpenAI API generation,
                 e.g. `temperature`, `seed`.
+            shared_client (`bool`, default `False`):
+                Whether to use the shared client from the client registry,
+                which reuses the keep-alive connections across the instances
+                with the same API key and client arguments. Refer to
+                `get_client_registry` for the pool limits and `close_all`.
         """
 
-        super().__init__(model_name, stream)
+        super().__init__(model_name, stream, stream_delta)
 
         import openai
 
-        self.client = openai.AsyncClient(
-            api_key=api_key,
-            organization=organization,
-            **(client_args or {}),
-        )
+        client_args = client_args or {}
+        if shared_client:
+            self.client = get_client_registry().get_client(
+                "openai",
+                lambda transport: openai.AsyncClient(
+                    api_key=api_key,
+                    organization=organization,
+                    http_client=openai.DefaultAsyncHttpxClient(
+                        transport=transport,
+                    ),
+                    **client_args,
+                ),
+                base_url=client_args.get("base_url"),
+                api_key=api_key,
+                options={"organization": organization, **client_args},
+                http_module=_get_http_module(openai.DefaultAsyncHttpxClient),
+            )
+        else:
+            self.client = openai.AsyncClient(
+                api_key=api_key,
+                organization=organization,
+                **client_args,
+            )
 
         self.reasoning_effort = reasoning_effort
         self.generate_kwargs = generate_kwargs or {}
@@ -142,6 +176,58 @@ class OpenAIChatModel(ChatModelBase):
                 The response from the OpenAI chat completions API.
         """
 
+        kwargs = self._format_request_kwargs(
+            messages,
+            tools,
+            tool_choice,
+            structured_model,
+            **kwargs,
+        )
+
+        start_datetime = datetime.now()
+
+        if structured_model:
+            if not self.stream:
+                response = await self.client.chat.completions.parse(**kwargs)
+            else:
+                response = self.client.chat.completions.stream(**kwargs)
+                return self._parse_openai_stream_response(
+                    start_datetime,
+                    response,
+                    structured_model,
+                )
+        else:
+            response = await self.client.chat.completions.create(**kwargs)
+
+        if self.stream:
+            return self._parse_openai_stream_response(
+                start_datetime,
+                response,
+                structured_model,
+            )
+
+        # Non-streaming response
+        parsed_response = self._parse_openai_completion_response(
+            start_datetime,
+            response,
+            structured_model,
+        )
+
+        return parsed_response
+
+    def _format_request_kwargs(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        tool_choice: Literal["auto", "none", "any", "required"]
+        | str
+        | None = None,
+        structured_model: Type[BaseModel] | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """Format the keyword arguments of the OpenAI chat completions API,
+        where the `response_format` is the structured model class if given.
+        """
         # checking messages
         if not isinstance(messages, list):
             raise ValueError(
@@ -174,8 +260,6 @@ class OpenAIChatModel(ChatModelBase):
         if self.stream:
             kwargs["stream_options"] = {"include_usage": True}
 
-        start_datetime = datetime.now()
-
         if structured_model:
             if tools or tool_choice:
                 logger.warning(
@@ -188,33 +272,118 @@ class OpenAIChatModel(ChatModelBase):
             kwargs.pop("tools", None)
             kwargs.pop("tool_choice", None)
             kwargs["response_format"] = structured_model
-            if not self.stream:
-                response = await self.client.chat.completions.parse(**kwargs)
-            else:
-                response = self.client.chat.completions.stream(**kwargs)
-                return self._parse_openai_stream_response(
-                    start_datetime,
-                    response,
-                    structured_model,
-                )
-        else:
-            response = await self.client.chat.completions.create(**kwargs)
 
-        if self.stream:
-            return self._parse_openai_stream_response(
-                start_datetime,
-                response,
+        return kwargs
+
+    async def _batch_with_provider(
+        self,
+        prompts: list[list[dict]],
+        poll_interval: float,
+        timeout: float | None,
+        tools: list[dict] | None = None,
+        tool_choice: Literal["auto", "none", "any", "required"]
+        | str
+        | None = None,
+        structured_model: Type[BaseModel] | None = None,
+        **kwargs: Any,
+    ) -> tuple[list[ChatResponse | None], list[str | None], dict]:
+        """Submit the requests to the OpenAI Batch API, which is also
+        provided by the OpenAI-compatible providers, and poll the job until
+        it's done."""
+        from openai import NOT_GIVEN
+        from openai.types.chat import ChatCompletion
+        from openai.lib._parsing._completions import (
+            parse_chat_completion,
+            type_to_response_format_param,
+        )
+
+        lines = []
+        for index, messages in enumerate(prompts):
+            body = self._format_request_kwargs(
+                messages,
+                tools,
+                tool_choice,
                 structured_model,
+                **kwargs,
+            )
+            body.pop("stream", None)
+            body.pop("stream_options", None)
+            if structured_model:
+                body["response_format"] = type_to_response_format_param(
+                    structured_model,
+                )
+            lines.append(
+                json.dumps(
+                    {
+                        "custom_id": str(index),
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": body,
+                    },
+                    ensure_ascii=False,
+                ),
             )
 
-        # Non-streaming response
-        parsed_response = self._parse_openai_completion_response(
-            start_datetime,
-            response,
-            structured_model,
+        start_datetime = datetime.now()
+        input_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info("Submitted the OpenAI batch job %s.", batch.id)
+
+        batch = await _poll_batch(
+            lambda: self.client.batches.retrieve(batch.id),
+            lambda _: _.status
+            in ["completed", "failed", "expired", "cancelled"],
+            poll_interval,
+            timeout,
+            lambda: self.client.batches.cancel(batch.id),
         )
 
-        return parsed_response
+        responses: list[ChatResponse | None] = [None] * len(prompts)
+        errors: list[str | None] = [
+            f"No result in the batch job {batch.id} with status "
+            f"{batch.status}.",
+        ] * len(prompts)
+        for file_id in [batch.error_file_id, batch.output_file_id]:
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                index = int(result["custom_id"])
+                response = result.get("response") or {}
+                if response.get("status_code") != 200:
+                    errors[index] = str(
+                        result.get("error") or response.get("body"),
+                    )
+                    continue
+                completion = ChatCompletion.model_validate(response["body"])
+                if structured_model:
+                    completion = parse_chat_completion(
+                        response_format=structured_model,
+                        input_tools=NOT_GIVEN,
+                        chat_completion=completion,
+                    )
+                responses[index] = self._parse_openai_completion_response(
+                    start_datetime,
+                    completion,
+                    structured_model,
+                )
+                errors[index] = None
+
+        return (
+            responses,
+            errors,
+            {"batch_id": batch.id, "status": batch.status},
+        )
 
     async def _parse_openai_stream_response(
         self,
@@ -242,17 +411,22 @@ class OpenAIChatModel(ChatModelBase):
 
         .. note::
             If `structured_model` is not `None`, the expected structured output
-            will be stored in the metadata of the `ChatResponse`.
+            will be stored in the metadata of the `ChatResponse`. In delta
+            mode, the content only carries the deltas, and the full content
+            and metadata are materialized from `ChatResponse.snapshot`.
         """
-        usage, res = None, None
-        text = ""
-        thinking = ""
-        audio = ""
-        tool_calls = OrderedDict()
-        metadata: dict | None = None
-        contents: List[
-            TextBlock | ToolUseBlock | ThinkingBlock | AudioBlock
-        ] = []
+        usage = None
+        # Accumulate the deltas, where the JSON is parsed incrementally
+        # instead of repairing the accumulated string on every chunk
+        snapshot = ChatResponseSnapshot(
+            delta=self.stream_delta,
+            structured_output="text" if structured_model else None,
+        )
+        media_type = self.generate_kwargs.get("audio", {}).get(
+            "format",
+            "wav",
+        )
+        latency = _StreamLatencyTracker(self.model_name, start_datetime)
 
         async with response as stream:
             async for item in stream:
@@ -268,109 +442,49 @@ class OpenAIChatModel(ChatModelBase):
                         input_tokens=chunk.usage.prompt_tokens,
                         output_tokens=chunk.usage.completion_tokens,
                         time=(datetime.now() - start_datetime).total_seconds(),
+                        cached_tokens=_get_usage_field(
+                            chunk.usage,
+                            "prompt_tokens_details",
+                            "cached_tokens",
+                        ),
                     )
 
                 if not chunk.choices:
-                    if usage and contents:
-                        res = ChatResponse(
-                            content=contents,
-                            usage=usage,
-                            metadata=metadata,
-                        )
-                        yield res
+                    if usage and not snapshot.is_empty:
+                        yield snapshot.to_chat_response(latency.update(usage))
                     continue
 
                 choice = chunk.choices[0]
 
-                thinking += (
-                    getattr(choice.delta, "reasoning_content", None) or ""
+                snapshot.add_thinking(
+                    getattr(choice.delta, "reasoning_content", None) or "",
                 )
-                text += choice.delta.content or ""
-
-                if (
-                    hasattr(choice.delta, "audio")
-                    and "data" in choice.delta.audio
-                ):
-                    audio += choice.delta.audio["data"]
-                if (
-                    hasattr(choice.delta, "audio")
-                    and "transcript" in choice.delta.audio
-                ):
-                    text += choice.delta.audio["transcript"]
+                snapshot.add_text(choice.delta.content or "")
 
-                for tool_call in choice.delta.tool_calls or []:
-                    if tool_call.index in tool_calls:
-                        if tool_call.function.arguments is not None:
-                            tool_calls[tool_call.index][
-                                "input"
-                            ] += tool_call.function.arguments
-
-                    else:
-                        tool_calls[tool_call.index] = {
-                            "type": "tool_use",
-                            "id": tool_call.id,
-                            "name": tool_call.function.name,
-                            "input": tool_call.function.arguments or "",
-                        }
-
-                contents = []
-
-                if thinking:
-                    contents.append(
-                        ThinkingBlock(
-                            type="thinking",
-                            thinking=thinking,
-                        ),
-                    )
-
-                if audio:
-                    media_type = self.generate_kwargs.get("audio", {}).get(
-                        "format",
-                        "wav",
-                    )
-                    contents.append(
-                        AudioBlock(
-                            type="audio",
-                            source=Base64Source(
-                                data=audio,
-                                media_type=f"audio/{media_type}",
-                                type="base64",
-                            ),
-                        ),
-                    )
+                audio = getattr(choice.delta, "audio", None)
+                if audio and "data" in audio:
+                    snapshot.add_audio(audio["data"], f"audio/{media_type}")
+                if audio and "transcript" in audio:
+                    snapshot.add_text(audio["transcript"])
 
-                if text:
-                    contents.append(
-                        TextBlock(
-                            type="text",
-                            text=text,
-                        ),
-                    )
+                for tool_call in choice.delta.tool_calls or []:
+                    snapshot.add_tool_call(
+                        tool_call.index,
+                        tool_call.id,
+                        tool_call.function.name,
+                    )["input"].feed(tool_call.function.arguments or "")
 
-                    if structured_model:
-                        metadata = _json_loads_with_repair(text)
-
-                for tool_call in tool_calls.values():
-                    contents.append(
-                        ToolUseBlock(
-                            type=tool_call["type"],
-                            id=tool_call["id"],
-                            name=tool_call["name"],
-                            input=_json_loads_with_repair(
-                                tool_call["input"] or "{}",
-                            ),
-                        ),
-                    )
+                if isinstance(choice.finish_reason, str):
+                    # Repair the invalid or incomplete JSON once at the end
+                    snapshot.close()
 
-                if not contents:
+                if snapshot.is_empty:
                     continue
 
-                res = ChatResponse(
-                    content=contents,
-                    usage=usage,
-                    metadata=metadata,
-                )
-                yield res
+                latency.on_chunk()
+                yield snapshot.to_chat_response(latency.update(usage))
+
+        latency.finish(usage)
 
     def _parse_openai_completion_response(
         self,
@@ -468,6 +582,11 @@ class OpenAIChatModel(ChatModelBase):
                 input_tokens=response.usage.prompt_tokens,
                 output_tokens=response.usage.completion_tokens,
                 time=(datetime.now() - start_datetime).total_seconds(),
+                cached_tokens=_get_usage_field(
+                    response.usage,
+                    "prompt_tokens_details",
+                    "cached_tokens",
+                ),
             )
 
         parsed_response = ChatResponse(
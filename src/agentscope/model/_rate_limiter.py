@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""The rate limiter shared by the chat models that call the same endpoint
+with the same API key, which enforces the requests-per-minute and
+tokens-per-minute budgets, and adapts the concurrency to the observed
+throttling and latency."""
+import asyncio
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from functools import wraps
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Hashable,
+    TYPE_CHECKING,
+)
+
+from ._model_response import ChatResponse
+from ._response_cache import _get_call_arguments
+from .._logging import logger
+from ..token import TokenCounterBase
+
+if TYPE_CHECKING:
+    from ._model_base import ChatModelBase
+else:
+    ChatModelBase = "ChatModelBase"
+
+# The model instance whose rate-limited call is running, so that the nested
+# calls of the parent class are not limited again
+_in_limited_call: ContextVar[Any] = ContextVar(
+    "_in_limited_call",
+    default=None,
+)
+
+
+class _TokenBucket:
+    """The token bucket, which refills at a constant rate up to its
+    capacity."""
+
+    def __init__(self, capacity: float, period: float) -> None:
+        """Initialize the token bucket with full capacity."""
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """Refill the tokens by the elapsed time."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate,
+        )
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """The seconds to wait until the given amount is available, where the
+        amount is capped by the capacity."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Consume the given amount, where the tokens can be negative to
+        reconcile an underestimate."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class RateLimiter:
+    """The rate limiter for a model endpoint, which is shared by all the
+    model instances (and thus all the agents) that call the endpoint with
+    the same API key.
+
+    - The requests-per-minute (RPM) and tokens-per-minute (TPM) budgets are
+      enforced by token buckets. The tokens of a request are estimated from
+      its prompt before sending, and reconciled with the actual usage after
+      the response.
+    - The concurrency limit is adapted in the AIMD way, i.e. increased
+      additively after the successful requests, and decreased
+      multiplicatively when the provider throttles the requests or the
+      latency exceeds the target.
+    - The waiting requests are queued per owner (e.g. per model instance)
+      and dispatched in round-robin order, so that an agent firing many
+      requests doesn't starve the others.
+    """
+
+    def __init__(
+        self,
+        rpm: float | None = None,
+        tpm: float | None = None,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        initial_concurrency: int | None = None,
+        target_latency: float | None = None,
+        backoff_factor: float = 0.5,
+        expected_output_tokens: int = 256,
+        chars_per_token: float = 4.0,
+        token_counter: TokenCounterBase | None = None,
+        period: float = 60.0,
+    ) -> None:
+        """Initialize the rate limiter.
+
+        Args:
+            rpm (`float | None`, optional):
+                The maximum number of requests per minute. `None` means no
+                limit.
+            tpm (`float | None`, optional):
+                The maximum number of tokens (input and output) per minute.
+                `None` means no limit.
+            max_concurrency (`int`, defaults to `16`):
+                The upper bound of the concurrency limit.
+            min_concurrency (`int`, defaults to `1`):
+                The lower bound of the concurrency limit.
+            initial_concurrency (`int | None`, optional):
+                The initial concurrency limit, defaults to `max_concurrency`.
+            target_latency (`float | None`, optional):
+                The target latency in seconds (the time to the first chunk
+                for the streaming responses). The concurrency is decreased
+                when exceeded. `None` means only the throttling is
+                considered.
+            backoff_factor (`float`, defaults to `0.5`):
+                The factor by which the concurrency limit is multiplied when
+                the requests are throttled.
+            expected_output_tokens (`int`, defaults to `256`):
+                The number of output tokens reserved in the TPM budget when
+                the request doesn't specify `max_tokens`.
+            chars_per_token (`float`, defaults to `4.0`):
+                The average number of characters per token used to estimate
+                the prompt tokens, if `token_counter` is not given.
+            token_counter (`TokenCounterBase | None`, optional):
+                The token counter to estimate the prompt tokens, e.g. a
+                remote token counter in the "local" mode.
+            period (`float`, defaults to `60.0`):
+                The period of the RPM and TPM budgets in seconds.
+        """
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError(
+                f"Invalid concurrency bounds [{min_concurrency}, "
+                f"{max_concurrency}].",
+            )
+        if not 0 < backoff_factor < 1:
+            raise ValueError(
+                f"The backoff factor must be in (0, 1), got {backoff_factor}.",
+            )
+
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.target_latency = target_latency
+        self.backoff_factor = backoff_factor
+        self.expected_output_tokens = expected_output_tokens
+        self.chars_per_token = chars_per_token
+        self.token_counter = token_counter
+
+        self._request_bucket = _TokenBucket(rpm, period) if rpm else None
+        self._token_bucket = _TokenBucket(tpm, period) if tpm else None
+
+        self._limit = float(initial_concurrency or max_concurrency)
+        self.in_flight = 0
+
+        # The waiting requests of each owner, which are bound to the event
+        # loop
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queues: OrderedDict[Hashable, deque] = OrderedDict()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def concurrency(self) -> int:
+        """The current concurrency limit."""
+        return max(self.min_concurrency, math.floor(self._limit))
+
+    @property
+    def n_waiting(self) -> int:
+        """The number of the waiting requests."""
+        return sum(len(_) for _ in self._queues.values())
+
+    def _estimate_chars(self, obj: Any) -> int:
+        """Count the characters of the strings in the prompt, where the
+        base64 data are counted as a fixed number of characters."""
+        if isinstance(obj, str):
+            if obj.startswith("data:"):
+                return 1000 * int(self.chars_per_token)
+            return len(obj)
+        if isinstance(obj, dict):
+            return sum(
+                1000 * int(self.chars_per_token)
+                if k == "data" and isinstance(v, str)
+                else self._estimate_chars(v)
+                for k, v in obj.items()
+            )
+        if isinstance(obj, (list, tuple)):
+            return sum(self._estimate_chars(_) for _ in obj)
+        if obj is None:
+            return 0
+        return len(str(obj))
+
+    async def estimate_tokens(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        max_tokens: int | None = None,
+    ) -> int:
+        """Estimate the tokens of a request, including the prompt tokens and
+        the reserved output tokens.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages sent to the model API.
+            tools (`list[dict] | None`, optional):
+                The tool JSON schemas.
+            max_tokens (`int | None`, optional):
+                The maximum number of output tokens of the request.
+
+        Returns:
+            `int`:
+                The estimated number of tokens.
+        """
+        if self.token_counter is not None:
+            n_prompt = await self.token_counter.count(messages, tools=tools)
+        else:
+            n_chars = self._estimate_chars(messages)
+            if tools:
+                n_chars += len(json.dumps(tools, ensure_ascii=False))
+            n_prompt = math.ceil(n_chars / self.chars_per_token)
+        return n_prompt + (max_tokens or self.expected_output_tokens)
+
+    def _bind_loop(self) -> None:
+        """Bind the waiting queues to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queues = OrderedDict()
+            self._timer = None
+            self.in_flight = 0
+
+    async def acquire(self, tokens: int = 0, owner: Hashable = None) -> None:
+        """Wait until the request is allowed by the budgets and the
+        concurrency limit. Each successful `acquire` must be followed by a
+        `release`.
+
+        Args:
+            tokens (`int`, defaults to `0`):
+                The estimated tokens of the request.
+            owner (`Hashable`, optional):
+                The owner of the request, e.g. the model instance. The
+                waiting requests of different owners are dispatched in
+                round-robin order.
+        """
+        self._bind_loop()
+        future = self._loop.create_future()
+        waiter = (future, tokens)
+        self._queues.setdefault(owner, deque()).append(waiter)
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted right before the cancellation
+                self.release(tokens)
+            else:
+                queue = self._queues.get(owner)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[owner]
+            raise
+
+    def release(
+        self,
+        tokens_reserved: int = 0,
+        tokens_used: int | None = None,
+        latency: float | None = None,
+        throttled: bool = False,
+    ) -> None:
+        """Release an acquired request, and adapt the concurrency limit by
+        its outcome.
+
+        Args:
+            tokens_reserved (`int`, defaults to `0`):
+                The estimated tokens passed to `acquire`.
+            tokens_used (`int | None`, optional):
+                The actual tokens of the request, which reconciles the TPM
+                budget.
+            latency (`float | None`, optional):
+                The latency of the request in seconds.
+            throttled (`bool`, defaults to `False`):
+                Whether the provider throttled the request, e.g. responded
+                with HTTP 429.
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+
+        if self._token_bucket is not None and tokens_used is not None:
+            self._token_bucket.consume(tokens_used - tokens_reserved)
+
+        if throttled:
+            self._limit = max(
+                self.min_concurrency,
+                self._limit * self.backoff_factor,
+            )
+            # Wait for the budgets to be refilled before the next requests
+            for bucket in [self._request_bucket, self._token_bucket]:
+                if bucket is not None:
+                    bucket.consume(max(bucket.tokens, 0))
+            logger.debug(
+                "Requests are throttled, decrease the concurrency to %s.",
+                self.concurrency,
+            )
+        elif (
+            latency is not None
+            and self.target_latency is not None
+            and latency > self.target_latency
+        ):
+            self._limit = max(self.min_concurrency, self._limit * 0.9)
+        else:
+            self._limit = min(
+                self.max_concurrency,
+                self._limit + 1 / max(self._limit, 1),
+            )
+
+        if self._loop is not None and not self._loop.is_closed():
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant the waiting requests in round-robin order of the owners,
+        while the concurrency limit and the budgets allow."""
+        while self._queues and self.in_flight < self.concurrency:
+            owner, queue = next(iter(self._queues.items()))
+            future, tokens = queue[0]
+            if future.done():
+                queue.popleft()
+                if not queue:
+                    del self._queues[owner]
+                continue
+
+            wait_time = 0.0
+            if self._request_bucket is not None:
+                wait_time = self._request_bucket.wait_time(1)
+            if self._token_bucket is not None:
+                wait_time = max(
+                    wait_time,
+                    self._token_bucket.wait_time(tokens),
+                )
+            if wait_time > 0:
+                self._schedule(wait_time)
+                return
+
+            if self._request_bucket is not None:
+                self._request_bucket.consume(1)
+            if self._token_bucket is not None:
+                self._token_bucket.consume(tokens)
+
+            queue.popleft()
+            # Move the owner to the end for the round-robin order
+            del self._queues[owner]
+            if queue:
+                self._queues[owner] = queue
+
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _schedule(self, wait_time: float) -> None:
+        """Schedule the dispatching after the budgets are refilled."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = self._loop.call_later(wait_time, self._on_timer)
+
+    def _on_timer(self) -> None:
+        """Dispatch the waiting requests when the timer fires."""
+        self._timer = None
+        self._dispatch()
+
+
+_shared_rate_limiters: dict[tuple, RateLimiter] = {}
+
+
+def get_shared_rate_limiter(
+    provider: str,
+    model_name: str,
+    api_key: str | None = None,
+    **kwargs: Any,
+) -> RateLimiter:
+    """Get the process-wide rate limiter keyed by the provider, the model
+    name and the API key, which is created by the given arguments on the
+    first call.
+
+    Args:
+        provider (`str`):
+            The provider, e.g. the model class and the base URL.
+        model_name (`str`):
+            The model name.
+        api_key (`str | None`, optional):
+            The API key, which is hashed in the key.
+        **kwargs (`Any`):
+            The arguments to create the rate limiter, e.g. `rpm` and `tpm`,
+            which are ignored if the rate limiter already exists.
+
+    Returns:
+        `RateLimiter`:
+            The shared rate limiter.
+    """
+    key = (
+        provider,
+        model_name,
+        hashlib.sha256((api_key or "").encode("utf-8")).hexdigest(),
+    )
+    if key not in _shared_rate_limiters:
+        _shared_rate_limiters[key] = RateLimiter(**kwargs)
+    return _shared_rate_limiters[key]
+
+
+# The names of the throttling error types of the provider SDKs, e.g.
+# `openai.RateLimitError` and `google.api_core.exceptions.TooManyRequests`
+_THROTTLING_ERROR_NAMES = {"RateLimitError", "TooManyRequests"}
+
+
+def _is_throttling_error(error: BaseException) -> bool:
+    """Whether the error indicates the provider throttles the requests, by
+    the HTTP status code of the error, of its response, or of the response
+    object it wraps (e.g. the DashScope responses raised by the models), or
+    by the throttling error types of the SDKs."""
+    for obj in [error, getattr(error, "response", None), *error.args]:
+        for name in ["status_code", "status", "code"]:
+            if getattr(obj, name, None) == 429:
+                return True
+    return any(
+        cls.__name__ in _THROTTLING_ERROR_NAMES for cls in type(error).__mro__
+    )
+
+
+def _get_max_tokens(model: ChatModelBase, arguments: dict) -> int | None:
+    """Get the maximum number of output tokens of the request."""
+    for source in [arguments, getattr(model, "generate_kwargs", None) or {}]:
+        for name in ["max_tokens", "max_completion_tokens"]:
+            if isinstance(source.get(name), int):
+                return source[name]
+    max_tokens = getattr(model, "max_tokens", None)
+    return max_tokens if isinstance(max_tokens, int) else None
+
+
+def _get_used_tokens(response: ChatResponse | None) -> int | None:
+    """Get the actual tokens from the usage of the response."""
+    if response is None or response.usage is None:
+        return None
+    return response.usage.input_tokens + response.usage.output_tokens
+
+
+async def _release_after_stream(
+    generator: AsyncGenerator[ChatResponse, None],
+    limiter: RateLimiter,
+    tokens: int,
+    start: float,
+) -> AsyncGenerator[ChatResponse | None, None]:
+    """Yield the chunks, and release the request after the stream is
+    finished, where the latency is the time to the first chunk.
+
+    The generator first yields `None`, which is consumed by
+    `_wrap_with_rate_limiter` before returning it, so that the request is
+    also released when the stream is closed or garbage collected without
+    being iterated.
+    """
+    latency, last_chunk, throttled = None, None, False
+    try:
+        yield None
+        async for chunk in generator:
+            if latency is None:
+                latency = time.monotonic() - start
+            last_chunk = chunk
+            yield chunk
+    except Exception as e:
+        throttled = _is_throttling_error(e)
+        raise
+    finally:
+        limiter.release(
+            tokens,
+            _get_used_tokens(last_chunk),
+            latency,
+            throttled,
+        )
+
+
+def _wrap_with_rate_limiter(original_func: Callable) -> Callable:
+    """A decorator to wrap the `__call__` function of the chat models with
+    the rate limiter of the model instance.
+
+    Args:
+        original_func (`Callable`):
+            The original async `__call__` function to be wrapped.
+    """
+
+    @wraps(original_func)
+    async def async_wrapper(
+        self: ChatModelBase,
+        *args: Any,
+        **kwargs: Any,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Wait for the rate limiter before calling the model."""
+        limiter = self.rate_limiter
+        if limiter is None or _in_limited_call.get() is self:
+            return await original_func(self, *args, **kwargs)
+
+        arguments = _get_call_arguments(original_func, self, args, kwargs)
+        tokens = await limiter.estimate_tokens(
+            arguments.get("messages") or [],
+            arguments.get("tools"),
+            _get_max_tokens(self, arguments),
+        )
+
+        await limiter.acquire(tokens, id(self))
+        start = time.monotonic()
+        token = _in_limited_call.set(self)
+        try:
+            res = await original_func(self, *args, **kwargs)
+        except BaseException as e:
+            limiter.release(
+                tokens,
+                latency=time.monotonic() - start,
+                throttled=isinstance(e, Exception) and _is_throttling_error(e),
+            )
+            raise
+        finally:
+            _in_limited_call.reset(token)
+
+        if isinstance(res, AsyncGenerator):
+            stream = _release_after_stream(res, limiter, tokens, start)
+            await anext(stream)
+            return stream
+
+        limiter.release(
+            tokens,
+            _get_used_tokens(res),
+            time.monotonic() - start,
+        )
+        return res
+
+    return async_wrapper
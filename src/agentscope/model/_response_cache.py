@@ -0,0 +1,512 @@
+# -*- coding: utf-8 -*-
+"""The response cache of the chat models, which stores the responses keyed by
+the requests, and replays them with their original structure, e.g. the chunk
+sequences of the streaming responses."""
+import hashlib
+import inspect
+import json
+import os
+import threading
+from abc import abstractmethod
+from collections import OrderedDict
+from contextvars import ContextVar
+from copy import deepcopy
+from functools import wraps
+from typing import Any, AsyncGenerator, Callable, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from ._model_response import ChatResponse, ChatResponseSnapshot
+from ._model_usage import ChatUsage
+from .._logging import logger
+from .._utils._common import _run_in_io_executor
+
+if TYPE_CHECKING:
+    from ._model_base import ChatModelBase
+else:
+    ChatModelBase = "ChatModelBase"
+
+RESPONSE_CACHE_MODES = ["cache", "record", "replay"]
+
+# The model attributes that are involved in the cache key
+_CONFIG_ATTRIBUTES = [
+    "model_name",
+    "stream",
+    "stream_delta",
+    "generate_kwargs",
+    "reasoning_effort",
+    "enable_thinking",
+    "think",
+    "thinking",
+    "thinking_config",
+    "max_tokens",
+    "options",
+]
+
+# The model instance whose cached call is running, so that the nested calls
+# of the parent class (e.g. by `super().__call__`) are not cached again,
+# while the calls of the other instances (e.g. the legs of a composite model)
+# are still cached
+_in_cached_call: ContextVar[Any] = ContextVar(
+    "_in_cached_call",
+    default=None,
+)
+
+
+class ResponseCacheBase:
+    """Base class for the response caches of the chat models, which store and
+    retrieve the JSON serializable records of the responses by the request
+    keys."""
+
+    @abstractmethod
+    async def get(self, key: str) -> dict | None:
+        """Get the record with the given key. If not found, return `None`.
+
+        Args:
+            key (`str`):
+                The key of the request.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, record: dict) -> None:
+        """Store the record with the given key.
+
+        Args:
+            key (`str`):
+                The key of the request.
+            record (`dict`):
+                The JSON serializable record of the response.
+        """
+
+    @abstractmethod
+    async def remove(self, key: str) -> None:
+        """Remove the record with the given key.
+
+        Args:
+            key (`str`):
+                The key of the request.
+        """
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Clear all cached records."""
+
+
+class InMemoryResponseCache(ResponseCacheBase):
+    """The in-memory response cache with LRU eviction."""
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """Initialize the in-memory response cache.
+
+        Args:
+            max_size (`int`, defaults to `1024`):
+                The maximum number of records to keep. The least recently
+                used records are evicted when exceeded.
+        """
+        self.max_size = max_size
+        self._records: OrderedDict[str, dict] = OrderedDict()
+
+    async def get(self, key: str) -> dict | None:
+        """Get the record with the given key. If not found, return `None`.
+
+        Args:
+            key (`str`):
+                The key of the request.
+        """
+        if key not in self._records:
+            return None
+        self._records.move_to_end(key)
+        return self._records[key]
+
+    async def set(self, key: str, record: dict) -> None:
+        """Store the record with the given key.
+
+        Args:
+            key (`str`):
+                The key of the request.
+            record (`dict`):
+                The JSON serializable record of the response.
+        """
+        self._records[key] = record
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_size:
+            self._records.popitem(last=False)
+
+    async def remove(self, key: str) -> None:
+        """Remove the record with the given key.
+
+        Args:
+            key (`str`):
+                The key of the request.
+        """
+        self._records.pop(key, None)
+
+    async def clear(self) -> None:
+        """Clear all cached records."""
+        self._records.clear()
+
+
+class FileResponseCache(ResponseCacheBase):
+    """The response cache that stores each record in a JSON file, which can
+    be shared across processes and committed for the offline replay."""
+
+    def __init__(self, cache_dir: str = "./.cache/responses") -> None:
+        """Initialize the file response cache.
+
+        Args:
+            cache_dir (`str`, defaults to `"./.cache/responses"`):
+                The directory to store the record files.
+        """
+        self._cache_dir = os.path.abspath(cache_dir)
+
+    @property
+    def cache_dir(self) -> str:
+        """The cache directory where the record files are stored."""
+        if not os.path.exists(self._cache_dir):
+            os.makedirs(self._cache_dir, exist_ok=True)
+        return self._cache_dir
+
+    def _get_path(self, key: str) -> str:
+        """Get the path of the record file."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    async def get(self, key: str) -> dict | None:
+        """Get the record with the given key. If not found, return `None`.
+
+        Args:
+            key (`str`):
+                The key of the request.
+        """
+        return await _run_in_io_executor(self._read_record, key)
+
+    async def set(self, key: str, record: dict) -> None:
+        """Store the record with the given key, which is written to a
+        temporary file first to avoid the partial files.
+
+        Args:
+            key (`str`):
+                The key of the request.
+            record (`dict`):
+                The JSON serializable record of the response.
+        """
+        await _run_in_io_executor(
+            self._write_record,
+            key,
+            json.dumps(record, ensure_ascii=False),
+        )
+
+    async def remove(self, key: str) -> None:
+        """Remove the record with the given key.
+
+        Args:
+            key (`str`):
+                The key of the request.
+        """
+        await _run_in_io_executor(self._remove_record, key)
+
+    async def clear(self) -> None:
+        """Clear the cache directory by removing all record files."""
+        await _run_in_io_executor(self._clear_records)
+
+    def _read_record(self, key: str) -> dict | None:
+        """Read the record file, or return `None` if it doesn't exist."""
+        path_file = self._get_path(key)
+        if not os.path.exists(path_file):
+            return None
+        with open(path_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_record(self, key: str, data: str) -> None:
+        """Write the serialized record to a temporary file and rename it."""
+        path_file = self._get_path(key)
+        path_tmp = f"{path_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(path_tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(path_tmp, path_file)
+
+    def _remove_record(self, key: str) -> None:
+        """Remove the record file if it exists."""
+        path_file = self._get_path(key)
+        if os.path.exists(path_file):
+            os.remove(path_file)
+
+    def _clear_records(self) -> None:
+        """Remove all the record files in the cache directory."""
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+
+def _canonicalize(obj: Any) -> Any:
+    """Convert the object into a canonical JSON serializable object, where
+    the Pydantic models are converted into their JSON schemas or dumps."""
+    if isinstance(obj, type) and issubclass(obj, BaseModel):
+        return {"__schema__": obj.model_json_schema()}
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, dict):
+        return {str(k): _canonicalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_canonicalize(_) for _ in obj]
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    return f"{type(obj).__qualname__}:{obj}"
+
+
+def _get_model_config(model: ChatModelBase) -> dict:
+    """Get the configuration of the model that affects the responses, e.g.
+    the model name and the generation arguments."""
+    return {
+        name: _canonicalize(getattr(model, name))
+        for name in _CONFIG_ATTRIBUTES
+        if hasattr(model, name)
+    }
+
+
+def _get_call_arguments(
+    func: Callable,
+    model: ChatModelBase,
+    args: tuple,
+    kwargs: dict,
+) -> dict:
+    """Bind the arguments of a model call to the signature of its
+    `__call__` function, where the variadic keyword arguments are
+    flattened."""
+    bound = inspect.signature(func).bind(model, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = {}
+    for name, value in list(bound.arguments.items())[1:]:
+        kind = bound.signature.parameters[name].kind
+        if kind == inspect.Parameter.VAR_KEYWORD:
+            arguments.update(value)
+        elif kind == inspect.Parameter.VAR_POSITIONAL:
+            arguments[f"*{name}"] = value
+        else:
+            arguments[name] = value
+    return arguments
+
+
+def _get_cache_key(
+    model: ChatModelBase,
+    func: Callable,
+    args: tuple,
+    kwargs: dict,
+) -> str:
+    """Get the canonical hash of the request, including the model class and
+    configuration, the messages, tools and the generation arguments."""
+    identifier = {
+        "class": type(model).__name__,
+        "config": _get_model_config(model),
+        "arguments": _canonicalize(
+            _get_call_arguments(func, model, args, kwargs),
+        ),
+    }
+    json_str = json.dumps(identifier, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(json_str.encode("utf-8")).hexdigest()
+
+
+def _compact_content(content: list[dict], previous: list[dict]) -> list:
+    """Compact the content of a streaming chunk by storing only the new
+    suffix of the text and thinking blocks, which extend the blocks at the
+    same positions in the previous chunk."""
+    compacted = []
+    for index, block in enumerate(content):
+        key = block.get("type")
+        if (
+            key in ["text", "thinking"]
+            and index < len(previous)
+            and previous[index].get("type") == key
+            and isinstance(block.get(key), str)
+            and block[key].startswith(previous[index][key])
+        ):
+            block = {
+                **block,
+                key: block[key][len(previous[index][key]) :],
+                "_extends": True,
+            }
+        compacted.append(block)
+    return compacted
+
+
+def _expand_content(compacted: list[dict], previous: list[dict]) -> list:
+    """Expand the compacted content of a streaming chunk."""
+    content = []
+    for index, block in enumerate(compacted):
+        block = dict(block)
+        if block.pop("_extends", False):
+            key = block["type"]
+            block[key] = previous[index][key] + block[key]
+        content.append(block)
+    return content
+
+
+def _response_to_record(response: ChatResponse) -> dict:
+    """Convert the chat response into a JSON serializable record."""
+    return {
+        "content": deepcopy(list(response.content)),
+        "id": response.id,
+        "created_at": response.created_at,
+        "usage": dict(response.usage) if response.usage else None,
+        "metadata": deepcopy(response.metadata),
+    }
+
+
+def _record_to_response(
+    record: dict,
+    content: list | None = None,
+    snapshot: ChatResponseSnapshot | None = None,
+) -> ChatResponse:
+    """Convert the record into a new chat response."""
+    return ChatResponse(
+        content=deepcopy(record["content"]) if content is None else content,
+        id=record["id"],
+        created_at=record["created_at"],
+        usage=ChatUsage(**record["usage"]) if record["usage"] else None,
+        metadata=deepcopy(record["metadata"]),
+        snapshot=snapshot,
+    )
+
+
+async def _record_stream(
+    generator: AsyncGenerator[ChatResponse, None],
+    cache: ResponseCacheBase,
+    key: str,
+    delta: bool,
+) -> AsyncGenerator[ChatResponse, None]:
+    """Yield the chunks and store them as a chunk sequence after the stream
+    is finished. The interrupted streams are not stored."""
+    chunks = []
+    previous: list = []
+    snapshot = None
+    async for chunk in generator:
+        chunk_record = _response_to_record(chunk)
+        if delta:
+            snapshot = chunk.snapshot
+        else:
+            content = chunk_record["content"]
+            chunk_record["content"] = _compact_content(content, previous)
+            previous = content
+        chunks.append(chunk_record)
+        yield chunk
+
+    record: dict = {"stream": True, "delta": delta, "chunks": chunks}
+    if snapshot is not None:
+        # The tool calls and the structured output are only in the snapshot
+        record["snapshot"] = {
+            "structured_output": snapshot.structured_output,
+            "thinking_signature": snapshot.thinking_signature,
+            "tool_calls": [
+                _
+                for _ in snapshot.materialize()
+                if _.get("type") == "tool_use"
+            ],
+        }
+    await cache.set(key, record)
+
+
+async def _replay_stream(
+    record: dict,
+) -> AsyncGenerator[ChatResponse, None]:
+    """Replay the recorded chunk sequence."""
+    if not record.get("delta"):
+        previous: list = []
+        for chunk_record in record["chunks"]:
+            content = _expand_content(chunk_record["content"], previous)
+            previous = content
+            yield _record_to_response(chunk_record, deepcopy(content))
+        return
+
+    snapshot_record = record.get("snapshot") or {}
+    snapshot = ChatResponseSnapshot(
+        delta=True,
+        structured_output=snapshot_record.get("structured_output"),
+    )
+    snapshot.thinking_signature = snapshot_record.get("thinking_signature")
+    n_chunks = len(record["chunks"])
+    for index, chunk_record in enumerate(record["chunks"]):
+        for block in chunk_record["content"]:
+            if block["type"] == "thinking":
+                snapshot.add_thinking(block["thinking"])
+            elif block["type"] == "text":
+                snapshot.add_text(block["text"])
+            elif block["type"] == "audio":
+                snapshot.add_audio(
+                    block["source"]["data"],
+                    block["source"]["media_type"],
+                )
+
+        if index == n_chunks - 1:
+            for i, tool_call in enumerate(
+                snapshot_record.get("tool_calls", []),
+            ):
+                snapshot.add_tool_call(
+                    i,
+                    tool_call["id"],
+                    tool_call["name"],
+                )[
+                    "input"
+                ].feed(json.dumps(tool_call["input"]))
+            snapshot.close()
+
+        yield _record_to_response(
+            chunk_record,
+            snapshot.pop_delta(),
+            snapshot,
+        )
+
+
+def _wrap_with_response_cache(original_func: Callable) -> Callable:
+    """A decorator to wrap the `__call__` function of the chat models with
+    the response cache of the model instance.
+
+    Args:
+        original_func (`Callable`):
+            The original async `__call__` function to be wrapped.
+    """
+
+    @wraps(original_func)
+    async def async_wrapper(
+        self: ChatModelBase,
+        *args: Any,
+        **kwargs: Any,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Look up the response cache before calling the model."""
+        cache = self.response_cache
+        if cache is None or _in_cached_call.get() is self:
+            return await original_func(self, *args, **kwargs)
+
+        key = _get_cache_key(self, original_func, args, kwargs)
+        mode = self.response_cache_mode
+
+        if mode != "record":
+            record = await cache.get(key)
+            if record is not None:
+                logger.debug("Replay the cached response %s.", key)
+                if record.get("stream"):
+                    return _replay_stream(record)
+                return _record_to_response(record)
+
+            if mode == "replay":
+                raise RuntimeError(
+                    f"Response cache miss for the request {key} of model "
+                    f"{self.model_name} in replay mode.",
+                )
+
+        token = _in_cached_call.set(self)
+        try:
+            res = await original_func(self, *args, **kwargs)
+        finally:
+            _in_cached_call.reset(token)
+
+        if isinstance(res, AsyncGenerator):
+            return _record_stream(
+                res,
+                cache,
+                key,
+                getattr(self, "stream_delta", False),
+            )
+
+        await cache.set(key, {"stream": False, **_response_to_record(res)})
+        return res
+
+    return async_wrapper
@@ -122,6 +122,10 @@ async def stream_printing_messages(
     .. note:: The messages with the same ``id`` is considered as the same
      message, e.g., the chunks of a streaming message.
 
+    .. note:: If the model streams in delta mode (``stream_delta=True``), the
+     chunks before the last one only carry the new content, while the last
+     chunk carries the full content.
+
     Args:
         agents (`list[AgentBase]`):
             A list of agents whose printing messages will be gathered and
@@ -3,8 +3,12 @@
 
 from ._session_base import SessionBase
 from ._json_session import JSONSession
+from ._journaled_json_session import JournaledJSONSession
+from ._sqlite_session import SQLiteSession
 
 __all__ = [
     "SessionBase",
     "JSONSession",
+    "JournaledJSONSession",
+    "SQLiteSession",
 ]
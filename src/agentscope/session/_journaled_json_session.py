@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""The journaled JSON session class, which appends the state changes to a
+journal file instead of rewriting the whole session state on every save."""
+import asyncio
+import json
+import os
+from copy import deepcopy
+from typing import Any, BinaryIO, Callable
+
+from ._session_base import SessionBase
+from ._utils import _atomic_write_json, _get_session_executor
+from .._logging import logger
+from ..module import StateModule
+
+
+def _diff_state(old: Any, new: Any, path: list, ops: list) -> None:
+    """Compute the operations that turn the old state into the new one.
+
+    Args:
+        old (`Any`):
+            The old JSON-serializable state.
+        new (`Any`):
+            The new JSON-serializable state.
+        path (`list`):
+            The path to the current state from the root.
+        ops (`list`):
+            The list to collect the operations, each of which is one of
+            `["set", path, value]`, `["del", path]` and
+            `["extend", path, values]`.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append(["del", path + [key]])
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["set", path + [key], value])
+            elif old[key] != value:
+                _diff_state(old[key], value, path + [key], ops)
+
+    elif (
+        isinstance(old, list)
+        and isinstance(new, list)
+        and len(new) > len(old)
+        and new[: len(old)] == old
+    ):
+        # Appending is the most common change, e.g. the memory content
+        ops.append(["extend", path, new[len(old) :]])
+
+    else:
+        ops.append(["set", path, new])
+
+
+def _apply_ops(state: Any, ops: list) -> Any:
+    """Apply the operations to the state in place and return the new state.
+    The values are deep-copied, so the state won't share objects with the
+    state modules."""
+    for op in ops:
+        kind, path = op[0], op[1]
+        if not path:
+            state = deepcopy(op[2])
+            continue
+
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+
+        if kind == "set":
+            parent[path[-1]] = deepcopy(op[2])
+        elif kind == "del":
+            parent.pop(path[-1], None)
+        elif kind == "extend":
+            parent[path[-1]].extend(deepcopy(op[2]))
+        else:
+            raise ValueError(f"Unknown journal operation: {kind}")
+    return state
+
+
+class JournaledJSONSession(SessionBase):
+    """The JSON session class that stores each session as a snapshot file
+    and an append-only journal file.
+
+    The first save of a session in the process writes a full snapshot.
+    Each following save only appends the changes since the last save to
+    the journal, so the write cost is proportional to the changes rather
+    than the whole history. Once the journal has more than `compact_every`
+    entries, it's compacted into a new snapshot in a background thread.
+    """
+
+    def __init__(
+        self,
+        save_dir: str = "./",
+        compact_every: int = 50,
+        fsync: bool = False,
+    ) -> None:
+        """Initialize the journaled JSON session class.
+
+        Args:
+            save_dir (`str`, defaults to `"./"`):
+                The directory to save the session state.
+            compact_every (`int`, defaults to `50`):
+                The number of journal entries that triggers a compaction.
+            fsync (`bool`, defaults to `False`):
+                Whether to call `os.fsync` after each journal append, which
+                makes the saves durable across power loss at the cost of
+                speed.
+        """
+        self.save_dir = save_dir
+        self.compact_every = compact_every
+        self.fsync = fsync
+
+        # The last saved state, sequence number and the number of journal
+        # entries of each session
+        self._states: dict[str, dict] = {}
+        self._seqs: dict[str, int] = {}
+        self._journal_sizes: dict[str, int] = {}
+
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._compaction_tasks: dict[str, asyncio.Future] = {}
+
+    def _get_paths(self, session_id: str) -> tuple[str, str, str]:
+        """Get the paths of the snapshot file, the journal file and the
+        journal file under compaction.
+
+        Args:
+            session_id (`str`):
+                The session id.
+
+        Returns:
+            `tuple[str, str, str]`:
+                The snapshot path, the journal path and the compacting
+                journal path.
+        """
+        os.makedirs(self.save_dir, exist_ok=True)
+        prefix = os.path.join(self.save_dir, session_id)
+        return (
+            f"{prefix}.snapshot.json",
+            f"{prefix}.journal.jsonl",
+            f"{prefix}.journal.jsonl.compacting",
+        )
+
+    @staticmethod
+    def _run_in_executor(func: Callable, *args: Any) -> asyncio.Future:
+        """Run the function in the session I/O executor."""
+        return asyncio.get_running_loop().run_in_executor(
+            _get_session_executor(),
+            func,
+            *args,
+        )
+
+    def _get_lock(self, session_id: str) -> asyncio.Lock:
+        """Get the lock of the session."""
+        if session_id not in self._locks:
+            self._locks[session_id] = asyncio.Lock()
+        return self._locks[session_id]
+
+    async def save_session_state(
+        self,
+        session_id: str,
+        **state_modules_mapping: StateModule,
+    ) -> None:
+        """Save the changes of the session state since the last save.
+
+        Args:
+            session_id (`str`):
+                The session id.
+            **state_modules_mapping (`dict[str, StateModule]`):
+                A dictionary mapping of state module names to their instances.
+        """
+        # Serialize on the event loop, so the state modules can be changed
+        # right after the call without racing with the executor
+        payload = json.dumps(
+            {
+                name: state_module.state_dict()
+                for name, state_module in state_modules_mapping.items()
+            },
+            ensure_ascii=False,
+        )
+
+        async with self._get_lock(session_id):
+            if session_id not in self._states:
+                # Wait for the compaction from the previous loads
+                await self._wait_compaction(session_id)
+                await self._run_in_executor(
+                    self._write_snapshot,
+                    session_id,
+                    payload,
+                )
+                return
+
+            appended = await self._run_in_executor(
+                self._append_changes,
+                session_id,
+                payload,
+            )
+            if not appended:
+                return
+
+            self._journal_sizes[session_id] += 1
+            if self._journal_sizes[session_id] >= self.compact_every:
+                # Chain after the previous compaction, so every full journal
+                # is rotated regardless of the executor timing
+                await self._wait_compaction(session_id)
+                await self._run_in_executor(self._rotate_journal, session_id)
+                self._journal_sizes[session_id] = 0
+                self._start_compaction(session_id)
+
+    async def load_session_state(
+        self,
+        session_id: str,
+        allow_not_exist: bool = True,
+        **state_modules_mapping: StateModule,
+    ) -> None:
+        """Load the session state by replaying the journal on the snapshot.
+
+        Args:
+            session_id (`str`):
+                The session id.
+            allow_not_exist (`bool`, defaults to `True`):
+                Whether to allow the session to not exist. If `False`, raises
+                an error if the session does not exist.
+            state_modules_mapping (`list[StateModule]`):
+                The list of state modules to be loaded.
+        """
+        async with self._get_lock(session_id):
+            await self._wait_compaction(session_id)
+            loaded = await self._run_in_executor(self._read_state, session_id)
+
+            if loaded is None:
+                if allow_not_exist:
+                    logger.info(
+                        "Session %s does not exist in %s. Skip loading "
+                        "session state.",
+                        session_id,
+                        self.save_dir,
+                    )
+                    return
+                raise ValueError(
+                    f"Failed to load session state for session {session_id} "
+                    f"does not exist in {self.save_dir}.",
+                )
+
+            states, seq, journal_size = loaded
+            self._states[session_id] = states
+            self._seqs[session_id] = seq
+            self._journal_sizes[session_id] = journal_size
+
+            for name, state_module in state_modules_mapping.items():
+                if name in states:
+                    state_module.load_state_dict(deepcopy(states[name]))
+            logger.info(
+                "Load session state of %s from %s successfully.",
+                session_id,
+                self.save_dir,
+            )
+
+    def _write_snapshot(self, session_id: str, payload: str) -> None:
+        """Write a full snapshot atomically and remove the journals."""
+        snapshot_path, journal_path, compacting_path = self._get_paths(
+            session_id,
+        )
+        state = json.loads(payload)
+        _atomic_write_json(snapshot_path, {"seq": 0, "state": state})
+        for path in [journal_path, compacting_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+        self._states[session_id] = state
+        self._seqs[session_id] = 0
+        self._journal_sizes[session_id] = 0
+
+    def _append_changes(self, session_id: str, payload: str) -> bool:
+        """Append the changes of the serialized state since the last save
+        to the journal.
+
+        Returns:
+            `bool`:
+                Whether an entry is appended, i.e. the state is changed.
+        """
+        state = json.loads(payload)
+        ops: list = []
+        _diff_state(self._states[session_id], state, [], ops)
+        if not ops:
+            return False
+
+        seq = self._seqs[session_id] + 1
+        self._append_journal(
+            session_id,
+            json.dumps({"seq": seq, "ops": ops}, ensure_ascii=False),
+        )
+        # Only take the new state once it's in the journal, so a failed
+        # append is retried by the next save
+        self._states[session_id] = state
+        self._seqs[session_id] = seq
+        return True
+
+    @staticmethod
+    def _ends_with_newline(file: BinaryIO) -> bool:
+        """Whether the file opened for appending is empty or ends with a
+        line break. A partially written entry from a crash doesn't, and the
+        next entry must start on a new line to not be merged into it."""
+        file.seek(0, os.SEEK_END)
+        if file.tell() == 0:
+            return True
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+    def _append_journal(self, session_id: str, entry: str) -> None:
+        """Append one entry to the journal file."""
+        _, journal_path, _ = self._get_paths(session_id)
+        with open(journal_path, "a+b") as file:
+            data = (entry + "\n").encode("utf-8")
+            if not self._ends_with_newline(file):
+                data = b"\n" + data
+            file.write(data)
+            if self.fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+    @staticmethod
+    def _read_journal(path: str, state: Any, seq: int) -> tuple[Any, int, int]:
+        """Replay the entries in the journal file whose sequence number is
+        larger than the given one.
+
+        Returns:
+            `tuple[Any, int, int]`:
+                The new state, the last sequence number and the number of
+                replayed entries.
+        """
+        n_entries = 0
+        if not os.path.exists(path):
+            return state, seq, n_entries
+
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written entry from a crash, which is never
+                    # taken into the saved state
+                    logger.warning(
+                        "Skip the broken entry after seq %d in %s.",
+                        seq,
+                        path,
+                    )
+                    continue
+                if entry["seq"] <= seq:
+                    continue
+                state = _apply_ops(state, entry["ops"])
+                seq = entry["seq"]
+                n_entries += 1
+        return state, seq, n_entries
+
+    def _read_state(self, session_id: str) -> tuple[dict, int, int] | None:
+        """Read the snapshot and replay the journals.
+
+        Returns:
+            `tuple[dict, int, int] | None`:
+                The state, the last sequence number and the number of journal
+                entries, or `None` if the session doesn't exist.
+        """
+        snapshot_path, journal_path, compacting_path = self._get_paths(
+            session_id,
+        )
+        if not os.path.exists(snapshot_path):
+            return None
+
+        with open(snapshot_path, "r", encoding="utf-8") as file:
+            snapshot = json.load(file)
+
+        state, seq = snapshot["state"], snapshot["seq"]
+        total = 0
+        for path in [compacting_path, journal_path]:
+            state, seq, n_entries = self._read_journal(path, state, seq)
+            total += n_entries
+        return state, seq, total
+
+    def _rotate_journal(self, session_id: str) -> None:
+        """Move the journal to the compacting file, which is merged into
+        the snapshot by the compaction."""
+        _, journal_path, compacting_path = self._get_paths(session_id)
+        if os.path.exists(compacting_path):
+            # A compaction was interrupted, merge it before rotating
+            with open(compacting_path, "a+b") as dst:
+                with open(journal_path, "rb") as src:
+                    data = src.read()
+                if not self._ends_with_newline(dst):
+                    data = b"\n" + data
+                dst.write(data)
+            os.remove(journal_path)
+        else:
+            os.replace(journal_path, compacting_path)
+
+    def _start_compaction(self, session_id: str) -> None:
+        """Compact the rotated journal into the snapshot in a background
+        thread."""
+        task = self._run_in_executor(self._compact, session_id)
+        self._compaction_tasks[session_id] = task
+
+        def _on_done(_: asyncio.Future) -> None:
+            if self._compaction_tasks.get(session_id) is task:
+                self._compaction_tasks.pop(session_id)
+
+        task.add_done_callback(_on_done)
+
+    def _compact(self, session_id: str) -> None:
+        """Merge the rotated journal into the snapshot."""
+        snapshot_path, _, compacting_path = self._get_paths(session_id)
+        with open(snapshot_path, "r", encoding="utf-8") as file:
+            snapshot = json.load(file)
+
+        state, seq, _ = self._read_journal(
+            compacting_path,
+            snapshot["state"],
+            snapshot["seq"],
+        )
+        _atomic_write_json(snapshot_path, {"seq": seq, "state": state})
+        os.remove(compacting_path)
+
+    async def _wait_compaction(self, session_id: str) -> None:
+        """Wait for the running compaction of the session if any."""
+        task = self._compaction_tasks.get(session_id)
+        if task is not None:
+            try:
+                await task
+            except Exception as e:
+                logger.warning(
+                    "Failed to compact the journal of session %s: %s",
+                    session_id,
+                    e,
+                )
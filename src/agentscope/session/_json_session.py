@@ -1,15 +1,23 @@
 # -*- coding: utf-8 -*-
 """The JSON session class."""
+import asyncio
 import json
 import os
 
 from ._session_base import SessionBase
+from ._utils import _atomic_write_text, _get_session_executor, _read_json
 from .._logging import logger
 from ..module import StateModule
 
 
 class JSONSession(SessionBase):
-    """The JSON session class."""
+    """The JSON session class.
+
+    The file I/O runs in a dedicated thread pool executor, and the session
+    file is written to a temporary file first and then renamed, so that a
+    crash won't corrupt the saved state. Concurrent saves of the same
+    session are coalesced, i.e. only the latest pending state is written.
+    """
 
     def __init__(
         self,
@@ -28,6 +36,11 @@ class JSONSession(SessionBase):
         """
         self.save_dir = save_dir
 
+        # The latest serialized state to be written and the running writer
+        # task of each session
+        self._pending_states: dict[str, str] = {}
+        self._writers: dict[str, asyncio.Future] = {}
+
         if session_id is not None:
             logger.warning(
                 "The `session_id` argument in the JSONSession constructor is "
@@ -63,16 +76,45 @@ class JSONSession(SessionBase):
             **state_modules_mapping (`dict[str, StateModule]`):
                 A dictionary mapping of state module names to their instances.
         """
-        state_dicts = {
-            name: state_module.state_dict()
-            for name, state_module in state_modules_mapping.items()
-        }
-        with open(
-            self._get_save_path(session_id),
-            "w",
-            encoding="utf-8",
-        ) as file:
-            json.dump(state_dicts, file, ensure_ascii=False)
+        # Serialize on the event loop, so the state modules can be changed
+        # right after the call without racing with the writer thread
+        self._pending_states[session_id] = json.dumps(
+            {
+                name: state_module.state_dict()
+                for name, state_module in state_modules_mapping.items()
+            },
+            ensure_ascii=False,
+        )
+
+        writer = self._writers.get(session_id)
+        if writer is None:
+            writer = asyncio.ensure_future(self._flush(session_id))
+            self._writers[session_id] = writer
+
+        # The writer keeps writing until no state is pending, so the state
+        # of this call (or a newer one) is saved once it's done. Shield it
+        # from the cancellation of the caller.
+        await asyncio.shield(writer)
+
+    async def _flush(self, session_id: str) -> None:
+        """Write the pending states of the session until there is none.
+
+        Args:
+            session_id (`str`):
+                The session id.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while session_id in self._pending_states:
+                payload = self._pending_states.pop(session_id)
+                await loop.run_in_executor(
+                    _get_session_executor(),
+                    _atomic_write_text,
+                    self._get_save_path(session_id),
+                    payload,
+                )
+        finally:
+            self._writers.pop(session_id, None)
 
     async def load_session_state(
         self,
@@ -91,10 +133,18 @@ class JSONSession(SessionBase):
             state_modules_mapping (`list[StateModule]`):
                 The list of state modules to be loaded.
         """
+        # Wait for the pending writes of the session
+        writer = self._writers.get(session_id)
+        if writer is not None:
+            await asyncio.shield(writer)
+
         session_save_path = self._get_save_path(session_id)
         if os.path.exists(session_save_path):
-            with open(session_save_path, "r", encoding="utf-8") as file:
-                states = json.load(file)
+            states = await asyncio.get_running_loop().run_in_executor(
+                _get_session_executor(),
+                _read_json,
+                session_save_path,
+            )
 
             for name, state_module in state_modules_mapping.items():
                 if name in states:
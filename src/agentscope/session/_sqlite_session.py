@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""The SQLite session class with an in-process LRU cache of the loaded
+session states, designed for serving many users in one process."""
+import asyncio
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Callable, Iterable
+
+from ._session_base import SessionBase
+from ._utils import _get_session_executor
+from .._logging import logger
+from ..module import StateModule
+
+# The maximum number of the bound variables in a query, which is under the
+# limit (999) of the older SQLite builds
+_MAX_VARIABLES = 500
+
+
+class SQLiteSession(SessionBase):
+    """The session class that stores the session states in a SQLite
+    database, and keeps the recently used states in an LRU cache.
+
+    The cache holds the deserialized state dictionaries within a byte
+    budget (measured by their JSON size), so repeated turns of active
+    sessions skip both the disk read and the JSON parsing. The cache is
+    write-through, i.e. every save is written to the database.
+
+    .. note:: By default, the cached state dictionaries are deep copied
+     before being passed to the `load_state_dict` method of the state
+     modules. Set `copy_on_load` to `False` to skip the copy if your state
+     modules never modify the loaded data in place.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        copy_on_load: bool = True,
+    ) -> None:
+        """Initialize the SQLite session.
+
+        Args:
+            db_path (`str`):
+                The path to the SQLite database file.
+            cache_max_bytes (`int`, defaults to `256 * 1024 * 1024`):
+                The byte budget of the LRU cache, measured by the JSON size
+                of the cached states. Set to `0` to disable the cache.
+            copy_on_load (`bool`, defaults to `True`):
+                Whether to deep copy the cached state before loading it into
+                the state modules.
+        """
+        self.db_path = db_path
+        self.cache_max_bytes = cache_max_bytes
+        self.copy_on_load = copy_on_load
+
+        # The cached states and their sizes in bytes, in LRU order
+        self._cache: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self._cache_bytes = 0
+
+        self._locks: dict[str, asyncio.Lock] = {}
+
+        self._conn: sqlite3.Connection | None = None
+        # The connection is shared by the executor threads
+        self._conn_lock = threading.Lock()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get the database connection, creating the table if needed."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS as_session (
+                    session_id TEXT,
+                    session_data JSON,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (session_id)
+                )
+                """,
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _get_lock(self, session_id: str) -> asyncio.Lock:
+        """Get the lock of the session."""
+        if session_id not in self._locks:
+            self._locks[session_id] = asyncio.Lock()
+        return self._locks[session_id]
+
+    @staticmethod
+    def _run_in_executor(func: Callable, *args: Any) -> asyncio.Future:
+        """Run the function in the session I/O executor."""
+        return asyncio.get_running_loop().run_in_executor(
+            _get_session_executor(),
+            func,
+            *args,
+        )
+
+    def _write_row(self, session_id: str, json_data: str) -> tuple[dict, int]:
+        """Write the serialized session state into the database.
+
+        Returns:
+            `tuple[dict, int]`:
+                The state parsed from the written JSON, which shares no
+                objects with the state modules, and its size in bytes.
+        """
+        with self._conn_lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT INTO as_session (session_id, session_data, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    session_data = excluded.session_data,
+                    updated_at = excluded.updated_at
+                """,
+                (session_id, json_data),
+            )
+            conn.commit()
+        return json.loads(json_data), len(json_data.encode("utf-8"))
+
+    def _read_rows(
+        self,
+        session_ids: list[str],
+    ) -> dict[str, tuple[dict, int]]:
+        """Read and deserialize the session states from the database, where
+        the ids are queried in chunks to respect the limit of the bound
+        variables.
+
+        Returns:
+            `dict[str, tuple[dict, int]]`:
+                The states and their sizes in bytes of the existing sessions.
+        """
+        rows = []
+        with self._conn_lock:
+            conn = self._get_conn()
+            for i in range(0, len(session_ids), _MAX_VARIABLES):
+                chunk = session_ids[i : i + _MAX_VARIABLES]
+                rows.extend(
+                    conn.execute(
+                        f"""
+                        SELECT session_id, session_data FROM as_session
+                        WHERE session_id IN ({",".join("?" * len(chunk))})
+                        """,
+                        chunk,
+                    ).fetchall(),
+                )
+        return {
+            session_id: (json.loads(data), len(data.encode("utf-8")))
+            for session_id, data in rows
+        }
+
+    def _cache_put(self, session_id: str, states: dict, n_bytes: int) -> None:
+        """Put the state into the cache and evict the least recently used
+        states to stay within the byte budget."""
+        self._cache_pop(session_id)
+        if n_bytes > self.cache_max_bytes:
+            return
+
+        self._cache[session_id] = (states, n_bytes)
+        self._cache_bytes += n_bytes
+        while self._cache_bytes > self.cache_max_bytes:
+            _, (_, evicted_bytes) = self._cache.popitem(last=False)
+            self._cache_bytes -= evicted_bytes
+
+    def _cache_pop(self, session_id: str) -> None:
+        """Remove the state from the cache if it exists."""
+        if session_id in self._cache:
+            _, n_bytes = self._cache.pop(session_id)
+            self._cache_bytes -= n_bytes
+
+    async def save_session_state(
+        self,
+        session_id: str,
+        **state_modules_mapping: StateModule,
+    ) -> None:
+        """Save the session state into the database and the cache.
+
+        Args:
+            session_id (`str`):
+                The session id.
+            **state_modules_mapping (`dict[str, StateModule]`):
+                A dictionary mapping of state module names to their instances.
+        """
+        # Serialize on the event loop, so the cache holds exactly what is
+        # written rather than the live objects of the state modules
+        json_data = json.dumps(
+            {
+                name: state_module.state_dict()
+                for name, state_module in state_modules_mapping.items()
+            },
+            ensure_ascii=False,
+        )
+        async with self._get_lock(session_id):
+            states, n_bytes = await self._run_in_executor(
+                self._write_row,
+                session_id,
+                json_data,
+            )
+            self._cache_put(session_id, states, n_bytes)
+
+    async def load_session_state(
+        self,
+        session_id: str,
+        allow_not_exist: bool = True,
+        **state_modules_mapping: StateModule,
+    ) -> None:
+        """Load the session state from the cache, or the database on a cache
+        miss.
+
+        Args:
+            session_id (`str`):
+                The session id.
+            allow_not_exist (`bool`, defaults to `True`):
+                Whether to allow the session to not exist. If `False`, raises
+                an error if the session does not exist.
+            **state_modules_mapping (`dict[str, StateModule]`):
+                A dictionary mapping of state module names to their instances.
+        """
+        async with self._get_lock(session_id):
+            if session_id in self._cache:
+                self._cache.move_to_end(session_id)
+                states, _ = self._cache[session_id]
+            else:
+                rows = await self._run_in_executor(
+                    self._read_rows,
+                    [session_id],
+                )
+                if session_id not in rows:
+                    if allow_not_exist:
+                        logger.info(
+                            "Session %s does not exist in database %s. Skip "
+                            "loading session state.",
+                            session_id,
+                            self.db_path,
+                        )
+                        return
+                    raise ValueError(
+                        f"Failed to load session state for session "
+                        f"{session_id} does not exist in database "
+                        f"{self.db_path}.",
+                    )
+                states, n_bytes = rows[session_id]
+                self._cache_put(session_id, states, n_bytes)
+
+            for name, state_module in state_modules_mapping.items():
+                if name in states:
+                    state_module.load_state_dict(
+                        deepcopy(states[name])
+                        if self.copy_on_load
+                        else states[name],
+                    )
+
+    async def prefetch(self, session_ids: Iterable[str]) -> None:
+        """Load the states of the given sessions into the cache in batched
+        database queries, e.g. for the users that are expected to be active
+        soon. The non-existing sessions are ignored.
+
+        Args:
+            session_ids (`Iterable[str]`):
+                The session ids to prefetch.
+        """
+        missing_ids = [_ for _ in session_ids if _ not in self._cache]
+        if not missing_ids:
+            return
+
+        rows = await self._run_in_executor(self._read_rows, missing_ids)
+        for session_id, (states, n_bytes) in rows.items():
+            # Don't override the states saved during the prefetching
+            if session_id not in self._cache:
+                self._cache_put(session_id, states, n_bytes)
+
+    def close(self) -> None:
+        """Close the database connection and clear the cache."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._cache.clear()
+        self._cache_bytes = 0
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""The utility functions for the session module."""
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+_SESSION_EXECUTOR: ThreadPoolExecutor | None = None
+
+
+def _get_session_executor() -> ThreadPoolExecutor:
+    """Get the dedicated thread pool executor for the session file I/O, so
+    that the disk I/O and JSON (de)serialization won't block the event loop
+    or occupy the default executor."""
+    global _SESSION_EXECUTOR
+    if _SESSION_EXECUTOR is None:
+        _SESSION_EXECUTOR = ThreadPoolExecutor(
+            max_workers=4,
+            thread_name_prefix="agentscope-session",
+        )
+    return _SESSION_EXECUTOR
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    """Write the JSON data to a temporary file in the same directory and
+    rename it to the target path, so that a crash during writing won't
+    leave a corrupted file.
+
+    Args:
+        path (`str`):
+            The target file path.
+        data (`Any`):
+            The JSON-serializable data.
+    """
+    _atomic_write_text(path, json.dumps(data, ensure_ascii=False))
+
+
+def _atomic_write_text(path: str, text: str) -> None:
+    """Write the text to a temporary file in the same directory and rename
+    it to the target path, e.g. the JSON serialized in advance.
+
+    Args:
+        path (`str`):
+            The target file path.
+        text (`str`):
+            The text to write.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=f".{os.path.basename(path)}.",
+        suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_json(path: str) -> Any:
+    """Read the JSON data from the given file."""
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
@@ -2,6 +2,8 @@
 """The token module in agentscope"""
 
 from ._token_base import TokenCounterBase
+from ._cached_token_counter_base import CachedTokenCounterBase
+from ._remote_token_counter_base import RemoteTokenCounterBase
 from ._gemini_token_counter import GeminiTokenCounter
 from ._openai_token_counter import OpenAITokenCounter
 from ._anthropic_token_counter import AnthropicTokenCounter
@@ -9,6 +11,8 @@ from ._huggingface_token_counter import HuggingFaceTokenCounter
 
 __all__ = [
     "TokenCounterBase",
+    "CachedTokenCounterBase",
+    "RemoteTokenCounterBase",
     "GeminiTokenCounter",
     "OpenAITokenCounter",
     "AnthropicTokenCounter",
@@ -1,23 +1,103 @@
 # -*- coding: utf-8 -*-
 """The Anthropic token counter class."""
-from typing import Any
+import math
+from typing import Any, Literal
 
+from ._remote_token_counter_base import RemoteTokenCounterBase
 
-class AnthropicTokenCounter:
-    """The Anthropic token counter class."""
 
-    def __init__(self, model_name: str, api_key: str, **kwargs: Any) -> None:
+class AnthropicTokenCounter(RemoteTokenCounterBase):
+    """The Anthropic token counter class, which counts the tokens by the
+    Anthropic token counting API, or estimates them locally in the "local"
+    and "hybrid" modes."""
+
+    chars_per_token: float = 3.5
+    """The average number of characters per token of the Claude models."""
+
+    tokens_per_message: int = 5
+
+    def __init__(
+        self,
+        model_name: str,
+        api_key: str | None = None,
+        mode: Literal["remote", "local", "hybrid"] = "remote",
+        chars_per_token: float | None = None,
+        safety_margin: float = 0.1,
+        verify_margin: float = 0.1,
+        cache_size: int = 1024,
+        shared_client: bool = False,
+        **kwargs: Any,
+    ) -> None:
         """Initialize the Anthropic token counter.
 
         Args:
             model_name (`str`):
                 The name of the Anthropic model to use, e.g. "claude-2".
-            api_key (`str`):
-                The API key for Anthropic.
+            api_key (`str | None`, optional):
+                The API key for Anthropic, which is not required in the
+                "local" mode.
+            mode (`Literal["remote", "local", "hybrid"]`, defaults to \
+            `"remote"`):
+                The counting mode. "remote" counts by the API, "local"
+                estimates the count locally, and "hybrid" estimates locally
+                and verifies by the API when the estimate is close to the
+                budget.
+            chars_per_token (`float | None`, optional):
+                The average number of characters per token used in the local
+                estimation, defaults to `3.5`.
+            safety_margin (`float`, defaults to `0.1`):
+                The fraction by which the local estimate is enlarged.
+            verify_margin (`float`, defaults to `0.1`):
+                In the "hybrid" mode, the estimate within this fraction of the
+                budget is verified by the API.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of the API results kept in the cache.
+            shared_client (`bool`, defaults to `False`):
+                Whether to use the shared client from the client registry,
+                e.g. the same client as the `AnthropicChatModel` with the
+                same API key and client arguments.
+            **kwargs (`Any`):
+                Additional keyword arguments for the Anthropic client.
         """
-        import anthropic
+        super().__init__(
+            mode=mode,
+            chars_per_token=chars_per_token,
+            safety_margin=safety_margin,
+            verify_margin=verify_margin,
+            cache_size=cache_size,
+        )
+
+        self.client = None
+        if mode != "local":
+            import anthropic
+
+            if shared_client:
+                from ..model._client_registry import (
+                    get_client_registry,
+                    _get_http_module,
+                )
 
-        self.client = anthropic.AsyncAnthropic(api_key=api_key, **kwargs)
+                self.client = get_client_registry().get_client(
+                    "anthropic",
+                    lambda transport: anthropic.AsyncAnthropic(
+                        api_key=api_key,
+                        http_client=anthropic.DefaultAsyncHttpxClient(
+                            transport=transport,
+                        ),
+                        **kwargs,
+                    ),
+                    base_url=kwargs.get("base_url"),
+                    api_key=api_key,
+                    options=kwargs,
+                    http_module=_get_http_module(
+                        anthropic.DefaultAsyncHttpxClient,
+                    ),
+                )
+            else:
+                self.client = anthropic.AsyncAnthropic(
+                    api_key=api_key,
+                    **kwargs,
+                )
         self.model_name = model_name
 
     async def count(
@@ -40,9 +120,19 @@ class AnthropicTokenCounter:
             **kwargs (`Any`):
                 Additional keyword arguments for the token counting API.
         """
+        return await super().count(messages, tools, **kwargs)
+
+    async def _count_remote(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens by the Anthropic token counting API."""
         system_message = None
-        if messages[0].get("role") == "system":
-            system_message = messages.pop(0)
+        if messages and messages[0].get("role") == "system":
+            system_message = messages[0]
+            messages = messages[1:]
 
         extra_kwargs: dict = {
             "model": self.model_name,
@@ -54,8 +144,21 @@ class AnthropicTokenCounter:
             extra_kwargs["tools"] = tools
 
         if system_message:
-            extra_kwargs["system"] = system_message
+            extra_kwargs["system"] = system_message["content"]
 
         res = await self.client.messages.count_tokens(**extra_kwargs)
 
         return res.input_tokens
+
+    def _estimate_image_tokens(self, width: int, height: int) -> int:
+        """Estimate the image tokens as `width * height / 750`, where the
+        image is first scaled to fit within 1568 pixels on the long edge and
+        about 1.15 megapixels, following
+        https://docs.anthropic.com/en/docs/build-with-claude/vision
+        """
+        ratio = min(
+            1.0,
+            1568 / max(width, height),
+            math.sqrt(1_150_000 / (width * height)),
+        )
+        return math.ceil(width * height * ratio * ratio / 750)
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""The token counter base class that caches the token counts of each
+message and the tool schemas."""
+import asyncio
+import threading
+from abc import abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from ._token_base import TokenCounterBase
+from .._utils._common import _freeze
+
+
+def _get_text_length(obj: Any) -> int:
+    """Get the total length of the strings in the JSON-like object."""
+    if isinstance(obj, str):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(_get_text_length(_) for _ in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(_get_text_length(_) for _ in obj)
+    return 0
+
+
+class CachedTokenCounterBase(TokenCounterBase):
+    """The base class for the token counters whose count of a prompt is the
+    sum of the counts of its messages, plus a fixed overhead per prompt and
+    the count of the tool schemas, e.g. the tiktoken-based counting.
+
+    The counts of the messages and the tool schemas are memoized in LRU
+    caches keyed by their content, so counting a long conversation only
+    tokenizes the messages that haven't been counted before. The
+    `count_batch` method counts many prompts at once. The uncached messages
+    of a big prompt are counted in a worker thread.
+
+    The subclasses only need to implement the `_count_message` and
+    `_count_tools` methods.
+    """
+
+    tokens_per_prompt: int = 0
+    """The fixed number of tokens added to each prompt, e.g. the tokens
+    priming the reply."""
+
+    def __init__(
+        self,
+        cache_size: int = 4096,
+        offload_threshold: int | None = 32768,
+    ) -> None:
+        """Initialize the cached token counter.
+
+        Args:
+            cache_size (`int`, defaults to `4096`):
+                The maximum number of messages (and tool schemas) whose token
+                counts are kept in the cache. Set to `0` to disable the
+                cache.
+            offload_threshold (`int | None`, defaults to `32768`):
+                The total text length of the uncached messages above which
+                they are counted in a worker thread, so that tokenizing a big
+                prompt won't block the event loop. If `None`, always count
+                in the event loop.
+        """
+        self.cache_size = cache_size
+        self.offload_threshold = offload_threshold
+        # The caches are also accessed by the worker threads
+        self._lock = threading.Lock()
+        self._message_cache: OrderedDict[Hashable, int] = OrderedDict()
+        self._tools_cache: OrderedDict[Hashable, int] = OrderedDict()
+
+    @abstractmethod
+    def _count_message(self, message: dict[str, Any]) -> int:
+        """Count the number of tokens of a single message.
+
+        Args:
+            message (`dict[str, Any]`):
+                The formatted message.
+
+        Returns:
+            `int`:
+                The number of tokens of the message.
+        """
+
+    @abstractmethod
+    def _count_tools(self, tools: list[dict]) -> int:
+        """Count the number of tokens of the tool schemas.
+
+        Args:
+            tools (`list[dict]`):
+                The tool JSON schemas.
+
+        Returns:
+            `int`:
+                The number of tokens of the tool schemas.
+        """
+
+    async def _prefetch(self, messages: list[dict[str, Any]]) -> None:
+        """Prepare the resources needed to count the given messages
+        asynchronously before they're counted, e.g. fetching the web images.
+        Do nothing by default.
+
+        Args:
+            messages (`list[dict[str, Any]]`):
+                The uncached formatted messages.
+        """
+
+    @staticmethod
+    def _lookup(
+        cache: OrderedDict[Hashable, int],
+        key: Hashable,
+    ) -> int | None:
+        """Get the cached count and mark it as recently used."""
+        n_tokens = cache.get(key)
+        if n_tokens is not None:
+            cache.move_to_end(key)
+        return n_tokens
+
+    def _store(
+        self,
+        cache: OrderedDict[Hashable, int],
+        key: Hashable,
+        n_tokens: int,
+    ) -> None:
+        """Store the count and evict the least recently used counts."""
+        if self.cache_size <= 0:
+            return
+        cache[key] = n_tokens
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    async def _count_each_with_cache(
+        self,
+        messages: list[dict[str, Any]],
+    ) -> list[int]:
+        """Count the number of tokens of each message, reusing the cached
+        counts of the counted ones. The uncached messages are counted in a
+        worker thread if their total text length exceeds
+        `offload_threshold`."""
+        # The frozen content is used as the key, whose strings are usually
+        # shared with the cached formatting results, so hashing it won't scan
+        # the long strings again
+        keys = [_freeze(_) for _ in messages]
+        counts: dict[Hashable, int] = {}
+        with self._lock:
+            for key in keys:
+                n_tokens = self._lookup(self._message_cache, key)
+                if n_tokens is not None:
+                    counts[key] = n_tokens
+
+        misses = {
+            key: message
+            for key, message in zip(keys, messages)
+            if key not in counts
+        }
+        if misses:
+            await self._prefetch(list(misses.values()))
+            if (
+                self.offload_threshold is not None
+                and _get_text_length(list(misses.values()))
+                > self.offload_threshold
+            ):
+                new_counts = await asyncio.to_thread(
+                    self._count_messages,
+                    list(misses.values()),
+                )
+            else:
+                new_counts = self._count_messages(list(misses.values()))
+
+            with self._lock:
+                for key, n_tokens in zip(misses, new_counts):
+                    counts[key] = n_tokens
+                    self._store(self._message_cache, key, n_tokens)
+
+        return [counts[key] for key in keys]
+
+    def _count_messages(self, messages: list[dict[str, Any]]) -> list[int]:
+        """Count the number of tokens of each message without the cache."""
+        return [self._count_message(_) for _ in messages]
+
+    def _count_tools_with_cache(self, tools: list[dict] | None) -> int:
+        """Count the number of tokens of the tool schemas, reusing the cached
+        count of the same schemas."""
+        if not tools:
+            return 0
+
+        key = _freeze(tools)
+        with self._lock:
+            n_tokens = self._lookup(self._tools_cache, key)
+        if n_tokens is None:
+            n_tokens = self._count_tools(tools)
+            with self._lock:
+                self._store(self._tools_cache, key, n_tokens)
+        return n_tokens
+
+    async def count(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens of the given messages and tools.
+
+        Args:
+            messages (`list[dict[str, Any]]`):
+                The formatted messages.
+            tools (`list[dict] | None`, defaults to `None`):
+                The tool JSON schemas.
+
+        Returns:
+            `int`:
+                The number of tokens.
+        """
+        return (
+            self.tokens_per_prompt
+            + sum(await self._count_each_with_cache(messages))
+            + self._count_tools_with_cache(tools)
+        )
+
+    async def count_batch(  # pylint: disable=unused-argument
+        self,
+        prompts: list[list[dict[str, Any]]],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> list[int]:
+        """Count the number of tokens of many prompts at once. The distinct
+        messages of all prompts are counted in one pass, so the history
+        shared by the prompts is only tokenized once.
+
+        Args:
+            prompts (`list[list[dict[str, Any]]]`):
+                The prompts, each of which is a list of formatted messages.
+            tools (`list[dict] | None`, defaults to `None`):
+                The tool JSON schemas shared by the prompts.
+            **kwargs (`Any`):
+                Accepted for the same signature as `count`, and unused by
+                the cached counting.
+
+        Returns:
+            `list[int]`:
+                The number of tokens of each prompt.
+        """
+        counts = await self._count_each_with_cache(
+            [message for prompt in prompts for message in prompt],
+        )
+        n_tools_tokens = self._count_tools_with_cache(tools)
+
+        results = []
+        start = 0
+        for prompt in prompts:
+            results.append(
+                self.tokens_per_prompt
+                + sum(counts[start : start + len(prompt)])
+                + n_tools_tokens,
+            )
+            start += len(prompt)
+        return results
+
+    def clear_cache(self) -> None:
+        """Clear the cached token counts."""
+        with self._lock:
+            self._message_cache.clear()
+            self._tools_cache.clear()
@@ -1,31 +1,76 @@
 # -*- coding: utf-8 -*-
 """The gemini token counter class in agentscope."""
-from typing import Any
+import math
+from typing import Any, Literal
 
-from agentscope.token._token_base import TokenCounterBase
+from ._remote_token_counter_base import RemoteTokenCounterBase
 
 
-class GeminiTokenCounter(TokenCounterBase):
-    """The Gemini token counter class."""
+class GeminiTokenCounter(RemoteTokenCounterBase):
+    """The Gemini token counter class, which counts the tokens by the Gemini
+    token counting API, or estimates them locally in the "local" and
+    "hybrid" modes."""
 
-    def __init__(self, model_name: str, api_key: str, **kwargs: Any) -> None:
+    chars_per_token: float = 4.0
+    """The average number of characters per token of the Gemini models."""
+
+    tokens_per_message: int = 3
+
+    def __init__(
+        self,
+        model_name: str,
+        api_key: str | None = None,
+        mode: Literal["remote", "local", "hybrid"] = "remote",
+        chars_per_token: float | None = None,
+        safety_margin: float = 0.1,
+        verify_margin: float = 0.1,
+        cache_size: int = 1024,
+        **kwargs: Any,
+    ) -> None:
         """Initialize the Gemini token counter.
 
         Args:
             model_name (`str`):
                 The name of the Gemini model to use, e.g. "gemini-2.5-flash".
-            api_key (`str`):
-                The API key for Google Gemini.
+            api_key (`str | None`, optional):
+                The API key for Google Gemini, which is not required in the
+                "local" mode.
+            mode (`Literal["remote", "local", "hybrid"]`, defaults to \
+            `"remote"`):
+                The counting mode. "remote" counts by the API, "local"
+                estimates the count locally, and "hybrid" estimates locally
+                and verifies by the API when the estimate is close to the
+                budget.
+            chars_per_token (`float | None`, optional):
+                The average number of characters per token used in the local
+                estimation, defaults to `4.0`.
+            safety_margin (`float`, defaults to `0.1`):
+                The fraction by which the local estimate is enlarged.
+            verify_margin (`float`, defaults to `0.1`):
+                In the "hybrid" mode, the estimate within this fraction of the
+                budget is verified by the API.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of the API results kept in the cache.
             **kwargs:
                 Additional keyword arguments that will be passed to the
                 Gemini client.
         """
-        from google import genai
-
-        self.client = genai.Client(
-            api_key=api_key,
-            **kwargs,
+        super().__init__(
+            mode=mode,
+            chars_per_token=chars_per_token,
+            safety_margin=safety_margin,
+            verify_margin=verify_margin,
+            cache_size=cache_size,
         )
+
+        self.client = None
+        if mode != "local":
+            from google import genai
+
+            self.client = genai.Client(
+                api_key=api_key,
+                **kwargs,
+            )
         self.model_name = model_name
 
     async def count(
@@ -35,7 +80,15 @@ class GeminiTokenCounter(TokenCounterBase):
         **config_kwargs: Any,
     ) -> int:
         """Count the number of tokens of gemini models."""
+        return await super().count(messages, tools, **config_kwargs)
 
+    async def _count_remote(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **config_kwargs: Any,
+    ) -> int:
+        """Count the number of tokens by the Gemini token counting API."""
         kwargs = {
             "model": self.model_name,
             "contents": messages,
@@ -45,6 +98,20 @@ class GeminiTokenCounter(TokenCounterBase):
             },
         }
 
-        res = self.client.models.count_tokens(**kwargs)
+        res = await self.client.aio.models.count_tokens(**kwargs)
 
         return res.total_tokens
+
+    def _estimate_image_tokens(self, width: int, height: int) -> int:
+        """Estimate the image tokens as 258 tokens per tile, where the images
+        within 384 pixels take one tile and the larger ones are cropped into
+        tiles, following
+        https://ai.google.dev/gemini-api/docs/tokens#multimodal-tokens
+        """
+        if width <= 384 and height <= 384:
+            return 258
+
+        tile_size = min(max(min(width, height) / 1.5, 256), 768)
+        return (
+            258 * math.ceil(width / tile_size) * math.ceil(height / tile_size)
+        )
@@ -1,13 +1,54 @@
 # -*- coding: utf-8 -*-
 """The huggingface token counter class."""
+import asyncio
 import os
-from typing import Any
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Literal
 
 from agentscope.token._token_base import TokenCounterBase
 
+_WORKER_TOKENIZER: Any = None
+
+
+def _init_worker_tokenizer(
+    pretrained_model_name_or_path: str,
+    tokenizer_kwargs: dict,
+) -> None:
+    """Load the tokenizer in the worker process."""
+    global _WORKER_TOKENIZER
+    from transformers import AutoTokenizer
+
+    _WORKER_TOKENIZER = AutoTokenizer.from_pretrained(
+        pretrained_model_name_or_path,
+        **tokenizer_kwargs,
+    )
+
+
+def _tokenize_in_worker(texts: list[str]) -> list[list[int]]:
+    """Tokenize the texts with the tokenizer of the worker process."""
+    return _WORKER_TOKENIZER(texts, add_special_tokens=False)["input_ids"]
+
 
 class HuggingFaceTokenCounter(TokenCounterBase):
-    """The token counter for Huggingface models."""
+    """The token counter for Huggingface models.
+
+    The prompt rendered by the chat template is split before each added
+    token (e.g. `<|im_start|>`), which the tokenizer never merges with the
+    neighboring text, so the prompt tokenizes to the concatenation of its
+    chunks. The token ids of the chunks are kept in an LRU cache, so
+    appending a message to a chat only tokenizes the new chunks.
+
+    The counting runs in a thread pool (or a process pool) to avoid
+    blocking the event loop, and the concurrent `count` calls are merged
+    into one batched tokenizer call.
+    """
 
     def __init__(
         self,
@@ -15,6 +56,10 @@ class HuggingFaceTokenCounter(TokenCounterBase):
         use_mirror: bool = False,
         use_fast: bool = False,
         trust_remote_code: bool = False,
+        pool: Literal["thread", "process"] = "thread",
+        max_workers: int = 1,
+        cache_size: int = 4096,
+        batch_wait: float = 0.0,
         **kwargs: Any,
     ) -> None:
         """Initialize the huggingface token counter.
@@ -30,20 +75,42 @@ class HuggingFaceTokenCounter(TokenCounterBase):
                 The argument that will be passed to the tokenizer.
             trust_remote_code (`bool`, defaults to `False`):
                 The argument that will be passed to the tokenizer.
+            pool (`Literal["thread", "process"]`, defaults to `"thread"`):
+                Run the tokenization in a thread pool or a process pool. The
+                process pool loads the tokenizer in each worker, which avoids
+                the GIL for the slow (pure Python) tokenizers.
+            max_workers (`int`, defaults to `1`):
+                The maximum number of workers in the pool.
+            cache_size (`int`, defaults to `4096`):
+                The maximum number of the prompt chunks whose token ids are
+                kept in the cache. Set to `0` to disable the cache.
+            batch_wait (`float`, defaults to `0.0`):
+                The seconds to wait for more `count` calls before tokenizing
+                them in one batch. By default, only the calls issued in the
+                same event loop iteration are merged.
             **kwargs:
                 Additional keyword arguments that will be passed to the
                 tokenizer.
         """
+        if pool not in ["thread", "process"]:
+            raise ValueError(
+                f"Invalid pool {pool}, expected one of ['thread', "
+                "'process'].",
+            )
+
         if use_mirror:
             os.environ["HF_ENDPOINT"] = "https://hf-mirror.com"
 
         from transformers import AutoTokenizer
 
+        tokenizer_kwargs = {
+            "use_fast": use_fast,
+            "trust_remote_code": trust_remote_code,
+            **kwargs,
+        }
         self.tokenizer = AutoTokenizer.from_pretrained(
             pretrained_model_name_or_path,
-            use_fast=use_fast,
-            trust_remote_code=trust_remote_code,
-            **kwargs,
+            **tokenizer_kwargs,
         )
 
         if self.tokenizer.chat_template is None:
@@ -52,6 +119,171 @@ class HuggingFaceTokenCounter(TokenCounterBase):
                 f"transformers does not have chat template.",
             )
 
+        self.cache_size = cache_size
+        self.batch_wait = batch_wait
+
+        # The prompt is split before each added token
+        added_tokens = sorted(
+            self.tokenizer.added_tokens_encoder,
+            key=len,
+            reverse=True,
+        )
+        self._split_pattern = (
+            re.compile(
+                "(?=" + "|".join(re.escape(_) for _ in added_tokens) + ")",
+            )
+            if added_tokens
+            else None
+        )
+
+        self._cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._process_pool: Executor | None = None
+        if pool == "process":
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker_tokenizer,
+                initargs=(pretrained_model_name_or_path, tokenizer_kwargs),
+            )
+
+        # The pending count requests, which are bound to the event loop
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: list[tuple[list[dict], list[dict] | None, dict]] = []
+        self._pending_futures: list[asyncio.Future] = []
+        self._flush_task: asyncio.Task | None = None
+
+    def _split(self, text: str) -> list[str]:
+        """Split the rendered prompt into chunks before the added tokens."""
+        if self._split_pattern is None:
+            return [text]
+        return [_ for _ in self._split_pattern.split(text) if _]
+
+    def _tokenize(self, texts: list[str]) -> list[list[int]]:
+        """Tokenize the texts in one batched call."""
+        if self._process_pool is not None:
+            return self._process_pool.submit(
+                _tokenize_in_worker,
+                texts,
+            ).result()
+        return self.tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+    def _tokenize_prompts(
+        self,
+        requests: list[tuple[list[dict], list[dict] | None, dict]],
+    ) -> list[list[int]]:
+        """Render the prompts by the chat template and tokenize them,
+        reusing the cached token ids of the chunks. The uncached chunks of
+        all prompts are tokenized in one batched call."""
+        chunked_prompts = []
+        for messages, tools, kwargs in requests:
+            text = self.tokenizer.apply_chat_template(
+                messages,
+                add_generation_prompt=False,
+                tokenize=False,
+                tools=tools,
+                **kwargs,
+            )
+            chunked_prompts.append(self._split(text))
+
+        with self._lock:
+            token_ids = {}
+            for chunks in chunked_prompts:
+                for chunk in chunks:
+                    if chunk in self._cache:
+                        self._cache.move_to_end(chunk)
+                        token_ids[chunk] = self._cache[chunk]
+            misses = list(
+                dict.fromkeys(
+                    chunk
+                    for chunks in chunked_prompts
+                    for chunk in chunks
+                    if chunk not in token_ids
+                ),
+            )
+
+        if misses:
+            new_token_ids = self._tokenize(misses)
+            with self._lock:
+                for chunk, ids in zip(misses, new_token_ids):
+                    token_ids[chunk] = ids
+                    if self.cache_size > 0:
+                        self._cache[chunk] = ids
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [
+            [_ for chunk in chunks for _ in token_ids[chunk]]
+            for chunks in chunked_prompts
+        ]
+
+    async def _submit(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None,
+        kwargs: dict,
+    ) -> list[int]:
+        """Submit a prompt to the pending batch and wait for its token
+        ids."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._pending_futures = []
+
+        future = loop.create_future()
+        self._pending.append((messages, tools, kwargs))
+        self._pending_futures.append(future)
+        if len(self._pending) == 1:
+            self._flush_task = loop.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        """Tokenize the pending prompts in one batch in the pool."""
+        await asyncio.sleep(self.batch_wait)
+        requests, futures = self._pending, self._pending_futures
+        self._pending, self._pending_futures = [], []
+
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                self._tokenize_prompts,
+                requests,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def tokenize(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> list[int]:
+        """Tokenize the given messages by the chat template.
+
+        Args:
+            messages (`list[dict]`):
+                A list of message dictionaries
+            tools (`list[dict] | None`, defaults to `None`):
+                The JSON schema of the tools.
+            **kwargs (`Any`):
+                The additional keyword arguments that will be passed to the
+                `apply_chat_template` method, e.g. `chat_template`.
+
+        Returns:
+            `list[int]`:
+                The token ids of the prompt.
+        """
+        return await self._submit(messages, tools, kwargs)
+
     async def count(
         self,
         messages: list[dict],
@@ -69,15 +301,43 @@ class HuggingFaceTokenCounter(TokenCounterBase):
                 the token counting.
             **kwargs (`Any`):
                 The additional keyword arguments that will be passed to the
-                tokenizer, e.g. `chat_template`, `padding`, etc.
+                `apply_chat_template` method, e.g. `chat_template`.
         """
-        tokenized_msgs = self.tokenizer.apply_chat_template(
-            messages,
-            add_generation_prompt=False,
-            tokenize=True,
-            return_tensors="np",
-            tools=tools,
-            **kwargs,
-        )[0]
+        return len(await self._submit(messages, tools, kwargs))
+
+    async def count_batch(
+        self,
+        prompts: list[list[dict]],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> list[int]:
+        """Count the number of tokens of many prompts in one batched
+        tokenizer call.
+
+        Args:
+            prompts (`list[list[dict]]`):
+                The prompts, each of which is a list of message dictionaries.
+            tools (`list[dict] | None`, defaults to `None`):
+                The JSON schema of the tools shared by the prompts.
+
+        Returns:
+            `list[int]`:
+                The number of tokens of each prompt.
+        """
+        results = await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            self._tokenize_prompts,
+            [(_, tools, kwargs) for _ in prompts],
+        )
+        return [len(_) for _ in results]
+
+    def clear_cache(self) -> None:
+        """Clear the cached token ids."""
+        with self._lock:
+            self._cache.clear()
 
-        return len(tokenized_msgs)
+    def close(self) -> None:
+        """Shut down the worker pools."""
+        self._executor.shutdown(wait=False)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""The image size resolver used in the vision token counting, which reads
+the width and height of an image from its header bytes."""
+import asyncio
+import base64
+import io
+import struct
+from typing import Iterable
+
+import httpx
+
+from .._utils._cached_loader import _CachedLoader
+
+_JPEG_SOF_MARKERS = {
+    0xC0,
+    0xC1,
+    0xC2,
+    0xC3,
+    0xC5,
+    0xC6,
+    0xC7,
+    0xC9,
+    0xCA,
+    0xCB,
+    0xCD,
+    0xCE,
+    0xCF,
+}
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD8, *range(0xD0, 0xD8)}
+
+
+def _parse_jpeg_size(data: bytes) -> tuple[int, int] | None:
+    """Scan the JPEG segments for the start-of-frame marker."""
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill bytes before the marker
+            i += 1
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", data[i + 5 : i + 9])
+            return width, height
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        (length,) = struct.unpack(">H", data[i + 2 : i + 4])
+        i += 2 + length
+    return None
+
+
+def _parse_webp_size(data: bytes) -> tuple[int, int] | None:
+    """Parse the size from the first chunk of the WebP image."""
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        (bits,) = struct.unpack("<I", data[21:25])
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _parse_image_size(data: bytes) -> tuple[int, int] | None:
+    """Parse the width and height from the header bytes of a PNG, JPEG,
+    GIF or WebP image.
+
+    Args:
+        data (`bytes`):
+            The leading bytes of the image.
+
+    Returns:
+        `tuple[int, int] | None`:
+            The width and height of the image, or `None` if the format is
+            not supported or the given bytes are not enough.
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(data) >= 24:
+            return struct.unpack(">II", data[16:24])
+
+    elif data[:6] in (b"GIF87a", b"GIF89a"):
+        if len(data) >= 10:
+            return struct.unpack("<HH", data[6:10])
+
+    elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return _parse_webp_size(data)
+
+    elif data.startswith(b"\xff\xd8"):
+        return _parse_jpeg_size(data)
+
+    return None
+
+
+def _get_size_by_pillow(data: bytes) -> tuple[int, int]:
+    """Get the image size by decoding the image with Pillow, used for the
+    formats that cannot be parsed from the header."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+class _ImageSizeResolver(_CachedLoader):
+    """The resolver that gets the width and height of the images without
+    downloading and decoding the whole images.
+
+    The base64 data URLs are parsed from the prefix of the data, which costs
+    as little as hashing it. The web URLs are fetched by a range request
+    and the response is read only until the header is parsed. The sizes of
+    the web images are kept in an LRU cache keyed by the URL. In the async
+    methods, the web images are fetched through the shared async HTTP client
+    with bounded concurrency.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 4096,
+        header_bytes: int = 256 * 1024,
+        max_concurrency: int = 8,
+        timeout: float = 30,
+        max_retries: int = 3,
+    ) -> None:
+        """Initialize the image size resolver.
+
+        Args:
+            cache_size (`int`, defaults to `4096`):
+                The maximum number of the web image sizes kept in the cache.
+            header_bytes (`int`, defaults to `256 * 1024`):
+                The maximum number of the leading bytes read to parse the
+                header, beyond which the whole image is decoded.
+            max_concurrency (`int`, defaults to `8`):
+                The maximum number of web images fetched concurrently in the
+                async methods.
+            timeout (`float`, defaults to `30`):
+                The timeout in seconds of fetching a web image.
+            max_retries (`int`, defaults to `3`):
+                The maximum number of attempts to fetch a web image.
+        """
+        super().__init__(
+            cache_max_size=cache_size,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+            max_retries=max_retries,
+        )
+        self.header_bytes = header_bytes
+
+    def _get_size_of_data_url(self, url: str) -> tuple[int, int]:
+        """Get the image size from a base64 data URL by decoding its prefix
+        progressively."""
+        base64_data = url.split("base64,", 1)[1]
+        # A multiple of 4 characters decodes to whole bytes
+        n_chars = 1024
+        while True:
+            data = base64.b64decode(base64_data[:n_chars])
+            size = _parse_image_size(data)
+            if size is not None:
+                return size
+            if n_chars >= len(base64_data) or len(data) >= self.header_bytes:
+                return _get_size_by_pillow(base64.b64decode(base64_data))
+            n_chars *= 4
+
+    def get_size(self, url: str) -> tuple[int, int]:
+        """Get the width and height of the image. On a cache miss, the web
+        image is fetched with a blocking request, so the async callers should
+        `prefetch` the URLs first.
+
+        Args:
+            url (`str`):
+                A web URL or a base64 data URL of the image.
+
+        Returns:
+            `tuple[int, int]`:
+                The width and height of the image.
+        """
+        if url.startswith("data:"):
+            return self._get_size_of_data_url(url)
+
+        size = self._cache_get(url)
+        if size is not None:
+            return size
+
+        size = self._fetch_with_retries(self._fetch_size, url)
+        self._cache_put(url, size)
+        return size
+
+    def _fetch_size(self, url: str) -> tuple[int, int]:
+        """Read the header of the web image with a range request."""
+        with httpx.Client(
+            timeout=self.timeout,
+            follow_redirects=True,
+        ) as client:
+            with client.stream(
+                "GET",
+                url,
+                headers={"Range": f"bytes=0-{self.header_bytes - 1}"},
+            ) as response:
+                response.raise_for_status()
+                data = b""
+                for chunk in response.iter_bytes():
+                    data += chunk
+                    size = _parse_image_size(data)
+                    if size is not None:
+                        return size
+                    if len(data) >= self.header_bytes:
+                        break
+
+                if (
+                    response.status_code == 200
+                    and len(data) < self.header_bytes
+                ):
+                    # The whole image is downloaded
+                    return _get_size_by_pillow(data)
+
+            response = client.get(url)
+            response.raise_for_status()
+            return _get_size_by_pillow(response.content)
+
+    async def _afetch_size(self, url: str) -> tuple[int, int]:
+        """Read the header of the web image with a range request through
+        the shared async client."""
+        client = self._get_async_client()
+        async with client.stream(
+            "GET",
+            url,
+            headers={"Range": f"bytes=0-{self.header_bytes - 1}"},
+        ) as response:
+            response.raise_for_status()
+            data = b""
+            async for chunk in response.aiter_bytes():
+                data += chunk
+                size = _parse_image_size(data)
+                if size is not None:
+                    return size
+                if len(data) >= self.header_bytes:
+                    break
+
+            if response.status_code == 200 and len(data) < self.header_bytes:
+                return _get_size_by_pillow(data)
+
+        response = await client.get(url)
+        response.raise_for_status()
+        return _get_size_by_pillow(response.content)
+
+    async def aget_size(self, url: str) -> tuple[int, int]:
+        """Get the width and height of the image without blocking the event
+        loop.
+
+        Args:
+            url (`str`):
+                A web URL or a base64 data URL of the image.
+
+        Returns:
+            `tuple[int, int]`:
+                The width and height of the image.
+        """
+        if url.startswith("data:"):
+            return self._get_size_of_data_url(url)
+
+        size = self._cache_get(url)
+        if size is not None:
+            return size
+
+        return await self._aload_once(
+            url,
+            lambda: self._afetch_with_retries(self._afetch_size, url),
+        )
+
+    async def prefetch(self, urls: Iterable[str]) -> None:
+        """Get the sizes of the given web images concurrently into the cache,
+        so that the following `get_size` calls won't touch the network.
+
+        Args:
+            urls (`Iterable[str]`):
+                The web URLs of the images.
+        """
+        await asyncio.gather(
+            *[
+                self.aget_size(_)
+                for _ in dict.fromkeys(urls)
+                if not _.startswith("data:")
+            ],
+        )
+
+
+_IMAGE_SIZE_RESOLVER: _ImageSizeResolver | None = None
+
+
+def _get_image_size_resolver() -> _ImageSizeResolver:
+    """Get the image size resolver shared by the token counters."""
+    global _IMAGE_SIZE_RESOLVER
+    if _IMAGE_SIZE_RESOLVER is None:
+        _IMAGE_SIZE_RESOLVER = _ImageSizeResolver()
+    return _IMAGE_SIZE_RESOLVER
@@ -3,16 +3,35 @@
 follows
 https://platform.openai.com/docs/guides/images-vision?api-mode=chat#calculating-costs
 """
-import base64
-import io
+import functools
 import json
 import math
-from http import HTTPStatus
 from typing import Any
 
-import requests
+from ._cached_token_counter_base import CachedTokenCounterBase
+from ._image_size import _get_image_size_resolver
 
-from ._token_base import TokenCounterBase
+
+@functools.lru_cache(maxsize=None)
+def _get_tiktoken_encoding(model_name: str) -> Any:
+    """Get the tiktoken encoding of the given model, which is loaded once
+    and kept resident for the process.
+
+    Args:
+        model_name (`str`):
+            The name of the model.
+
+    Returns:
+        `tiktoken.Encoding`:
+            The encoding of the model, or the `o200k_base` encoding if the
+            model is unknown to tiktoken.
+    """
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
 
 
 def _calculate_tokens_for_high_quality_image(
@@ -49,7 +68,8 @@ def _calculate_tokens_for_high_quality_image(
 
 
 def _get_size_of_image_url(url: str) -> tuple[int, int]:
-    """Get the size of an image from the given URL.
+    """Get the size of an image from the given URL. Only the header of the
+    image is read, and the sizes of the web images are cached.
 
     Args:
         url (`str`):
@@ -59,24 +79,7 @@ def _get_size_of_image_url(url: str) -> tuple[int, int]:
         `tuple[int, int]`:
             A tuple containing the width and height of the image.
     """
-    if url.startswith("data:image/"):
-        base64_data = url.split("base64,")[1]
-        image_data = base64.b64decode(base64_data)
-
-    else:
-        response = None
-        for _ in range(3):
-            response = requests.get(url)
-            if response.status_code == HTTPStatus.OK:
-                break
-        response.raise_for_status()
-        image_data = response.content
-
-    from PIL import Image
-
-    image = Image.open(io.BytesIO(image_data))
-    width, height = image.size
-    return width, height
+    return _get_image_size_resolver().get_size(url)
 
 
 def _get_base_and_tile_tokens(model_name: str) -> tuple[int, int]:
@@ -294,22 +297,46 @@ def _count_content_tokens_for_openai_vision_model(
     return num_tokens
 
 
-class OpenAITokenCounter(TokenCounterBase):
+class OpenAITokenCounter(CachedTokenCounterBase):
     """The OpenAI token counting class."""
 
-    def __init__(self, model_name: str) -> None:
+    tokens_per_prompt: int = 3
+    """Every reply is primed with <|start|>assistant<|message|>"""
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_size: int = 4096,
+        offload_threshold: int | None = 32768,
+    ) -> None:
         """Initialize the OpenAI token counter.
 
         Args:
             model_name (`str`):
                 The name of the OpenAI model to use for token counting.
+            cache_size (`int`, defaults to `4096`):
+                The maximum number of messages (and tool schemas) whose token
+                counts are kept in the cache. Set to `0` to disable the
+                cache.
+            offload_threshold (`int | None`, defaults to `32768`):
+                The total text length of the uncached messages above which
+                they are tokenized in a worker thread. If `None`, always
+                tokenize in the event loop.
         """
+        super().__init__(
+            cache_size=cache_size,
+            offload_threshold=offload_threshold,
+        )
         self.model_name = model_name
 
+    def _get_encoding(self) -> Any:
+        """Get the tiktoken encoding of the model."""
+        return _get_tiktoken_encoding(self.model_name)
+
     async def count(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict] = None,
+        tools: list[dict] | None = None,
         **kwargs: Any,
     ) -> int:
         """Count the token numbers of the given messages.
@@ -322,63 +349,69 @@ class OpenAITokenCounter(TokenCounterBase):
             messages (`list[dict[str, Any]]`):
                 A list of dictionaries, where `role` and `content` fields are
                 required.
-            tools (`list[dict]`, defaults to `None`):
+            tools (`list[dict] | None`, defaults to `None`):
         """
-        import tiktoken
+        return await super().count(messages, tools=tools, **kwargs)
+
+    async def _prefetch(self, messages: list[dict[str, Any]]) -> None:
+        """Get the sizes of the web images in the messages concurrently, so
+        that counting them won't block the event loop."""
+        await _get_image_size_resolver().prefetch(
+            item["image_url"]["url"]
+            for message in messages
+            if isinstance(message.get("content"), list)
+            for item in message["content"]
+            if isinstance(item, dict) and item.get("type") == "image_url"
+        )
 
-        try:
-            encoding = tiktoken.encoding_for_model(self.model_name)
-        except KeyError:
-            encoding = tiktoken.get_encoding("o200k_base")
+    def _count_message(self, message: dict[str, Any]) -> int:
+        """Count the token numbers of a single message."""
+        encoding = self._get_encoding()
 
         tokens_per_message = 3
         tokens_per_name = 1
 
-        # every reply is primed with <|start|>assistant<|message|>
-        num_tokens = 3
-        for message in messages:
-            num_tokens += tokens_per_message
-            for key, value in message.items():
-                # Considering vision models
-                if key == "content" and isinstance(value, list):
-                    num_tokens += (
-                        _count_content_tokens_for_openai_vision_model(
-                            self.model_name,
-                            value,
-                            encoding,
-                        )
-                    )
-
-                elif isinstance(value, str):
-                    num_tokens += len(encoding.encode(value))
+        num_tokens = tokens_per_message
+        for key, value in message.items():
+            # Considering vision models
+            if key == "content" and isinstance(value, list):
+                num_tokens += _count_content_tokens_for_openai_vision_model(
+                    self.model_name,
+                    value,
+                    encoding,
+                )
 
-                elif value is None:
-                    continue
+            elif isinstance(value, str):
+                num_tokens += len(encoding.encode(value))
 
-                elif key == "tool_calls":
-                    # TODO: This is only a temporary solution, since OpenAI
-                    # hasn't provided an official guide for counting tokens
-                    # with tool results.
-                    num_tokens += len(
-                        encoding.encode(
-                            json.dumps(value, ensure_ascii=False),
-                        ),
-                    )
+            elif value is None:
+                continue
 
-                else:
-                    raise TypeError(
-                        f"Invalid type {type(value)} in the {key} field: "
-                        f"{value}",
-                    )
+            elif key == "tool_calls":
+                # TODO: This is only a temporary solution, since OpenAI
+                # hasn't provided an official guide for counting tokens
+                # with tool results.
+                num_tokens += len(
+                    encoding.encode(
+                        json.dumps(value, ensure_ascii=False),
+                    ),
+                )
 
-                if key == "name":
-                    num_tokens += tokens_per_name
+            else:
+                raise TypeError(
+                    f"Invalid type {type(value)} in the {key} field: "
+                    f"{value}",
+                )
 
-        if tools:
-            num_tokens += _calculate_tokens_for_tools(
-                self.model_name,
-                tools,
-                encoding,
-            )
+            if key == "name":
+                num_tokens += tokens_per_name
 
         return num_tokens
+
+    def _count_tools(self, tools: list[dict]) -> int:
+        """Count the token numbers of the tools JSON schemas."""
+        return _calculate_tokens_for_tools(
+            self.model_name,
+            tools,
+            self._get_encoding(),
+        )
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""The base class of the token counters that call the token counting API of
+the model provider, which can also estimate the count locally."""
+import hashlib
+import json
+import math
+from abc import abstractmethod
+from collections import OrderedDict
+from typing import Any, Literal
+
+from ._image_size import _get_image_size_resolver
+from ._token_base import TokenCounterBase
+from .._logging import logger
+
+
+class RemoteTokenCounterBase(TokenCounterBase):
+    """The base class for the token counters that count the tokens by the
+    token counting API of the model provider.
+
+    Calling the API costs a network round-trip, which is paid several times
+    per reasoning step in the truncation. So the counters support three
+    modes:
+
+    - "remote": count by the API, and cache the results keyed by the hash of
+      the prompt.
+    - "local": estimate the count locally from the text length and the
+      image sizes, without any network access. The estimate is calibrated
+      by the provider-specific `chars_per_token`, `tokens_per_message` and
+      image token formula, and enlarged by the `safety_margin`.
+    - "hybrid": estimate the count locally, and verify it by the API only
+      when the estimate is close to the budget in `count_for_budget`.
+
+    The subclasses only need to implement the `_count_remote` and
+    `_estimate_image_tokens` methods.
+    """
+
+    chars_per_token: float = 4.0
+    """The average number of characters per token of the provider's
+    tokenizer, used in the local estimation."""
+
+    tokens_per_message: int = 4
+    """The number of tokens added to each message in the local estimation,
+    e.g. the role and the separators."""
+
+    tokens_per_media: int = 1000
+    """The estimated number of tokens of a media whose size is unknown,
+    e.g. a web image or a non-image media."""
+
+    def __init__(
+        self,
+        mode: Literal["remote", "local", "hybrid"] = "remote",
+        chars_per_token: float | None = None,
+        safety_margin: float = 0.1,
+        verify_margin: float = 0.1,
+        cache_size: int = 1024,
+    ) -> None:
+        """Initialize the remote token counter.
+
+        Args:
+            mode (`Literal["remote", "local", "hybrid"]`, defaults to \
+            `"remote"`):
+                The counting mode. "remote" counts by the API, "local"
+                estimates the count locally, and "hybrid" estimates locally
+                and verifies by the API when the estimate is close to the
+                budget.
+            chars_per_token (`float | None`, optional):
+                The average number of characters per token used in the local
+                estimation. If not provided, the provider's default is used.
+            safety_margin (`float`, defaults to `0.1`):
+                The fraction by which the local estimate is enlarged, so that
+                the estimate rarely undercounts.
+            verify_margin (`float`, defaults to `0.1`):
+                In the "hybrid" mode, the estimate within this fraction of the
+                budget is verified by the API.
+            cache_size (`int`, defaults to `1024`):
+                The maximum number of the API results kept in the cache,
+                keyed by the hash of the prompt. Set to `0` to disable the
+                cache.
+        """
+        if mode not in ["remote", "local", "hybrid"]:
+            raise ValueError(
+                f"Invalid mode {mode}, expected one of ['remote', 'local', "
+                "'hybrid'].",
+            )
+        if chars_per_token is not None and chars_per_token <= 0:
+            raise ValueError(
+                f"chars_per_token must be greater than 0, got "
+                f"{chars_per_token}.",
+            )
+
+        self.mode = mode
+        if chars_per_token is not None:
+            self.chars_per_token = chars_per_token
+        self.safety_margin = safety_margin
+        self.verify_margin = verify_margin
+        self.cache_size = cache_size
+        self._remote_cache: OrderedDict[str, int] = OrderedDict()
+
+    @abstractmethod
+    async def _count_remote(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens by the token counting API.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages.
+            tools (`list[dict] | None`, defaults to `None`):
+                The tool JSON schemas.
+
+        Returns:
+            `int`:
+                The number of tokens.
+        """
+
+    @abstractmethod
+    def _estimate_image_tokens(self, width: int, height: int) -> int:
+        """Estimate the number of tokens of an image with the given size by
+        the provider's formula.
+
+        Args:
+            width (`int`):
+                The width of the image.
+            height (`int`):
+                The height of the image.
+
+        Returns:
+            `int`:
+                The number of tokens of the image.
+        """
+
+    def _estimate_media_tokens(self, media_type: str, data: Any) -> int:
+        """Estimate the number of tokens of a base64 encoded media."""
+        if isinstance(data, str) and media_type.startswith("image/"):
+            try:
+                width, height = _get_image_size_resolver().get_size(
+                    f"data:{media_type};base64,{data}",
+                )
+                return self._estimate_image_tokens(width, height)
+            except Exception:  # pylint: disable=broad-except
+                pass
+        return self.tokens_per_media
+
+    def _estimate_chars_and_media(self, obj: Any) -> tuple[int, int]:
+        """Get the total number of characters and the estimated tokens of
+        the media in the JSON-like object."""
+        if isinstance(obj, str):
+            return len(obj), 0
+
+        if isinstance(obj, dict):
+            # The base64 media, e.g. the Anthropic source and the Gemini
+            # inline data
+            media_type = obj.get("media_type", obj.get("mime_type"))
+            if isinstance(media_type, str) and "data" in obj:
+                return 0, self._estimate_media_tokens(media_type, obj["data"])
+            if obj.get("type") == "url" and "url" in obj:
+                return 0, self.tokens_per_media
+            values = obj.values()
+
+        elif isinstance(obj, (list, tuple)):
+            values = obj
+
+        elif obj is None:
+            return 0, 0
+
+        else:
+            return len(str(obj)), 0
+
+        n_chars, n_media_tokens = 0, 0
+        for value in values:
+            chars, media_tokens = self._estimate_chars_and_media(value)
+            n_chars += chars
+            n_media_tokens += media_tokens
+        return n_chars, n_media_tokens
+
+    def estimate(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+    ) -> int:
+        """Estimate the number of tokens locally without any network access.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages.
+            tools (`list[dict] | None`, defaults to `None`):
+                The tool JSON schemas.
+
+        Returns:
+            `int`:
+                The estimated number of tokens, enlarged by the safety
+                margin.
+        """
+        n_chars, n_media_tokens = self._estimate_chars_and_media(messages)
+        if tools:
+            n_chars += len(json.dumps(tools, ensure_ascii=False))
+
+        n_tokens = (
+            n_chars / self.chars_per_token
+            + n_media_tokens
+            + self.tokens_per_message * len(messages)
+        )
+        return math.ceil(n_tokens * (1 + self.safety_margin))
+
+    @staticmethod
+    def _get_prompt_hash(
+        messages: list[dict],
+        tools: list[dict] | None,
+        kwargs: dict,
+    ) -> str:
+        """Get the hash of the prompt as the cache key of the API results."""
+        prompt = json.dumps(
+            [messages, tools, kwargs],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    async def _count_remote_with_cache(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens by the API, reusing the cached result
+        of the same prompt."""
+        key = self._get_prompt_hash(messages, tools, kwargs)
+        n_tokens = self._remote_cache.get(key)
+        if n_tokens is not None:
+            self._remote_cache.move_to_end(key)
+            return n_tokens
+
+        n_tokens = await self._count_remote(messages, tools, **kwargs)
+        if self.cache_size > 0:
+            self._remote_cache[key] = n_tokens
+            while len(self._remote_cache) > self.cache_size:
+                self._remote_cache.popitem(last=False)
+        return n_tokens
+
+    async def count(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens of the given messages and tools. In
+        the "local" and "hybrid" modes, the count is estimated locally.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages.
+            tools (`list[dict] | None`, defaults to `None`):
+                The tool JSON schemas.
+            **kwargs (`Any`):
+                Additional keyword arguments for the token counting API.
+
+        Returns:
+            `int`:
+                The number of tokens.
+        """
+        if self.mode == "remote":
+            return await self._count_remote_with_cache(
+                messages,
+                tools,
+                **kwargs,
+            )
+        return self.estimate(messages, tools)
+
+    async def count_for_budget(
+        self,
+        messages: list[dict],
+        budget: int,
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens to be compared with the given budget.
+        In the "hybrid" mode, the local estimate is verified by the API only
+        when it's within the `verify_margin` of the budget. If the API is
+        unreachable, the estimate is used.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages.
+            budget (`int`):
+                The maximum number of tokens allowed.
+            tools (`list[dict] | None`, defaults to `None`):
+                The tool JSON schemas.
+            **kwargs (`Any`):
+                Additional keyword arguments for the token counting API.
+
+        Returns:
+            `int`:
+                The number of tokens.
+        """
+        if self.mode != "hybrid":
+            return await self.count(messages, tools, **kwargs)
+
+        n_tokens = self.estimate(messages, tools)
+        if abs(n_tokens - budget) > self.verify_margin * budget:
+            return n_tokens
+
+        try:
+            return await self._count_remote_with_cache(
+                messages,
+                tools,
+                **kwargs,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning(
+                "Failed to count tokens by the API, using the local "
+                "estimate instead. Error: %s",
+                str(e),
+            )
+            return n_tokens
+
+    def clear_cache(self) -> None:
+        """Clear the cached API results."""
+        self._remote_cache.clear()
@@ -14,3 +14,27 @@ class TokenCounterBase:
         **kwargs: Any,
     ) -> int:
         """Count the number of tokens by the given model and messages."""
+
+    # The budget is only used by the estimating counters that override it
+    async def count_for_budget(  # pylint: disable=unused-argument
+        self,
+        messages: list[dict],
+        budget: int,
+        **kwargs: Any,
+    ) -> int:
+        """Count the number of tokens to be compared with the given budget,
+        e.g. in the truncation. The counters that estimate the count locally
+        can override this method to count precisely only when the estimate
+        is close to the budget. By default, it's the same as `count`.
+
+        Args:
+            messages (`list[dict]`):
+                The formatted messages.
+            budget (`int`):
+                The maximum number of tokens allowed.
+
+        Returns:
+            `int`:
+                The number of tokens.
+        """
+        return await self.count(messages, **kwargs)
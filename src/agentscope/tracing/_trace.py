@@ -127,6 +127,13 @@ async def _trace_async_generator_wrapper(
 
     finally:
         if not has_error:
+            # The chat response in delta mode only carries the last delta
+            if (
+                isinstance(last_chunk, dict)
+                and last_chunk.get("snapshot") is not None
+            ):
+                last_chunk = last_chunk.materialize()
+
             # Set the last chunk as output
             span.set_attributes(
                 {
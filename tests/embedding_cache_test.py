@@ -3,11 +3,13 @@
 import os
 import shutil
 import time
+from typing import Any
 from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, Mock
 
 import numpy as np
 
-from agentscope.embedding import FileEmbeddingCache
+from agentscope.embedding import FileEmbeddingCache, OpenAITextEmbedding
 
 
 class EmbeddingCacheTest(IsolatedAsyncioTestCase):
@@ -162,6 +164,60 @@ class EmbeddingCacheTest(IsolatedAsyncioTestCase):
             [],
         )
 
+    async def test_partial_hits(self) -> None:
+        """Test only the texts missed in the cache are sent to the API in one
+        batch, and the results are merged in order."""
+        model = OpenAITextEmbedding(
+            "test_key",
+            "text-embedding-3-small",
+            dimensions=2,
+            embedding_cache=FileEmbeddingCache(
+                cache_dir=self.embedding_cache.cache_dir,
+            ),
+        )
+
+        async def _create(**kwargs: Any) -> Mock:
+            response = Mock()
+            response.data = [
+                Mock(embedding=[float(len(_)), 1.0]) for _ in kwargs["input"]
+            ]
+            response.usage = Mock(total_tokens=len(kwargs["input"]))
+            return response
+
+        model.client = Mock()
+        model.client.embeddings.create = AsyncMock(side_effect=_create)
+
+        res = await model(["a", "bb"])
+        self.assertEqual(res.source, "api")
+        self.assertEqual(res.usage.cache_hits, 0)
+        self.assertEqual(res.usage.cache_misses, 2)
+
+        res = await model(["bb", "ccc", "a", "ccc"])
+        self.assertListEqual(
+            res.embeddings,
+            [[2.0, 1.0], [3.0, 1.0], [1.0, 1.0], [3.0, 1.0]],
+        )
+        self.assertEqual(res.source, "api")
+        self.assertEqual(res.usage.cache_hits, 2)
+        self.assertEqual(res.usage.cache_misses, 2)
+        self.assertEqual(res.usage.tokens, 1)
+        # The duplicated missed text is only sent once
+        self.assertListEqual(
+            model.client.embeddings.create.call_args[1]["input"],
+            ["ccc"],
+        )
+
+        res = await model(["ccc", "a"])
+        self.assertEqual(res.source, "cache")
+        self.assertEqual(res.usage.cache_hits, 2)
+        self.assertListEqual(res.embeddings, [[3.0, 1.0], [1.0, 1.0]])
+        self.assertEqual(model.client.embeddings.create.call_count, 2)
+
+        # The embeddings of another dimension are not shared
+        model.dimensions = 3
+        res = await model(["a"])
+        self.assertEqual(res.usage.cache_misses, 1)
+
     async def asyncTearDown(self) -> None:
         """Tear down the test case."""
         if os.path.exists(self.embedding_cache.cache_dir):
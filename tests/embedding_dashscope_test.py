@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""The DashScope embedding tests in agentscope."""
+import asyncio
+import time
+from typing import Any
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import Mock, patch
+
+from agentscope.embedding import DashScopeTextEmbedding
+
+
+class DashScopeEmbeddingTest(IsolatedAsyncioTestCase):
+    """The DashScope embedding tests in agentscope."""
+
+    async def test_parallel_calls(self) -> None:
+        """Test the parallel calls of the synchronous text embedding API
+        overlap instead of blocking the event loop."""
+        model = DashScopeTextEmbedding(
+            api_key="test_key",
+            model_name="text-embedding-v4",
+            dimensions=4,
+        )
+
+        def _sync_call(**kwargs: Any) -> Mock:
+            time.sleep(0.2)
+            response = Mock()
+            response.status_code = 200
+            response.output = {
+                "embeddings": [
+                    {"embedding": [0.1] * 4} for _ in kwargs["input"]
+                ],
+            }
+            response.usage = {"total_tokens": len(kwargs["input"])}
+            return response
+
+        with patch(
+            "dashscope.embeddings.TextEmbedding.call",
+            side_effect=_sync_call,
+        ):
+            start = time.monotonic()
+            results = await asyncio.gather(
+                *[model([f"text {i}"]) for i in range(5)],
+            )
+            elapsed = time.monotonic() - start
+
+        # Five calls of 0.2 seconds take 1 second if serialized
+        self.assertLess(elapsed, 0.6)
+        for res in results:
+            self.assertListEqual(res.embeddings, [[0.1] * 4])
+            self.assertEqual(res.usage.tokens, 1)
@@ -13,6 +13,7 @@ from agentscope.message import (
     TextBlock,
     ImageBlock,
     URLSource,
+    ThinkingBlock,
 )
 
 
@@ -599,3 +600,89 @@ class TestAnthropicChatFormatterFormatter(IsolatedAsyncioTestCase):
             res,
             self.ground_truth_multiagent_without_first_conversation[1:],
         )
+
+    async def test_prompt_cache_breakpoints(self) -> None:
+        """Test marking the prompt cache breakpoints."""
+        msgs = [
+            *self.msgs_system,
+            Msg("user", "What is the capital of France?", "user"),
+            Msg(
+                "assistant",
+                [
+                    TextBlock(type="text", text="Paris."),
+                    ThinkingBlock(type="thinking", thinking="Easy."),
+                ],
+                "assistant",
+            ),
+            Msg("user", "And Japan?", "user"),
+        ]
+        ground_truth = [
+            {
+                "role": "system",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "You're a helpful assistant.",
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                ],
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "What is the capital of France?",
+                    },
+                ],
+            },
+            {
+                "role": "assistant",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "Paris.",
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                    {"type": "thinking", "thinking": "Easy."},
+                ],
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "And Japan?",
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                ],
+            },
+        ]
+
+        formatter = AnthropicChatFormatter(
+            cache_system_prompt=True,
+            cache_last_n_messages=2,
+        )
+        for _ in range(2):
+            res = await formatter.format(msgs)
+            self.assertListEqual(res, ground_truth)
+
+        # The cached formatting results are not modified
+        # pylint: disable-next=protected-access
+        res = await formatter._format(msgs)
+        self.assertNotIn("cache_control", str(res))
+
+        res = await AnthropicMultiAgentFormatter(
+            cache_last_n_messages=1,
+        ).format(msgs)
+        self.assertNotIn("cache_control", str(res[0]))
+        self.assertDictEqual(
+            res[-1]["content"][-1]["cache_control"],
+            {"type": "ephemeral"},
+        )
+
+        with self.assertRaises(ValueError):
+            AnthropicChatFormatter(
+                cache_system_prompt=True,
+                cache_last_n_messages=4,
+            )
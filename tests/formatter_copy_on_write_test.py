@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""The unittests that the formatters don't modify the input messages."""
+import json
+from typing import Any
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from agentscope.formatter import (
+    AnthropicChatFormatter,
+    AnthropicMultiAgentFormatter,
+    DashScopeChatFormatter,
+    DashScopeMultiAgentFormatter,
+    DeepSeekChatFormatter,
+    DeepSeekMultiAgentFormatter,
+    GeminiChatFormatter,
+    GeminiMultiAgentFormatter,
+    OllamaChatFormatter,
+    OllamaMultiAgentFormatter,
+    OpenAIChatFormatter,
+    OpenAIMultiAgentFormatter,
+)
+from agentscope.message import (
+    Base64Source,
+    ImageBlock,
+    Msg,
+    TextBlock,
+    ThinkingBlock,
+    ToolResultBlock,
+    ToolUseBlock,
+)
+from agentscope.token import TokenCounterBase
+
+
+class CharTokenCounter(TokenCounterBase):
+    """A token counter that counts the characters of the messages."""
+
+    async def count(self, messages: list[dict], **kwargs: Any) -> int:
+        """Count the characters of the messages."""
+        return len(json.dumps(messages, default=str))
+
+
+class CopyOnWriteTest(IsolatedAsyncioTestCase):
+    """The copy-on-write unittests of the formatters."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test environment."""
+        image = ImageBlock(
+            type="image",
+            source=Base64Source(
+                type="base64",
+                media_type="image/png",
+                data="iVBORw0KGgo=",
+            ),
+        )
+        self.msgs = [
+            Msg("system", "You're a helpful assistant.", "system"),
+            Msg(
+                "user",
+                [TextBlock(type="text", text="What's in it?"), image],
+                "user",
+            ),
+            Msg(
+                "assistant",
+                [
+                    ThinkingBlock(type="thinking", thinking="Let me see."),
+                    TextBlock(type="text", text="Let me zoom in."),
+                    ToolUseBlock(
+                        type="tool_use",
+                        id="1",
+                        name="zoom",
+                        input={"scale": 2, "region": [0, 0, 10, 10]},
+                    ),
+                ],
+                "assistant",
+            ),
+            Msg(
+                "system",
+                [
+                    ToolResultBlock(
+                        type="tool_result",
+                        id="1",
+                        name="zoom",
+                        output=[TextBlock(type="text", text="Zoomed"), image],
+                    ),
+                ],
+                "system",
+            ),
+            Msg("assistant", "It's a cat.", "assistant"),
+            Msg("Bob", "A cute one.", "user"),
+        ]
+
+    async def test_input_unchanged(self) -> None:
+        """Test the input messages are unchanged after formatting, with and
+        without truncation."""
+        snapshot = [json.dumps(_.to_dict()) for _ in self.msgs]
+        for formatter_cls in [
+            AnthropicChatFormatter,
+            AnthropicMultiAgentFormatter,
+            DashScopeChatFormatter,
+            DashScopeMultiAgentFormatter,
+            DeepSeekChatFormatter,
+            DeepSeekMultiAgentFormatter,
+            GeminiChatFormatter,
+            GeminiMultiAgentFormatter,
+            OllamaChatFormatter,
+            OllamaMultiAgentFormatter,
+            OpenAIChatFormatter,
+            OpenAIMultiAgentFormatter,
+        ]:
+            for kwargs in [
+                {},
+                {"token_counter": CharTokenCounter(), "max_tokens": 600},
+            ]:
+                formatter = formatter_cls(**kwargs)
+                # Twice to cover the cached results
+                for _ in range(2):
+                    await formatter.format(self.msgs)
+                    self.assertListEqual(
+                        [json.dumps(_.to_dict()) for _ in self.msgs],
+                        snapshot,
+                        f"{formatter_cls.__name__} with {kwargs}",
+                    )
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""The unittests of the media resolver shared by the formatters."""
+import asyncio
+import base64
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from agentscope.formatter import OllamaChatFormatter, OpenAIChatFormatter
+from agentscope.formatter._media_resolver import _MediaResolver
+from agentscope.message import ImageBlock, Msg, TextBlock, URLSource
+
+DELAY = 0.5
+
+
+class SlowImageHandler(BaseHTTPRequestHandler):
+    """The handler that returns the path as the image bytes after a
+    delay."""
+
+    n_requests = 0
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Handle the GET request."""
+        SlowImageHandler.n_requests += 1
+        time.sleep(DELAY)
+        body = self.path.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Disable the logging."""
+
+
+class MediaResolverTest(IsolatedAsyncioTestCase):
+    """The media resolver unittests."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the local HTTP server."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowImageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the local HTTP server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test environment."""
+        SlowImageHandler.n_requests = 0
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.image_path = os.path.join(self.tmp_dir.name, "image.png")
+        with open(self.image_path, "wb") as f:
+            f.write(b"version 1")
+
+    async def asyncTearDown(self) -> None:
+        """Clean up the test environment."""
+        self.tmp_dir.cleanup()
+
+    async def test_local_file_cache(self) -> None:
+        """Test the local files are cached until they're modified."""
+        resolver = _MediaResolver()
+        data = resolver.load(self.image_path)
+        self.assertEqual(base64.b64decode(data), b"version 1")
+        self.assertIs(resolver.load(self.image_path), data)
+        self.assertIs(await resolver.aload(self.image_path), data)
+
+        with open(self.image_path, "wb") as f:
+            f.write(b"version 22")
+        self.assertEqual(
+            base64.b64decode(await resolver.aload(self.image_path)),
+            b"version 22",
+        )
+
+        # The data larger than the byte budget is not cached
+        resolver = _MediaResolver(cache_max_bytes=len(data))
+        resolver.load(self.image_path)
+        # pylint: disable-next=protected-access
+        self.assertEqual(len(resolver._cache), 0)
+
+        with self.assertRaises(ValueError):
+            resolver.load("not_exist.png")
+
+    async def test_concurrent_fetch(self) -> None:
+        """Test the web URLs are fetched concurrently and deduplicated
+        without blocking the event loop."""
+        resolver = _MediaResolver(max_concurrency=4)
+        urls = [f"{self.base_url}/{i}.png" for i in range(4)]
+
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.05)
+
+        ticker = asyncio.create_task(tick())
+        start = time.perf_counter()
+        await resolver.prefetch(urls + urls)
+        cost = time.perf_counter() - start
+        ticker.cancel()
+
+        self.assertLess(cost, DELAY * 2)
+        self.assertGreater(ticks, 5)
+        self.assertEqual(SlowImageHandler.n_requests, 4)
+        self.assertEqual(base64.b64decode(resolver.load(urls[1])), b"/1.png")
+        self.assertEqual(SlowImageHandler.n_requests, 4)
+        await resolver.aclose()
+
+    async def test_formatter_prefetch(self) -> None:
+        """Test the formatters load the media of a prompt concurrently."""
+        msgs = [
+            Msg(
+                "user",
+                [TextBlock(type="text", text="Compare them.")]
+                + [
+                    ImageBlock(
+                        type="image",
+                        source=URLSource(
+                            type="url",
+                            url=f"{self.base_url}/prefetch_{i}.png",
+                        ),
+                    )
+                    for i in range(4)
+                ]
+                + [
+                    ImageBlock(
+                        type="image",
+                        source=URLSource(type="url", url=self.image_path),
+                    ),
+                ],
+                "user",
+            ),
+        ]
+
+        start = time.perf_counter()
+        res = await OllamaChatFormatter().format(msgs)
+        self.assertLess(time.perf_counter() - start, DELAY * 2)
+        self.assertListEqual(
+            [base64.b64decode(_) for _ in res[0]["images"]],
+            [f"/prefetch_{i}.png".encode() for i in range(4)] + [b"version 1"],
+        )
+
+        # The web images are passed to OpenAI directly
+        res = await OpenAIChatFormatter().format(msgs)
+        self.assertEqual(SlowImageHandler.n_requests, 4)
+        self.assertEqual(
+            res[0]["content"][-1]["image_url"]["url"],
+            "data:image/png;base64,"
+            + base64.b64encode(b"version 1").decode("utf-8"),
+        )
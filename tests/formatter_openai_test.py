@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """The OpenAI formatter unittests."""
 import os
+import stat
 from unittest.async_case import IsolatedAsyncioTestCase
 from unittest.mock import patch, MagicMock
 
@@ -478,6 +479,56 @@ class TestOpenAIFormatter(IsolatedAsyncioTestCase):
             self.ground_truth_multiagent_without_conversation[1:],
         )
 
+    async def test_formatter_cache(self) -> None:
+        """Test that only the new or changed messages are formatted again."""
+        formatter = OpenAIChatFormatter()
+        msgs = [*self.msgs_system, *self.msgs_conversation]
+        with patch.object(
+            formatter,
+            "_format_msg",
+            wraps=formatter._format_msg,  # pylint: disable=protected-access
+        ) as mock_format_msg:
+            res = await formatter.format(msgs)
+            self.assertEqual(mock_format_msg.call_count, len(msgs))
+
+            # Append a new message
+            new_msg = Msg("user", "Thanks!", "user")
+            res_new = await formatter.format([*msgs, new_msg])
+            self.assertEqual(mock_format_msg.call_count, len(msgs) + 1)
+            self.assertListEqual(res_new[:-1], res)
+
+            # Change the content of a message
+            new_msg.content = "Thank you!"
+            res_new = await formatter.format([*msgs, new_msg])
+            self.assertEqual(mock_format_msg.call_count, len(msgs) + 2)
+            self.assertEqual(res_new[-1]["content"][0]["text"], "Thank you!")
+
+            # Change the local image file
+            with open(self.image_path, "wb") as f:
+                f.write(b"new fake image content")
+            res_new = await formatter.format(msgs)
+            self.assertEqual(mock_format_msg.call_count, len(msgs) + 3)
+            self.assertNotEqual(res_new, res)
+
+        # Each local file is only stat once in a call
+        with patch(
+            "agentscope.formatter._truncated_formatter_base.S_ISREG",
+            wraps=stat.S_ISREG,
+        ) as mock_is_file:
+            await formatter.format([*msgs, *msgs])
+            self.assertEqual(mock_is_file.call_count, 2)
+
+        # Disable the cache
+        formatter = OpenAIChatFormatter(cache_size=0)
+        with patch.object(
+            formatter,
+            "_format_msg",
+            wraps=formatter._format_msg,  # pylint: disable=protected-access
+        ) as mock_format_msg:
+            await formatter.format(msgs)
+            await formatter.format(msgs)
+            self.assertEqual(mock_format_msg.call_count, 2 * len(msgs))
+
     async def asyncTearDown(self) -> None:
         """Clean up the test environment."""
         if os.path.exists(self.image_path):
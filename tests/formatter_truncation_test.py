@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""The truncation unittests of the truncated formatter."""
+import json
+from typing import Any
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from agentscope.formatter import OpenAIChatFormatter
+from agentscope.message import Msg, ToolUseBlock, ToolResultBlock
+from agentscope.token import TokenCounterBase
+
+
+class CharTokenCounter(TokenCounterBase):
+    """A token counter that counts the characters of the messages."""
+
+    def __init__(self) -> None:
+        """Initialize the token counter."""
+        self.n_calls = 0
+
+    async def count(self, messages: list[dict], **kwargs: Any) -> int:
+        """Count the characters of the messages."""
+        self.n_calls += 1
+        return len(json.dumps(messages))
+
+
+class LegacyTruncatedFormatter(OpenAIChatFormatter):
+    """The formatter that truncates the messages one group at a time."""
+
+    async def _truncate(self, msgs: list[Msg]) -> list[Msg]:
+        """Use the default truncation strategy."""
+        return await super()._truncate(msgs)
+
+
+class TruncationTest(IsolatedAsyncioTestCase):
+    """The truncation unittests."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test environment."""
+        self.msgs = [Msg("system", "You're a helpful assistant.", "system")]
+        for i in range(50):
+            self.msgs.append(Msg("user", f"Question {i}" + "x" * i, "user"))
+            self.msgs.append(
+                Msg(
+                    "assistant",
+                    [
+                        ToolUseBlock(
+                            type="tool_use",
+                            id=str(i),
+                            name="search",
+                            input={"query": str(i)},
+                        ),
+                    ],
+                    "assistant",
+                ),
+            )
+            self.msgs.append(
+                Msg(
+                    "system",
+                    [
+                        ToolResultBlock(
+                            type="tool_result",
+                            id=str(i),
+                            name="search",
+                            output="y" * i,
+                        ),
+                    ],
+                    "system",
+                ),
+            )
+
+    async def test_truncation(self) -> None:
+        """Test the truncation matches the one-group-at-a-time strategy with
+        fewer counting passes."""
+        for max_tokens in [500, 3000, 10000, 100000]:
+            counter = CharTokenCounter()
+            res = await OpenAIChatFormatter(
+                token_counter=counter,
+                max_tokens=max_tokens,
+            ).format(self.msgs)
+
+            legacy_counter = CharTokenCounter()
+            legacy_res = await LegacyTruncatedFormatter(
+                token_counter=legacy_counter,
+                max_tokens=max_tokens,
+            ).format(self.msgs)
+
+            self.assertListEqual(res, legacy_res)
+            self.assertEqual(res[0]["role"], "system")
+            self.assertLessEqual(len(json.dumps(res)), max_tokens)
+            self.assertLessEqual(counter.n_calls, 10)
+
+            # The tool call is kept together with its result
+            self.assertNotEqual(res[1]["role"], "tool")
+
+    async def test_truncation_errors(self) -> None:
+        """Test the truncation errors."""
+        formatter = OpenAIChatFormatter(
+            token_counter=CharTokenCounter(),
+            max_tokens=10,
+        )
+        with self.assertRaises(ValueError):
+            await formatter.format(self.msgs)
+
+        # The tool call without result
+        with self.assertRaises(ValueError):
+            await formatter.format(self.msgs[1:3])
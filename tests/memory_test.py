@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""The memory module tests."""
+import os
+from unittest import IsolatedAsyncioTestCase
+
+from agentscope.memory import InMemoryMemory, SQLiteMemory
+from agentscope.message import Msg
+
+
+class InMemoryMemoryTest(IsolatedAsyncioTestCase):
+    """Test cases for the in-memory memory."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        self.msgs = [Msg("user", str(i), "user") for i in range(10)]
+
+    async def _check_consistency(self, indexed: bool) -> None:
+        """Apply the same operations to both modes and compare results."""
+        memory = InMemoryMemory(indexed=indexed, compact_ratio=0.9)
+        await memory.add(self.msgs)
+        await memory.add(self.msgs[:3])
+        self.assertEqual(await memory.size(), 10)
+
+        await memory.delete([1, 3])
+        await memory.delete(0)
+        await memory.delete_by_id([self.msgs[9].id, "non-existent"])
+        self.assertEqual(
+            [_.content for _ in await memory.iter_memory(1, -1)],
+            ["4", "5", "6", "7"],
+        )
+        self.assertEqual(
+            [_.content for _ in await memory.iter_memory(-2)],
+            ["7", "8"],
+        )
+        self.assertEqual(await memory.size(), 6)
+        self.assertIsNone(await memory.get_by_id(self.msgs[3].id))
+        self.assertEqual(
+            (await memory.get_by_id(self.msgs[5].id)).content,
+            "5",
+        )
+
+        with self.assertRaises(IndexError):
+            await memory.delete(6)
+
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory()],
+            ["2", "4", "5", "6", "7", "8"],
+        )
+
+    async def test_in_memory_memory(self) -> None:
+        """Test the default mode of the in-memory memory."""
+        await self._check_consistency(indexed=False)
+
+    async def test_indexed_in_memory_memory(self) -> None:
+        """Test the indexed mode of the in-memory memory."""
+        await self._check_consistency(indexed=True)
+
+        memory = InMemoryMemory(indexed=True)
+        await memory.add(self.msgs)
+        await memory.add(self.msgs[0], allow_duplicates=True)
+        await memory.delete(0)
+        self.assertEqual(
+            (await memory.get_by_id(self.msgs[0].id)).content,
+            "0",
+        )
+        self.assertEqual(await memory.size(), 10)
+
+        # Exceed the compact ratio
+        await memory.delete(list(range(6)))
+        # pylint: disable-next=protected-access
+        self.assertListEqual(memory._tombstones, [])
+        self.assertListEqual(
+            [_.content for _ in memory.content],
+            ["7", "8", "9", "0"],
+        )
+
+        new_memory = InMemoryMemory(indexed=True)
+        new_memory.load_state_dict(memory.state_dict())
+        self.assertEqual(
+            (await new_memory.get_by_id(self.msgs[7].id)).content,
+            "7",
+        )
+
+
+class SQLiteMemoryTest(IsolatedAsyncioTestCase):
+    """Test cases for the SQLite memory."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        self.db_path = "./memory_test.db"
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+    async def test_sqlite_memory(self) -> None:
+        """Test the SQLite memory."""
+        memory = SQLiteMemory(self.db_path, window_size=3, page_size=2)
+        msgs = [Msg("user", str(i), "user") for i in range(10)]
+        await memory.add(msgs[:6])
+        await memory.add(msgs)
+        self.assertEqual(await memory.size(), 10)
+        # pylint: disable-next=protected-access
+        self.assertEqual(len(memory._window), 3)
+
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory()],
+            [str(i) for i in range(10)],
+        )
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory(recent_n=5)],
+            ["5", "6", "7", "8", "9"],
+        )
+
+        await memory.delete([0, 8])
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory()],
+            ["1", "2", "3", "4", "5", "6", "7", "9"],
+        )
+
+        state = memory.state_dict()
+        self.assertDictEqual(
+            state,
+            {
+                "db_path": self.db_path,
+                "memory_id": "default",
+                "cursor": 10,
+                "segments": [[2, 8], [10, 10]],
+            },
+        )
+
+        await memory.add(Msg("user", "10", "user"))
+        memory.close()
+
+        # Restore from the state pointer
+        new_memory = SQLiteMemory(self.db_path)
+        self.assertEqual(await new_memory.size(), 9)
+        new_memory.load_state_dict(state)
+        self.assertListEqual(
+            [_.content for _ in await new_memory.get_memory()],
+            ["1", "2", "3", "4", "5", "6", "7", "9"],
+        )
+
+        await new_memory.clear()
+        self.assertListEqual(await new_memory.get_memory(), [])
+        new_memory.close()
+
+    async def test_checkpoints(self) -> None:
+        """Test restoring the checkpoints keeps the messages of the other
+        checkpoints, and the seqs are not reused after clearing."""
+        memory = SQLiteMemory(self.db_path, window_size=2)
+        await memory.add([Msg("user", str(i), "user") for i in range(3)])
+        old_state = memory.state_dict()
+        await memory.add([Msg("user", str(i), "user") for i in range(3, 5)])
+        new_state = memory.state_dict()
+
+        # Rewind to the old checkpoint and branch off
+        memory.load_state_dict(old_state)
+        await memory.add(Msg("user", "a", "user"))
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory()],
+            ["0", "1", "2", "a"],
+        )
+
+        # The newer checkpoint is still restorable
+        other_memory = SQLiteMemory(self.db_path)
+        other_memory.load_state_dict(new_state)
+        self.assertListEqual(
+            [_.content for _ in await other_memory.get_memory()],
+            ["0", "1", "2", "3", "4"],
+        )
+        other_memory.close()
+
+        # The checkpoints don't take the messages added after clearing
+        await memory.clear()
+        await memory.add(Msg("user", "b", "user"))
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory()],
+            ["b"],
+        )
+        memory.load_state_dict(old_state)
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory()],
+            ["0", "1", "2"],
+        )
+        memory.close()
+
+    async def test_large_batch(self) -> None:
+        """Test adding a batch beyond the limit of the bound variables of
+        SQLite, where the duplicates are still skipped."""
+        memory = SQLiteMemory(self.db_path, window_size=10)
+        msgs = [Msg("user", str(i), "user") for i in range(2500)]
+        await memory.add(msgs[:1000])
+        await memory.add(msgs)
+        self.assertEqual(await memory.size(), 2500)
+        self.assertListEqual(
+            [_.content for _ in await memory.get_memory(recent_n=3)],
+            ["2497", "2498", "2499"],
+        )
+        memory.close()
+
+    async def asyncTearDown(self) -> None:
+        """Clean up after the test."""
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
@@ -5,8 +5,9 @@ from unittest.async_case import IsolatedAsyncioTestCase
 from unittest.mock import Mock, patch, AsyncMock
 from pydantic import BaseModel
 
+from agentscope.formatter import AnthropicChatFormatter
 from agentscope.model import AnthropicChatModel, ChatResponse
-from agentscope.message import TextBlock, ToolUseBlock, ThinkingBlock
+from agentscope.message import Msg, TextBlock, ToolUseBlock, ThinkingBlock
 
 
 class SampleModel(BaseModel):
@@ -27,6 +28,12 @@ class AnthropicMessageMock:
         usage_mock = Mock()
         usage_mock.input_tokens = usage_data.get("input_tokens", 0)
         usage_mock.output_tokens = usage_data.get("output_tokens", 0)
+        usage_mock.cache_read_input_tokens = usage_data.get(
+            "cache_read_input_tokens",
+        )
+        usage_mock.cache_creation_input_tokens = usage_data.get(
+            "cache_creation_input_tokens",
+        )
         return usage_mock
 
 
@@ -273,6 +280,118 @@ class TestAnthropicChatModel(IsolatedAsyncioTestCase):
             ]
             self.assertEqual(result.content, expected_content)
 
+    async def test_call_with_prompt_cache(self) -> None:
+        """Test the tool schemas breakpoint and the cached tokens usage."""
+        with patch("anthropic.AsyncAnthropic") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client_class.return_value = mock_client
+
+            model = AnthropicChatModel(
+                model_name="claude-3-sonnet-20240229",
+                api_key="test_key",
+                stream=False,
+                cache_tools=True,
+            )
+            model.client = mock_client
+
+            tools = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": name,
+                        "description": f"Tool {name}",
+                        "parameters": {"type": "object"},
+                    },
+                }
+                for name in ["search", "get_weather"]
+            ]
+            mock_response = AnthropicMessageMock(
+                content=[AnthropicContentBlockMock("text", text="Sunny")],
+                usage={
+                    "input_tokens": 5,
+                    "output_tokens": 2,
+                    "cache_read_input_tokens": 1024,
+                    "cache_creation_input_tokens": 16,
+                },
+            )
+            mock_client.messages.create = AsyncMock(return_value=mock_response)
+            result = await model(
+                [{"role": "user", "content": "What's the weather?"}],
+                tools=tools,
+            )
+
+            call_args = mock_client.messages.create.call_args[1]
+            self.assertEqual(
+                call_args["tools"],
+                [
+                    {
+                        "name": "search",
+                        "description": "Tool search",
+                        "input_schema": {"type": "object"},
+                    },
+                    {
+                        "name": "get_weather",
+                        "description": "Tool get_weather",
+                        "input_schema": {"type": "object"},
+                        "cache_control": {"type": "ephemeral"},
+                    },
+                ],
+            )
+            self.assertEqual(result.usage.cached_tokens, 1024)
+            self.assertEqual(result.usage.cache_creation_tokens, 16)
+
+    async def test_prompt_cache_breakpoints_limit(self) -> None:
+        """Test the breakpoints of the formatter and the tool schemas are
+        limited together."""
+        with patch("anthropic.AsyncAnthropic") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client_class.return_value = mock_client
+            mock_client.messages.create = AsyncMock(
+                return_value=AnthropicMessageMock(
+                    content=[AnthropicContentBlockMock("text", text="Hi")],
+                ),
+            )
+            model = AnthropicChatModel(
+                model_name="claude-3-sonnet-20240229",
+                api_key="test_key",
+                stream=False,
+                cache_tools=True,
+            )
+            model.client = mock_client
+
+            msgs = [
+                Msg("system", "You're a helpful assistant.", "system"),
+                *[Msg("user", str(i), "user") for i in range(4)],
+            ]
+            tools = [
+                {
+                    "type": "function",
+                    "function": {
+                        "name": "search",
+                        "description": "Tool search",
+                        "parameters": {"type": "object"},
+                    },
+                },
+            ]
+
+            # 1 + 3 breakpoints in the messages and 1 in the tool schemas
+            formatter = AnthropicChatFormatter(
+                cache_system_prompt=True,
+                cache_last_n_messages=3,
+            )
+            with self.assertRaises(ValueError):
+                await model(await formatter.format(msgs), tools=tools)
+            mock_client.messages.create.assert_not_called()
+
+            # Within the limit, or without tools
+            await model(await formatter.format(msgs))
+            formatter = AnthropicChatFormatter(
+                cache_system_prompt=True,
+                cache_last_n_messages=2,
+            )
+            await model(await formatter.format(msgs), tools=tools)
+            self.assertEqual(mock_client.messages.create.call_count, 2)
+
     async def test_streaming_response_processing(self) -> None:
         """Test processing of streaming response."""
         with patch("anthropic.AsyncAnthropic") as mock_client_class:
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the batch inference of the chat models."""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from pydantic import BaseModel
+
+from agentscope.message import TextBlock
+from agentscope.model import (
+    ChatModelBase,
+    ChatResponse,
+    DashScopeChatModel,
+    OpenAIChatModel,
+)
+from agentscope.model._model_usage import ChatUsage
+
+
+class Answer(BaseModel):
+    """The structured output."""
+
+    answer: str
+
+
+class FlakyModel(ChatModelBase):
+    """The model that echoes the prompts, and fails on the prompts starting
+    with "flaky" for the first time and the prompts starting with "fail"."""
+
+    def __init__(self) -> None:
+        """Initialize the test model."""
+        super().__init__("test_model", stream=False)
+        self.running = 0
+        self.max_running = 0
+        self.n_calls: dict[str, int] = {}
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        **kwargs: Any,
+    ) -> ChatResponse:
+        """Echo the prompt."""
+        prompt = messages[-1]["content"]
+        self.n_calls[prompt] = self.n_calls.get(prompt, 0) + 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.running -= 1
+
+        if prompt.startswith("fail") or (
+            prompt.startswith("flaky") and self.n_calls[prompt] == 1
+        ):
+            raise RuntimeError(f"Failed on {prompt}")
+        return ChatResponse(
+            content=[TextBlock(type="text", text=prompt)],
+            usage=ChatUsage(input_tokens=1, output_tokens=2, time=0.01),
+        )
+
+
+class BatchAPIHandler(BaseHTTPRequestHandler):
+    """The stub of the OpenAI Batch API, which echoes the last user message
+    and fails the requests whose message is "fail"."""
+
+    files: dict[str, str] = {}
+    batches: dict[str, dict] = {}
+
+    def _send_json(self, data: Any) -> None:
+        """Send the JSON response."""
+        self._send(json.dumps(data).encode("utf-8"), "application/json")
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        """Send the response body."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _batch(self, batch_id: str) -> dict:
+        """The batch object, which is completed on the second retrieval."""
+        batch = self.batches[batch_id]
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": batch["input_file_id"],
+            "completion_window": "24h",
+            "created_at": 0,
+            "status": "completed" if batch["n_polls"] > 1 else "in_progress",
+            "output_file_id": f"{batch_id}-output"
+            if batch["n_polls"] > 1
+            else None,
+            "error_file_id": f"{batch_id}-error"
+            if batch["n_polls"] > 1
+            else None,
+        }
+
+    def _run_batch(self, batch_id: str) -> None:
+        """Run the requests of the batch, and write the output and error
+        files."""
+        output, error = [], []
+        input_file_id = self.batches[batch_id]["input_file_id"]
+        for line in self.files[input_file_id].splitlines():
+            request = json.loads(line)
+            text = request["body"]["messages"][-1]["content"]
+            if text == "fail":
+                error.append(
+                    {
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 400,
+                            "body": {"error": {"message": "Bad request"}},
+                        },
+                    },
+                )
+                continue
+            if "response_format" in request["body"]:
+                text = json.dumps({"answer": text})
+            output.append(
+                {
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "id": "chatcmpl-1",
+                            "object": "chat.completion",
+                            "created": 0,
+                            "model": request["body"]["model"],
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "finish_reason": "stop",
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": text,
+                                    },
+                                },
+                            ],
+                            "usage": {
+                                "prompt_tokens": 3,
+                                "completion_tokens": 5,
+                                "total_tokens": 8,
+                            },
+                        },
+                    },
+                },
+            )
+        # Write the output in the reverse order
+        self.files[f"{batch_id}-output"] = "\n".join(
+            json.dumps(_) for _ in reversed(output)
+        )
+        self.files[f"{batch_id}-error"] = "\n".join(
+            json.dumps(_) for _ in error
+        )
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Handle the file uploading and the batch creation."""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            # Extract the JSONL content from the multipart body
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = "\n".join(
+                _
+                for _ in body.decode("utf-8").splitlines()
+                if _.startswith('{"custom_id"')
+            )
+            self._send_json(
+                {
+                    "id": file_id,
+                    "object": "file",
+                    "bytes": len(body),
+                    "created_at": 0,
+                    "filename": "batch.jsonl",
+                    "purpose": "batch",
+                    "status": "processed",
+                },
+            )
+        elif self.path == "/v1/batches":
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "input_file_id": json.loads(body)["input_file_id"],
+                "n_polls": 0,
+            }
+            self._run_batch(batch_id)
+            self._send_json(self._batch(batch_id))
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Handle the batch retrieval and the file content downloading."""
+        parts = self.path.strip("/").split("/")
+        if parts[1] == "batches":
+            self.batches[parts[2]]["n_polls"] += 1
+            self._send_json(self._batch(parts[2]))
+        elif parts[1] == "files":
+            self._send(
+                self.files[parts[2]].encode("utf-8"),
+                "application/octet-stream",
+            )
+
+    def log_message(self, *args: object) -> None:
+        """Disable the logging."""
+
+
+class ChatModelBatchTest(IsolatedAsyncioTestCase):
+    """The unittests for the batch inference."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the stub server of the batch API."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), BatchAPIHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def test_local_batch(self) -> None:
+        """Test the local batch runs the requests concurrently with retries,
+        and keeps the order of the requests."""
+        model = FlakyModel()
+        prompts = ["a", "flaky", "b", "fail", "c", "d"]
+        res = await model.batch(
+            [[{"role": "user", "content": _}] for _ in prompts],
+            max_concurrency=2,
+            max_retries=1,
+            retry_delay=0.01,
+        )
+
+        self.assertListEqual(
+            [_.content[0]["text"] if _ else None for _ in res.responses],
+            ["a", "flaky", "b", None, "c", "d"],
+        )
+        self.assertIsNone(res.errors[1])
+        self.assertIn("Failed on fail", res.errors[3])
+        self.assertEqual(model.n_calls["flaky"], 2)
+        self.assertEqual(model.n_calls["fail"], 2)
+        self.assertEqual(model.max_running, 2)
+        self.assertEqual(res.usage.input_tokens, 5)
+        self.assertEqual(res.usage.output_tokens, 10)
+
+        with self.assertRaises(ValueError):
+            await model.batch([], mode="remote")
+
+    async def test_unsupported_provider_batch(self) -> None:
+        """Test the provider mode is rejected up front for the models without
+        the provider batch API."""
+        model = FlakyModel()
+        with self.assertRaisesRegex(ValueError, "FlakyModel doesn't support"):
+            await model.batch(
+                [[{"role": "user", "content": "a"}]],
+                mode="provider",
+            )
+        self.assertDictEqual(model.n_calls, {})
+
+        model = DashScopeChatModel("qwen-max", api_key="test_key")
+        self.assertFalse(model.supports_provider_batch)
+        with self.assertRaises(ValueError):
+            await model.batch(
+                [[{"role": "user", "content": "a"}]],
+                mode="provider",
+            )
+        self.assertTrue(OpenAIChatModel.supports_provider_batch)
+
+    async def test_provider_batch(self) -> None:
+        """Test the OpenAI batch API is polled until the job is done, and the
+        results are returned in the order of the requests."""
+        model = OpenAIChatModel(
+            "gpt-4o",
+            api_key="test_key",
+            stream=True,
+            client_args={"base_url": self.base_url},
+        )
+        prompts = [
+            [{"role": "user", "content": _}] for _ in ["a", "fail", "b"]
+        ]
+        res = await model.batch(prompts, mode="provider", poll_interval=0.01)
+
+        self.assertListEqual(
+            [_.content if _ else None for _ in res.responses],
+            [
+                [TextBlock(type="text", text="a")],
+                None,
+                [TextBlock(type="text", text="b")],
+            ],
+        )
+        self.assertIsNone(res.errors[0])
+        self.assertIn("Bad request", res.errors[1])
+        self.assertEqual(res.usage.input_tokens, 6)
+        self.assertEqual(res.usage.output_tokens, 10)
+        self.assertEqual(res.metadata["status"], "completed")
+
+        # The structured output
+        res = await model.batch(
+            prompts[:1],
+            mode="provider",
+            poll_interval=0.01,
+            structured_model=Answer,
+        )
+        self.assertDictEqual(res.responses[0].metadata, {"answer": "a"})
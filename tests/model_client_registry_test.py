@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the registry of the shared SDK clients."""
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import patch
+
+from agentscope.embedding import OpenAITextEmbedding
+from agentscope.model import OpenAIChatModel, get_client_registry
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """The stub of the OpenAI chat completions API, which records the client
+    addresses of the connections."""
+
+    protocol_version = "HTTP/1.1"
+    addresses: set = set()
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Handle the chat completion request."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        CompletionHandler.addresses.add(self.client_address)
+        body = json.dumps(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "ok"},
+                    },
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                },
+            },
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Disable the logging."""
+
+
+class ClientRegistryTest(TestCase):
+    """The unittests for the client registry."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the stub server."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        """Reset the recorded connections."""
+        CompletionHandler.addresses = set()
+
+    def _create_model(
+        self,
+        shared: bool,
+        api_key: str = "key",
+    ) -> OpenAIChatModel:
+        """Create the model calling the stub server."""
+        return OpenAIChatModel(
+            "gpt-4o",
+            api_key=api_key,
+            stream=False,
+            client_args={"base_url": self.base_url},
+            shared_client=shared,
+        )
+
+    def test_shared_clients(self) -> None:
+        """Test the instances with the same key share the client."""
+        models = [self._create_model(True) for _ in range(3)]
+        self.assertIs(models[0].client, models[1].client)
+        self.assertIs(models[0].client, models[2].client)
+        self.assertIsNot(
+            self._create_model(True, "another_key").client,
+            models[0].client,
+        )
+        self.assertIsNot(self._create_model(False).client, models[0].client)
+
+        embedding = OpenAITextEmbedding(
+            "key",
+            "text-embedding-3-small",
+            shared_client=True,
+            base_url=self.base_url,
+        )
+        self.assertIs(embedding.client, models[0].client)
+
+    def test_connection_reuse(self) -> None:
+        """Test the models created per request reuse the connections, and the
+        shared clients work across the event loops."""
+
+        async def _run(shared: bool) -> None:
+            for _ in range(5):
+                res = await self._create_model(shared)(
+                    [{"role": "user", "content": "hi"}],
+                )
+                self.assertEqual(res.content[0]["text"], "ok")
+
+        asyncio.run(_run(False))
+        self.assertEqual(len(CompletionHandler.addresses), 5)
+
+        CompletionHandler.addresses = set()
+        asyncio.run(_run(True))
+        self.assertEqual(len(CompletionHandler.addresses), 1)
+        # A new connection pool in the new event loop
+        asyncio.run(_run(True))
+        self.assertEqual(len(CompletionHandler.addresses), 2)
+
+        # The shared clients are closed and removed
+        registry = get_client_registry()
+        client = self._create_model(True).client
+        asyncio.run(registry.close_all())
+        self.assertEqual(len(registry), 0)
+        self.assertIsNot(self._create_model(True).client, client)
+
+    def test_proxy_environment(self) -> None:
+        """Test the shared clients follow the proxy environment variables."""
+        proxy = self.base_url.rsplit("/", 1)[0]
+        with patch.dict(os.environ, {"HTTP_PROXY": proxy, "NO_PROXY": ""}):
+            model = OpenAIChatModel(
+                "gpt-4o",
+                api_key="proxy_key",
+                stream=False,
+                # Only reachable through the stub server as the proxy
+                client_args={"base_url": "http://proxied.invalid/v1"},
+                shared_client=True,
+            )
+        res = asyncio.run(model([{"role": "user", "content": "hi"}]))
+        self.assertEqual(res.content[0]["text"], "ok")
+        self.assertEqual(len(CompletionHandler.addresses), 1)
+
+    def test_own_http_client(self) -> None:
+        """Test the shared clients reject the given HTTP clients."""
+        with self.assertRaises(ValueError):
+            OpenAIChatModel(
+                "gpt-4o",
+                api_key="key",
+                client_args={"http_client": object()},
+                shared_client=True,
+            )
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 """Unit tests for DashScope API model class."""
+import asyncio
+import time
 from typing import Any, AsyncGenerator
 from unittest.async_case import IsolatedAsyncioTestCase
 from unittest.mock import Mock, patch
@@ -326,6 +328,55 @@ class TestDashScopeChatModel(IsolatedAsyncioTestCase):
             ]
             self.assertEqual(final_response.content, expected_content)
 
+    async def test_parallel_vision_calls(self) -> None:
+        """Test the parallel calls of the vision models overlap instead of
+        blocking the event loop, with both the async SDK and the
+        synchronous SDK in the executor."""
+        messages = [{"role": "user", "content": [{"text": "Describe it"}]}]
+
+        async def _async_call(**kwargs: Any) -> Mock:
+            await asyncio.sleep(0.2)
+            return self._create_mock_response(kwargs["model"])
+
+        def _sync_call(**kwargs: Any) -> Any:
+            time.sleep(0.2)
+            if kwargs["stream"]:
+                return iter([self._create_mock_chunk(content=kwargs["model"])])
+            return self._create_mock_response(kwargs["model"])
+
+        for use_async_sdk, stream in [
+            (True, False),
+            (False, False),
+            (False, True),
+        ]:
+            model = DashScopeChatModel(
+                model_name="qwen-vl-max",
+                api_key="test_key",
+                stream=stream,
+            )
+            with patch(
+                "dashscope.AioMultiModalConversation",
+                new=Mock(call=_async_call) if use_async_sdk else None,
+            ), patch(
+                "dashscope.MultiModalConversation.call",
+                side_effect=_sync_call,
+            ):
+                start = time.monotonic()
+                results = await asyncio.gather(
+                    *[model(messages) for _ in range(5)],
+                )
+                if stream:
+                    results = [[_ async for _ in res][-1] for res in results]
+                elapsed = time.monotonic() - start
+
+            # Five calls of 0.2 seconds take 1 second if serialized
+            self.assertLess(elapsed, 0.6)
+            for res in results:
+                self.assertEqual(
+                    res.content,
+                    [TextBlock(type="text", text="qwen-vl-max")],
+                )
+
     def test_tools_schema_validation_through_api(self) -> None:
         """Test tools schema validation through API call."""
         model = DashScopeChatModel(
@@ -356,8 +407,6 @@ class TestDashScopeChatModel(IsolatedAsyncioTestCase):
 
             # Should not throw an exception
             try:
-                import asyncio
-
                 loop = asyncio.get_event_loop()
                 if loop.is_running():
                     # If event loop is already running, create a task
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the hedged chat model."""
+import asyncio
+from typing import Any, AsyncGenerator
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from agentscope.message import TextBlock
+from agentscope.model import ChatModelBase, ChatResponse, HedgedChatModel
+
+
+class ScriptedModel(ChatModelBase):
+    """The model whose calls follow the scripted delays before the first
+    token, where a `None` delay raises an error."""
+
+    def __init__(self, name: str, delays: list, stream: bool) -> None:
+        """Initialize the test model."""
+        super().__init__(name, stream)
+        self.delays = delays
+        self.n_calls = 0
+        self.n_cancelled = 0
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        **kwargs: Any,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Respond after the scripted delay."""
+        delay = self.delays[min(self.n_calls, len(self.delays) - 1)]
+        self.n_calls += 1
+        text = f"{self.model_name}#{self.n_calls}"
+
+        if not self.stream:
+            await self._wait(delay)
+            return ChatResponse(content=[TextBlock(type="text", text=text)])
+
+        async def _generator() -> AsyncGenerator[ChatResponse, None]:
+            await self._wait(delay)
+            for i in range(1, len(text) + 1):
+                yield ChatResponse(
+                    content=[TextBlock(type="text", text=text[:i])],
+                )
+
+        return _generator()
+
+    async def _wait(self, delay: float | None) -> None:
+        """Sleep for the delay, and count the cancellations."""
+        if delay is None:
+            raise RuntimeError(f"{self.model_name} is unavailable")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.n_cancelled += 1
+            raise
+
+
+class HedgedChatModelTest(IsolatedAsyncioTestCase):
+    """The unittests for the hedged chat model."""
+
+    async def test_hedging(self) -> None:
+        """Test the slow primary leg is hedged to the secondary model and
+        cancelled."""
+        for stream in [False, True]:
+            primary = ScriptedModel("primary", [1.0], stream)
+            secondary = ScriptedModel("secondary", [0.01], stream)
+            model = HedgedChatModel([primary, secondary], hedge_delay=0.05)
+
+            res = await model([{"role": "user", "content": "hi"}])
+            if stream:
+                chunks = [_ async for _ in res]
+                self.assertTrue(
+                    all(_.metadata["hedge"]["leg"] == 1 for _ in chunks),
+                )
+                res = chunks[-1]
+
+            self.assertEqual(res.content[0]["text"], "secondary#1")
+            self.assertEqual(res.metadata["hedge"]["model_name"], "secondary")
+            self.assertEqual(res.metadata["hedge"]["n_legs"], 2)
+            self.assertEqual(primary.n_cancelled, 1)
+            # The cancelled leg is observed at least at the deadline
+            # pylint: disable-next=protected-access
+            self.assertGreaterEqual(model._latencies[0][0], 0.05)
+
+    async def test_fast_primary(self) -> None:
+        """Test the fast primary leg is not hedged, and the observed
+        latencies make the percentile deadline."""
+        primary = ScriptedModel("primary", [0.01], False)
+        model = HedgedChatModel([primary], hedge_delay=1.0, min_samples=3)
+        self.assertEqual(model.get_hedge_delay(), 1.0)
+
+        for _ in range(3):
+            res = await model([{"role": "user", "content": "hi"}])
+            self.assertEqual(res.metadata["hedge"]["leg"], 0)
+        self.assertEqual(primary.n_calls, 3)
+        self.assertLess(model.get_hedge_delay(), 0.5)
+
+        # Hedge to the same model when the latency exceeds the deadline
+        primary.delays = [1.0, 0.01]
+        primary.n_calls = 0
+        res = await model([{"role": "user", "content": "hi"}])
+        self.assertEqual(res.content[0]["text"], "primary#2")
+        self.assertEqual(primary.n_cancelled, 1)
+
+    async def test_failover(self) -> None:
+        """Test the failed legs fail over to the next model, and the error is
+        raised if all the legs fail."""
+        for stream in [False, True]:
+            primary = ScriptedModel("primary", [None], stream)
+            secondary = ScriptedModel("secondary", [0.01], stream)
+            model = HedgedChatModel(
+                [primary, secondary],
+                hedge=False,
+            )
+            res = await model([{"role": "user", "content": "hi"}])
+            if stream:
+                res = [_ async for _ in res][-1]
+            self.assertEqual(res.content[0]["text"], "secondary#1")
+            self.assertEqual(res.metadata["hedge"]["n_failed"], 1)
+
+            secondary.delays = [None]
+            with self.assertRaises(RuntimeError):
+                await model([{"role": "user", "content": "hi"}])
+
+        with self.assertRaises(ValueError):
+            HedgedChatModel(
+                [
+                    ScriptedModel("primary", [0.01], True),
+                    ScriptedModel("secondary", [0.01], False),
+                ],
+            )
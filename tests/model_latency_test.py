@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the latency instrumentation of the streaming chat
+responses."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from agentscope.model import (
+    LatencyAggregator,
+    LatencyHistogram,
+    OpenAIChatModel,
+    get_latency_aggregator,
+)
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """The stub of the OpenAI chat completions API, which streams three
+    chunks with the given delays and a usage chunk."""
+
+    first_delay = 0.2
+    interval = 0.1
+
+    def _send_event(self, data: dict | str) -> None:
+        """Send a server-sent event."""
+        if isinstance(data, dict):
+            data = json.dumps(data)
+        self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """Handle the streaming chat completion request."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        chunk = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o",
+        }
+        time.sleep(self.first_delay)
+        for index, text in enumerate(["Hel", "lo", "!"]):
+            if index:
+                time.sleep(self.interval)
+            self._send_event(
+                {
+                    **chunk,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": text},
+                            "finish_reason": "stop" if index == 2 else None,
+                        },
+                    ],
+                },
+            )
+        self._send_event(
+            {
+                **chunk,
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": 3,
+                    "completion_tokens": 6,
+                    "total_tokens": 9,
+                },
+            },
+        )
+        self._send_event("[DONE]")
+
+    def log_message(self, *args: object) -> None:
+        """Disable the logging."""
+
+
+class StreamLatencyTest(IsolatedAsyncioTestCase):
+    """The unittests for the latency metrics of the streaming responses."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the stub server."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StreamHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/v1"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        """Reset the histograms."""
+        get_latency_aggregator().reset()
+
+    async def test_stream_latency(self) -> None:
+        """Test the latency metrics are recorded into the usage and the
+        aggregator."""
+        model = OpenAIChatModel(
+            "gpt-4o",
+            api_key="test_key",
+            stream=True,
+            client_args={"base_url": self.base_url},
+        )
+        last_chunk = None
+        async for chunk in await model([{"role": "user", "content": "hi"}]):
+            last_chunk = chunk
+
+        usage = last_chunk.usage
+        self.assertEqual(last_chunk.content[0]["text"], "Hello!")
+        self.assertGreaterEqual(usage.time_to_first_token, 0.2)
+        self.assertLess(usage.time_to_first_token, usage.time)
+        self.assertGreaterEqual(usage.mean_chunk_interval, 0.09)
+        self.assertGreaterEqual(
+            usage.max_chunk_interval,
+            usage.mean_chunk_interval,
+        )
+        # 6 output tokens within the two intervals after the first chunk
+        self.assertAlmostEqual(
+            usage.tokens_per_second,
+            6 / (usage.mean_chunk_interval * 2),
+        )
+
+        aggregator = get_latency_aggregator()
+        self.assertEqual(
+            aggregator.get_histogram("gpt-4o", "time_to_first_token").count,
+            1,
+        )
+        self.assertEqual(
+            aggregator.get_histogram("gpt-4o", "chunk_interval").count,
+            2,
+        )
+        self.assertEqual(aggregator.get_histogram("gpt-4o", "time").count, 1)
+
+
+class LatencyAggregatorTest(TestCase):
+    """The unittests for the histograms and their export."""
+
+    def test_histogram(self) -> None:
+        """Test the bucket counts and the quantile estimation."""
+        histogram = LatencyHistogram([0.1, 0.5, 1.0])
+        for value in [0.05, 0.1, 0.3, 0.4, 2.0]:
+            histogram.observe(value)
+
+        self.assertListEqual(histogram.counts, [2, 2, 0, 1])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.sum, 2.85)
+        # The 3rd of the 5 values is in the (0.1, 0.5] bucket
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.2)
+        # The values in the overflow bucket are estimated by the largest bound
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertIsNone(LatencyHistogram([1.0]).quantile(0.5))
+
+    def test_export(self) -> None:
+        """Test the export as JSON and in the Prometheus text format."""
+        aggregator = LatencyAggregator(time_buckets=[0.1, 1.0])
+        aggregator.record(
+            'model "a"',
+            time_to_first_token=0.5,
+            chunk_intervals=[0.05, 0.05, 0.2],
+            tokens_per_second=30.0,
+        )
+
+        data = json.loads(aggregator.to_json())
+        ttft = data['model "a"']["time_to_first_token"]
+        self.assertDictEqual(
+            ttft["buckets"],
+            {"0.1": 0, "1.0": 1, "+Inf": 1},
+        )
+        self.assertEqual(data['model "a"']["chunk_interval"]["count"], 3)
+        self.assertNotIn("time", data['model "a"'])
+
+        text = aggregator.to_prometheus()
+        self.assertIn(
+            "# TYPE agentscope_model_time_to_first_token_seconds histogram",
+            text,
+        )
+        self.assertIn(
+            'agentscope_model_chunk_interval_seconds_bucket{model="model '
+            '\\"a\\"",le="0.1"} 2',
+            text,
+        )
+        self.assertIn(
+            'agentscope_model_tokens_per_second_count{model="model \\"a\\""}'
+            " 1",
+            text,
+        )
+
+        aggregator.reset()
+        self.assertEqual(aggregator.to_prometheus(), "")
+        self.assertDictEqual(aggregator.to_dict(), {})
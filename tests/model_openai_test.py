@@ -87,6 +87,11 @@ class TestOpenAIChatModel(IsolatedAsyncioTestCase):
                 TextBlock(type="text", text="Hello! How can I help you?"),
             ]
             self.assertEqual(result.content, expected_content)
+            self.assertEqual(result.usage.cached_tokens, 0)
+
+            mock_response.usage.prompt_tokens_details.cached_tokens = 8
+            result = await model(messages)
+            self.assertEqual(result.usage.cached_tokens, 8)
 
     async def test_call_with_tools_integration(self) -> None:
         """Test full integration of tool calls."""
@@ -249,6 +254,170 @@ class TestOpenAIChatModel(IsolatedAsyncioTestCase):
             expected_content = [TextBlock(type="text", text="Hello there!")]
             self.assertEqual(final_response.content, expected_content)
 
+    async def test_streaming_tool_call_arguments(self) -> None:
+        """Test the tool call arguments are parsed incrementally, and the
+        invalid arguments are repaired at the end."""
+        with patch("openai.AsyncClient") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client_class.return_value = mock_client
+
+            model = OpenAIChatModel(
+                model_name="gpt-4",
+                api_key="test_key",
+                stream=True,
+            )
+            model.client = mock_client
+
+            cases: list[tuple[list[str], list[dict]]] = [
+                (
+                    ['{"path": "a.txt", ', '"content": "Hel', 'lo"}'],
+                    [
+                        {"path": "a.txt"},
+                        {"path": "a.txt", "content": "Hel"},
+                        {"path": "a.txt", "content": "Hello"},
+                    ],
+                ),
+                (
+                    ["{'path': ", "'a.txt'}"],
+                    [{}, {"path": "a.txt"}],
+                ),
+            ]
+            for pieces, expected_inputs in cases:
+                chunks = [
+                    {
+                        "tool_calls": [
+                            {
+                                "id": "call_1",
+                                "name": "write_text_file",
+                                "arguments": _,
+                            },
+                        ],
+                    }
+                    for _ in pieces
+                ]
+                chunks[-1]["finish_reason"] = "tool_calls"
+                mock_client.chat.completions.create = AsyncMock(
+                    return_value=self._create_stream_mock(chunks),
+                )
+
+                inputs = [
+                    response.content[0]["input"]
+                    async for response in await model(
+                        [{"role": "user", "content": "Write a file"}],
+                    )
+                ]
+                self.assertListEqual(inputs, expected_inputs)
+
+    async def test_streaming_chunk_after_finish(self) -> None:
+        """Test the tool call arguments after the finish reason are
+        ignored."""
+        with patch("openai.AsyncClient") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client_class.return_value = mock_client
+
+            model = OpenAIChatModel(
+                model_name="gpt-4",
+                api_key="test_key",
+                stream=True,
+            )
+            model.client = mock_client
+
+            chunks = [
+                {
+                    "tool_calls": [
+                        {
+                            "id": "call_1",
+                            "name": "write_text_file",
+                            "arguments": _,
+                        },
+                    ],
+                }
+                for _ in ['{"path": "a.txt"}', " "]
+            ]
+            chunks[0]["finish_reason"] = "tool_calls"
+            mock_client.chat.completions.create = AsyncMock(
+                return_value=self._create_stream_mock(chunks),
+            )
+
+            responses = [
+                response
+                async for response in await model(
+                    [{"role": "user", "content": "Write a file"}],
+                )
+            ]
+            self.assertDictEqual(
+                responses[-1].content[0]["input"],
+                {"path": "a.txt"},
+            )
+
+    async def test_streaming_delta_mode(self) -> None:
+        """Test the chunks only carry the deltas in delta mode, and the full
+        content is materialized from the snapshot."""
+        with patch("openai.AsyncClient") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client_class.return_value = mock_client
+
+            model = OpenAIChatModel(
+                model_name="gpt-4",
+                api_key="test_key",
+                stream=True,
+                stream_delta=True,
+            )
+            model.client = mock_client
+
+            chunks = [
+                {"reasoning_content": "Let me "},
+                {"reasoning_content": "think."},
+                {"content": "Hello"},
+                {"content": " there!"},
+                {
+                    "tool_calls": [
+                        {
+                            "id": "call_1",
+                            "name": "search",
+                            "arguments": '{"query": "x"}',
+                        },
+                    ],
+                    "finish_reason": "tool_calls",
+                },
+            ]
+            mock_client.chat.completions.create = AsyncMock(
+                return_value=self._create_stream_mock(chunks),
+            )
+
+            responses = [
+                response
+                async for response in await model(
+                    [{"role": "user", "content": "Hi"}],
+                )
+            ]
+            self.assertListEqual(
+                [response.content for response in responses],
+                [
+                    [ThinkingBlock(type="thinking", thinking="Let me ")],
+                    [ThinkingBlock(type="thinking", thinking="think.")],
+                    [TextBlock(type="text", text="Hello")],
+                    [TextBlock(type="text", text=" there!")],
+                    [],
+                ],
+            )
+
+            snapshot = responses[-1].snapshot
+            self.assertIsNotNone(snapshot)
+            self.assertListEqual(
+                responses[-1].materialize().content,
+                [
+                    ThinkingBlock(type="thinking", thinking="Let me think."),
+                    TextBlock(type="text", text="Hello there!"),
+                    ToolUseBlock(
+                        type="tool_use",
+                        id="call_1",
+                        name="search",
+                        input={"query": "x"},
+                    ),
+                ],
+            )
+
     # Auxiliary methods - ensure all Mock objects have complete attributes
     def _create_mock_response(
         self,
@@ -377,6 +546,7 @@ class TestOpenAIChatModel(IsolatedAsyncioTestCase):
 
                 choice = Mock()
                 choice.delta = delta
+                choice.finish_reason = chunk_data.get("finish_reason")
 
                 chunk = Mock()
                 chunk.choices = [choice]
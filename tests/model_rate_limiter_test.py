@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the shared rate limiter of the chat models."""
+import asyncio
+import gc
+import time
+from typing import Any, AsyncGenerator
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from agentscope.message import TextBlock
+from agentscope.model import ChatModelBase, ChatResponse, RateLimiter
+from agentscope.model._model_usage import ChatUsage
+from agentscope.model._rate_limiter import _is_throttling_error
+
+
+class RateLimitError(Exception):
+    """The fake throttling error."""
+
+    status_code = 429
+
+
+class SlowModel(ChatModelBase):
+    """The model that sleeps before responding, and records the number of
+    the concurrent calls."""
+
+    running = 0
+    max_running = 0
+
+    def __init__(self, api_key: str, throttle: bool = False) -> None:
+        """Initialize the test model."""
+        super().__init__("test_model", stream=False)
+        self.api_key = api_key
+        self.throttle = throttle
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        **kwargs: Any,
+    ) -> ChatResponse:
+        """Sleep and respond."""
+        SlowModel.running += 1
+        SlowModel.max_running = max(SlowModel.max_running, SlowModel.running)
+        try:
+            await asyncio.sleep(0.05)
+            if self.throttle:
+                raise RateLimitError("Too many requests")
+        finally:
+            SlowModel.running -= 1
+        return ChatResponse(
+            content=[TextBlock(type="text", text="ok")],
+            usage=ChatUsage(input_tokens=10, output_tokens=10, time=0.05),
+        )
+
+
+class StreamModel(ChatModelBase):
+    """The model that responds with a stream of two chunks."""
+
+    def __init__(self) -> None:
+        """Initialize the test model."""
+        super().__init__("test_model", stream=True)
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        **kwargs: Any,
+    ) -> AsyncGenerator[ChatResponse, None]:
+        """Respond with a stream."""
+
+        async def _stream() -> AsyncGenerator[ChatResponse, None]:
+            for text in ["o", "ok"]:
+                yield ChatResponse(content=[TextBlock(type="text", text=text)])
+
+        return _stream()
+
+
+class RateLimiterTest(IsolatedAsyncioTestCase):
+    """The unittests for the rate limiter."""
+
+    async def test_fair_queueing(self) -> None:
+        """Test the waiting requests of different owners are dispatched in
+        round-robin order."""
+        limiter = RateLimiter(max_concurrency=1)
+        granted = []
+
+        async def _request(owner: str, index: int) -> None:
+            await limiter.acquire(owner=owner)
+            granted.append(f"{owner}{index}")
+
+        tasks = [
+            asyncio.create_task(_request(owner, index))
+            for owner, index in [
+                ("A", 1),
+                ("A", 2),
+                ("A", 3),
+                ("A", 4),
+                ("B", 1),
+                ("B", 2),
+            ]
+        ]
+        while len(granted) < len(tasks):
+            await asyncio.sleep(0.01)
+            limiter.release()
+        await asyncio.gather(*tasks)
+        self.assertListEqual(granted, ["A1", "A2", "B1", "A3", "B2", "A4"])
+
+    async def test_request_budget(self) -> None:
+        """Test the requests beyond the budget wait for the refill."""
+        limiter = RateLimiter(rpm=3, period=0.3)
+        start = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+            limiter.release()
+        # 3 requests in burst, and 3 more at 10 requests per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    async def test_aimd(self) -> None:
+        """Test the concurrency is adapted by the outcomes."""
+        limiter = RateLimiter(max_concurrency=8, target_latency=1.0)
+        limiter.release(throttled=True)
+        self.assertEqual(limiter.concurrency, 4)
+        limiter.release(latency=2.0)
+        self.assertEqual(limiter.concurrency, 3)
+        # About one more per `concurrency` successful requests
+        for _ in range(4):
+            limiter.release(latency=0.5)
+        self.assertEqual(limiter.concurrency, 4)
+        for _ in range(40):
+            limiter.release(latency=0.5)
+        self.assertEqual(limiter.concurrency, 8)
+
+        with self.assertRaises(ValueError):
+            RateLimiter(min_concurrency=4, max_concurrency=2)
+
+    async def test_shared_by_models(self) -> None:
+        """Test the model instances with the same API key share the rate
+        limiter, and the throttling decreases the concurrency."""
+        models = [SlowModel("key") for _ in range(3)]
+        limiters = [
+            model.use_shared_rate_limiter(max_concurrency=2)
+            for model in models
+        ]
+        self.assertIs(limiters[0], limiters[1])
+        self.assertIs(limiters[0], limiters[2])
+        self.assertIsNot(
+            SlowModel("another_key").use_shared_rate_limiter(),
+            limiters[0],
+        )
+
+        SlowModel.max_running = 0
+        await asyncio.gather(
+            *[
+                model([{"role": "user", "content": "hi"}])
+                for model in models * 3
+            ],
+        )
+        self.assertEqual(SlowModel.max_running, 2)
+        self.assertEqual(limiters[0].in_flight, 0)
+
+        throttled_model = SlowModel("key", throttle=True)
+        throttled_model.set_rate_limiter(limiters[0])
+        with self.assertRaises(RateLimitError):
+            await throttled_model([{"role": "user", "content": "hi"}])
+        self.assertEqual(limiters[0].concurrency, 1)
+
+    async def test_unconsumed_stream(self) -> None:
+        """Test the request is released when the stream is closed or
+        dropped without being iterated."""
+        model = StreamModel()
+        limiter = RateLimiter()
+        model.set_rate_limiter(limiter)
+
+        stream = await model([{"role": "user", "content": "hi"}])
+        self.assertEqual(limiter.in_flight, 1)
+        await stream.aclose()
+        self.assertEqual(limiter.in_flight, 0)
+
+        stream = await model([{"role": "user", "content": "hi"}])
+        self.assertEqual(limiter.in_flight, 1)
+        del stream
+        gc.collect()
+        # The dropped generator is closed by the event loop
+        await asyncio.sleep(0.01)
+        self.assertEqual(limiter.in_flight, 0)
+
+        # The chunks are not changed
+        stream = await model([{"role": "user", "content": "hi"}])
+        self.assertListEqual(
+            [_.content[0]["text"] async for _ in stream],
+            ["o", "ok"],
+        )
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_throttling_error(self) -> None:
+        """Test the throttling errors are recognized by the status codes and
+        the error types rather than the messages."""
+
+        class TooManyRequests(Exception):
+            """The fake throttling error type of an SDK."""
+
+        class Response:
+            """The fake response with a status code."""
+
+            status_code = 429
+
+        self.assertTrue(_is_throttling_error(RateLimitError("Slow down")))
+        self.assertTrue(_is_throttling_error(TooManyRequests()))
+        self.assertTrue(_is_throttling_error(RuntimeError(Response())))
+        self.assertFalse(
+            _is_throttling_error(ValueError("Too many tool calls in 429.py")),
+        )
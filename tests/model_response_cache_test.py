@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the response cache of the chat models."""
+import tempfile
+from typing import Any, AsyncGenerator
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from pydantic import BaseModel
+
+from agentscope.message import TextBlock, ToolUseBlock
+from agentscope.model import (
+    ChatModelBase,
+    ChatResponse,
+    ChatResponseSnapshot,
+    FileResponseCache,
+    InMemoryResponseCache,
+)
+from agentscope.model._model_usage import ChatUsage
+
+
+class Answer(BaseModel):
+    """The structured output."""
+
+    answer: str
+
+
+class CountingModel(ChatModelBase):
+    """The model that counts the calls and echoes the last message."""
+
+    def __init__(self, stream: bool, stream_delta: bool = False) -> None:
+        """Initialize the test model."""
+        super().__init__("test_model", stream, stream_delta)
+        self.generate_kwargs = {"temperature": 0.5}
+        self.n_calls = 0
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        structured_model: type[BaseModel] | None = None,
+        **kwargs: Any,
+    ) -> ChatResponse | AsyncGenerator[ChatResponse, None]:
+        """Echo the last message."""
+        self.n_calls += 1
+        text = f"{messages[-1]['content']}#{self.n_calls}"
+        usage = ChatUsage(input_tokens=1, output_tokens=len(text), time=0.1)
+        if not self.stream:
+            return ChatResponse(content=[TextBlock(type="text", text=text)])
+
+        async def _generator() -> AsyncGenerator[ChatResponse, None]:
+            snapshot = ChatResponseSnapshot(delta=self.stream_delta)
+            for char in text:
+                snapshot.add_text(char)
+                yield snapshot.to_chat_response(None)
+            snapshot.add_tool_call(0, "call_1", "search")["input"].feed(
+                '{"query": "x"}',
+            )
+            snapshot.close()
+            yield snapshot.to_chat_response(usage)
+
+        return _generator()
+
+
+class ResponseCacheTest(IsolatedAsyncioTestCase):
+    """The unittests for the response cache."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        self.messages = [{"role": "user", "content": "hi"}]
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    async def asyncTearDown(self) -> None:
+        """Remove the cache files."""
+        self.tmp_dir.cleanup()
+
+    async def test_non_streaming(self) -> None:
+        """Test the non-streaming responses are cached by the requests."""
+        model = CountingModel(stream=False)
+        model.set_response_cache(InMemoryResponseCache())
+
+        res = await model(self.messages)
+        self.assertEqual(res.content[0]["text"], "hi#1")
+        cached = await model(self.messages)
+        self.assertEqual(cached, res)
+        self.assertIsNot(cached.content, res.content)
+        self.assertEqual(model.n_calls, 1)
+
+        # Different tools, structured model or generation arguments
+        await model(self.messages, tools=[{"name": "search"}])
+        await model(self.messages, structured_model=Answer)
+        await model(self.messages, temperature=0)
+        model.generate_kwargs["temperature"] = 0
+        await model(self.messages)
+        self.assertEqual(model.n_calls, 5)
+
+        # The record mode always calls the model and overwrites the cache
+        model.set_response_cache(model.response_cache, "record")
+        res = await model(self.messages)
+        self.assertEqual(res.content[0]["text"], "hi#6")
+        model.set_response_cache(model.response_cache, "replay")
+        res = await model(self.messages)
+        self.assertEqual(res.content[0]["text"], "hi#6")
+        self.assertEqual(model.n_calls, 6)
+
+        with self.assertRaises(RuntimeError):
+            await model([{"role": "user", "content": "bye"}])
+        with self.assertRaises(ValueError):
+            model.set_response_cache(InMemoryResponseCache(), "offline")
+
+    async def test_streaming(self) -> None:
+        """Test the streaming responses are replayed as chunk sequences from
+        the file cache."""
+        for stream_delta in [False, True]:
+            model = CountingModel(stream=True, stream_delta=stream_delta)
+            model.set_response_cache(FileResponseCache(self.tmp_dir.name))
+            recorded = [_ async for _ in await model(self.messages)]
+
+            # Replay in another model instance without calling the model
+            model = CountingModel(stream=True, stream_delta=stream_delta)
+            model.set_response_cache(
+                FileResponseCache(self.tmp_dir.name),
+                "replay",
+            )
+            replayed = [_ async for _ in await model(self.messages)]
+            self.assertEqual(model.n_calls, 0)
+
+            self.assertListEqual(
+                [_.content for _ in replayed],
+                [_.content for _ in recorded],
+            )
+            self.assertEqual(replayed[-1].usage, recorded[-1].usage)
+            self.assertListEqual(
+                replayed[-1].materialize().content,
+                [
+                    TextBlock(type="text", text="hi#1"),
+                    ToolUseBlock(
+                        type="tool_use",
+                        id="call_1",
+                        name="search",
+                        input={"query": "x"},
+                    ),
+                ],
+            )
+            await model.response_cache.clear()
+
+    async def test_interrupted_stream(self) -> None:
+        """Test the interrupted streams are not cached."""
+        model = CountingModel(stream=True)
+        model.set_response_cache(InMemoryResponseCache())
+        generator = await model(self.messages)
+        async for _ in generator:
+            break
+        await generator.aclose()
+
+        responses = [_ async for _ in await model(self.messages)]
+        self.assertEqual(responses[-1].content[0]["text"], "hi#2")
+        self.assertEqual(model.n_calls, 2)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the ReAct agent with the delta streaming mode."""
+import io
+from contextlib import redirect_stdout
+from typing import Any, AsyncGenerator
+from unittest import IsolatedAsyncioTestCase
+
+from agentscope.agent import ReActAgent
+from agentscope.formatter import DashScopeChatFormatter
+from agentscope.memory import InMemoryMemory
+from agentscope.model import (
+    ChatModelBase,
+    ChatResponse,
+    ChatResponseSnapshot,
+)
+from agentscope.tool import Toolkit
+
+THINKING_DELTAS = ["The user ", "says hi."]
+TEXT_DELTAS = ["Hello", ", how can ", "I help you?"]
+
+
+class StreamModel(ChatModelBase):
+    """The streaming model that yields the thinking and text deltas."""
+
+    def __init__(self, stream_delta: bool) -> None:
+        """Initialize the test model."""
+        super().__init__("test_model", True, stream_delta)
+
+    async def __call__(
+        self,
+        _messages: list[dict],
+        **kwargs: Any,
+    ) -> AsyncGenerator[ChatResponse, None]:
+        """Mock model call."""
+
+        async def _generator() -> AsyncGenerator[ChatResponse, None]:
+            snapshot = ChatResponseSnapshot(delta=self.stream_delta)
+            for thinking in THINKING_DELTAS:
+                snapshot.add_thinking(thinking)
+                yield snapshot.to_chat_response(None)
+            for text in TEXT_DELTAS:
+                snapshot.add_text(text)
+                yield snapshot.to_chat_response(None)
+
+        return _generator()
+
+
+class ReActAgentStreamDeltaTest(IsolatedAsyncioTestCase):
+    """The unittests for the delta streaming mode."""
+
+    async def _run(self, stream_delta: bool) -> tuple[ReActAgent, str, list]:
+        """Run the agent, and return the agent, the printed text and the
+        recorded arguments of the print function."""
+        agent = ReActAgent(
+            name="Friday",
+            sys_prompt="You are a helpful assistant named Friday.",
+            model=StreamModel(stream_delta),
+            formatter=DashScopeChatFormatter(),
+            memory=InMemoryMemory(),
+            toolkit=Toolkit(),
+        )
+
+        print_kwargs = []
+
+        def _record(_self: ReActAgent, kwargs: dict) -> None:
+            print_kwargs.append(kwargs)
+
+        agent.register_instance_hook("pre_print", "record", _record)
+
+        with redirect_stdout(io.StringIO()) as stdout:
+            await agent()
+        return agent, stdout.getvalue(), print_kwargs
+
+    async def test_delta_printing(self) -> None:
+        """Test the agent prints the same text in delta mode, where the
+        print hooks receive the deltas."""
+        full_agent, full_printed, _ = await self._run(False)
+        delta_agent, delta_printed, print_kwargs = await self._run(True)
+
+        self.assertEqual(delta_printed, full_printed)
+        self.assertIn("Friday(thinking): The user says hi.", delta_printed)
+        self.assertIn("Friday: Hello, how can I help you?", delta_printed)
+
+        # The hooks receive the deltas, and the full message at the end
+        delta_kwargs = [_ for _ in print_kwargs if _["delta"]]
+        self.assertListEqual(
+            [
+                block.get("text", block.get("thinking"))
+                for kwargs in delta_kwargs
+                for block in kwargs["msg"].content
+            ],
+            THINKING_DELTAS + TEXT_DELTAS,
+        )
+        self.assertFalse(any(_["last"] for _ in delta_kwargs))
+        self.assertEqual(
+            len({_["msg"].id for _ in print_kwargs[: len(delta_kwargs) + 1]}),
+            1,
+        )
+
+        # The same message is recorded in the memory
+        for agent in [full_agent, delta_agent]:
+            msgs = await agent.memory.get_memory()
+            self.assertEqual(
+                msgs[0].content[0]["input"]["response"],
+                "".join(TEXT_DELTAS),
+            )
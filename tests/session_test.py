@@ -1,15 +1,26 @@
 # -*- coding: utf-8 -*-
 """Session module tests."""
+import asyncio
+import json
 import os
+import shutil
+import sqlite3
 from typing import Union
 from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
 
 from agentscope.agent import ReActAgent, AgentBase
 from agentscope.formatter import DashScopeChatFormatter
 from agentscope.memory import InMemoryMemory
 from agentscope.message import Msg
 from agentscope.model import DashScopeChatModel
-from agentscope.session import JSONSession
+from agentscope.module import StateModule
+from agentscope.session import (
+    JSONSession,
+    JournaledJSONSession,
+    SQLiteSession,
+)
+from agentscope.session._utils import _atomic_write_text
 from agentscope.tool import Toolkit
 
 
@@ -40,6 +51,16 @@ class MyAgent(AgentBase):
         """Handle interrupt."""
 
 
+class ListModule(StateModule):
+    """Test state module with a registered list."""
+
+    def __init__(self) -> None:
+        """Initialize the test state module."""
+        super().__init__()
+        self.items: list = []
+        self.register_state("items")
+
+
 class SessionTest(IsolatedAsyncioTestCase):
     """Test cases for the session module."""
 
@@ -48,6 +69,9 @@ class SessionTest(IsolatedAsyncioTestCase):
         session_file = "./user_1.json"
         if os.path.exists(session_file):
             os.remove(session_file)
+        shutil.rmtree("./journaled_sessions", ignore_errors=True)
+        if os.path.exists("./session_test.db"):
+            os.remove("./session_test.db")
 
     async def test_session_base(self) -> None:
         """Test the SessionBase class."""
@@ -79,9 +103,207 @@ class SessionTest(IsolatedAsyncioTestCase):
             agent2=agent2,
         )
 
+    async def test_json_session_concurrent_save(self) -> None:
+        """Test the concurrent saves of the JSONSession are coalesced and
+        the latest state is saved."""
+        session = JSONSession(save_dir="./")
+        agent = MyAgent()
+
+        with patch(
+            "agentscope.session._json_session._atomic_write_text",
+            wraps=_atomic_write_text,
+        ) as mock_write:
+            saves = []
+            for i in range(5):
+                agent.sys_prompt = f"Prompt {i}"
+                saves.append(
+                    asyncio.create_task(
+                        session.save_session_state(
+                            session_id="user_1",
+                            agent=agent,
+                        ),
+                    ),
+                )
+            await asyncio.gather(*saves)
+            # All the saves are coalesced into one write
+            self.assertEqual(mock_write.call_count, 1)
+
+        self.assertListEqual(
+            [_ for _ in os.listdir("./") if _.startswith(".user_1.json")],
+            [],
+        )
+
+        new_agent = MyAgent()
+        await session.load_session_state(
+            session_id="user_1",
+            agent=new_agent,
+        )
+        self.assertEqual(new_agent.sys_prompt, "Prompt 4")
+
+    async def test_journaled_json_session(self) -> None:
+        """Test the JournaledJSONSession class."""
+        session = JournaledJSONSession(
+            save_dir="./journaled_sessions",
+            compact_every=3,
+        )
+        agent = MyAgent()
+        for i in range(8):
+            await agent.memory.add(Msg("user", str(i), "user"))
+            agent.sys_prompt = f"Prompt {i}"
+            await session.save_session_state(
+                session_id="user_1",
+                agent=agent,
+            )
+        # pylint: disable-next=protected-access
+        await session._wait_compaction("user_1")
+
+        # Only the changes are appended to the journal, which is rotated at
+        # the 3rd and the 6th entries and keeps the 7th
+        with open(
+            "./journaled_sessions/user_1.journal.jsonl",
+            "r",
+            encoding="utf-8",
+        ) as file:
+            entries = [json.loads(_) for _ in file]
+        self.assertEqual(len(entries), 1)
+        self.assertListEqual(
+            [op[0] for op in entries[0]["ops"]],
+            ["extend", "set"],
+        )
+
+        # Load the session state in a new session object
+        new_agent = MyAgent()
+        await JournaledJSONSession(
+            save_dir="./journaled_sessions",
+        ).load_session_state(
+            session_id="user_1",
+            agent=new_agent,
+        )
+        self.assertEqual(new_agent.sys_prompt, "Prompt 7")
+        self.assertListEqual(
+            [_.content for _ in await new_agent.memory.get_memory()],
+            [str(i) for i in range(8)],
+        )
+
+    async def test_journaled_json_session_torn_entry(self) -> None:
+        """Test the saves after a partially written journal entry are kept."""
+        agent = MyAgent()
+        session = JournaledJSONSession(save_dir="./journaled_sessions")
+        for i in range(3):
+            await agent.memory.add(Msg("user", str(i), "user"))
+            await session.save_session_state(session_id="user_1", agent=agent)
+
+        # A crash in the middle of an append
+        with open(
+            "./journaled_sessions/user_1.journal.jsonl",
+            "a",
+            encoding="utf-8",
+        ) as file:
+            file.write('{"seq": 3, "ops": [["set"')
+
+        agent = MyAgent()
+        session = JournaledJSONSession(save_dir="./journaled_sessions")
+        await session.load_session_state(session_id="user_1", agent=agent)
+        for i in range(10, 13):
+            await agent.memory.add(Msg("user", str(i), "user"))
+            await session.save_session_state(session_id="user_1", agent=agent)
+
+        new_agent = MyAgent()
+        await JournaledJSONSession(
+            save_dir="./journaled_sessions",
+        ).load_session_state(session_id="user_1", agent=new_agent)
+        self.assertListEqual(
+            [_.content for _ in await new_agent.memory.get_memory()],
+            ["0", "1", "2", "10", "11", "12"],
+        )
+
+    async def test_sqlite_session(self) -> None:
+        """Test the SQLiteSession class with the LRU cache."""
+        session = SQLiteSession("./session_test.db")
+        agent = MyAgent()
+        await agent.memory.add(Msg("user", "Hi!", "user"))
+        await session.save_session_state(session_id="user_1", agent=agent)
+        agent.sys_prompt = "Another prompt."
+        await session.save_session_state(session_id="user_2", agent=agent)
+
+        # Hit the cache without reading the database
+        with patch.object(session, "_read_rows") as mock_read:
+            new_agent = MyAgent()
+            await session.load_session_state(
+                session_id="user_1",
+                agent=new_agent,
+            )
+            mock_read.assert_not_called()
+        self.assertEqual(await new_agent.memory.size(), 1)
+
+        # Evict the least recently used state by the byte budget
+        # pylint: disable-next=protected-access
+        session.cache_max_bytes = session._cache["user_1"][1]
+        await session.save_session_state(session_id="user_1", agent=agent)
+        # pylint: disable-next=protected-access
+        self.assertListEqual(list(session._cache), ["user_1"])
+
+        # Load from the database in a new session object
+        new_session = SQLiteSession("./session_test.db")
+        # Beyond the limit of the bound variables of the older SQLite builds
+        # pylint: disable-next=protected-access
+        conn = new_session._get_conn()
+        if hasattr(conn, "setlimit"):
+            conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        await new_session.prefetch(
+            ["user_1", "user_2", *[f"user_{i}" for i in range(3, 1200)]],
+        )
+        # pylint: disable-next=protected-access
+        self.assertListEqual(list(new_session._cache), ["user_1", "user_2"])
+        new_agent = MyAgent()
+        await new_session.load_session_state(
+            session_id="user_2",
+            agent=new_agent,
+        )
+        self.assertEqual(new_agent.sys_prompt, "Another prompt.")
+
+        with self.assertRaises(ValueError):
+            await new_session.load_session_state(
+                session_id="user_3",
+                allow_not_exist=False,
+                agent=new_agent,
+            )
+
+        session.close()
+        new_session.close()
+
+    async def test_sqlite_session_cache_isolation(self) -> None:
+        """Test the cached states are not changed with the state modules."""
+        session = SQLiteSession("./session_test.db")
+        module = ListModule()
+        module.items.append(1)
+        await session.save_session_state(session_id="user_1", module=module)
+
+        # Change the registered list after saving
+        module.items.append(2)
+        new_module = ListModule()
+        await session.load_session_state(
+            session_id="user_1",
+            module=new_module,
+        )
+        self.assertListEqual(new_module.items, [1])
+
+        # Change the loaded list
+        new_module.items.append(3)
+        await session.load_session_state(
+            session_id="user_1",
+            module=new_module,
+        )
+        self.assertListEqual(new_module.items, [1])
+
+        session.close()
+
     async def asyncTearDown(self) -> None:
         """Clean up after the test."""
         # Remove the session file if it exists
         session_file = "./user_1.json"
         if os.path.exists(session_file):
             os.remove(session_file)
+        shutil.rmtree("./journaled_sessions", ignore_errors=True)
+        if os.path.exists("./session_test.db"):
+            os.remove("./session_test.db")
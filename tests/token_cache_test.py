@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the cached token counter."""
+import threading
+from typing import Any
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from agentscope.token import CachedTokenCounterBase, OpenAITokenCounter
+
+
+class CharTokenCounter(CachedTokenCounterBase):
+    """The token counter that counts the characters of the content."""
+
+    tokens_per_prompt: int = 1
+
+    def __init__(
+        self,
+        cache_size: int = 4096,
+        offload_threshold: int | None = None,
+    ) -> None:
+        """Initialize the token counter."""
+        super().__init__(
+            cache_size=cache_size,
+            offload_threshold=offload_threshold,
+        )
+        self.counted: list[str] = []
+        self.threads: set[threading.Thread] = set()
+
+    def _count_message(self, message: dict[str, Any]) -> int:
+        """Count the characters of the message content."""
+        self.counted.append(message["content"])
+        self.threads.add(threading.current_thread())
+        return len(message["content"])
+
+    def _count_tools(self, tools: list[dict]) -> int:
+        """Count the characters of the tool names."""
+        self.counted.append("tools")
+        return sum(len(_["function"]["name"]) for _ in tools)
+
+
+class CharEncoding:
+    """The fake tiktoken encoding that encodes each character as a
+    token."""
+
+    def encode(self, text: str) -> list[str]:
+        """Encode the text into characters."""
+        return list(text)
+
+
+class CachedTokenCounterTest(IsolatedAsyncioTestCase):
+    """The unittests for the cached token counter."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        self.messages = [
+            {"role": "user", "content": "x" * (i + 1)} for i in range(200)
+        ]
+        self.tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "search",
+                    "description": "Search the web.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "query": {"type": "string"},
+                        },
+                    },
+                },
+            },
+        ]
+
+    async def test_incremental_counting(self) -> None:
+        """Test only the new messages are tokenized in a growing
+        conversation."""
+        counter = CharTokenCounter()
+        total = await counter.count(self.messages[:-1], tools=self.tools)
+        self.assertEqual(total, 1 + 199 * 200 // 2 + 6)
+        self.assertEqual(len(counter.counted), 200)
+
+        counter.counted.clear()
+        self.assertEqual(
+            await counter.count(self.messages, tools=self.tools),
+            total + 200,
+        )
+        self.assertListEqual(counter.counted, ["x" * 200])
+
+        counter.counted.clear()
+        # The changed message is counted again
+        messages = [*self.messages[:-1], {"role": "user", "content": "y"}]
+        self.assertEqual(
+            await counter.count(messages, tools=self.tools),
+            total + 1,
+        )
+        self.assertListEqual(counter.counted, ["y"])
+
+    async def test_cache_size(self) -> None:
+        """Test the least recently used counts are evicted."""
+        counter = CharTokenCounter(cache_size=2)
+        await counter.count(self.messages[:3])
+        # pylint: disable-next=protected-access
+        self.assertEqual(len(counter._message_cache), 2)
+
+        counter.counted.clear()
+        await counter.count(self.messages[1:3])
+        self.assertListEqual(counter.counted, [])
+
+        counter.clear_cache()
+        # pylint: disable-next=protected-access
+        self.assertEqual(len(counter._message_cache), 0)
+
+        counter = CharTokenCounter(cache_size=0)
+        await counter.count(self.messages[:3])
+        await counter.count(self.messages[:3])
+        self.assertEqual(len(counter.counted), 6)
+
+    async def test_count_batch(self) -> None:
+        """Test counting many prompts sharing the history at once."""
+        counter = CharTokenCounter(cache_size=0)
+        prompts = [self.messages[:i] for i in [0, 50, 100, 200]]
+        self.assertListEqual(
+            await counter.count_batch(prompts, tools=self.tools),
+            [await CharTokenCounter().count(_, self.tools) for _ in prompts],
+        )
+        self.assertEqual(len(counter.counted), 200 + 1)
+
+    async def test_offload(self) -> None:
+        """Test the big prompts are counted in a worker thread."""
+        counter = CharTokenCounter(offload_threshold=1000)
+        await counter.count(self.messages[:10])
+        self.assertSetEqual(counter.threads, {threading.current_thread()})
+
+        counter.threads.clear()
+        await counter.count(self.messages)
+        self.assertNotIn(threading.current_thread(), counter.threads)
+
+    async def test_openai_token_counter(self) -> None:
+        """Test the OpenAI token counter with the cache."""
+        with patch.object(
+            OpenAITokenCounter,
+            "_get_encoding",
+            return_value=CharEncoding(),
+        ):
+            counter = OpenAITokenCounter("gpt-4o")
+            messages = [
+                {"role": "system", "content": "Be brief.", "name": "system"},
+                {"role": "user", "content": "Hi", "name": "user"},
+            ]
+            self.assertEqual(
+                await counter.count(messages),
+                3 + (3 + 6 + 9 + 6 + 1) + (3 + 4 + 2 + 4 + 1),
+            )
+            self.assertEqual(
+                await counter.count(messages + messages[-1:])
+                - await counter.count(messages),
+                3 + 4 + 2 + 4 + 1,
+            )
+            self.assertEqual(
+                await counter.count(messages, tools=self.tools)
+                - await counter.count(messages),
+                7 + len("search:Search the web") + 3 + 3 + 13 + 12,
+            )
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the local estimation of the remote token counters."""
+import base64
+import io
+import math
+from typing import Any
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from PIL import Image
+
+from agentscope.formatter import AnthropicChatFormatter
+from agentscope.message import Msg
+from agentscope.token import AnthropicTokenCounter, GeminiTokenCounter
+
+
+class FakeCountTokens:
+    """The fake token counting API that counts the characters of the
+    prompt."""
+
+    def __init__(self, fail: bool = False) -> None:
+        """Initialize the fake API."""
+        self.n_calls = 0
+        self.fail = fail
+
+    async def __call__(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> int:
+        """Count the characters of the text blocks."""
+        self.n_calls += 1
+        if self.fail:
+            raise ConnectionError("The network is unreachable.")
+        return sum(
+            len(block["text"])
+            for message in messages
+            for block in message["content"]
+            if block["type"] == "text"
+        )
+
+
+class TokenEstimateTest(IsolatedAsyncioTestCase):
+    """The unittests for the local estimation."""
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        buffer = io.BytesIO()
+        Image.new("RGB", (1000, 750)).save(buffer, format="PNG")
+        self.image_data = base64.b64encode(buffer.getvalue()).decode()
+        self.messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "x" * 700},
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "image/png",
+                            "data": self.image_data,
+                        },
+                    },
+                ],
+            },
+        ]
+
+    async def test_local_mode(self) -> None:
+        """Test the counters estimate the count without the API."""
+        counter = AnthropicTokenCounter("claude-sonnet-4", mode="local")
+        self.assertIsNone(counter.client)
+
+        # text, image (1000 * 750 / 750) and the message overhead
+        n_chars = len("user") + len("text") + 700 + len("image")
+        self.assertEqual(
+            await counter.count(self.messages),
+            math.ceil((n_chars / 3.5 + 1000 + 5) * 1.1),
+        )
+
+        counter = AnthropicTokenCounter(
+            "claude-sonnet-4",
+            mode="local",
+            chars_per_token=2,
+            safety_margin=0,
+        )
+        self.assertEqual(
+            await counter.count(self.messages),
+            math.ceil(n_chars / 2) + 1000 + 5,
+        )
+
+        gemini_messages = [
+            {
+                "role": "user",
+                "parts": [
+                    {"text": "x" * 700},
+                    {
+                        "inline_data": {
+                            "data": self.image_data,
+                            "mime_type": "image/png",
+                        },
+                    },
+                ],
+            },
+        ]
+        counter = GeminiTokenCounter(
+            "gemini-2.5-flash",
+            mode="local",
+            safety_margin=0,
+        )
+        # 1000x750 is cropped into 500x500 tiles, i.e. 2x2 tiles
+        self.assertEqual(
+            await counter.count(gemini_messages),
+            math.ceil((len("user") + 700) / 4 + 258 * 4 + 3),
+        )
+
+        with self.assertRaises(ValueError):
+            GeminiTokenCounter("gemini-2.5-flash", mode="offline")
+
+    async def test_remote_cache(self) -> None:
+        """Test the API results are cached by the prompt hash."""
+        counter = AnthropicTokenCounter("claude-sonnet-4", api_key="xxx")
+        fake_api = FakeCountTokens()
+        with patch.object(counter, "_count_remote", fake_api):
+            self.assertEqual(await counter.count(self.messages), 700)
+            self.assertEqual(await counter.count(self.messages), 700)
+            self.assertEqual(fake_api.n_calls, 1)
+
+            await counter.count(self.messages, tools=[{"name": "search"}])
+            self.assertEqual(fake_api.n_calls, 2)
+
+            counter.clear_cache()
+            await counter.count(self.messages)
+            self.assertEqual(fake_api.n_calls, 3)
+
+    async def test_hybrid_mode(self) -> None:
+        """Test the estimate is verified only when it's close to the
+        budget."""
+        counter = AnthropicTokenCounter(
+            "claude-sonnet-4",
+            api_key="xxx",
+            mode="hybrid",
+        )
+        estimate = counter.estimate(self.messages)
+        fake_api = FakeCountTokens()
+        with patch.object(counter, "_count_remote", fake_api):
+            self.assertEqual(await counter.count(self.messages), estimate)
+            for budget in [estimate // 2, estimate * 2]:
+                self.assertEqual(
+                    await counter.count_for_budget(self.messages, budget),
+                    estimate,
+                )
+            self.assertEqual(fake_api.n_calls, 0)
+
+            self.assertEqual(
+                await counter.count_for_budget(self.messages, estimate),
+                700,
+            )
+            self.assertEqual(fake_api.n_calls, 1)
+
+        # Fall back to the estimate if the API is unreachable
+        counter.clear_cache()
+        with patch.object(counter, "_count_remote", FakeCountTokens(True)):
+            self.assertEqual(
+                await counter.count_for_budget(self.messages, estimate),
+                estimate,
+            )
+
+    async def test_offline_truncation(self) -> None:
+        """Test the formatter truncates the messages with the local
+        estimation."""
+        formatter = AnthropicChatFormatter(
+            token_counter=AnthropicTokenCounter(
+                "claude-sonnet-4",
+                mode="local",
+            ),
+            max_tokens=1000,
+        )
+        msgs = [Msg("system", "You're a helpful assistant.", "system")] + [
+            Msg("user", f"{i}" + "x" * 350, "user") for i in range(20)
+        ]
+        res = await formatter.format(msgs)
+        self.assertLess(len(res), 20)
+        self.assertLessEqual(
+            await formatter.token_counter.count(res),
+            1000,
+        )
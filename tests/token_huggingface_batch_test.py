@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the batched and cached HuggingFace token counter, which
+use a small tokenizer trained locally."""
+import asyncio
+import tempfile
+from unittest.async_case import IsolatedAsyncioTestCase
+
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+from transformers import AutoTokenizer, PreTrainedTokenizerFast
+
+from agentscope.token import HuggingFaceTokenCounter
+
+CHAT_TEMPLATE = (
+    "{% for m in messages %}<|im_start|>{{ m['role'] }}\n"
+    "{{ m['content'] }}<|im_end|>\n{% endfor %}"
+    "{% if tools %}<|im_start|>tools\n{{ tools | tojson }}<|im_end|>\n"
+    "{% endif %}"
+)
+
+
+class HuggingFaceBatchTest(IsolatedAsyncioTestCase):
+    """The unittests for the batched HuggingFace token counter."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Train and save a small BPE tokenizer with a chat template."""
+        tokenizer = Tokenizer(models.BPE(unk_token="<unk>"))
+        tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(
+            add_prefix_space=False,
+        )
+        tokenizer.decoder = decoders.ByteLevel()
+        tokenizer.train_from_iterator(
+            [
+                "What is the capital of France? The capital is Paris.",
+                "What is the capital of Japan? The capital is Tokyo.",
+            ]
+            * 10,
+            trainers.BpeTrainer(
+                vocab_size=300,
+                special_tokens=["<unk>", "<|im_start|>", "<|im_end|>"],
+                initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+            ),
+        )
+        fast_tokenizer = PreTrainedTokenizerFast(
+            tokenizer_object=tokenizer,
+            unk_token="<unk>",
+            additional_special_tokens=["<|im_start|>", "<|im_end|>"],
+        )
+        fast_tokenizer.chat_template = CHAT_TEMPLATE
+
+        # The directory is removed in tearDownClass
+        # pylint: disable-next=consider-using-with
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        fast_tokenizer.save_pretrained(cls.tmp_dir.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Remove the saved tokenizer."""
+        cls.tmp_dir.cleanup()
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        self.messages = [
+            {"role": "user", "content": f"What is the capital of {_}?"}
+            for _ in ["France", "Japan", "China", "Italy"]
+        ]
+        self.tools = [{"name": "search", "description": "Search the web."}]
+        self.tokenizer = AutoTokenizer.from_pretrained(self.tmp_dir.name)
+
+    def _expected_ids(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+    ) -> list[int]:
+        """Tokenize the whole prompt at once."""
+        text = self.tokenizer.apply_chat_template(
+            messages,
+            tokenize=False,
+            tools=tools,
+        )
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    async def test_chunk_cache(self) -> None:
+        """Test the chunked tokenization equals the whole tokenization, and
+        only the new chunks are tokenized."""
+        counter = HuggingFaceTokenCounter(self.tmp_dir.name)
+        for i in range(1, 5):
+            self.assertListEqual(
+                await counter.tokenize(self.messages[:i], self.tools),
+                self._expected_ids(self.messages[:i], self.tools),
+            )
+
+        tokenized = []
+        tokenize = counter._tokenize  # pylint: disable=protected-access
+
+        def _record(texts: list[str]) -> list[list[int]]:
+            tokenized.extend(texts)
+            return tokenize(texts)
+
+        counter._tokenize = _record  # pylint: disable=protected-access
+        messages = [*self.messages, {"role": "assistant", "content": "Rome"}]
+        self.assertEqual(
+            await counter.count(messages, self.tools),
+            len(self._expected_ids(messages, self.tools)),
+        )
+        self.assertListEqual(tokenized, ["<|im_start|>assistant\nRome"])
+        counter.close()
+
+    async def test_batching(self) -> None:
+        """Test the concurrent count calls are merged into one batch."""
+        counter = HuggingFaceTokenCounter(self.tmp_dir.name, cache_size=0)
+        batches = []
+        tokenize = counter._tokenize  # pylint: disable=protected-access
+
+        def _record(texts: list[str]) -> list[list[int]]:
+            batches.append(texts)
+            return tokenize(texts)
+
+        counter._tokenize = _record  # pylint: disable=protected-access
+        prompts = [self.messages[:i] for i in range(1, 5)]
+        results = await asyncio.gather(*[counter.count(_) for _ in prompts])
+        self.assertListEqual(
+            results,
+            [len(self._expected_ids(_)) for _ in prompts],
+        )
+        self.assertEqual(len(batches), 1)
+
+        self.assertListEqual(
+            await counter.count_batch(prompts, self.tools),
+            [len(self._expected_ids(_, self.tools)) for _ in prompts],
+        )
+        self.assertEqual(len(batches), 2)
+        counter.close()
+
+    async def test_process_pool(self) -> None:
+        """Test the tokenization in the process pool."""
+        counter = HuggingFaceTokenCounter(self.tmp_dir.name, pool="process")
+        self.assertEqual(
+            await counter.count(self.messages, self.tools),
+            len(self._expected_ids(self.messages, self.tools)),
+        )
+        counter.close()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""The unittests of the image size resolver used in the token counting."""
+import base64
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.async_case import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from PIL import Image
+
+from agentscope.token import OpenAITokenCounter
+from agentscope.token._image_size import (
+    _ImageSizeResolver,
+    _parse_image_size,
+)
+
+DELAY = 0.5
+
+
+def _make_image(fmt: str, size: tuple[int, int], **kwargs: object) -> bytes:
+    """Make an image with the given format and size."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (255, 0, 0)).save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+class CharEncoding:
+    """The fake tiktoken encoding that encodes each character as a
+    token."""
+
+    def encode(self, text: str) -> list[str]:
+        """Encode the text into characters."""
+        return list(text)
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """The handler that returns a big PNG image after a delay, and records
+    the range headers."""
+
+    image = _make_image("PNG", (1200, 700)) + b"\x00" * 1024 * 1024
+    ranges: list[str | None] = []
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Handle the GET request."""
+        ImageHandler.ranges.append(self.headers.get("Range"))
+        time.sleep(DELAY)
+        body = self.image
+        if self.headers.get("Range"):
+            end = int(self.headers["Range"].split("-")[1])
+            body = body[: end + 1]
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        """Disable the logging."""
+
+
+class ImageSizeTest(IsolatedAsyncioTestCase):
+    """The image size resolver unittests."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the local HTTP server."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the local HTTP server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncSetUp(self) -> None:
+        """Set up the test case."""
+        ImageHandler.ranges = []
+
+    def test_parse_header(self) -> None:
+        """Test parsing the size from the header bytes."""
+        exif = Image.Exif()
+        exif[0x010E] = "x" * 60000
+        images = {
+            "png": _make_image("PNG", (321, 123)),
+            "gif": _make_image("GIF", (321, 123)),
+            "jpeg": _make_image("JPEG", (321, 123)),
+            "jpeg_exif": _make_image("JPEG", (321, 123), exif=exif),
+            "jpeg_progressive": _make_image(
+                "JPEG",
+                (321, 123),
+                progressive=True,
+            ),
+            "webp_lossy": _make_image("WEBP", (321, 123)),
+            "webp_lossless": _make_image("WEBP", (321, 123), lossless=True),
+            "webp_extended": _make_image("WEBP", (321, 123), exif=exif),
+        }
+        for name, data in images.items():
+            self.assertEqual(_parse_image_size(data), (321, 123), name)
+
+        # The header is incomplete or unsupported
+        self.assertIsNone(_parse_image_size(images["png"][:20]))
+        self.assertIsNone(_parse_image_size(images["jpeg_exif"][:1024]))
+        self.assertIsNone(_parse_image_size(_make_image("BMP", (3, 3))))
+
+    async def test_data_url(self) -> None:
+        """Test getting the size of the base64 data URLs."""
+        resolver = _ImageSizeResolver()
+        for fmt in ["PNG", "JPEG", "BMP"]:
+            data = base64.b64encode(_make_image(fmt, (640, 480))).decode()
+            url = f"data:image/{fmt.lower()};base64,{data}"
+            self.assertEqual(resolver.get_size(url), (640, 480))
+            self.assertEqual(await resolver.aget_size(url), (640, 480))
+
+    async def test_web_url(self) -> None:
+        """Test the web images are read by range requests, cached and
+        fetched concurrently."""
+        resolver = _ImageSizeResolver(header_bytes=4096)
+        url = f"{self.base_url}/image.png"
+        self.assertEqual(resolver.get_size(url), (1200, 700))
+        self.assertEqual(resolver.get_size(url), (1200, 700))
+        self.assertListEqual(ImageHandler.ranges, ["bytes=0-4095"])
+
+        urls = [f"{self.base_url}/{i}.png" for i in range(4)]
+        start = time.perf_counter()
+        await resolver.prefetch(urls + urls)
+        self.assertLess(time.perf_counter() - start, DELAY * 2)
+        self.assertEqual(len(ImageHandler.ranges), 5)
+
+        self.assertEqual(resolver.get_size(urls[1]), (1200, 700))
+        self.assertEqual(len(ImageHandler.ranges), 5)
+        await resolver.aclose()
+
+    async def test_openai_token_counter(self) -> None:
+        """Test the OpenAI token counter fetches the image sizes
+        concurrently."""
+        resolver = _ImageSizeResolver()
+        counter = OpenAITokenCounter("gpt-4o")
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": f"{self.base_url}/count_{i}.png"},
+                    }
+                    for i in range(4)
+                ],
+            },
+        ]
+        with patch.object(
+            OpenAITokenCounter,
+            "_get_encoding",
+            return_value=CharEncoding(),
+        ), patch(
+            "agentscope.token._openai_token_counter._get_image_size_resolver",
+            return_value=resolver,
+        ):
+            start = time.perf_counter()
+            n_tokens = await counter.count(messages)
+            self.assertLess(time.perf_counter() - start, DELAY * 2)
+
+        # 1200x700 is scaled to 1316x768, i.e. 3x2 tiles
+        self.assertEqual(n_tokens, 3 + 3 + 4 + 4 * (85 + 6 * 170))
+        self.assertEqual(len(ImageHandler.ranges), 4)
+        await resolver.aclose()
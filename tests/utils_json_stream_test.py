@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""The unittests for the incremental JSON parser."""
+import json
+from unittest import TestCase
+
+from agentscope._utils._json_stream import _IncrementalJSONParser
+
+
+class IncrementalJSONParserTest(TestCase):
+    """The unittests for the incremental JSON parser."""
+
+    def _feed_by(self, text: str, size: int) -> _IncrementalJSONParser:
+        """Feed the text into a new parser in chunks of the given size."""
+        parser = _IncrementalJSONParser()
+        for i in range(0, len(text), size):
+            parser.feed(text[i : i + size])
+            parser.get()
+        return parser
+
+    def test_valid_json(self) -> None:
+        """Test the valid JSON texts split at every position are parsed."""
+        obj = {
+            "path": "a.txt",
+            "content": 'Say "hi"\\n\n\t\u00e9\U0001f600/',
+            "numbers": [0, -1, 2.5, 1e-3, 12345678901234567890],
+            "flags": [True, False, None],
+            "nested": {"empty_dict": {}, "empty_list": [], "list": [[{}]]},
+        }
+        for text in [
+            json.dumps(obj),
+            json.dumps(obj, ensure_ascii=False, indent=2),
+            '"root string"',
+            "  42  ",
+            "[]",
+        ]:
+            for size in [1, 2, 3, 7, len(text)]:
+                parser = self._feed_by(text, size)
+                self.assertEqual(parser.close(), json.loads(text))
+                self.assertEqual(parser.text, text)
+
+    def test_partial_object(self) -> None:
+        """Test the partial object includes the finished and unfinished
+        values."""
+        parser = _IncrementalJSONParser()
+        self.assertIsNone(parser.get())
+
+        parser.feed('{"path": "a.txt", "content": "Hel')
+        self.assertEqual(parser.get(), {"path": "a.txt", "content": "Hel"})
+
+        parser.feed("lo\\u00e")
+        self.assertEqual(parser.get(), {"path": "a.txt", "content": "Hello"})
+
+        parser.feed('9", "lines": [1, 2')
+        partial = parser.get()
+        self.assertEqual(
+            partial,
+            {"path": "a.txt", "content": "Helloé", "lines": [1, 2]},
+        )
+
+        # The partial object is a copy
+        partial["lines"].append(3)
+        parser.feed(", 4, tr")
+        self.assertEqual(parser.get()["lines"], [1, 2, 4])
+
+        parser.feed("ue]}")
+        self.assertEqual(parser.get()["lines"], [1, 2, 4, True])
+
+        # The chunks after closing are ignored
+        final = parser.close()
+        parser.feed(', "extra": 1}')
+        self.assertEqual(parser.get(), final)
+
+    def test_repair_at_close(self) -> None:
+        """Test the invalid or incomplete JSON is repaired in close."""
+        parser = self._feed_by("{'path': 'a.txt', 'overwrite': True}", 4)
+        self.assertEqual(parser.get(), {})
+        self.assertEqual(
+            parser.close(),
+            {"path": "a.txt", "overwrite": True},
+        )
+
+        parser = self._feed_by('{"path": "a.txt", "lines": [1, 2', 5)
+        self.assertEqual(parser.close(), {"path": "a.txt", "lines": [1, 2]})
+
+        self.assertIsNone(_IncrementalJSONParser().close())